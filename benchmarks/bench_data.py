@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the augmentations & the collate function.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import torch
+from PIL import Image
+
+from benchmarks.bench_helper import BenchHelper
+
+
+# The size modes of collate, with the other keys of the data_transformer.
+COLLATE_MODE_DICT = {
+    'fix_size': dict(size_mode='fix_size', align_method='scale_and_pad', pad_mode='random'),
+    'random_size': dict(size_mode='random_size', align_method='only_pad', fit_stride=16, pad_mode='pad_right_down'),
+    'multi_size': dict(size_mode='multi_size', align_method='only_scale'),
+    'max_size': dict(size_mode='max_size', align_method='only_pad', fit_stride=32, pad_mode='pad_right_down'),
+}
+
+
+def _make_sample(rng, configer, args, width, height):
+    """The inputs of the aug transforms for the task of the configer, as numpy arrays."""
+    sample = dict(img=BenchHelper.rand_img(rng, width, height))
+    if configer.get('task') == 'seg':
+        num_classes = configer.get('data', 'num_classes')
+        sample['labelmap'] = rng.randint(0, num_classes, size=(height, width)).astype(np.uint8)
+
+    elif configer.get('task') == 'det':
+        sample['bboxes'], sample['labels'] = BenchHelper.rand_bboxes(rng, args.num_objects, width, height,
+                                                                     configer.get('data', 'num_classes'))
+
+    elif configer.get('task') == 'pose':
+        sample['maskmap'] = np.ones((height, width), dtype=np.uint8)
+        sample['kpts'] = BenchHelper.rand_kpts(rng, args.num_objects, configer.get('data', 'num_kpts'), width, height)
+        sample['bboxes'], _ = BenchHelper.rand_bboxes(rng, args.num_objects, width, height, 1)
+
+    return sample
+
+
+def _to_pil(sample):
+    sample = dict(sample)
+    sample['img'] = Image.fromarray(sample['img'])
+    for key in ('labelmap', 'maskmap'):
+        if key in sample:
+            sample[key] = Image.fromarray(sample[key])
+
+    return sample
+
+
+def _get_aug_compose(image_tool):
+    if image_tool == 'cv2':
+        from datasets.tools.cv2_aug_transforms import CV2AugCompose
+        return CV2AugCompose
+
+    from datasets.tools.pil_aug_transforms import PILAugCompose
+    return PILAugCompose
+
+
+def _bench_transforms(result_list, hypes_file, configer, args):
+    trans_seq = list(configer.get('train_trans', 'trans_seq'))
+    if configer.exists('train_trans', 'shuffle_trans_seq'):
+        shuffle_trans_seq = configer.get('train_trans', 'shuffle_trans_seq')
+        if len(shuffle_trans_seq) > 0 and isinstance(shuffle_trans_seq[0], list):
+            shuffle_trans_seq = sum(shuffle_trans_seq, [])
+
+        trans_seq = list(shuffle_trans_seq) + trans_seq
+
+    width, height = BenchHelper.get_input_size(configer)
+    # The raw images are larger than the input size, as the crops of the pipeline expect.
+    width, height = int(width * args.img_scale), int(height * args.img_scale)
+    rng = np.random.RandomState(args.seed)
+    sample = _make_sample(rng, configer, args, width, height)
+    for image_tool, to_tool in [('cv2', dict), ('pil', _to_pil)]:
+        try:
+            aug_compose_cls = _get_aug_compose(image_tool)
+        except ImportError as e:
+            result_list.append(dict(suite='data', name='{}_compose'.format(image_tool), config=hypes_file,
+                                    status='skipped', reason='{}: {}'.format(type(e).__name__, e)))
+            continue
+
+        tool_sample = to_tool(sample)
+        for trans in trans_seq:
+            def build(trans=trans, aug_compose_cls=aug_compose_cls, tool_sample=tool_sample):
+                # The ratio of the single transform is 1.0, so that its cost is always measured.
+                param_dict = dict(configer.get('train_trans', trans))
+                if 'ratio' in param_dict:
+                    param_dict['ratio'] = 1.0
+
+                transform = aug_compose_cls.build_trans(trans, param_dict)
+                return _call_transform, lambda: (transform, BenchHelper.clone(tool_sample))
+
+            BenchHelper.run_case(result_list, 'data', '{}_{}'.format(image_tool, trans), hypes_file, build, args)
+
+        # The train compose of the loaders, with the ratios of the hypes.
+        def build_compose(aug_compose_cls=aug_compose_cls, tool_sample=tool_sample):
+            aug_compose = aug_compose_cls(configer, split='train')
+            return _call_compose, lambda: (aug_compose, BenchHelper.clone(tool_sample))
+
+        BenchHelper.run_case(result_list, 'data', '{}_compose'.format(image_tool), hypes_file, build_compose, args)
+
+
+def _call_transform(transform, sample):
+    return transform(sample['img'], sample.get('labelmap'), sample.get('maskmap'), sample.get('kpts'),
+                     sample.get('bboxes'), sample.get('labels'), None)
+
+
+def _call_compose(aug_compose, sample):
+    return aug_compose(sample['img'], labelmap=sample.get('labelmap'), maskmap=sample.get('maskmap'),
+                       kpts=sample.get('kpts'), bboxes=sample.get('bboxes'), labels=sample.get('labels'))
+
+
+def _bench_collate(result_list, hypes_file, configer, args):
+    width, height = BenchHelper.get_input_size(configer)
+    rng = np.random.RandomState(args.seed)
+
+    def make_batch():
+        from extensions.parallel.data_container import DataContainer
+        batch = list()
+        for i in range(args.batch_size):
+            # Jitter the sizes, so that every size mode has to resize or pad. The random_size target is the first
+            # image, the others are not larger than it.
+            img_w = width if i == 0 else int(width * rng.uniform(0.75, 1.0))
+            img_h = height if i == 0 else int(height * rng.uniform(0.75, 1.0))
+            sample = dict(img=DataContainer(torch.rand(3, img_h, img_w), stack=True))
+            if configer.get('task') == 'seg':
+                labelmap = torch.randint(0, configer.get('data', 'num_classes'), (img_h, img_w))
+                sample['labelmap'] = DataContainer(labelmap, stack=True)
+
+            elif configer.get('task') == 'det':
+                bboxes, labels = BenchHelper.rand_bboxes(rng, args.num_objects, img_w, img_h,
+                                                         configer.get('data', 'num_classes'))
+                sample['bboxes'] = DataContainer(torch.from_numpy(bboxes), stack=False)
+                sample['labels'] = DataContainer(torch.from_numpy(labels), stack=False)
+
+            elif configer.get('task') == 'pose':
+                kpts = BenchHelper.rand_kpts(rng, args.num_objects, configer.get('data', 'num_kpts'), img_w, img_h)
+                sample['kpts'] = DataContainer(torch.from_numpy(kpts), stack=False)
+
+            batch.append(sample)
+
+        return batch
+
+    for size_mode, trans_dict in COLLATE_MODE_DICT.items():
+        trans_dict = dict(trans_dict, input_size=[width, height], ms_input_size=[[width, height]])
+
+        def build(trans_dict=trans_dict):
+            from datasets.tools.collate import collate
+            return collate, lambda: (make_batch(), trans_dict)
+
+        BenchHelper.run_case(result_list, 'data', 'collate_{}'.format(size_mode), hypes_file, build, args,
+                             items=args.batch_size)
+
+
+def _bench_config(result_list, hypes_file, configer, args):
+    # The reads of one sample in the loader & the aug compose, repeated for num_samples.
+    key_list = [('data', 'image_tool'), ('data', 'input_mode'), ('data', 'image_tool'),
+                ('train_trans', 'trans_seq'), ('data', 'input_mode')]
+    num_samples = 1000
+
+    def read_configer():
+        for _ in range(num_samples):
+            for key in key_list:
+                configer.get(*key)
+
+    def read_view(config):
+        for _ in range(num_samples):
+            for section, key in key_list:
+                getattr(getattr(config, section), key)
+
+    BenchHelper.run_case(result_list, 'data', 'config_get', hypes_file,
+                         lambda: (read_configer, None), args, items=num_samples)
+    BenchHelper.run_case(result_list, 'data', 'config_view', hypes_file,
+                         lambda: (read_view, lambda: (configer.freeze(),)), args, items=num_samples)
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file)
+        _bench_transforms(result_list, hypes_file, configer, args)
+        _bench_collate(result_list, hypes_file, configer, args)
+        _bench_config(result_list, hypes_file, configer, args)
+
+    return result_list
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the det decoders & the nms.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+from benchmarks.bench_targets import get_feat_list
+
+
+def _rand_dets(rng, num_dets, input_size, num_classes):
+    bboxes, labels = BenchHelper.rand_bboxes(rng, num_dets, input_size[0], input_size[1], num_classes)
+    scores = rng.uniform(size=(num_dets, 1)).astype(np.float32)
+    return torch.from_numpy(np.concatenate([bboxes, scores, labels[:, None].astype(np.float32)], 1))
+
+
+def _bench_decode(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    method = configer.get('method')
+    num_classes = configer.get('data', 'num_classes')
+    input_size = BenchHelper.get_input_size(configer, default=(800, 600))
+    configer.update(['phase'], 'test')
+    if method == 'single_shot_detector':
+        def build():
+            from methods.det.single_shot_detector_test import SingleShotDetectorTest
+            from utils.layers.det.ssd_priorbox_layer import SSDPriorBoxLayer
+            default_boxes = SSDPriorBoxLayer(configer)(get_feat_list(configer, input_size), input_size)
+            num_priors = default_boxes.size(0)
+            bbox = torch.randn(args.batch_size, num_priors, 4) * 0.1
+            conf = torch.randn(args.batch_size, num_priors, num_classes)
+            return SingleShotDetectorTest.decode, lambda: (bbox, conf, default_boxes, configer, input_size)
+
+        BenchHelper.run_case(result_list, 'decode', 'ssd_decode', hypes_file, build, args, items=args.batch_size)
+
+    elif method == 'yolov3':
+        def build():
+            from methods.det.yolov3_test import YOLOv3Test
+            num_preds = sum([len(anchors) * (input_size[0] // stride) * (input_size[1] // stride)
+                             for anchors, stride in zip(configer.get('gt', 'anchors_list'),
+                                                        configer.get('network', 'stride_list'))])
+            preds = torch.rand(args.batch_size, num_preds, 5 + num_classes)
+            preds[:, :, 2:4] *= 0.3
+            # The decoder writes the boxes in place.
+            return YOLOv3Test.decode, lambda: (preds.clone(), configer, input_size)
+
+        BenchHelper.run_case(result_list, 'decode', 'yolo_decode', hypes_file, build, args, items=args.batch_size)
+
+    elif method == 'faster_rcnn':
+        def build():
+            from methods.det.faster_rcnn_test import FastRCNNTest
+            n_rois = configer.get('rpn', 'n_test_post_nms')
+            rois_list = list()
+            for i in range(args.batch_size):
+                rois, _ = BenchHelper.rand_bboxes(rng, n_rois, input_size[0], input_size[1], 1)
+                rois_list.append(torch.cat([torch.full((n_rois, 1), float(i)), torch.from_numpy(rois)], 1))
+
+            indices_and_rois = torch.cat(rois_list, 0)
+            roi_locs = torch.randn(indices_and_rois.size(0), num_classes * 4) * 0.1
+            roi_scores = torch.randn(indices_and_rois.size(0), num_classes)
+            test_rois_num = torch.LongTensor([n_rois] * args.batch_size)
+            metas = [dict(border_size=input_size) for _ in range(args.batch_size)]
+            return FastRCNNTest.decode, lambda: (roi_locs, roi_scores, indices_and_rois,
+                                                 test_rois_num, configer, metas)
+
+        BenchHelper.run_case(result_list, 'decode', 'fr_decode', hypes_file, build, args, items=args.batch_size)
+
+    def build_nms():
+        from utils.helpers.det_helper import DetHelper
+        dets = _rand_dets(rng, args.num_dets, input_size, num_classes)
+        max_threshold = configer.get('nms', 'max_threshold')
+        return DetHelper.cls_nms, lambda: (dets, dets[:, 5], max_threshold)
+
+    BenchHelper.run_case(result_list, 'decode', 'cls_nms', hypes_file, build_nms, args)
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file)
+        if configer.get('task') == 'det':
+            _bench_decode(result_list, hypes_file, configer, args)
+
+    return result_list
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Timing & synthetic data helpers of the benchmarks.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import copy
+import time
+import traceback
+
+import numpy as np
+import torch
+
+from utils.helpers.tensor_helper import TensorHelper
+from utils.tools.configer import Configer
+
+
+class BenchHelper(object):
+
+    @staticmethod
+    def load_configer(hypes_file, phase='train'):
+        configer = Configer(hypes_file=hypes_file)
+        configer.add(['phase'], phase)
+        configer.add(['gpu'], None)
+        return configer
+
+    @staticmethod
+    def get_input_size(configer, default=(640, 480)):
+        """The [width, height] of the synthetic images, from the train data_transformer of the hypes."""
+        trans_dict = configer.get('train', 'data_transformer')
+        if 'input_size' in trans_dict:
+            return list(trans_dict['input_size'])
+
+        if 'ms_input_size' in trans_dict:
+            return list(trans_dict['ms_input_size'][0])
+
+        if configer.exists('test', 'input_size'):
+            return list(configer.get('test', 'input_size'))
+
+        return list(default)
+
+    @staticmethod
+    def rand_img(rng, width, height):
+        return rng.randint(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    @staticmethod
+    def rand_bboxes(rng, num_objects, width, height, num_classes):
+        xy = rng.uniform(0, 0.7, size=(num_objects, 2)) * [width, height]
+        wh = rng.uniform(0.05, 0.3, size=(num_objects, 2)) * [width, height]
+        bboxes = np.concatenate([xy, np.minimum(xy + wh, [width - 1, height - 1])], 1).astype(np.float32)
+        labels = rng.randint(1 if num_classes > 1 else 0, num_classes, size=(num_objects,))
+        return bboxes, labels
+
+    @staticmethod
+    def rand_kpts(rng, num_objects, num_kpts, width, height, vis_ratio=0.8):
+        kpts = np.zeros((num_objects, num_kpts, 3), dtype=np.float32)
+        kpts[:, :, 0] = rng.uniform(0, width - 1, size=(num_objects, num_kpts))
+        kpts[:, :, 1] = rng.uniform(0, height - 1, size=(num_objects, num_kpts))
+        kpts[:, :, 2] = np.where(rng.uniform(size=(num_objects, num_kpts)) < vis_ratio, 1, -1)
+        return kpts
+
+    @staticmethod
+    def timeit(func, setup=None, warmup=3, iters=20, items=1):
+        """Time func(*setup()) over iters runs, the setup is not timed.
+
+        Returns:
+          dict of mean_ms, std_ms, min_ms, p50_ms and items_per_sec.
+        """
+        for _ in range(warmup):
+            func(*(setup() if setup is not None else ()))
+
+        time_list = list()
+        for _ in range(iters):
+            args = setup() if setup is not None else ()
+            start_time = time.perf_counter()
+            func(*args)
+            time_list.append(time.perf_counter() - start_time)
+
+        time_list = np.array(time_list) * 1000.0
+        return dict(iters=iters, mean_ms=float(time_list.mean()), std_ms=float(time_list.std()),
+                    min_ms=float(time_list.min()), p50_ms=float(np.percentile(time_list, 50)),
+                    items_per_sec=float(items * 1000.0 / max(time_list.mean(), 1e-9)))
+
+    @staticmethod
+    def run_case(result_list, suite, name, config, build, args, items=1):
+        """Build the (func, setup) of one case & time it, a case that fails to build or run is skipped."""
+        record = dict(suite=suite, name=name, config=config)
+        try:
+            func, setup = build()
+            record.update(BenchHelper.timeit(func, setup=setup, warmup=args.warmup, iters=args.iters, items=items))
+            record['status'] = 'ok'
+        except (Exception, SystemExit) as e:
+            # The repo code exits on the invalid configs, skip the case instead of the whole run.
+            record['status'] = 'skipped'
+            record['reason'] = '{}: {}'.format(type(e).__name__, e)
+            if args.verbose:
+                traceback.print_exc()
+
+        result_list.append(record)
+        return record
+
+    @staticmethod
+    def check_case(record, out, ref_out, atol=1e-5, rtol=1e-4):
+        """Record the max abs diff against the reference, a case differing beyond the tolerance is failed."""
+        if record['status'] != 'ok':
+            return
+
+        diff, max_value = TensorHelper.max_abs_diff(out, ref_out)
+        record['max_abs_diff'] = diff
+        if not diff <= atol + rtol * max_value:
+            record['status'] = 'failed'
+            if np.isnan(diff):
+                record['reason'] = 'NaN in the outputs'
+            elif np.isinf(diff):
+                record['reason'] = 'inf differs from the reference'
+            else:
+                record['reason'] = 'differs from the reference by {}'.format(diff)
+
+    @staticmethod
+    def clone(obj):
+        if isinstance(obj, torch.Tensor):
+            return obj.clone()
+
+        return copy.deepcopy(obj)
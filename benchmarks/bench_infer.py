@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the test models, eager against the BN folding, channels_last & TorchScript freezing.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+
+
+# The optimizations of every case, each on top of the ones before it.
+CASE_LIST = [
+    ('infer_eager', []),
+    ('infer_fuse_bn', ['fuse_bn']),
+    ('infer_channels_last', ['fuse_bn', 'channels_last']),
+    ('infer_jit_freeze', ['fuse_bn', 'channels_last', 'jit_freeze']),
+]
+
+
+def _load_test_configer(hypes_file):
+    from main import get_args_parser
+    from utils.tools.configer import Configer
+    configer = Configer(args_parser=get_args_parser().parse_args(
+        ['--hypes', hypes_file, '--phase', 'test', '--gpu', '--bn_type', 'torchbn', '--stdout_level', 'error']))
+    configer.update(['gpu'], None)
+    configer.add(['project_dir'], os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    # No pretrained weights on the bench machine, the latency doesn't depend on them.
+    if configer.exists('network', 'pretrained'):
+        configer.update(['network', 'pretrained'], None)
+
+    return configer
+
+
+def _build_net(configer):
+    task = configer.get('task')
+    if task == 'seg':
+        from models.seg_model_manager import SegModelManager
+        return SegModelManager(configer).semantic_segmentor()
+
+    elif task == 'det':
+        from models.det_model_manager import DetModelManager
+        return DetModelManager(configer).object_detector()
+
+    elif task == 'pose':
+        from models.pose_model_manager import PoseModelManager
+        return PoseModelManager(configer).multi_pose_detector()
+
+    from models.cls_model_manager import ClsModelManager
+    return ClsModelManager(configer).image_classifier()
+
+
+def _forward(net, inputs):
+    with torch.no_grad():
+        return net(*inputs)
+
+
+def _flat_outputs(outputs):
+    from methods.tools.model_optimizer import _flatten_tensors
+    return torch.cat([item.detach().double().reshape(-1) for item in _flatten_tensors(outputs, list())])
+
+
+def run(hypes_list, args):
+    from methods.tools.model_optimizer import ModelOptimizer
+    result_list = list()
+    for hypes_file in hypes_list:
+        try:
+            configer = _load_test_configer(hypes_file)
+            net = _build_net(configer).eval()
+        except (Exception, SystemExit) as e:
+            result_list.append(dict(suite='infer', name=CASE_LIST[0][0], config=hypes_file,
+                                    status='skipped', reason='{}: {}'.format(type(e).__name__, e)))
+            continue
+
+        # The single image inputs of the test runners.
+        inputs = ModelOptimizer.get_example_inputs(configer, torch.device('cpu'))
+        ref_out = _flat_outputs(_forward(net, inputs))
+        for name, keys in CASE_LIST:
+            # The optimized net is built inside the case, so that a failed optimization only skips the case.
+            net_dict = dict()
+
+            def build():
+                net_dict['net'] = ModelOptimizer.build(net, keys, inputs)[0] if len(keys) > 0 else net
+                return lambda: _forward(net_dict['net'], inputs), None
+
+            record = BenchHelper.run_case(result_list, 'infer', name, hypes_file, build, args)
+            if record['status'] == 'ok' and len(keys) > 0:
+                BenchHelper.check_case(record, _flat_outputs(_forward(net_dict['net'], inputs)), ref_out,
+                                       atol=1e-4, rtol=1e-3)
+
+    return result_list
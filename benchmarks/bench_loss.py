@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the losses, checked against their reference implementations.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from benchmarks.bench_helper import BenchHelper
+
+
+def _forward_backward(loss_func, inputs, *targets):
+    loss = loss_func(inputs, *targets)
+    loss.backward()
+    return loss
+
+
+def sort_ohem_ce_loss(predict, target, thresh, min_kept, ignore_label, weight=None):
+    """The reference OHEM ce, sorting the probs of all the valid pixels."""
+    predict = predict.float()
+    prob_out = F.softmax(predict, dim=1)
+    tmp_target = target.clone()
+    tmp_target[tmp_target == ignore_label] = 0
+    prob = prob_out.gather(1, tmp_target.unsqueeze(1))
+    mask = target.contiguous().view(-1, ) != ignore_label
+    sort_prob, sort_indices = prob.contiguous().view(-1, )[mask].contiguous().sort()
+    min_threshold = sort_prob[min(min_kept, sort_prob.numel() - 1)]
+    threshold = max(min_threshold, thresh)
+    loss_matrix = F.cross_entropy(predict, target, weight=weight, ignore_index=ignore_label,
+                                  reduction='none').contiguous().view(-1, )
+    sort_loss_matrix = loss_matrix[mask][sort_indices]
+    return sort_loss_matrix[sort_prob < threshold].mean()
+
+
+def _bench_ohem(result_list, hypes_file, configer, args):
+    params = dict(configer.get('loss', 'params')) if configer.exists('loss', 'params') else dict()
+    params.setdefault('ohem_thresh', 0.7)
+    params.setdefault('ohem_minkeep', 100000)
+    params.setdefault('ce_ignore_index', -1)
+    if not torch.cuda.is_available():
+        # The ce weight of the loss is built on cuda.
+        params.pop('ce_weight', None)
+
+    configer.update(['loss', 'params'], params)
+    width, height = BenchHelper.get_input_size(configer)
+    num_classes = configer.get('data', 'num_classes')
+    rng = np.random.RandomState(args.seed)
+    predict = torch.from_numpy(rng.randn(args.batch_size, num_classes, height, width).astype(np.float32))
+    target = torch.from_numpy(rng.randint(-1, num_classes, size=(args.batch_size, height, width))).long()
+
+    def ref_loss(inputs, targets):
+        return sort_ohem_ce_loss(inputs, targets, params['ohem_thresh'], params['ohem_minkeep'],
+                                 params['ce_ignore_index'])
+
+    def setup():
+        return predict.clone().requires_grad_(), target
+
+    def build():
+        from loss.modules.seg_modules import FSOhemCELoss
+        ohem_ce_loss = FSOhemCELoss(configer)
+        return lambda inputs, targets: _forward_backward(ohem_ce_loss, inputs, targets), setup
+
+    BenchHelper.run_case(result_list, 'loss', 'ohem_ce_sort', hypes_file,
+                         lambda: (lambda inputs, targets: _forward_backward(ref_loss, inputs, targets), setup),
+                         args, items=args.batch_size)
+    record = BenchHelper.run_case(result_list, 'loss', 'ohem_ce', hypes_file, build, args, items=args.batch_size)
+    if record['status'] == 'ok':
+        func, _ = build()
+        inputs, ref_inputs = setup()[0], setup()[0]
+        out = func(inputs, target)
+        ref_out = _forward_backward(ref_loss, ref_inputs, target)
+        BenchHelper.check_case(record, torch.cat([out.view(1), inputs.grad.view(-1)]),
+                               torch.cat([ref_out.view(1), ref_inputs.grad.view(-1)]))
+
+
+def _bench_embed(result_list, hypes_file, configer, args):
+    width, height = BenchHelper.get_input_size(configer)
+    num_classes = configer.get('data', 'num_classes')
+    rng = np.random.RandomState(args.seed)
+    # The embeddings at the 1/8 resolution of the seg heads.
+    embed = torch.from_numpy(rng.randn(args.batch_size, 64, height // 8, width // 8).astype(np.float32))
+    target = torch.from_numpy(rng.randint(-1, num_classes, size=(args.batch_size, height // 8, width // 8))).long()
+
+    def build():
+        from loss.modules.seg_modules import FSEmbedLoss
+        embed_loss = FSEmbedLoss(configer)
+        return lambda inputs, targets: _forward_backward(embed_loss, inputs, targets), \
+            lambda: (embed.clone().requires_grad_(), target)
+
+    BenchHelper.run_case(result_list, 'loss', 'embed', hypes_file, build, args, items=args.batch_size)
+
+
+def _bench_ssd(result_list, hypes_file, configer, args):
+    from benchmarks.bench_targets import get_feat_list
+    input_size = BenchHelper.get_input_size(configer)
+    num_classes = configer.get('data', 'num_classes')
+    num_boxes = sum([feat.size(2) * feat.size(3) * num_anchors for feat, num_anchors in
+                     zip(get_feat_list(configer, input_size), configer.get('gt', 'num_anchor_list'))])
+    rng = np.random.RandomState(args.seed)
+    loc = torch.from_numpy(rng.randn(args.batch_size, num_boxes, 4).astype(np.float32))
+    conf = torch.from_numpy(rng.randn(args.batch_size, num_boxes, num_classes).astype(np.float32))
+    loc_targets = torch.from_numpy(rng.randn(args.batch_size, num_boxes, 4).astype(np.float32))
+    # About 4 matched priors per object.
+    conf_targets = torch.from_numpy(np.where(rng.uniform(size=(args.batch_size, num_boxes))
+                                             < 4.0 * args.num_objects / num_boxes,
+                                             rng.randint(1, num_classes, size=(args.batch_size, num_boxes)), 0))
+
+    def build():
+        from loss.modules.det_modules import SSDMultiBoxLoss
+        multibox_loss = SSDMultiBoxLoss(configer)
+        return lambda outputs, *targets: _forward_backward(multibox_loss, outputs, *targets), \
+            lambda: ([None, loc.clone().requires_grad_(), conf.clone().requires_grad_()], loc_targets, conf_targets)
+
+    BenchHelper.run_case(result_list, 'loss', 'ssd_multibox', hypes_file, build, args, items=args.batch_size)
+
+
+def _bench_yolo(result_list, hypes_file, configer, args):
+    from benchmarks.bench_targets import get_det_batch, get_feat_list
+    input_size = BenchHelper.get_input_size(configer)
+    num_classes = configer.get('data', 'num_classes')
+    feat_list = get_feat_list(configer, input_size, batch_size=args.batch_size)
+    num_priors = sum([feat.size(2) * feat.size(3) * len(anchors) for feat, anchors in
+                      zip(feat_list, configer.get('gt', 'anchors_list'))])
+    rng = np.random.RandomState(args.seed)
+    prediction = torch.from_numpy(rng.randn(args.batch_size, num_priors, 5 + num_classes).astype(np.float32))
+    batch_gt_bboxes, batch_gt_labels = get_det_batch(rng, configer, args, input_size)
+
+    def build():
+        from loss.modules.det_modules import YOLOv3Loss
+        from utils.layers.det.yolo_target_generator import YOLOTargetGenerator
+        targets = YOLOTargetGenerator(configer)(feat_list, batch_gt_bboxes, batch_gt_labels, input_size)
+        yolo_loss = YOLOv3Loss(configer)
+        return lambda inputs, *targets: _forward_backward(yolo_loss, inputs, *targets), \
+            lambda: (prediction.clone().requires_grad_(),) + tuple(targets)
+
+    BenchHelper.run_case(result_list, 'loss', 'yolov3', hypes_file, build, args, items=args.batch_size)
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file)
+        if configer.get('task') == 'seg':
+            _bench_ohem(result_list, hypes_file, configer, args)
+            _bench_embed(result_list, hypes_file, configer, args)
+        elif configer.get('method') == 'single_shot_detector':
+            _bench_ssd(result_list, hypes_file, configer, args)
+        elif configer.get('method') == 'yolov3':
+            _bench_yolo(result_list, hypes_file, configer, args)
+
+    return result_list
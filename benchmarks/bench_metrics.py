@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the running scores.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+
+
+def _bench_seg(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    width, height = BenchHelper.get_input_size(configer)
+    num_classes = configer.get('data', 'num_classes')
+    preds = rng.randint(0, num_classes, size=(args.batch_size, height, width))
+    targets = rng.randint(-1, num_classes, size=(args.batch_size, height, width))
+
+    def build():
+        from metric.seg.seg_running_score import SegRunningScore
+        running_score = SegRunningScore(configer)
+        return running_score.update, lambda: (preds, targets)
+
+    BenchHelper.run_case(result_list, 'metrics', 'seg_update', hypes_file, build, args, items=args.batch_size)
+
+
+def _bench_det(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    input_size = BenchHelper.get_input_size(configer, default=(800, 600))
+    num_classes = configer.get('data', 'num_classes')
+    batch_gt_bboxes, batch_gt_labels, batch_pred_bboxes = list(), list(), list()
+    for _ in range(args.batch_size):
+        bboxes, labels = BenchHelper.rand_bboxes(rng, args.num_objects, input_size[0], input_size[1], num_classes)
+        batch_gt_bboxes.append(torch.from_numpy(bboxes))
+        batch_gt_labels.append(torch.from_numpy(labels).long())
+        bboxes, labels = BenchHelper.rand_bboxes(rng, args.num_dets, input_size[0], input_size[1], num_classes)
+        batch_pred_bboxes.append([list(bbox) + [int(label), float(rng.uniform())]
+                                  for bbox, label in zip(bboxes, labels)])
+
+    def build_update():
+        from metric.det.det_running_score import DetRunningScore
+        running_score = DetRunningScore(configer)
+        return running_score.update, lambda: (batch_pred_bboxes, batch_gt_bboxes, batch_gt_labels)
+
+    BenchHelper.run_case(result_list, 'metrics', 'det_update', hypes_file, build_update, args,
+                         items=args.batch_size)
+
+    def build_map():
+        from metric.det.det_running_score import DetRunningScore
+        running_score = DetRunningScore(configer)
+        for _ in range(args.iters):
+            running_score.update(batch_pred_bboxes, batch_gt_bboxes, batch_gt_labels)
+
+        return running_score.get_mAP, None
+
+    BenchHelper.run_case(result_list, 'metrics', 'det_mAP', hypes_file, build_map, args)
+
+
+def _bench_pose(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    width, height = BenchHelper.get_input_size(configer)
+    num_kpts = configer.get('data', 'num_kpts')
+    # The keys of PoseRunningScore, with the default sigma of the coco keypoints.
+    if not configer.exists('data', 'num_keypoints'):
+        configer.add(['data', 'num_keypoints'], num_kpts)
+
+    if not configer.exists('details', 'delta'):
+        configer.add(['details', 'delta'], np.full((num_kpts,), 2 * 0.072))
+
+    batch_gt_kpts, batch_pred_kpts = list(), list()
+    for _ in range(args.batch_size):
+        gt_kpts = BenchHelper.rand_kpts(rng, args.num_objects, num_kpts, width, height)
+        gt_kpts[:, :, 2] = np.where(gt_kpts[:, :, 2] > 0, 1, 0)
+        batch_gt_kpts.append(gt_kpts.reshape(args.num_objects, -1).tolist())
+        pred_kpts = gt_kpts + rng.normal(0, 4, size=gt_kpts.shape).astype(np.float32)
+        batch_pred_kpts.append(pred_kpts.reshape(args.num_objects, -1).tolist())
+
+    def build():
+        from metric.pose.pose_running_score import PoseRunningScore
+        running_score = PoseRunningScore(configer)
+        return running_score.update, lambda: (batch_pred_kpts, batch_gt_kpts)
+
+    BenchHelper.run_case(result_list, 'metrics', 'pose_update', hypes_file, build, args, items=args.batch_size)
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file, phase='val')
+        if configer.get('task') == 'seg':
+            _bench_seg(result_list, hypes_file, configer, args)
+        elif configer.get('task') == 'det':
+            _bench_det(result_list, hypes_file, configer, args)
+        elif configer.get('task') == 'pose':
+            _bench_pose(result_list, hypes_file, configer, args)
+
+    return result_list
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the pure torch fallbacks of the compiled ops, checked against the ports of the C loops.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from benchmarks.bench_helper import BenchHelper
+
+
+def _forward_backward(func, inputs, *others):
+    out = func(inputs, *others)
+    out.backward(torch.ones_like(out))
+    return out
+
+
+def _forward_grad(func, *inputs):
+    """The output & the grads of the inputs in double, the inputs without grad (e.g. the rois) are skipped."""
+    inputs = [x.detach().double().requires_grad_() for x in inputs]
+    out = _forward_backward(func, *inputs)
+    return torch.cat([out.detach().reshape(-1)] + [x.grad.reshape(-1) for x in inputs if x.grad is not None])
+
+
+def loop_roi_align(features, rois, pooled_height, pooled_width, spatial_scale, sampling_ratio=0):
+    """The port of the loops of roialign/src/roi_align_cpu.cpp."""
+    _, num_channels, height, width = features.size()
+    output = features.new_zeros((rois.size(0), num_channels, pooled_height, pooled_width))
+    for n, roi in enumerate(rois.tolist()):
+        batch_index = int(roi[0])
+        roi_start_w, roi_start_h = roi[1] * spatial_scale, roi[2] * spatial_scale
+        roi_width = max(roi[3] * spatial_scale - roi_start_w, 1.)
+        roi_height = max(roi[4] * spatial_scale - roi_start_h, 1.)
+        bin_size_h, bin_size_w = roi_height / pooled_height, roi_width / pooled_width
+        grid_h = sampling_ratio if sampling_ratio > 0 else int(math.ceil(roi_height / pooled_height))
+        grid_w = sampling_ratio if sampling_ratio > 0 else int(math.ceil(roi_width / pooled_width))
+        for ph in range(pooled_height):
+            for pw in range(pooled_width):
+                value = 0.
+                for iy in range(grid_h):
+                    y = roi_start_h + ph * bin_size_h + (iy + .5) * bin_size_h / grid_h
+                    for ix in range(grid_w):
+                        x = roi_start_w + pw * bin_size_w + (ix + .5) * bin_size_w / grid_w
+                        if y < -1.0 or y > height or x < -1.0 or x > width:
+                            continue
+
+                        y, x = max(y, 0.), max(x, 0.)
+                        y_low, x_low = int(y), int(x)
+                        if y_low >= height - 1:
+                            y_high = y_low = height - 1
+                            y = float(y_low)
+                        else:
+                            y_high = y_low + 1
+
+                        if x_low >= width - 1:
+                            x_high = x_low = width - 1
+                            x = float(x_low)
+                        else:
+                            x_high = x_low + 1
+
+                        ly, lx = y - y_low, x - x_low
+                        hy, hx = 1. - ly, 1. - lx
+                        value = value + hy * hx * features[batch_index, :, y_low, x_low] \
+                            + hy * lx * features[batch_index, :, y_low, x_high] \
+                            + ly * hx * features[batch_index, :, y_high, x_low] \
+                            + ly * lx * features[batch_index, :, y_high, x_high]
+
+                output[n, :, ph, pw] = value / max(grid_h * grid_w, 1)
+
+    return output
+
+
+def loop_roi_pool(features, rois, pooled_height, pooled_width, spatial_scale):
+    """The port of the loops of roipool/src/roi_pool_cpu.cpp."""
+    _, num_channels, height, width = features.size()
+    output = features.new_zeros((rois.size(0), num_channels, pooled_height, pooled_width))
+    c_round = lambda v: int(math.copysign(math.floor(abs(v) + 0.5), v))
+    for n, roi in enumerate(rois.tolist()):
+        batch_index = int(roi[0])
+        roi_start_w, roi_start_h = c_round(roi[1] * spatial_scale), c_round(roi[2] * spatial_scale)
+        roi_width = max(c_round(roi[3] * spatial_scale) - roi_start_w + 1, 1)
+        roi_height = max(c_round(roi[4] * spatial_scale) - roi_start_h + 1, 1)
+        bin_size_h, bin_size_w = roi_height / pooled_height, roi_width / pooled_width
+        for ph in range(pooled_height):
+            for pw in range(pooled_width):
+                h_start = min(max(int(math.floor(ph * bin_size_h)) + roi_start_h, 0), height)
+                h_end = min(max(int(math.ceil((ph + 1) * bin_size_h)) + roi_start_h, 0), height)
+                w_start = min(max(int(math.floor(pw * bin_size_w)) + roi_start_w, 0), width)
+                w_end = min(max(int(math.ceil((pw + 1) * bin_size_w)) + roi_start_w, 0), width)
+                if h_end <= h_start or w_end <= w_start:
+                    continue
+
+                output[n, :, ph, pw] = features[batch_index, :, h_start:h_end, w_start:w_end]\
+                    .reshape(num_channels, -1).max(1)[0]
+
+    return output
+
+
+def loop_ca_weight(t, f):
+    """The port of ca_forward_kernel of cc_attention/src/ca.cu."""
+    batch_size, _, height, width = t.size()
+    weight = t.new_zeros((batch_size, height + width - 1, height, width))
+    for y in range(height):
+        for x in range(width):
+            for z in range(height + width - 1):
+                if z < width:
+                    weight[:, z, y, x] = (t[:, :, y, x] * f[:, :, y, z]).sum(1)
+                else:
+                    i = z - width
+                    j = i if i < y else i + 1
+                    weight[:, z, y, x] = (t[:, :, y, x] * f[:, :, j, x]).sum(1)
+
+    return weight
+
+
+def loop_ca_map(weight, g):
+    """The port of ca_map_forward_kernel of cc_attention/src/ca.cu."""
+    _, _, height, width = g.size()
+    out = torch.zeros_like(g)
+    for y in range(height):
+        for x in range(width):
+            value = 0.
+            for i in range(width):
+                value = value + g[:, :, y, i] * weight[:, i:i + 1, y, x]
+
+            for i in range(height):
+                if i == y:
+                    continue
+
+                j = i if i < y else i - 1
+                value = value + g[:, :, i, x] * weight[:, width + j:width + j + 1, y, x]
+
+            out[:, :, y, x] = value
+
+    return out
+
+
+def _rand_rois(rng, args, input_size, num_rois):
+    rois_list = list()
+    for i in range(args.batch_size):
+        rois, _ = BenchHelper.rand_bboxes(rng, num_rois, input_size[0], input_size[1], 1)
+        rois_list.append(np.concatenate([np.full((num_rois, 1), i, dtype=np.float32), rois], 1))
+
+    return torch.from_numpy(np.concatenate(rois_list, 0))
+
+
+def _bench_roi(result_list, hypes_file, configer, args):
+    input_size = BenchHelper.get_input_size(configer)
+    stride = configer.get('roi', 'spatial_stride')
+    num_channels = configer.get('rpn', 'num_feature_list')[0]
+    pooled_height, pooled_width = configer.get('roi', 'pooled_height'), configer.get('roi', 'pooled_width')
+    rng = np.random.RandomState(args.seed)
+    features = torch.from_numpy(rng.randn(args.batch_size, num_channels, int(math.ceil(input_size[1] / stride)),
+                                          int(math.ceil(input_size[0] / stride))).astype(np.float32))
+    rois = _rand_rois(rng, args, input_size, configer.get('roi', 'loss')['n_sample'])
+
+    def setup():
+        return features.clone().requires_grad_(), rois
+
+    # The loops are checked on the first rois & channels.
+    check_features, check_rois = features[:, :4], rois[:16]
+    from extensions.roipool.py_roi_pool import roi_pool
+    pool_func = lambda inputs, boxes: roi_pool(inputs, boxes, pooled_height, pooled_width, 1.0 / stride)
+    record = BenchHelper.run_case(result_list, 'ops', 'roi_pool', hypes_file,
+                                  lambda: (lambda inputs, boxes: _forward_backward(pool_func, inputs, boxes), setup),
+                                  args, items=args.batch_size)
+    if record['status'] == 'ok':
+        BenchHelper.check_case(record, _forward_grad(pool_func, check_features, check_rois),
+                               _forward_grad(lambda inputs, boxes: loop_roi_pool(
+                                   inputs, boxes, pooled_height, pooled_width, 1.0 / stride),
+                                             check_features, check_rois))
+
+    from extensions.roialign.py_roi_align import roi_align
+    align_func = lambda inputs, boxes: roi_align(inputs, boxes, pooled_height, pooled_width, 1.0 / stride)
+    record = BenchHelper.run_case(result_list, 'ops', 'roi_align', hypes_file,
+                                  lambda: (lambda inputs, boxes: _forward_backward(align_func, inputs, boxes), setup),
+                                  args, items=args.batch_size)
+    if record['status'] == 'ok':
+        BenchHelper.check_case(record, _forward_grad(align_func, check_features, check_rois),
+                               _forward_grad(lambda inputs, boxes: loop_roi_align(
+                                   inputs, boxes, pooled_height, pooled_width, 1.0 / stride),
+                                             check_features, check_rois))
+
+
+def _bench_bn(result_list, hypes_file, configer, args, features):
+    from models.tools.module_helper import ModuleHelper
+
+    def setup():
+        # The in-place bn can't modify a leaf.
+        return (features.clone().requires_grad_() * 1.0,)
+
+    for bn_type, activation in (('inplace_abn', lambda x: F.leaky_relu(x, 0.01)), ('syncbn', F.relu)):
+        bn_relu = ModuleHelper.BNReLU(features.size(1), bn_type=bn_type)
+        record = BenchHelper.run_case(result_list, 'ops', bn_type, hypes_file,
+                                      lambda: (lambda inputs: _forward_backward(bn_relu, inputs), setup),
+                                      args, items=args.batch_size)
+        if record['status'] == 'ok':
+            inputs, ref_inputs = features.clone().requires_grad_(), features.clone().requires_grad_()
+            out = bn_relu(inputs * 1.0)
+            # The backward of the in-place bn restores its input from the output.
+            out_copy = out.detach().clone()
+            out.backward(torch.ones_like(out))
+            ref_out = _forward_backward(lambda x: activation(F.batch_norm(x, None, None, training=True)), ref_inputs)
+            BenchHelper.check_case(record, torch.cat([out_copy.view(-1), inputs.grad.view(-1)]),
+                                   torch.cat([ref_out.view(-1), ref_inputs.grad.view(-1)]))
+
+
+def _bench_cc(result_list, hypes_file, configer, args, features):
+    from extensions.cc_attention.functions import CrissCrossAttention, ca_weight, ca_map, ca_attention
+    cc_attention = CrissCrossAttention(features.size(1))
+    cc_attention.gamma.data.fill_(1.0)
+    BenchHelper.run_case(result_list, 'ops', 'cc_attention', hypes_file,
+                         lambda: (lambda inputs: _forward_backward(cc_attention, inputs),
+                                  lambda: (features.clone().requires_grad_(),)),
+                         args, items=args.batch_size)
+
+    # The projections of the module, the dense weight [B, H + W - 1, H, W] against the chunks of the query rows.
+    with torch.no_grad():
+        qkv = [cc_attention.query_conv(features), cc_attention.key_conv(features), cc_attention.value_conv(features)]
+
+    def setup():
+        return [x.clone().requires_grad_() for x in qkv]
+
+    dense_func = lambda query, key, value: ca_map(F.softmax(ca_weight(query, key), 1), value)
+    rng = np.random.RandomState(args.seed)
+    query, key, value = [torch.from_numpy(rng.randn(2, channels, 6, 5)) for channels in (4, 4, 3)]
+    record = BenchHelper.run_case(result_list, 'ops', 'ca_dense', hypes_file,
+                                  lambda: (lambda *inputs: _forward_backward(dense_func, *inputs), setup),
+                                  args, items=args.batch_size)
+    if record['status'] == 'ok':
+        weight = F.softmax(torch.from_numpy(rng.randn(2, 10, 6, 5)), 1)
+        BenchHelper.check_case(record, torch.cat([_forward_grad(ca_weight, query, key),
+                                                  _forward_grad(ca_map, weight, value)]),
+                               torch.cat([_forward_grad(loop_ca_weight, query, key),
+                                          _forward_grad(loop_ca_map, weight, value)]))
+
+    record = BenchHelper.run_case(result_list, 'ops', 'ca_chunked', hypes_file,
+                                  lambda: (lambda *inputs: _forward_backward(ca_attention, *inputs), setup),
+                                  args, items=args.batch_size)
+    if record['status'] == 'ok':
+        # Chunks of 1 query row.
+        chunked_func = lambda *inputs: ca_attention(*inputs, chunk_numel=1)
+        BenchHelper.check_case(record, _forward_grad(chunked_func, query, key, value),
+                               _forward_grad(lambda *inputs: loop_ca_map(F.softmax(loop_ca_weight(*inputs[:2]), 1),
+                                                                         inputs[2]), query, key, value))
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file)
+        if configer.get('task') == 'seg':
+            width, height = BenchHelper.get_input_size(configer)
+            stride = configer.get('network', 'stride')
+            rng = np.random.RandomState(args.seed)
+            features = torch.from_numpy(rng.randn(args.batch_size, 512, int(math.ceil(height / stride)),
+                                                  int(math.ceil(width / stride))).astype(np.float32))
+            _bench_bn(result_list, hypes_file, configer, args, features)
+            _bench_cc(result_list, hypes_file, configer, args, features)
+        elif configer.exists('roi'):
+            _bench_roi(result_list, hypes_file, configer, args)
+
+    return result_list
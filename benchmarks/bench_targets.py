@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Benchmarks of the target generators of the det & pose tasks.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+
+
+def get_feat_list(configer, input_size, batch_size=1):
+    """Empty feature maps of the det heads, the target generators only read their sizes."""
+    width, height = input_size
+    if configer.get('method') == 'single_shot_detector':
+        size_list = [tuple(feat_wh) for feat_wh in configer.get('gt', 'feature_maps_wh')]
+    elif configer.get('method') == 'faster_rcnn':
+        size_list = [(width // stride, height // stride) for stride in configer.get('rpn', 'stride_list')]
+    else:
+        size_list = [(width // stride, height // stride) for stride in configer.get('network', 'stride_list')]
+
+    return [torch.zeros(batch_size, 1, feat_h, feat_w) for feat_w, feat_h in size_list]
+
+
+def get_det_batch(rng, configer, args, input_size):
+    batch_gt_bboxes, batch_gt_labels = list(), list()
+    for _ in range(args.batch_size):
+        bboxes, labels = BenchHelper.rand_bboxes(rng, args.num_objects, input_size[0], input_size[1],
+                                                 configer.get('data', 'num_classes'))
+        batch_gt_bboxes.append(torch.from_numpy(bboxes))
+        batch_gt_labels.append(torch.from_numpy(labels).long())
+
+    return batch_gt_bboxes, batch_gt_labels
+
+
+def _bench_det(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    method = configer.get('method')
+    input_size = BenchHelper.get_input_size(configer, default=(800, 600))
+    batch_gt_bboxes, batch_gt_labels = get_det_batch(rng, configer, args, input_size)
+    feat_list = get_feat_list(configer, input_size, args.batch_size)
+    if method == 'single_shot_detector':
+        def build():
+            from utils.layers.det.ssd_target_generator import SSDTargetGenerator
+            return SSDTargetGenerator(configer), lambda: (feat_list, batch_gt_bboxes, batch_gt_labels, input_size)
+
+        BenchHelper.run_case(result_list, 'targets', 'ssd_target', hypes_file, build, args, items=args.batch_size)
+
+    elif method == 'yolov3':
+        def build():
+            from utils.layers.det.yolo_target_generator import YOLOTargetGenerator
+            return YOLOTargetGenerator(configer), lambda: (feat_list, batch_gt_bboxes, batch_gt_labels, input_size)
+
+        BenchHelper.run_case(result_list, 'targets', 'yolo_target', hypes_file, build, args, items=args.batch_size)
+
+    elif method == 'faster_rcnn':
+        meta = [dict(input_size=input_size, border_size=input_size) for _ in range(args.batch_size)]
+
+        def build():
+            from utils.layers.det.rpn_target_assigner import RPNTargetAssigner
+            return RPNTargetAssigner(configer), lambda: (feat_list, batch_gt_bboxes, meta)
+
+        BenchHelper.run_case(result_list, 'targets', 'rpn_target', hypes_file, build, args, items=args.batch_size)
+
+        def build_roi():
+            from utils.layers.det.fr_roi_sampler import FRROISampler
+            n_rois = configer.get('rpn', 'n_train_post_nms')
+            rois_list = list()
+            for i in range(args.batch_size):
+                rois, _ = BenchHelper.rand_bboxes(rng, n_rois, input_size[0], input_size[1], 1)
+                rois_list.append(torch.cat([torch.full((n_rois, 1), float(i)), torch.from_numpy(rois)], 1))
+
+            indices_and_rois = torch.cat(rois_list, 0)
+            return FRROISampler(configer), lambda: (indices_and_rois, batch_gt_bboxes, batch_gt_labels, meta)
+
+        BenchHelper.run_case(result_list, 'targets', 'roi_sampler', hypes_file, build_roi, args,
+                             items=args.batch_size)
+
+
+def _bench_pose(result_list, hypes_file, configer, args):
+    rng = np.random.RandomState(args.seed)
+    width, height = BenchHelper.get_input_size(configer)
+    kpts = torch.from_numpy(BenchHelper.rand_kpts(rng, args.num_objects, configer.get('data', 'num_kpts'),
+                                                  width, height))
+    stride = configer.get('network', 'stride')
+    maskmap = torch.ones(1, height // stride, width // stride)
+
+    def build_heatmap():
+        from utils.layers.pose.heatmap_generator import HeatmapGenerator
+        return HeatmapGenerator(configer), lambda: (kpts, [width, height], maskmap)
+
+    BenchHelper.run_case(result_list, 'targets', 'heatmap', hypes_file, build_heatmap, args)
+
+    def build_paf():
+        from utils.layers.pose.paf_generator import PafGenerator
+        return PafGenerator(configer), lambda: (kpts, [width, height], maskmap)
+
+    BenchHelper.run_case(result_list, 'targets', 'paf', hypes_file, build_paf, args)
+
+
+def run(hypes_list, args):
+    result_list = list()
+    for hypes_file in hypes_list:
+        configer = BenchHelper.load_configer(hypes_file)
+        if configer.get('task') == 'det':
+            _bench_det(result_list, hypes_file, configer, args)
+        elif configer.get('task') == 'pose':
+            _bench_pose(result_list, hypes_file, configer, args)
+
+    return result_list
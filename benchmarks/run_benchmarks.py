@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Run the cpu benchmarks on synthetic data & compare the results between commits.
+#
+#   python -m benchmarks.run_benchmarks --out bench_new.json --compare bench_old.json
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+import torch
+
+from benchmarks import bench_data, bench_decode, bench_infer, bench_loss, bench_metrics, bench_ops, bench_targets
+
+
+SUITE_DICT = {
+    'data': (bench_data, ['hypes/seg/cityscapes/fs_pspnet_cityscapes_seg.json',
+                          'hypes/det/voc/ssd_vgg300_voc_det.json',
+                          'hypes/pose/coco/op_vgg19_coco_pose.json',
+                          'hypes/cls/cifar/fc_vgg19_cifar10_cls.json']),
+    'targets': (bench_targets, ['hypes/det/voc/ssd_vgg300_voc_det.json',
+                                'hypes/det/coco/yolov3_darknet_coco_det.json',
+                                'hypes/det/voc/fr_vgg16_voc_det.json',
+                                'hypes/pose/coco/op_vgg19_coco_pose.json']),
+    'decode': (bench_decode, ['hypes/det/voc/ssd_vgg300_voc_det.json',
+                              'hypes/det/coco/yolov3_darknet_coco_det.json',
+                              'hypes/det/voc/fr_vgg16_voc_det.json']),
+    'metrics': (bench_metrics, ['hypes/seg/cityscapes/fs_pspnet_cityscapes_seg.json',
+                                'hypes/det/voc/ssd_vgg300_voc_det.json',
+                                'hypes/pose/coco/op_vgg19_coco_pose.json']),
+    'loss': (bench_loss, ['hypes/seg/cityscapes/fs_pspnet_cityscapes_seg.json',
+                          'hypes/det/voc/ssd_vgg300_voc_det.json',
+                          'hypes/det/coco/yolov3_darknet_coco_det.json']),
+    'ops': (bench_ops, ['hypes/det/voc/fr_vgg16_voc_det.json',
+                        'hypes/seg/cityscapes/fs_pspnet_cityscapes_seg.json']),
+    'infer': (bench_infer, ['hypes/seg/ade20k/fs_pspnet_ade20k_seg.json',
+                            'hypes/det/voc/ssd_vgg300_voc_det.json',
+                            'hypes/det/coco/yolov3_darknet_coco_det.json',
+                            'hypes/pose/coco/op_vgg19_coco_pose.json',
+                            'hypes/cls/imagenet/fc_shufflenetv2_imagenet_cls.json']),
+}
+
+
+def get_meta(args):
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                         stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return dict(commit=commit, time=time.strftime('%Y-%m-%d %H:%M:%S'), python=platform.python_version(),
+                platform=platform.platform(), torch=torch.__version__, numpy=np.__version__,
+                threads=torch.get_num_threads(), iters=args.iters, warmup=args.warmup,
+                batch_size=args.batch_size, num_objects=args.num_objects, num_dets=args.num_dets)
+
+
+def compare(result_list, base_file, threshold):
+    """Print the speed ratio of every case against the baseline, return the number of regressions."""
+    with open(base_file, 'r') as json_stream:
+        base_dict = {(item['suite'], item['name'], item['config']): item
+                     for item in json.load(json_stream)['results'] if item['status'] == 'ok'}
+
+    num_regressions = 0
+    print('{:<10}{:<28}{:>12}{:>12}{:>9}'.format('Suite', 'Case', 'Base(ms)', 'New(ms)', 'Ratio'))
+    for item in result_list:
+        key = (item['suite'], item['name'], item['config'])
+        if item['status'] != 'ok' or key not in base_dict:
+            continue
+
+        ratio = item['mean_ms'] / max(base_dict[key]['mean_ms'], 1e-9)
+        flag = ''
+        if ratio > 1.0 + threshold:
+            flag = '  REGRESSION'
+            num_regressions += 1
+        elif ratio < 1.0 - threshold:
+            flag = '  faster'
+
+        print('{:<10}{:<28}{:>12.3f}{:>12.3f}{:>8.2f}x{}'.format(
+            item['suite'], item['name'], base_dict[key]['mean_ms'], item['mean_ms'], ratio, flag))
+
+    return num_regressions
+
+
+def main(args):
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+    result_list = list()
+    for suite in args.suites:
+        bench_module, hypes_list = SUITE_DICT[suite]
+        hypes_list = hypes_list if args.hypes is None else args.hypes
+        result_list.extend(bench_module.run(hypes_list, args))
+
+    print('{:<10}{:<28}{:<52}{:>12}{:>14}'.format('Suite', 'Case', 'Config', 'Mean(ms)', 'Items/s'))
+    for item in result_list:
+        if item['status'] == 'ok':
+            print('{:<10}{:<28}{:<52}{:>12.3f}{:>14.2f}'.format(
+                item['suite'], item['name'], item['config'], item['mean_ms'], item['items_per_sec']))
+        else:
+            print('{:<10}{:<28}{:<52}  {}: {}'.format(item['suite'], item['name'], item['config'],
+                                                     item['status'], item['reason']))
+
+    if args.out is not None:
+        with open(args.out, 'w') as json_stream:
+            json.dump(dict(meta=get_meta(args), results=result_list), json_stream, indent=2)
+
+        print('Save the results into {}.'.format(args.out))
+
+    if args.compare is not None:
+        num_regressions = compare(result_list, args.compare, args.threshold)
+        if num_regressions > 0 and args.fail_on_regression:
+            exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--suites', default=list(SUITE_DICT.keys()), nargs='+', choices=list(SUITE_DICT.keys()),
+                        dest='suites', help='The benchmark suites to run.')
+    parser.add_argument('--hypes', default=None, nargs='+', type=str,
+                        dest='hypes', help='The hypes files to run, instead of the defaults of every suite.')
+    parser.add_argument('--iters', default=20, type=int,
+                        dest='iters', help='The timed runs of every case.')
+    parser.add_argument('--warmup', default=3, type=int,
+                        dest='warmup', help='The untimed runs of every case.')
+    parser.add_argument('--batch_size', default=8, type=int,
+                        dest='batch_size', help='The batch size of the batched cases.')
+    parser.add_argument('--num_objects', default=8, type=int,
+                        dest='num_objects', help='The objects (bboxes or persons) per synthetic image.')
+    parser.add_argument('--num_dets', default=2000, type=int,
+                        dest='num_dets', help='The detections per image fed to the nms & the metrics.')
+    parser.add_argument('--img_scale', default=1.25, type=float,
+                        dest='img_scale', help='The raw image size of the augmentations, relative to the input size.')
+    parser.add_argument('--threads', default=1, type=int,
+                        dest='threads', help='The torch threads, 1 keeps the results comparable.')
+    parser.add_argument('--seed', default=0, type=int,
+                        dest='seed', help='The seed of the synthetic data.')
+    parser.add_argument('--out', default=None, type=str,
+                        dest='out', help='The json file of the results.')
+    parser.add_argument('--compare', default=None, type=str,
+                        dest='compare', help='The json file of the baseline results.')
+    parser.add_argument('--threshold', default=0.1, type=float,
+                        dest='threshold', help='The relative slowdown reported as a regression.')
+    parser.add_argument('--fail_on_regression', action='store_true',
+                        dest='fail_on_regression', help='Exit with 1 if any case regresses.')
+    parser.add_argument('--verbose', action='store_true',
+                        dest='verbose', help='Print the traceback of the skipped cases.')
+
+    main(parser.parse_args())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# End-to-end cpu throughput of the hypes files on synthetic datasets.
+#
+#   python -m benchmarks.run_throughput --hypes hypes/det/voc/ssd_vgg300_voc_det.json --out ssd.json
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+import cv2
+import numpy as np
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+
+
+class SyntheticDataset(object):
+    """Write random images & annotations in the layout of the task's default loader.
+
+    The files live in tmpfs (/dev/shm) when it exists, so the loaders, the aug transforms
+    & the collate of the hypes run unchanged, without touching the disk.
+    """
+    def __init__(self, configer, args):
+        self.configer = configer
+        self.args = args
+        self.rng = np.random.RandomState(args.seed)
+        if args.img_size is not None:
+            self.width, self.height = args.img_size
+        else:
+            width, height = BenchHelper.get_input_size(configer, default=(500, 375))
+            self.width, self.height = int(width * args.img_scale), int(height * args.img_scale)
+
+    def _label_ids(self):
+        if self.configer.exists('data', 'label_list'):
+            return np.array(self.configer.get('data', 'label_list'))
+
+        label_ids = np.arange(self.configer.get('data', 'num_classes'))
+        if self.configer.exists('data', 'reduce_zero_label') and self.configer.get('data', 'reduce_zero_label'):
+            label_ids = label_ids + 1
+
+        return label_ids
+
+    def _write_image(self, image_dir, name):
+        cv2.imwrite(os.path.join(image_dir, '{}.jpg'.format(name)),
+                    BenchHelper.rand_img(self.rng, self.width, self.height))
+
+    def make(self, root_dir, split, num_images):
+        task = self.configer.get('task')
+        split_dir = os.path.join(root_dir, split)
+        image_dir = os.path.join(split_dir, 'image')
+        os.makedirs(image_dir)
+        if task == 'cls':
+            item_list = list()
+            for i in range(num_images):
+                self._write_image(image_dir, i)
+                item_list.append(dict(image_path='image/{}.jpg'.format(i),
+                                      label=int(self.rng.randint(self.configer.get('data', 'num_classes')))))
+
+            with open(os.path.join(split_dir, 'label.json'), 'w') as json_stream:
+                json.dump(item_list, json_stream)
+
+        elif task == 'seg':
+            label_dir = os.path.join(split_dir, 'label')
+            os.makedirs(label_dir)
+            label_ids = self._label_ids()
+            for i in range(num_images):
+                self._write_image(image_dir, i)
+                # Blocky labelmaps, closer to the real ones than the pixel noise.
+                labelmap = label_ids[self.rng.randint(len(label_ids), size=(self.height // 16 + 1,
+                                                                           self.width // 16 + 1))]
+                labelmap = np.kron(labelmap, np.ones((16, 16), dtype=labelmap.dtype))[:self.height, :self.width]
+                cv2.imwrite(os.path.join(label_dir, '{}.png'.format(i)), labelmap.astype(np.uint8))
+
+        elif task in ('det', 'pose'):
+            json_dir = os.path.join(split_dir, 'json')
+            os.makedirs(json_dir)
+            mask_dir = os.path.join(split_dir, 'mask')
+            if task == 'pose':
+                os.makedirs(mask_dir)
+
+            num_classes = self.configer.get('data', 'num_classes') if task == 'det' else 1
+            for i in range(num_images):
+                self._write_image(image_dir, i)
+                num_objects = max(1, self.rng.poisson(self.args.num_objects))
+                bboxes, labels = BenchHelper.rand_bboxes(self.rng, num_objects, self.width, self.height, num_classes)
+                if task == 'det':
+                    object_list = [dict(bbox=bbox.tolist(), label=int(label) - 1 if num_classes > 1 else int(label))
+                                   for bbox, label in zip(bboxes, labels)]
+                else:
+                    kpts = BenchHelper.rand_kpts(self.rng, num_objects, self.configer.get('data', 'num_kpts'),
+                                                 self.width, self.height)
+                    object_list = [dict(bbox=bbox.tolist(), kpts=kpt.tolist()) for bbox, kpt in zip(bboxes, kpts)]
+                    cv2.imwrite(os.path.join(mask_dir, '{}.png'.format(i)),
+                                np.ones((self.height, self.width), dtype=np.uint8))
+
+                with open(os.path.join(json_dir, '{}.json'.format(i)), 'w') as json_stream:
+                    json.dump(dict(objects=object_list), json_stream)
+
+        else:
+            raise ValueError('Task: {} has no synthetic dataset.'.format(task))
+
+
+class TimedLoader(object):
+    """Record the time of every batch the runner takes, and reset the stage timers after the warm-up."""
+    def __init__(self, loader, warmup):
+        self.loader = loader
+        self.warmup = warmup
+        self.time_list = list()
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        from utils.tools.step_profiler import StepProfiler
+        self.time_list = [time.perf_counter()]
+        for i, data_dict in enumerate(self.loader):
+            if i == self.warmup:
+                StepProfiler.reset()
+
+            yield data_dict
+            self.time_list.append(time.perf_counter())
+
+    def get_timed(self):
+        """The seconds of the batches after the warm-up, from taking one batch to taking the next."""
+        return np.diff(self.time_list)[self.warmup:]
+
+
+def get_peak_rss():
+    """The peak resident memory (MB) of this process & the loader workers."""
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is KB on linux, bytes on mac.
+    return peak_rss / 1024.0 ** (2 if sys.platform == 'darwin' else 1)
+
+
+def build_runner(hypes_file, work_dir, args):
+    from main import get_args_parser
+    from methods.method_selector import MethodSelector
+    from methods.tools.controller import Controller
+    from utils.tools.configer import Configer
+    from utils.tools.logger import Logger as Log
+    from utils.tools.step_profiler import StepProfiler
+    argv = ['--hypes', hypes_file, '--phase', 'train', '--gpu',
+            '--data_dir', os.path.join(work_dir, 'data'),
+            '--checkpoints_root', os.path.join(work_dir, 'checkpoints'),
+            '--log_file', os.path.join(work_dir, 'throughput.log'),
+            '--bn_type', 'torchbn', '--workers', str(args.workers),
+            '--max_iters', str(10 ** 9), '--max_epoch', str(10 ** 9),
+            '--display_iter', str(10 ** 9), '--test_interval', str(10 ** 9),
+            '--profile', 'true', '--stdout_level', 'error']
+    if args.train_batch_size is not None:
+        argv += ['--train_batch_size', str(args.train_batch_size)]
+
+    if args.val_batch_size is not None:
+        argv += ['--val_batch_size', str(args.val_batch_size)]
+
+    configer = Configer(args_parser=get_args_parser().parse_args(argv))
+    configer.update(['gpu'], None)
+    configer.add(['project_dir'], os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    # No pretrained weights on the bench machine, the throughput doesn't depend on them.
+    if configer.exists('network', 'pretrained'):
+        configer.update(['network', 'pretrained'], None)
+
+    if args.checkpoint:
+        # Recompute the activations in the backward, for the machines with less memory.
+        if configer.exists('network', 'checkpoint'):
+            configer.update(['network', 'checkpoint'], True)
+        else:
+            configer.add(['network', 'checkpoint'], True)
+
+    Log.init(logfile_level=None, stdout_level=configer.get('logging', 'stdout_level'),
+             log_file=configer.get('logging', 'log_file'), log_format=configer.get('logging', 'log_format'),
+             rewrite=True)
+    StepProfiler.init(configer)
+
+    num_batches = args.warmup + args.iters
+    dataset = SyntheticDataset(configer, args)
+    dataset.make(configer.get('data', 'data_dir'), 'train', num_batches * configer.get('train', 'batch_size'))
+    dataset.make(configer.get('data', 'data_dir'), 'val', num_batches * configer.get('val', 'batch_size'))
+
+    method_selector = MethodSelector(configer)
+    runner = getattr(method_selector, 'select_{}_method'.format(configer.get('task')))()
+    Controller.init(runner)
+    return configer, runner
+
+
+def run_phase(runner, phase, batch_size, args):
+    from utils.tools.step_profiler import StepProfiler
+    loader_name = '{}_loader'.format(phase)
+    timed_loader = TimedLoader(getattr(runner, loader_name), args.warmup)
+    setattr(runner, loader_name, timed_loader)
+    StepProfiler.reset()
+    getattr(runner, phase)()
+    time_list = timed_loader.get_timed()
+    if len(time_list) == 0:
+        raise ValueError('No timed {} batch, the synthetic dataset is too small.'.format(phase))
+
+    stage_dict = {name: value['avg'] * 1000.0 for name, value in StepProfiler.summary().items()}
+    return dict(images_per_sec=float(batch_size * len(time_list) / time_list.sum()),
+                batch_ms=float(time_list.mean() * 1000.0), iters=len(time_list), stage_ms=stage_dict)
+
+
+def run_hypes(hypes_file, args):
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+    record = dict(config=hypes_file)
+    work_dir = tempfile.mkdtemp(prefix='throughput_', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    runner = None
+    try:
+        configer, runner = build_runner(hypes_file, work_dir, args)
+        record['method'] = configer.get('method')
+        record['train'] = run_phase(runner, 'train', configer.get('train', 'batch_size'), args)
+        record['val'] = run_phase(runner, 'val', configer.get('val', 'batch_size'), args)
+        record['status'] = 'ok'
+    except (Exception, SystemExit) as e:
+        record['status'] = 'failed'
+        record['reason'] = '{}: {}'.format(type(e).__name__, e)
+        if args.verbose:
+            traceback.print_exc()
+
+    finally:
+        # The async checkpoint writes of the val phase go into the work dir.
+        if getattr(runner, 'checkpoint_manager', None) is not None:
+            runner.checkpoint_manager.wait()
+
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    record['peak_rss_mb'] = get_peak_rss()
+    return record
+
+
+def main(args):
+    hypes_list = args.hypes
+    if hypes_list is None:
+        hypes_list = sorted(glob.glob('hypes/*/*/*.json'))
+
+    result_list = list()
+    for hypes_file in hypes_list:
+        if len(hypes_list) == 1:
+            result_list.append(run_hypes(hypes_file, args))
+            continue
+
+        # One process per hypes file, so that the peak rss isn't shared.
+        with tempfile.NamedTemporaryFile(suffix='.json') as out_file:
+            # The last --hypes & --out override the ones passed through.
+            cmd = [sys.executable, '-m', 'benchmarks.run_throughput'] + args.passthrough + [
+                '--hypes', hypes_file, '--out', out_file.name]
+            if subprocess.call(cmd) == 0:
+                with open(out_file.name, 'r') as json_stream:
+                    result_list.extend(json.load(json_stream)['results'])
+            else:
+                result_list.append(dict(config=hypes_file, status='failed', reason='The process crashed.'))
+
+    print('{:<54}{:>14}{:>14}{:>12}'.format('Config', 'Train(img/s)', 'Val(img/s)', 'RSS(MB)'))
+    for item in result_list:
+        if item['status'] == 'ok':
+            print('{:<54}{:>14.2f}{:>14.2f}{:>12.1f}'.format(item['config'], item['train']['images_per_sec'],
+                                                           item['val']['images_per_sec'], item['peak_rss_mb']))
+            print('    train stage(ms): {}'.format('  '.join(['{} {:.2f}'.format(name, value)
+                                                            for name, value in item['train']['stage_ms'].items()])))
+        else:
+            print('{:<54}  failed: {}'.format(item['config'], item['reason']))
+
+    if args.out is not None:
+        meta = dict(time=time.strftime('%Y-%m-%d %H:%M:%S'), torch=torch.__version__, threads=args.threads,
+                    warmup=args.warmup, iters=args.iters, workers=args.workers)
+        with open(args.out, 'w') as json_stream:
+            json.dump(dict(meta=meta, results=result_list), json_stream, indent=2)
+
+
+def parse_size(value):
+    width, height = value.split('x')
+    return int(width), int(height)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hypes', default=None, nargs='+', type=str,
+                        dest='hypes', help='The hypes files to run, all the files under hypes/ by default.')
+    parser.add_argument('--warmup', default=2, type=int,
+                        dest='warmup', help='The untimed batches of every phase.')
+    parser.add_argument('--iters', default=5, type=int,
+                        dest='iters', help='The timed batches of every phase.')
+    parser.add_argument('--train_batch_size', default=None, type=int,
+                        dest='train_batch_size', help='Override the train batch size of the hypes.')
+    parser.add_argument('--val_batch_size', default=None, type=int,
+                        dest='val_batch_size', help='Override the val batch size of the hypes.')
+    parser.add_argument('--workers', default=0, type=int,
+                        dest='workers', help='The loader workers, 0 loads in the main process.')
+    parser.add_argument('--num_objects', default=8, type=int,
+                        dest='num_objects', help='The mean objects (bboxes or persons) per synthetic image.')
+    parser.add_argument('--img_size', default=None, type=parse_size,
+                        dest='img_size', help='The size (WxH) of the synthetic images.')
+    parser.add_argument('--img_scale', default=1.25, type=float,
+                        dest='img_scale', help='The synthetic image size relative to the input size.')
+    parser.add_argument('--checkpoint', action='store_true',
+                        dest='checkpoint', help='Set network.checkpoint, which trades the speed for the memory.')
+    parser.add_argument('--threads', default=torch.get_num_threads(), type=int,
+                        dest='threads', help='The torch threads.')
+    parser.add_argument('--seed', default=0, type=int,
+                        dest='seed', help='The seed of the synthetic data.')
+    parser.add_argument('--out', default=None, type=str,
+                        dest='out', help='The json file of the results.')
+    parser.add_argument('--verbose', action='store_true',
+                        dest='verbose', help='Print the traceback of the failed configs.')
+
+    args = parser.parse_args()
+    # The args passed on to the process of every hypes file.
+    args.passthrough = sys.argv[1:]
+    main(args)
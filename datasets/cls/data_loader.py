@@ -15,6 +15,7 @@ import datasets.tools.cv2_aug_transforms as cv2_aug_trans
 import datasets.tools.transforms as trans
 from datasets.cls.loader.default_loader import DefaultLoader
 from datasets.tools.collate import collate
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.logger import Logger as Log
 
 
@@ -47,11 +48,14 @@ class DataLoader(object):
 
     def get_trainloader(self):
         if not self.configer.exists('train', 'loader') or self.configer.get('train', 'loader') == 'default':
+            trainset = DefaultLoader(root_dir=self.configer.get('data', 'data_dir'), dataset='train',
+                                     aug_transform=self.aug_train_transform,
+                                     img_transform=self.img_transform, configer=self.configer)
+            sampler = DistHelper.get_sampler(trainset, shuffle=True)
             trainloader = data.DataLoader(
-                DefaultLoader(root_dir=self.configer.get('data', 'data_dir'), dataset='train',
-                              aug_transform=self.aug_train_transform,
-                              img_transform=self.img_transform, configer=self.configer),
-                batch_size=self.configer.get('train', 'batch_size'), shuffle=True,
+                trainset,
+                batch_size=DistHelper.get_batch_size(self.configer.get('train', 'batch_size')),
+                shuffle=sampler is None, sampler=sampler,
                 num_workers=self.configer.get('data', 'workers'), pin_memory=True,
                 drop_last=self.configer.get('data', 'drop_last'),
                 collate_fn=lambda *args: collate(
@@ -68,10 +72,11 @@ class DataLoader(object):
     def get_valloader(self, dataset=None):
         dataset = 'val' if dataset is None else dataset
         if not self.configer.exists('val', 'loader') or self.configer.get('val', 'loader') == 'default':
+            valset = DefaultLoader(root_dir=self.configer.get('data', 'data_dir'), dataset=dataset,
+                                   aug_transform=self.aug_val_transform,
+                                   img_transform=self.img_transform, configer=self.configer)
             valloader = data.DataLoader(
-                DefaultLoader(root_dir=self.configer.get('data', 'data_dir'), dataset=dataset,
-                              aug_transform=self.aug_val_transform,
-                              img_transform=self.img_transform, configer=self.configer),
+                valset, sampler=DistHelper.get_val_sampler(valset),
                 batch_size=self.configer.get('val', 'batch_size'), shuffle=False,
                 num_workers=self.configer.get('data', 'workers'), pin_memory=True,
                 collate_fn=lambda *args: collate(
@@ -21,14 +21,15 @@ class DefaultLoader(data.Dataset):
 
     def __init__(self, root_dir=None, dataset=None, aug_transform=None, img_transform=None, configer=None):
         self.configer = configer
+        self.config = configer.freeze()
         self.aug_transform = aug_transform
         self.img_transform = img_transform
         self.img_list, self.label_list = self.__read_json_file(root_dir, dataset)
 
     def __getitem__(self, index):
         img = ImageHelper.read_image(self.img_list[index],
-                                     tool=self.configer.get('data', 'image_tool'),
-                                     mode=self.configer.get('data', 'input_mode'))
+                                     tool=self.config.data.image_tool,
+                                     mode=self.config.data.input_mode)
         label = self.label_list[index]
 
         if self.aug_transform is not None:
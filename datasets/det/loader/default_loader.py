@@ -25,14 +25,15 @@ class DefaultLoader(data.Dataset):
                  aug_transform=None, img_transform=None, configer=None):
         super(DefaultLoader, self).__init__()
         self.configer = configer
+        self.config = configer.freeze()
         self.aug_transform = aug_transform
         self.img_transform = img_transform
         self.img_list, self.json_list = self.__list_dirs(root_dir, dataset)
 
     def __getitem__(self, index):
         img = ImageHelper.read_image(self.img_list[index],
-                                     tool=self.configer.get('data', 'image_tool'),
-                                     mode=self.configer.get('data', 'input_mode'))
+                                     tool=self.config.data.image_tool,
+                                     mode=self.config.data.input_mode)
 
         bboxes, labels = self.__read_json_file(self.json_list[index])
 
@@ -67,7 +68,7 @@ class DefaultLoader(data.Dataset):
         bboxes = list()
 
         for object in json_dict['objects']:
-            if 'difficult' in object and object['difficult'] and not self.configer.get('data', 'keep_difficult'):
+            if 'difficult' in object and object['difficult'] and not self.config.data.keep_difficult:
                 continue
 
             labels.append(object['label'])
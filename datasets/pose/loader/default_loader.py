@@ -24,6 +24,7 @@ class DefaultLoader(data.Dataset):
     def __init__(self, root_dir, dataset=None, aug_transform=None,
                  img_transform=None, configer=None):
         self.configer = configer
+        self.config = configer.freeze()
         self.aug_transform = aug_transform
         self.img_transform = img_transform
         self.heatmap_generator = HeatmapGenerator(self.configer)
@@ -31,8 +32,8 @@ class DefaultLoader(data.Dataset):
 
     def __getitem__(self, index):
         img = ImageHelper.read_image(self.img_list[index],
-                                     tool=self.configer.get('data', 'image_tool'),
-                                     mode=self.configer.get('data', 'input_mode'))
+                                     tool=self.config.data.image_tool,
+                                     mode=self.config.data.input_mode)
 
         kpts, bboxes = self.__read_json_file(self.json_list[index])
 
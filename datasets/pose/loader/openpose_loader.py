@@ -26,6 +26,7 @@ class OpenPoseLoader(data.Dataset):
     def __init__(self, root_dir=None, dataset=None,
                  aug_transform=None,img_transform=None, configer=None):
         self.configer = configer
+        self.config = configer.freeze()
         self.aug_transform = aug_transform
         self.img_transform = img_transform
         self.heatmap_generator = HeatmapGenerator(self.configer)
@@ -34,14 +35,14 @@ class OpenPoseLoader(data.Dataset):
 
     def __getitem__(self, index):
         img = ImageHelper.read_image(self.img_list[index],
-                                     tool=self.configer.get('data', 'image_tool'),
-                                     mode=self.configer.get('data', 'input_mode'))
+                                     tool=self.config.data.image_tool,
+                                     mode=self.config.data.input_mode)
         if os.path.exists(self.mask_list[index]):
             maskmap = ImageHelper.read_image(self.mask_list[index],
-                                             tool=self.configer.get('data', 'image_tool'), mode='P')
+                                             tool=self.config.data.image_tool, mode='P')
         else:
             maskmap = np.ones((img.size[1], img.size[0]), dtype=np.uint8)
-            if self.configer.get('data', 'image_tool') == 'pil':
+            if self.config.data.image_tool == 'pil':
                 maskmap = ImageHelper.np2img(maskmap)
 
         kpts, bboxes = self.__read_json_file(self.json_list[index])
@@ -54,8 +55,8 @@ class OpenPoseLoader(data.Dataset):
 
         width, height = ImageHelper.get_size(maskmap)
         maskmap = ImageHelper.resize(maskmap,
-                                     (width // self.configer.get('network', 'stride'),
-                                      height // self.configer.get('network', 'stride')),
+                                     (width // self.config.network.stride,
+                                      height // self.config.network.stride),
                                      interpolation='nearest')
 
         maskmap = torch.from_numpy(np.array(maskmap, dtype=np.float32))
@@ -20,6 +20,7 @@ class DefaultLoader(data.Dataset):
     def __init__(self, root_dir, dataset=None, aug_transform=None,
                  img_transform=None, label_transform=None, configer=None):
         self.configer = configer
+        self.config = configer.freeze()
         self.aug_transform = aug_transform
         self.img_transform = img_transform
         self.label_transform = label_transform
@@ -30,18 +31,18 @@ class DefaultLoader(data.Dataset):
 
     def __getitem__(self, index):
         img = ImageHelper.read_image(self.img_list[index],
-                                     tool=self.configer.get('data', 'image_tool'),
-                                     mode=self.configer.get('data', 'input_mode'))
+                                     tool=self.config.data.image_tool,
+                                     mode=self.config.data.input_mode)
         img_size = ImageHelper.get_size(img)
         labelmap = ImageHelper.read_image(self.label_list[index],
-                                          tool=self.configer.get('data', 'image_tool'), mode='P')
-        if self.configer.exists('data', 'label_list'):
+                                          tool=self.config.data.image_tool, mode='P')
+        if 'label_list' in self.config.data:
             labelmap = self._encode_label(labelmap)
 
-        if self.configer.exists('data', 'reduce_zero_label'):
+        if 'reduce_zero_label' in self.config.data:
             labelmap = self._reduce_zero_label(labelmap)
 
-        ori_target = ImageHelper.tonp(labelmap)
+        ori_target = ImageHelper.tonp(labelmap).astype(np.int64)
         ori_target[ori_target == 255] = -1
 
         if self.aug_transform is not None:
@@ -67,12 +68,12 @@ class DefaultLoader(data.Dataset):
         )
 
     def _reduce_zero_label(self, labelmap):
-        if not self.configer.get('data', 'reduce_zero_label'):
+        if not self.config.data.reduce_zero_label:
             return labelmap
 
         labelmap = np.array(labelmap)
         encoded_labelmap = labelmap - 1
-        if self.configer.get('data', 'image_tool') == 'pil':
+        if self.config.data.image_tool == 'pil':
             encoded_labelmap = ImageHelper.np2img(encoded_labelmap.astype(np.uint8))
 
         return encoded_labelmap
@@ -82,11 +83,10 @@ class DefaultLoader(data.Dataset):
 
         shape = labelmap.shape
         encoded_labelmap = np.ones(shape=(shape[0], shape[1]), dtype=np.float32) * 255
-        for i in range(len(self.configer.get('data', 'label_list'))):
-            class_id = self.configer.get('data', 'label_list')[i]
+        for i, class_id in enumerate(self.config.data.label_list):
             encoded_labelmap[labelmap == class_id] = i
 
-        if self.configer.get('data', 'image_tool') == 'pil':
+        if self.config.data.image_tool == 'pil':
             encoded_labelmap = ImageHelper.np2img(encoded_labelmap.astype(np.uint8))
 
         return encoded_labelmap
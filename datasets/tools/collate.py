@@ -8,11 +8,15 @@ from __future__ import division
 from __future__ import print_function
 
 import random
-import collections
+import collections.abc
 import torch
 import torch.nn.functional as F
 from torch.utils.data.dataloader import default_collate
-from torch._six import string_classes, int_classes
+try:
+    from torch._six import string_classes, int_classes
+except ImportError:
+    # torch>=2.0 dropped torch._six.
+    string_classes, int_classes = (str, bytes), int
 
 from extensions.parallel.data_container import DataContainer
 from utils.tools.logger import Logger as Log
@@ -23,8 +27,8 @@ def stack(batch, data_key=None):
         if batch[0][data_key].stack:
             assert isinstance(batch[0][data_key].data, torch.Tensor) or \
                    isinstance(batch[0], int_classes) or isinstance(batch[0], float) or \
-                   isinstance(batch[0], string_classes) or isinstance(batch[0], collections.Mapping) or\
-                   isinstance(batch[0], collections.Sequence)
+                   isinstance(batch[0], string_classes) or isinstance(batch[0], collections.abc.Mapping) or\
+                   isinstance(batch[0], collections.abc.Sequence)
             samples = [sample[data_key].data for sample in batch]
             return default_collate(samples)
 
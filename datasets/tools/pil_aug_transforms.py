@@ -7,7 +7,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import collections
+import collections.abc
+import inspect
 import random
 import math
 import cv2
@@ -694,7 +695,7 @@ class RandomCrop(object):
 
         if isinstance(crop_size, float):
             self.size = (crop_size, crop_size)
-        elif isinstance(crop_size, collections.Iterable) and len(crop_size) == 2:
+        elif isinstance(crop_size, collections.abc.Iterable) and len(crop_size) == 2:
             self.size = crop_size
         else:
             raise TypeError('Got inappropriate size arg: {}'.format(crop_size))
@@ -809,7 +810,7 @@ class RandomFocusCrop(object):
 
         if isinstance(crop_size, float):
             self.size = (crop_size, crop_size)
-        elif isinstance(crop_size, collections.Iterable) and len(crop_size) == 2:
+        elif isinstance(crop_size, collections.abc.Iterable) and len(crop_size) == 2:
             self.size = crop_size
         else:
             raise TypeError('Got inappropriate size arg: {}'.format(crop_size))
@@ -1128,6 +1129,12 @@ PIL_AUGMENTATIONS_DICT = {
     'resize': Resize
 }
 
+# The params of the hypes named differently from the args of the transforms.
+TRANS_ARG_ALIAS_DICT = {
+    'rotate_degree': 'max_degree',
+    'crop_size': 'size',
+}
+
 
 class PILAugCompose(object):
     """Composes several transforms together.
@@ -1141,50 +1148,86 @@ class PILAugCompose(object):
         >>> ])
     """
 
+    @staticmethod
+    def _get_trans_arg(key, arg_list):
+        """The arg of the transform for the param of the hypes, None if the transform doesn't take it."""
+        if key == 'ratio':
+            return next((arg for arg in arg_list if arg.endswith('_ratio')), None)
+
+        if key not in arg_list:
+            key = TRANS_ARG_ALIAS_DICT.get(key, key)
+
+        return key if key in arg_list else None
+
+    @staticmethod
+    def build_trans(trans, param_dict):
+        """Build the transform from its params of the hypes.
+
+        The focus & det methods of random_crop are the random_focus_crop & random_det_crop transforms.
+        The ratio of the hypes is the <name>_ratio arg of the transform, e.g. flip_ratio, the other aliases are
+        in TRANS_ARG_ALIAS_DICT. The params of random_crop are shared by its methods, a param that none of
+        them takes is invalid.
+        """
+        shared_list = [trans]
+        if trans == 'random_crop':
+            shared_list = ['random_crop', 'random_focus_crop', 'random_det_crop']
+            if param_dict.get('method') in ('focus', 'det'):
+                trans = 'random_{}_crop'.format(param_dict['method'])
+
+        trans_cls = PIL_AUGMENTATIONS_DICT[trans]
+        arg_list = inspect.getfullargspec(trans_cls.__init__).args[1:]
+        shared_arg_lists = [inspect.getfullargspec(PIL_AUGMENTATIONS_DICT[name].__init__).args[1:] for name in shared_list]
+        kwargs = dict()
+        for key, value in param_dict.items():
+            arg = PILAugCompose._get_trans_arg(key, arg_list)
+            if arg is not None:
+                kwargs[arg] = value
+            elif all(PILAugCompose._get_trans_arg(key, args) is None for args in shared_arg_lists):
+                Log.error('Param {} of the transform {} is invalid.'.format(key, trans))
+                exit(1)
+
+        return trans_cls(**kwargs)
+
     def __init__(self, configer, split='train'):
         self.configer = configer
         self.split = split
 
         self.transforms = dict()
+        # The trans seqs are resolved once here, not for every sample.
+        self.shuffle_trans_seq = None
         if self.split == 'train':
+            self.trans_seq = list(self.configer.get('train_trans', 'trans_seq'))
             shuffle_train_trans = []
             if self.configer.exists('train_trans', 'shuffle_trans_seq'):
-                if isinstance(self.configer.get('train_trans', 'shuffle_trans_seq')[0], list):
-                    train_trans_seq_list = self.configer.get('train_trans', 'shuffle_trans_seq')
-                    for train_trans_seq in train_trans_seq_list:
+                self.shuffle_trans_seq = list(self.configer.get('train_trans', 'shuffle_trans_seq'))
+                if isinstance(self.shuffle_trans_seq[0], list):
+                    for train_trans_seq in self.shuffle_trans_seq:
                         shuffle_train_trans += train_trans_seq
 
                 else:
-                    shuffle_train_trans = self.configer.get('train_trans', 'shuffle_trans_seq')
+                    shuffle_train_trans = self.shuffle_trans_seq
 
-            for trans in self.configer.get('train_trans', 'trans_seq') + shuffle_train_trans:
-                self.transforms[trans] = PIL_AUGMENTATIONS_DICT[trans](**self.configer.get('train', trans))
+            for trans in self.trans_seq + shuffle_train_trans:
+                self.transforms[trans] = PILAugCompose.build_trans(trans, self.configer.get('train_trans', trans))
 
         else:
-            for trans in self.configer.get('val_trans', 'trans_seq'):
-                self.transforms[trans] = PIL_AUGMENTATIONS_DICT[trans](**self.configer.get('val', trans))
+            self.trans_seq = list(self.configer.get('val_trans', 'trans_seq'))
+            for trans in self.trans_seq:
+                self.transforms[trans] = PILAugCompose.build_trans(trans, self.configer.get('val_trans', trans))
 
     def __call__(self, img, labelmap=None, maskmap=None, kpts=None, bboxes=None, labels=None, polygons=None):
-        if self.split == 'train':
-            shuffle_trans_seq = []
-            if self.configer.exists('train_trans', 'shuffle_trans_seq'):
-                if isinstance(self.configer.get('train_trans', 'shuffle_trans_seq')[0], list):
-                    shuffle_trans_seq_list = self.configer.get('train_trans', 'shuffle_trans_seq')
-                    shuffle_trans_seq = shuffle_trans_seq_list[random.randint(0, len(shuffle_trans_seq_list))]
-                else:
-                    shuffle_trans_seq = self.configer.get('train_trans', 'shuffle_trans_seq')
-                    random.shuffle(shuffle_trans_seq)
-
-            for trans_key in (shuffle_trans_seq + self.configer.get('train_trans', 'trans_seq')):
-                (img, labelmap, maskmap, kpts,
-                 bboxes, labels, polygons) = self.transforms[trans_key](img, labelmap, maskmap,
-                                                                        kpts, bboxes, labels, polygons)
+        trans_seq = self.trans_seq
+        if self.shuffle_trans_seq is not None:
+            if isinstance(self.shuffle_trans_seq[0], list):
+                trans_seq = random.choice(self.shuffle_trans_seq) + trans_seq
+            else:
+                random.shuffle(self.shuffle_trans_seq)
+                trans_seq = self.shuffle_trans_seq + trans_seq
 
-        else:
-            for trans_key in self.configer.get('val_trans', 'trans_seq'):
-                (img, labelmap, maskmap, kpts,
-                 bboxes, labels, polygons) = self.transforms[trans_key](img, labelmap, maskmap,
-                                                                        kpts, bboxes, labels, polygons)
+        for trans_key in trans_seq:
+            (img, labelmap, maskmap, kpts,
+             bboxes, labels, polygons) = self.transforms[trans_key](img, labelmap, maskmap,
+                                                                    kpts, bboxes, labels, polygons)
 
         out_list = [img]
         for elem in [labelmap, maskmap, kpts, bboxes, labels, polygons]:
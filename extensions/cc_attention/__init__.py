@@ -1 +1 @@
-from .functions import PAM_Module, CrissCrossAttention, CrossAttention, ca_weight, ca_map
\ No newline at end of file
+from .functions import PAM_Module, CrissCrossAttention, CrossAttention, ca_weight, ca_map, ca_attention
\ No newline at end of file
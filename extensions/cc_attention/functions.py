@@ -4,7 +4,14 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch.autograd.function import once_differentiable
 
-from . import _ext
+from extensions.cc_attention.py_ca import ca_weight as py_ca_weight, ca_map as py_ca_map, \
+    ca_attention as py_ca_attention
+
+try:
+    from . import _ext
+except ImportError:
+    # The ffi _ext is not built, use the pure torch ops.
+    _ext = None
 
 
 # from libs import InPlaceABN, InPlaceABNSync
@@ -71,8 +78,27 @@ class CA_Map(autograd.Function):
 
         return dw, dg
 
-ca_weight = CA_Weight.apply
-ca_map = CA_Map.apply
+
+def ca_weight(t, f):
+    if _ext is None or not t.is_cuda:
+        return py_ca_weight(t, f)
+
+    return CA_Weight.apply(t, f)
+
+
+def ca_map(weight, g):
+    if _ext is None or not g.is_cuda:
+        return py_ca_map(weight, g)
+
+    return CA_Map.apply(weight, g)
+
+
+def ca_attention(t, f, g, chunk_numel=1 << 22):
+    """ca_map(softmax(ca_weight(t, f), 1), g), by the chunks of chunk_numel elements without the _ext."""
+    if _ext is None or not t.is_cuda:
+        return py_ca_attention(t, f, g, chunk_numel=chunk_numel)
+
+    return ca_map(F.softmax(ca_weight(t, f), 1), g)
 
 
 class CrossAttention(nn.Module):
@@ -98,9 +124,7 @@ class CrossAttention(nn.Module):
         f = self.f_func(x)
         g = self.g_func(x)
 
-        w = ca_weight(t, f)
-        w = F.softmax(w, 1)
-        out = ca_map(w, g)
+        out = ca_attention(t, f, g)
         x = x + self.inc(out)
 
         return x
@@ -121,9 +145,7 @@ class CrissCrossAttention(nn.Module):
         proj_key = self.key_conv(x)
         proj_value = self.value_conv(x)
 
-        energy = ca_weight(proj_query, proj_key)
-        attention = F.softmax(energy, 1)
-        out = ca_map(attention, proj_value)
+        out = ca_attention(proj_query, proj_key, proj_value)
         out = self.gamma*out + x
 
         return out
@@ -163,4 +185,4 @@ class PAM_Module(nn.Module):
 
 
 
-__all__ = ["PAM_Module", "CrissCrossAttention", "CrossAttention", "ca_weight", "ca_map"]
+__all__ = ["PAM_Module", "CrissCrossAttention", "CrossAttention", "ca_weight", "ca_map", "ca_attention"]
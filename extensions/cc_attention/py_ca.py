@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The pure torch criss-cross attention ops, used on cpu or when the compiled _ext is not available.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import torch
+import torch.autograd as autograd
+from torch.autograd.function import once_differentiable
+
+
+def _column_index(height, like):
+    """The rows j of the column slots i of every query row y (j = i if i < y else i + 1), [1, H - 1, H, 1]."""
+    slots = torch.arange(height - 1, device=like.device)[:, None]
+    rows = torch.arange(height, device=like.device)[None, :]
+    return (slots + (slots >= rows).long()).view(1, height - 1, height, 1)
+
+
+def ca_weight(t, f):
+    """The criss-cross energy of the queries t & keys f [B, C, H, W], of shape [B, W + H - 1, H, W].
+
+    The slot i < W is the key (y, i) of the same row, the slot W + i the key (j, x) of the same column
+    except the query itself, j = i if i < y else i + 1.
+    """
+    batch_size, _, height, width = t.size()
+    row = torch.einsum('bcyx,bcyi->biyx', t, f)
+    col = torch.einsum('bcyx,bcix->biyx', t, f)
+    index = _column_index(height, t).expand(batch_size, height - 1, height, width)
+    return torch.cat((row, col.gather(1, index)), 1)
+
+
+def ca_map(weight, g):
+    """The criss-cross aggregation of the values g [B, C, H, W] by the weight [B, W + H - 1, H, W] of ca_weight."""
+    batch_size, _, height, width = g.size()
+    index = _column_index(height, g).expand(batch_size, height - 1, height, width)
+    # The column weights back onto the rows, the query row itself is 0.
+    col = weight.new_zeros((batch_size, height, height, width)).scatter(1, index, weight[:, width:])
+    return torch.einsum('biyx,bcyi->bcyx', weight[:, :width], g) + torch.einsum('biyx,bcix->bcyx', col, g)
+
+
+def _chunk_energy(q_rows, k_rows, q_cols, k_cols, start, end):
+    """The row energies [B, Y, W(x), W(i)] & the column energies [B, W(x), Y, H(i)] of the query rows [start, end),
+    the column energy of the query itself is -inf."""
+    row = torch.matmul(q_rows[:, start:end], k_rows[:, start:end])
+    col = torch.matmul(q_cols[:, :, start:end], k_cols)
+    rows = torch.arange(start, end, device=col.device)[:, None]
+    self_mask = rows == torch.arange(col.size(3), device=col.device)[None, :]
+    return row, col.masked_fill(self_mask, float('-inf'))
+
+
+def _chunk_rows(size, chunk_numel):
+    # The energies & the aggregated values of a query row, B * W * (H + W + C).
+    batch_size, num_channels, height, width = size
+    return max(1, min(height, chunk_numel // max(batch_size * width * (height + width + num_channels), 1)))
+
+
+def _layouts(query, key, v_cols):
+    """The row layouts [B, H, W, C'], [B, H, C', W], [B, H, C, W] & the column layouts [B, W, H, C'], [B, W, C', H],
+    [B, W, H, C] of q, k & v. The column layouts of k & v are used by every chunk & kept contiguous."""
+    return query.permute(0, 2, 3, 1), key.permute(0, 2, 1, 3), v_cols.permute(0, 2, 3, 1), \
+        query.permute(0, 3, 2, 1), key.permute(0, 3, 1, 2).contiguous(), v_cols
+
+
+class _ChunkedCCAttention(autograd.Function):
+    """softmax(ca_weight(q, k)) & ca_map with v, by the chunks of the query rows.
+
+    The energies of a chunk are a batched matmul over the rows & one over the columns, normalized by their joint
+    logsumexp. Only q, k, v in the column layout & the logsumexp are kept, the backward recomputes the attention by chunk.
+    """
+
+    @staticmethod
+    def forward(ctx, query, key, value, chunk_numel):
+        batch_size, _, height, width = query.size()
+        q_rows, k_rows, v_rows, q_cols, k_cols, v_cols = _layouts(query, key, value.permute(0, 3, 2, 1).contiguous())
+        out = torch.empty_like(value)
+        lse = query.new_empty((batch_size, height, width))
+        step = _chunk_rows(value.size(), chunk_numel)
+        for start in range(0, height, step):
+            end = min(start + step, height)
+            row, col = _chunk_energy(q_rows, k_rows, q_cols, k_cols, start, end)
+            # The logsumexp over the W + H - 1 energies of every query, [B, Y, W].
+            col_t = col.transpose(1, 2)
+            chunk_max = torch.max(row.max(3)[0], col_t.max(3)[0])
+            chunk_lse = chunk_max + torch.log(torch.exp(row - chunk_max[..., None]).sum(3)
+                                              + torch.exp(col_t - chunk_max[..., None]).sum(3))
+            row_attn = torch.exp(row - chunk_lse[..., None])
+            col_attn = torch.exp(col - chunk_lse.transpose(1, 2)[..., None])
+            # [B, Y, C, W(x)] & [B, W(x), Y, C].
+            out[:, :, start:end] = torch.matmul(v_rows[:, start:end], row_attn.transpose(2, 3)).transpose(1, 2) \
+                + torch.matmul(col_attn, v_cols).permute(0, 3, 2, 1)
+            lse[:, start:end] = chunk_lse
+
+        ctx.chunk_numel = chunk_numel
+        ctx.save_for_backward(query, key, v_cols, lse)
+        return out
+
+    @staticmethod
+    @once_differentiable
+    def backward(ctx, dout):
+        query, key, v_cols, lse = ctx.saved_tensors
+        batch_size, width, height, num_channels = v_cols.size()
+        q_rows, k_rows, v_rows, q_cols, k_cols, v_cols = _layouts(query, key, v_cols)
+        dout = dout.contiguous()
+        do_rows, do_cols = dout.permute(0, 2, 3, 1), dout.permute(0, 3, 2, 1)
+
+        # The grads of k & v are in the column layouts, every chunk adds onto all their rows in place by baddbmm.
+        dq = torch.zeros_like(query)
+        dk_cols = key.new_zeros((batch_size * width, height, key.size(1)))
+        dv_cols = v_cols.new_zeros((batch_size * width, height, num_channels))
+        dq_rows = dq.permute(0, 2, 3, 1)
+        dk_rows = dk_cols.view(batch_size, width, height, -1).transpose(1, 2)
+        dv_rows = dv_cols.view(batch_size, width, height, num_channels).permute(0, 2, 3, 1)
+        step = _chunk_rows((batch_size, num_channels, height, width), ctx.chunk_numel)
+        for start in range(0, height, step):
+            end = min(start + step, height)
+            row, col = _chunk_energy(q_rows, k_rows, q_cols, k_cols, start, end)
+            chunk_lse = lse[:, start:end]
+            row_attn = torch.exp(row - chunk_lse[..., None])
+            col_attn = torch.exp(col - chunk_lse.transpose(1, 2)[..., None])
+            chunk_do_cols = do_cols[:, :, start:end].reshape(batch_size * width, end - start, num_channels)
+
+            dv_rows[:, start:end] += torch.matmul(do_rows[:, start:end].transpose(2, 3), row_attn)
+            dv_cols.baddbmm_(col_attn.view(batch_size * width, end - start, height).transpose(1, 2), chunk_do_cols)
+            row_dattn = torch.matmul(do_rows[:, start:end], v_rows[:, start:end])
+            col_dattn = torch.matmul(chunk_do_cols, v_cols.view(batch_size * width, height, num_channels)
+                                     .transpose(1, 2)).view_as(col)
+            # The grad of the softmax, p * (dp - sum(p * dp)) over the W + H - 1 energies, [B, Y, W].
+            delta = (row_attn * row_dattn).sum(3) + (col_attn * col_dattn).sum(3).transpose(1, 2)
+            row_grad = row_attn * (row_dattn - delta[..., None])
+            col_grad = col_attn * (col_dattn - delta.transpose(1, 2)[..., None])
+
+            dq_rows[:, start:end] += torch.matmul(row_grad, k_rows[:, start:end].transpose(2, 3)) \
+                + torch.matmul(col_grad, k_cols.transpose(2, 3)).transpose(1, 2)
+            dk_rows[:, start:end] += torch.matmul(row_grad.transpose(2, 3), q_rows[:, start:end])
+            dk_cols.baddbmm_(col_grad.view(batch_size * width, end - start, height).transpose(1, 2),
+                             q_cols[:, :, start:end].reshape(batch_size * width, end - start, -1))
+
+        return dq, dk_cols.view(batch_size, width, height, -1).permute(0, 3, 2, 1), \
+            dv_cols.view(batch_size, width, height, num_channels).permute(0, 3, 2, 1), None
+
+
+def ca_attention(query, key, value, chunk_numel=1 << 22):
+    """ca_map(softmax(ca_weight(query, key), 1), value) without the [B, H + W - 1, H, W] weight.
+
+    Args:
+      query, key: [B, C', H, W].
+      value: [B, C, H, W].
+      chunk_numel: The elements of a chunk of the query rows, B * rows * W * (H + W + C).
+    """
+    return _ChunkedCCAttention.apply(query.contiguous(), key.contiguous(), value.contiguous(), chunk_numel)
@@ -7,7 +7,7 @@ try:
 except ImportError:
     from Queue import Queue
 
-from lib.extensions.inplace_abn.functions import *
+from extensions.inplace_abn.functions import *
 
 
 class ABN(nn.Module):
@@ -145,6 +145,11 @@ class InPlaceABNSync(ABN):
         self.worker_queues = [Queue(1) for _ in self.worker_ids]
 
     def forward(self, x):
+        if not x.is_cuda:
+            # No replicas to synchronize on cpu.
+            return inplace_abn(x, self.weight, self.bias, self.running_mean, self.running_var,
+                               self.training, self.momentum, self.eps, self.activation, self.slope)
+
         if x.get_device() == self.devices[0]:
             # Master mode
             extra = {
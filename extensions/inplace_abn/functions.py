@@ -5,15 +5,22 @@ import torch.cuda.comm as comm
 from torch.autograd.function import once_differentiable
 from torch.utils.cpp_extension import load
 
+from extensions.inplace_abn.py_backend import PyABNBackend
+
 _src_path = path.join(path.dirname(path.abspath(__file__)), "src")
-_backend = load(name="inplace_abn",
-                extra_cflags=["-O3"],
-                sources=[path.join(_src_path, f) for f in [
-                    "inplace_abn.cpp",
-                    "inplace_abn_cpu.cpp",
-                    "inplace_abn_cuda.cu"
-                ]],
-                extra_cuda_cflags=["--expt-extended-lambda"])
+try:
+    _backend = load(name="inplace_abn",
+                    extra_cflags=["-O3"],
+                    sources=[path.join(_src_path, f) for f in [
+                        "inplace_abn.cpp",
+                        "inplace_abn_cpu.cpp",
+                        "inplace_abn_cuda.cu"
+                    ]],
+                    extra_cuda_cflags=["--expt-extended-lambda"])
+except (ImportError, OSError, RuntimeError):
+    # inplace_abn is not built, use the pure torch backend.
+    _backend = PyABNBackend(affine_grads=True)
+
 
 # Activation names
 ACT_RELU = "relu"
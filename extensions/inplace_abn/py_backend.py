@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The pure torch backend of the inplace abn, used when the compiled backend is not available.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import torch
+import torch.nn.functional as F
+
+
+def _by_channel(x):
+    return x.view(x.size(0), x.size(1), -1)
+
+
+def _reduce_sum(x):
+    return _by_channel(x).sum(2).sum(0)
+
+
+def _count(x):
+    return x.numel() // x.size(1)
+
+
+def _invert_affine(z, weight, bias, affine, eps):
+    if affine:
+        return (_by_channel(z) - bias.view(1, -1, 1)) / (weight.abs() + eps).view(1, -1, 1)
+
+    return _by_channel(z)
+
+
+class PyABNBackend(object):
+    """The ops of the compiled _backend (src/inplace_abn_cpu.cpp) on torch, with the same in-place semantics.
+
+    Args:
+      affine_grads: backward returns (dx, dweight, dbias) as inplace_abn, dx only as inplace_abn_1.
+    """
+    def __init__(self, affine_grads=True):
+        self.affine_grads = affine_grads
+
+    @staticmethod
+    def mean_var(x):
+        num = _count(x)
+        mean = _reduce_sum(x) / num
+        var = (_by_channel(x) - mean.view(1, -1, 1)).pow(2).sum(2).sum(0) / num
+        return mean, var
+
+    @staticmethod
+    def forward(x, mean, var, weight, bias, affine, eps):
+        mul = torch.rsqrt(var + eps)
+        if affine:
+            mul = mul * (weight.abs() + eps)
+
+        x_view = _by_channel(x)
+        x_view.sub_(mean.view(1, -1, 1)).mul_(mul.view(1, -1, 1))
+        if affine:
+            x_view.add_(bias.view(1, -1, 1))
+
+        return x
+
+    @staticmethod
+    def edz_eydz(z, dz, weight, bias, affine, eps):
+        edz = _reduce_sum(dz)
+        eydz = (_invert_affine(z, weight, bias, affine, eps) * _by_channel(dz)).sum(2).sum(0)
+        return edz, eydz
+
+    def backward(self, z, dz, var, weight, bias, edz, eydz, affine, eps):
+        y = _invert_affine(z, weight, bias, affine, eps)
+        mul = torch.rsqrt(var + eps)
+        if affine:
+            mul = mul * (weight.abs() + eps)
+
+        num = _count(z)
+        dx = (_by_channel(dz) - (edz / num).view(1, -1, 1) - y * (eydz / num).view(1, -1, 1)) * mul.view(1, -1, 1)
+        dx = dx.view_as(dz)
+        if not self.affine_grads:
+            return dx
+
+        if affine:
+            return dx, eydz * weight.sign(), edz
+
+        return dx, dz.new_empty(0), dz.new_empty(0)
+
+    @staticmethod
+    def leaky_relu_forward(z, slope):
+        F.leaky_relu(z, slope, inplace=True)
+
+    @staticmethod
+    def leaky_relu_backward(z, dz, slope):
+        # Scale the grads & invert the activation of the negative outputs in-place.
+        neg = (z < 0).to(z.dtype)
+        dz.mul_(neg * (slope - 1.) + 1.)
+        z.mul_(neg * (1. / slope - 1.) + 1.)
+
+    @staticmethod
+    def elu_forward(z):
+        F.elu(z, inplace=True)
+
+    @staticmethod
+    def elu_backward(z, dz):
+        # The grad of elu is exp(x) = z + 1 on the negative outputs.
+        neg = z < 0
+        dz.mul_(neg.to(z.dtype) * z + 1.)
+        z.copy_(torch.where(neg, torch.log1p(z), z))
@@ -6,16 +6,23 @@ import torch.cuda.comm as comm
 from torch.autograd.function import once_differentiable
 from torch.utils.cpp_extension import load
 
+from extensions.inplace_abn.py_backend import PyABNBackend
+
 _src_path = path.join(path.dirname(path.abspath(__file__)), "src")
-_backend = load(name="inplace_abn",
-                extra_cflags=["-O3"],
-                sources=[path.join(_src_path, f) for f in [
-                    "inplace_abn.cpp",
-                    "inplace_abn_cpu.cpp",
-                    "inplace_abn_cuda.cu",
-                    "inplace_abn_cuda_half.cu"
-                ]],
-                extra_cuda_cflags=["--expt-extended-lambda"])
+try:
+    _backend = load(name="inplace_abn",
+                    extra_cflags=["-O3"],
+                    sources=[path.join(_src_path, f) for f in [
+                        "inplace_abn.cpp",
+                        "inplace_abn_cpu.cpp",
+                        "inplace_abn_cuda.cu",
+                        "inplace_abn_cuda_half.cu"
+                    ]],
+                    extra_cuda_cflags=["--expt-extended-lambda"])
+except (ImportError, OSError, RuntimeError):
+    # inplace_abn is not built, use the pure torch backend.
+    _backend = PyABNBackend(affine_grads=False)
+
 
 # Activation names
 ACT_RELU = "relu"
@@ -100,7 +107,7 @@ class InPlaceABN(autograd.Function):
             running_var.mul_((1 - ctx.momentum)).add_(ctx.momentum * var * count / (count - 1))
 
             # Mark in-place modified tensors
-            ctx.mark_dirty(x, running_mean, running_var)
+            ctx.mark_dirty(x)
         else:
             mean, var = running_mean.contiguous(), running_var.contiguous()
             ctx.mark_dirty(x)
@@ -184,7 +191,7 @@ class InPlaceABNSync(autograd.Function):
             running_var.mul_((1 - ctx.momentum)).add_(ctx.momentum * var * (float(count) / (count - 1)))
 
             # Mark in-place modified tensors
-            ctx.mark_dirty(x, running_mean, running_var)
+            ctx.mark_dirty(x)
         else:
             mean, var = running_mean.contiguous(), running_var.contiguous()
             ctx.mark_dirty(x)
@@ -1,9 +1,17 @@
 import numpy as np
 import torch
 
-from extensions.nms.src.cpu_nms import cpu_nms
-from extensions.nms.src.cpu_soft_nms import cpu_soft_nms
-from extensions.nms.src.gpu_nms import gpu_nms
+try:
+    from extensions.nms.src.cpu_nms import cpu_nms
+    from extensions.nms.src.cpu_soft_nms import cpu_soft_nms
+except ImportError:
+    # The cython extensions are not built, fall back to numpy.
+    from extensions.nms.py_nms import cpu_nms, cpu_soft_nms
+
+try:
+    from extensions.nms.src.gpu_nms import gpu_nms
+except ImportError:
+    gpu_nms = None
 
 
 def nms(dets, thresh, device_id=None):
@@ -20,9 +28,9 @@ def nms(dets, thresh, device_id=None):
         inds = []
     else:
         inds = (gpu_nms(dets, thresh, device_id=device_id)
-                if device_id is not None else cpu_nms(dets, thresh))
+                if device_id is not None and gpu_nms is not None else cpu_nms(dets, thresh))
 
-    return np.array(inds, dtype=np.int)
+    return np.array(inds, dtype=np.int64)
 
 
 def soft_nms(dets, max_threshold=0.3, method='linear', sigma=0.5, min_score=0):
@@ -43,5 +51,5 @@ def soft_nms(dets, max_threshold=0.3, method='linear', sigma=0.5, min_score=0):
             inds, dtype=torch.long), dets.new_tensor(new_dets)
     else:
         return np.array(
-            inds, dtype=np.int), np.array(
+            inds, dtype=np.int64), np.array(
                 new_dets, dtype=np.float32)
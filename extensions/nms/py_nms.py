@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The numpy nms & soft nms, used when the cython extensions are not built.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+def cpu_nms(dets, thresh):
+    """The greedy nms of the cython cpu_nms, the overlaps of every kept box are vectorized."""
+    x1, y1, x2, y2, scores = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3], dets[:, 4]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0.0, xx2 - xx1 + 1) * np.maximum(0.0, yy2 - yy1 + 1)
+        ovr = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[1:][ovr < thresh]
+
+    return keep
+
+
+def cpu_soft_nms(boxes_in, sigma=0.5, Nt=0.3, threshold=0.001, method=0):
+    """The soft nms of the cython cpu_soft_nms, method 0: hard, 1: linear & 2: gaussian.
+
+    The boxes dropped under the threshold are removed in order instead of swapped with the last box,
+    so only the order of the exactly tied scores may differ.
+    """
+    boxes = boxes_in.copy()
+    inds = np.arange(boxes.shape[0])
+    for i in range(boxes.shape[0]):
+        if i >= boxes.shape[0]:
+            break
+
+        maxpos = i + int(np.argmax(boxes[i:, 4]))
+        boxes[[i, maxpos]] = boxes[[maxpos, i]]
+        inds[[i, maxpos]] = inds[[maxpos, i]]
+
+        tx1, ty1, tx2, ty2 = boxes[i, :4]
+        rest = boxes[i + 1:]
+        area = (rest[:, 2] - rest[:, 0] + 1) * (rest[:, 3] - rest[:, 1] + 1)
+        iw = np.minimum(tx2, rest[:, 2]) - np.maximum(tx1, rest[:, 0]) + 1
+        ih = np.minimum(ty2, rest[:, 3]) - np.maximum(ty1, rest[:, 1]) + 1
+        overlap = (iw > 0) & (ih > 0)
+        ua = (tx2 - tx1 + 1) * (ty2 - ty1 + 1) + area - iw * ih
+        ov = np.where(overlap, iw * ih / np.where(overlap, ua, 1.0), 0.0)
+
+        if method == 1:
+            weight = np.where(ov > Nt, 1 - ov, 1.0)
+        elif method == 2:
+            weight = np.exp(-(ov * ov) / sigma)
+        else:
+            weight = np.where(ov > Nt, 0.0, 1.0)
+
+        rest[:, 4] = np.where(overlap, weight * rest[:, 4], rest[:, 4])
+        valid = np.concatenate((np.ones((i + 1,), dtype=bool), rest[:, 4] >= threshold))
+        boxes = boxes[valid]
+        inds = inds[valid]
+
+    return boxes, inds
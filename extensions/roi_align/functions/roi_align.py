@@ -1,23 +1,31 @@
 from torch.autograd import Function, Variable
 
-from .. import roi_align_cuda
+from extensions.roialign.py_roi_align import roi_align as py_roi_align
+
+try:
+    from .. import roi_align_cuda
+except ImportError:
+    roi_align_cuda = None
+
+
+def _out_hw(out_size):
+    if isinstance(out_size, int):
+        return out_size, out_size
+    elif isinstance(out_size, tuple):
+        assert len(out_size) == 2
+        assert isinstance(out_size[0], int)
+        assert isinstance(out_size[1], int)
+        return out_size
+    else:
+        raise TypeError(
+            '"out_size" must be an integer or tuple of integers')
 
 
 class RoIAlignFunction(Function):
 
     @staticmethod
     def forward(ctx, features, rois, out_size, spatial_scale, sample_num=0):
-        if isinstance(out_size, int):
-            out_h = out_size
-            out_w = out_size
-        elif isinstance(out_size, tuple):
-            assert len(out_size) == 2
-            assert isinstance(out_size[0], int)
-            assert isinstance(out_size[1], int)
-            out_h, out_w = out_size
-        else:
-            raise TypeError(
-                '"out_size" must be an integer or tuple of integers')
+        out_h, out_w = _out_hw(out_size)
         ctx.spatial_scale = spatial_scale
         ctx.sample_num = sample_num
         ctx.save_for_backward(rois)
@@ -58,4 +66,10 @@ class RoIAlignFunction(Function):
         return grad_input, grad_rois, None, None, None
 
 
-roi_align = RoIAlignFunction.apply
+def roi_align(features, rois, out_size, spatial_scale, sample_num=0):
+    if roi_align_cuda is None or not features.is_cuda:
+        out_h, out_w = _out_hw(out_size)
+        return py_roi_align(features, rois, out_h, out_w, spatial_scale, sample_num,
+                            roi_end_offset=1., min_roi_size=0.)
+
+    return RoIAlignFunction.apply(features, rois, out_size, spatial_scale, sample_num)
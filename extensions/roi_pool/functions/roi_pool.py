@@ -1,24 +1,32 @@
 import torch
 from torch.autograd import Function
 
-from .. import roi_pool_cuda
+from extensions.roipool.py_roi_pool import roi_pool as py_roi_pool
+
+try:
+    from .. import roi_pool_cuda
+except ImportError:
+    roi_pool_cuda = None
+
+
+def _out_hw(out_size):
+    if isinstance(out_size, int):
+        return out_size, out_size
+    elif isinstance(out_size, tuple):
+        assert len(out_size) == 2
+        assert isinstance(out_size[0], int)
+        assert isinstance(out_size[1], int)
+        return out_size
+    else:
+        raise TypeError(
+            '"out_size" must be an integer or tuple of integers')
 
 
 class RoIPoolFunction(Function):
 
     @staticmethod
     def forward(ctx, features, rois, out_size, spatial_scale):
-        if isinstance(out_size, int):
-            out_h = out_size
-            out_w = out_size
-        elif isinstance(out_size, tuple):
-            assert len(out_size) == 2
-            assert isinstance(out_size[0], int)
-            assert isinstance(out_size[1], int)
-            out_h, out_w = out_size
-        else:
-            raise TypeError(
-                '"out_size" must be an integer or tuple of integers')
+        out_h, out_w = _out_hw(out_size)
         assert features.is_cuda
         ctx.save_for_backward(rois)
         num_channels = features.size(1)
@@ -53,4 +61,9 @@ class RoIPoolFunction(Function):
         return grad_input, grad_rois, None, None
 
 
-roi_pool = RoIPoolFunction.apply
+def roi_pool(features, rois, out_size, spatial_scale):
+    if roi_pool_cuda is None or not features.is_cuda:
+        out_h, out_w = _out_hw(out_size)
+        return py_roi_pool(features, rois, out_h, out_w, spatial_scale, round_roi=False)
+
+    return RoIPoolFunction.apply(features, rois, out_size, spatial_scale)
@@ -5,6 +5,8 @@ from torch.autograd import Variable
 import os
 from torch.autograd.function import once_differentiable
 
+from extensions.roialign.py_roi_align import roi_align
+
 torch_ver = torch.__version__[:3]
 
 from torch.utils.cpp_extension import load
@@ -14,10 +16,14 @@ build_path = '/tmp/bulid'
 if not os.path.exists(build_path):
     os.makedirs(build_path)
 
-roialign = load(name='roialign', sources=['extensions/roialign/src/roi_align_binding.cpp',
-                                          'extensions/roialign/src/roi_align_forward_cuda.cu',
-                                          'extensions/roialign/src/roi_align_backward_cuda.cu'],
-                build_directory=build_path, verbose=True)
+try:
+    roialign = load(name='roialign', sources=['extensions/roialign/src/roi_align_binding.cpp',
+                                              'extensions/roialign/src/roi_align_forward_cuda.cu',
+                                              'extensions/roialign/src/roi_align_backward_cuda.cu'],
+                    build_directory=build_path, verbose=True)
+except (ImportError, OSError, RuntimeError):
+    # roi_align is not built, use the pure torch roi_align.
+    roialign = None
 
 
 class RoIAlignFunction(Function):
@@ -109,6 +115,10 @@ class RoIAlign2D(Module):
         # features is a Variable/FloatTensor of size BxCxHxW
         # rois is a (optional: list of) Variable/FloatTensor IDX,Xmin,Ymin,Xmax,Ymax (normalized to [0,1])
         rois = preprocess_rois(rois)
+        if roialign is None:
+            return roi_align(features, rois, self.pooled_height, self.pooled_width,
+                             self.spatial_scale if scale is None else scale, self.sampling_ratio)
+
         if scale is None:
             output = RoIAlignFunction.apply(features,
                                             rois,
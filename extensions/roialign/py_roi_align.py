@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The pure torch roi align, used when the compiled roi align is not available.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import torch
+
+
+def _sample_weights(roi_start, roi_end, size, pooled_size, spatial_scale, sampling_ratio,
+                    roi_end_offset, min_roi_size):
+    """The feature indices & bilinear weights of the samples of every bin along one axis.
+
+    Returns:
+      index, weight of shape [K, pooled_size, 2 * grid], the weights of a bin sum to 1 over the sampling grid.
+    """
+    roi_start = roi_start * spatial_scale
+    roi_len = ((roi_end + roi_end_offset) * spatial_scale - roi_start).clamp(min=min_roi_size)
+    bin_len = roi_len / pooled_size
+    if sampling_ratio > 0:
+        grid = torch.full_like(roi_len, sampling_ratio)
+    else:
+        grid = torch.ceil(roi_len / pooled_size)
+
+    bins = torch.arange(pooled_size, dtype=roi_len.dtype, device=roi_len.device)
+    samples = torch.arange(max(int(grid.max().item()), 1), dtype=roi_len.dtype, device=roi_len.device)
+    grid = grid[:, None, None]
+    coord = roi_start[:, None, None] + bins[None, :, None] * bin_len[:, None, None] \
+        + (samples[None, None, :] + 0.5) * bin_len[:, None, None] / grid.clamp(min=1)
+    # The samples out of the grid of the roi & beyond the feature map are zero.
+    valid = (samples[None, None, :] < grid) & (coord >= -1.0) & (coord <= size)
+
+    coord = coord.clamp(min=0, max=size - 1)
+    low = coord.floor()
+    high = (low + 1).clamp(max=size - 1)
+    frac = coord - low
+    scale = valid.to(coord.dtype) / grid.clamp(min=1)
+    index = torch.stack((low.long(), high.long()), 3).view(roi_len.size(0), pooled_size, -1)
+    weight = torch.stack(((1 - frac) * scale, frac * scale), 3).view(roi_len.size(0), pooled_size, -1)
+    return index, weight
+
+
+def roi_align(features, rois, pooled_height, pooled_width, spatial_scale, sampling_ratio=0,
+              roi_end_offset=0., min_roi_size=1.):
+    """RoIAlign of the caffe2 rules: the samples within 1 cell of the border are clamped onto the border.
+
+    The bilinear samples of all the bins are one sparse matrix applied to the channel-last features,
+    the autograd of the sparse mm gives the backward.
+
+    Args:
+      features: The feature maps of shape [B, C, H, W].
+      rois: [K, 5] of (batch_index, x1, y1, x2, y2) or [K, 4] of the image 0, in the input image.
+      sampling_ratio: The samples per bin along each axis, adaptive (ceil(roi_size / pooled_size)) if <= 0.
+      roi_end_offset & min_roi_size: The roi size is max((x2 + roi_end_offset) * scale - x1 * scale, min_roi_size),
+        0 & 1 for roialign (caffe2), 1 & 0 for roi_align (mmdet).
+
+    Returns:
+      The pooled features of shape [K, C, pooled_height, pooled_width].
+    """
+    batch_size, num_channels, height, width = features.size()
+    num_rois = rois.size(0)
+    if num_rois == 0:
+        return features.new_zeros((0, num_channels, pooled_height, pooled_width))
+
+    rois = rois.detach().to(features.dtype)
+    if rois.size(1) == 4:
+        rois = torch.cat((rois.new_zeros((num_rois, 1)), rois), 1)
+
+    y_index, y_weight = _sample_weights(rois[:, 2], rois[:, 4], height, pooled_height, spatial_scale,
+                                        sampling_ratio, roi_end_offset, min_roi_size)
+    x_index, x_weight = _sample_weights(rois[:, 1], rois[:, 3], width, pooled_width, spatial_scale,
+                                        sampling_ratio, roi_end_offset, min_roi_size)
+
+    # The (bin, sample) entries of the sparse matrix, [K, PH, PW, SY, SX].
+    batch_index = rois[:, 0].long()[:, None, None, None, None]
+    col = (batch_index * height + y_index[:, :, None, :, None]) * width + x_index[:, None, :, None, :]
+    value = y_weight[:, :, None, :, None] * x_weight[:, None, :, None, :]
+    num_bins = num_rois * pooled_height * pooled_width
+    row = torch.arange(num_bins, device=features.device)[:, None].expand(num_bins, col[0, 0, 0].numel())
+    sample_matrix = torch.sparse_coo_tensor(torch.stack((row.reshape(-1), col.reshape(-1))), value.reshape(-1),
+                                            (num_bins, batch_size * height * width))
+
+    output = torch.sparse.mm(sample_matrix, features.permute(0, 2, 3, 1).reshape(-1, num_channels))
+    return output.view(num_rois, pooled_height, pooled_width, num_channels).permute(0, 3, 1, 2).contiguous()
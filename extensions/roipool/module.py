@@ -9,6 +9,8 @@ from torch.nn import Module
 from torch.autograd import Function
 from torch.utils.cpp_extension import load
 
+from extensions.roipool.py_roi_pool import roi_pool
+
 torch_ver = torch.__version__[:3]
 
 print('compiling/loading roi_pool')
@@ -16,9 +18,13 @@ build_path = '/tmp/bulid/roipool'
 if not os.path.exists(build_path):
     os.makedirs(build_path)
 
-roipool = load(name='roipool', sources=['extensions/roipool/src/roi_pool_binding.cpp',
-                                        'extensions/roipool/src/roi_pool_kernel.cu'],
-               build_directory=build_path, verbose=True)
+try:
+    roipool = load(name='roipool', sources=['extensions/roipool/src/roi_pool_binding.cpp',
+                                            'extensions/roipool/src/roi_pool_kernel.cu'],
+                   build_directory=build_path, verbose=True)
+except (ImportError, OSError, RuntimeError):
+    # roi_pool is not built, use the pure torch roi_pool.
+    roipool = None
 
 
 class ROIPoolFunction(Function):
@@ -67,6 +73,9 @@ class RoIPool2D(Module):
 
     # feat: BxCxHxW,  rois: Kx5 (batch_idx, xmin, ymin, xmax, ymax) without normalize
     def forward(self, feat, rois, scale=None):
+        if roipool is None:
+            return roi_pool(feat, rois, self.pool_h, self.pool_w, self.scale if scale is None else scale)
+
         if scale is None:
             output = ROIPoolFunction.apply(feat, rois, self.pool_h, self.pool_w, self.scale, self.training)
         else:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The pure torch roi pool, used when the compiled roi pool is not available.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import torch
+import torch.nn.functional as F
+
+
+def _c_round(x):
+    # The round of c, half away from zero.
+    return torch.sign(x) * torch.floor(x.abs() + 0.5)
+
+
+def _bin_edges(roi_start, roi_end, size, pooled_size, spatial_scale, round_roi):
+    """The [start, end) cells of every bin along one axis, clipped to the feature map, of shape [K, pooled_size]."""
+    if round_roi:
+        roi_start = _c_round(roi_start * spatial_scale)
+        roi_len = (_c_round(roi_end * spatial_scale) - roi_start + 1).clamp(min=1)
+    else:
+        roi_start = roi_start * spatial_scale
+        roi_len = (roi_end + 1) * spatial_scale - roi_start
+
+    bin_len = roi_len / pooled_size
+    bins = torch.arange(pooled_size, dtype=roi_len.dtype, device=roi_len.device)
+    if round_roi:
+        start = torch.floor(bins[None, :] * bin_len[:, None]) + roi_start[:, None]
+        end = torch.ceil((bins[None, :] + 1) * bin_len[:, None]) + roi_start[:, None]
+    else:
+        start = torch.floor(bins[None, :] * bin_len[:, None] + roi_start[:, None])
+        end = torch.ceil((bins[None, :] + 1) * bin_len[:, None] + roi_start[:, None])
+        # The malformed rois are pooled into zeros.
+        end = torch.where(roi_len[:, None] > 0, end, start)
+
+    return start.clamp(min=0, max=size).long(), end.clamp(min=0, max=size).long()
+
+
+def _floor_log2(length, max_level):
+    level = torch.zeros_like(length)
+    for i in range(1, max_level + 1):
+        level += (length >= (1 << i)).long()
+
+    return level
+
+
+def _max_tables(features, max_level_y, max_level_x):
+    """The max over the 2 ** ly x 2 ** lx windows of the features [B, C, H, W] at every cell, the windows lie within
+    the feature map & the tables are padded to [H, W].
+
+    Returns:
+      The channel-last tables of shape [LX * LY * B * H * W, C].
+    """
+    num_channels, height, width = features.size(1), features.size(2), features.size(3)
+    table_list = list()
+    for lx in range(max_level_x + 1):
+        for ly in range(max_level_y + 1):
+            table = F.max_pool2d(features, (1 << ly, 1 << lx), stride=1) if ly > 0 or lx > 0 else features
+            table_list.append(F.pad(table, (0, width - table.size(3), 0, height - table.size(2))))
+
+    return torch.stack(table_list, 0).permute(0, 1, 3, 4, 2).reshape(-1, num_channels)
+
+
+def roi_pool(features, rois, pooled_height, pooled_width, spatial_scale, round_roi=True):
+    """RoIPool, the max of every bin is looked up from the 4 overlapped power-of-2 windows of the max tables.
+
+    The window holding the max is selected without grad & the pooled features are gathered from it,
+    the backward is one scatter onto the tables instead of the grads of the pairwise max.
+
+    Args:
+      features: The feature maps of shape [B, C, H, W].
+      rois: [K, 5] of (batch_index, x1, y1, x2, y2) in the input image.
+      round_roi: The caffe rules of roipool, the roi is rounded to the cells with its end included.
+        The mmdet rules of roi_pool otherwise, the roi ends at (x2 + 1) * spatial_scale.
+
+    Returns:
+      The pooled features of shape [K, C, pooled_height, pooled_width], the empty bins are 0.
+    """
+    batch_size, num_channels, height, width = features.size()
+    num_rois = rois.size(0)
+    if num_rois == 0:
+        return features.new_zeros((0, num_channels, pooled_height, pooled_width))
+
+    rois = rois.detach().to(features.dtype)
+    y_start, y_end = _bin_edges(rois[:, 2], rois[:, 4], height, pooled_height, spatial_scale, round_roi)
+    x_start, x_end = _bin_edges(rois[:, 1], rois[:, 3], width, pooled_width, spatial_scale, round_roi)
+    y_len, x_len = (y_end - y_start)[:, :, None], (x_end - x_start)[:, None, :]
+    empty = (y_len <= 0) | (x_len <= 0)
+    y_len, x_len = y_len.clamp(min=1), x_len.clamp(min=1)
+
+    max_level_y = int(_floor_log2(y_len, height.bit_length()).max().item())
+    max_level_x = int(_floor_log2(x_len, width.bit_length()).max().item())
+    level_y, level_x = _floor_log2(y_len, max_level_y), _floor_log2(x_len, max_level_x)
+    tables = _max_tables(features, max_level_y, max_level_x)
+
+    # The table rows of the 4 windows of every bin, [K, PH, PW].
+    y_start, x_start = y_start[:, :, None].clamp(max=height - 1), x_start[:, None, :].clamp(max=width - 1)
+    y_last, x_last = y_start + y_len - (1 << level_y), x_start + x_len - (1 << level_x)
+    base = ((level_x * (max_level_y + 1) + level_y) * batch_size + rois[:, 0].long()[:, None, None]) * height
+    with torch.no_grad():
+        max_value, max_row = None, None
+        for y in (y_start, y_last):
+            for x in (x_start, x_last):
+                row = ((base + y) * width + x).view(-1, 1)
+                value = tables.index_select(0, row.view(-1))
+                if max_value is None:
+                    max_value, max_row = value, row.expand_as(value)
+                else:
+                    larger = value > max_value
+                    max_value, max_row = torch.where(larger, value, max_value), torch.where(larger, row, max_row)
+
+    output = tables.gather(0, max_row).masked_fill(empty.view(-1, 1), 0)
+    return output.view(num_rois, pooled_height, pooled_width, num_channels).permute(0, 3, 1, 2).contiguous()
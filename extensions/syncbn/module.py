@@ -20,6 +20,7 @@ from torch.nn.modules.batchnorm import _BatchNorm
 from torch.nn.parallel._functions import ReduceAddCoalesced, Broadcast
 from torch.utils.cpp_extension import load
 
+from extensions.syncbn import py_syncbn
 from extensions.syncbn.allreduce import allreduce
 from extensions.syncbn.comm import SyncMaster
 
@@ -31,13 +32,20 @@ build_path = '/tmp/bulid/syncbn'
 if not os.path.exists(build_path):
     os.makedirs(build_path)
 
-syncbn = load(name='syncbn', sources=['extensions/syncbn/src/operator.cpp',
-                                      'extensions/syncbn/src/syncbn_kernel.cu'],
-              build_directory=build_path, verbose=True)
+try:
+    syncbn = load(name='syncbn', sources=['extensions/syncbn/src/operator.cpp',
+                                          'extensions/syncbn/src/syncbn_kernel.cu'],
+                  build_directory=build_path, verbose=True)
+except (ImportError, OSError, RuntimeError):
+    # syncbn is not built, use the pure torch syncbn.
+    syncbn = None
 
 
 def sum_square(input):
     r"""Calculate sum of elements and sum of squares for Batch Normalization"""
+    if syncbn is None or not input.is_cuda:
+        return py_syncbn.sum_square(input)
+
     return _sum_square.apply(input)
 
 
@@ -53,7 +61,7 @@ class _sum_square(Function):
 
     @staticmethod
     def backward(ctx, gradSum, gradSquare):
-        input, = ctx.saved_variables
+        input, = ctx.saved_tensors
         if input.is_cuda:
             gradInput = syncbn.sumsquare_backward(input, gradSum, gradSquare)
         else:
@@ -73,7 +81,7 @@ class _batchnormtrain(Function):
 
     @staticmethod
     def backward(ctx, gradOutput):
-        input, mean, std, gamma, beta = ctx.saved_variables
+        input, mean, std, gamma, beta = ctx.saved_tensors
         if gradOutput.is_cuda:
             gradInput, gradMean, gradStd, gradGamma, gradBeta = \
                 syncbn.batchnorm_backward(gradOutput, input, mean,
@@ -98,6 +106,9 @@ def batchnormtrain(input, mean, std, gamma, beta):
         - Output: :math:`(N, C)` or :math:`(N, C, L)` (same shape as input)
 
     """
+    if syncbn is None or not input.is_cuda:
+        return py_syncbn.batchnormtrain(input, mean, std, gamma, beta)
+
     return _batchnormtrain.apply(input, mean, std, gamma, beta)
 
 
@@ -124,7 +135,10 @@ class _SyncBatchNorm(_BatchNorm):
         xsum, xsqsum = sum_square(input)
 
         # all-reduce for global sum(x) and sum(x^2)
-        if self._parallel_id == 0:
+        if self._parallel_id is None:
+            # Not replicated by the data parallel, the stats of the input only.
+            mean, inv_std = self._compute_mean_std(xsum, xsqsum, N)
+        elif self._parallel_id == 0:
             mean, inv_std = self._sync_master.run_master(_ChildMessage(xsum, xsqsum, N))
         else:
             mean, inv_std = self._slave_pipe.run_slave(_ChildMessage(xsum, xsqsum, N))
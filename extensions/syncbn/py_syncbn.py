@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# The pure torch ops of the syncbn, used on cpu or when the compiled syncbn is not available.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+
+def sum_square(input):
+    """The sum(x) & sum(x^2) over the (B, L) of the input [B, C, L], of shape [C]."""
+    return input.sum(2).sum(0), input.pow(2).sum(2).sum(0)
+
+
+def batchnormtrain(input, mean, std, gamma, beta):
+    """(x - mean) / std * gamma + beta of the input [B, C, L] by channel, gamma & beta may be None."""
+    output = (input - mean.view(1, -1, 1)) / std.view(1, -1, 1)
+    if gamma is not None:
+        output = output * gamma.view(1, -1, 1)
+
+    if beta is not None:
+        output = output + beta.view(1, -1, 1)
+
+    return output
@@ -10,35 +10,32 @@ from __future__ import print_function
 
 import torch
 
-from loss.modules.cls_modules import FCCELoss, FCCenterLoss
-from loss.modules.det_modules import FRLoss, SSDMultiBoxLoss, YOLOv3Loss, SSDFocalLoss
-from loss.modules.pose_modules import OPMseLoss
-from loss.modules.seg_modules import FSCELoss, FSOhemCELoss, FSAuxCELoss, FSAuxEncCELoss, FSAuxOhemCELoss
+from utils.helpers.import_helper import ImportHelper
 from utils.tools.logger import Logger as Log
 
 
 CLS_LOSS_DICT = {
-    'fc_ce_loss': FCCELoss,
-    'fc_center_loss': FCCenterLoss
+    'fc_ce_loss': 'loss.modules.cls_modules.FCCELoss',
+    'fc_center_loss': 'loss.modules.cls_modules.FCCenterLoss'
 }
 
 DET_LOSS_DICT = {
-    'ssd_multibox_loss': SSDMultiBoxLoss,
-    'ssd_focal_loss': SSDFocalLoss,
-    'yolov3_det_loss': YOLOv3Loss,
-    'fr_loss': FRLoss
+    'ssd_multibox_loss': 'loss.modules.det_modules.SSDMultiBoxLoss',
+    'ssd_focal_loss': 'loss.modules.det_modules.SSDFocalLoss',
+    'yolov3_det_loss': 'loss.modules.det_modules.YOLOv3Loss',
+    'fr_loss': 'loss.modules.det_modules.FRLoss'
 }
 
 POSE_LOSS_DICT = {
-    'op_mse_loss': OPMseLoss,
+    'op_mse_loss': 'loss.modules.pose_modules.OPMseLoss',
 }
 
 SEG_LOSS_DICT = {
-    'fs_ce_loss': FSCELoss,
-    'fs_ohemce_loss': FSOhemCELoss,
-    'fs_auxce_loss':FSAuxCELoss,
-    'fs_auxencce_loss': FSAuxEncCELoss,
-    'fs_auxohemce_loss': FSAuxOhemCELoss
+    'fs_ce_loss': 'loss.modules.seg_modules.FSCELoss',
+    'fs_ohemce_loss': 'loss.modules.seg_modules.FSOhemCELoss',
+    'fs_auxce_loss': 'loss.modules.seg_modules.FSAuxCELoss',
+    'fs_auxencce_loss': 'loss.modules.seg_modules.FSAuxEncCELoss',
+    'fs_auxohemce_loss': 'loss.modules.seg_modules.FSAuxOhemCELoss'
 }
 
 
@@ -59,7 +56,7 @@ class LossManager(object):
             Log.error('Loss: {} not valid!'.format(key))
             exit(1)
 
-        loss = CLS_LOSS_DICT[key](self.configer)
+        loss = ImportHelper.load(CLS_LOSS_DICT[key])(self.configer)
         return self._parallel(loss)
 
     def get_seg_loss(self, loss_type=None):
@@ -68,7 +65,7 @@ class LossManager(object):
             Log.error('Loss: {} not valid!'.format(key))
             exit(1)
 
-        loss = SEG_LOSS_DICT[key](self.configer)
+        loss = ImportHelper.load(SEG_LOSS_DICT[key])(self.configer)
         return self._parallel(loss)
 
     def get_det_loss(self, loss_type=None):
@@ -77,7 +74,7 @@ class LossManager(object):
             Log.error('Loss: {} not valid!'.format(key))
             exit(1)
 
-        loss = DET_LOSS_DICT[key](self.configer)
+        loss = ImportHelper.load(DET_LOSS_DICT[key])(self.configer)
         return self._parallel(loss)
 
     def get_pose_loss(self, loss_type=None):
@@ -86,6 +83,6 @@ class LossManager(object):
             Log.error('Loss: {} not valid!'.format(key))
             exit(1)
 
-        loss = POSE_LOSS_DICT[key](self.configer)
+        loss = ImportHelper.load(POSE_LOSS_DICT[key])(self.configer)
         return self._parallel(loss)
 
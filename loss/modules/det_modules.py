@@ -51,7 +51,7 @@ class SSDFocalLoss(nn.Module):
         t = self._one_hot_embeding(y.data.cpu())
         t = Variable(t).cuda()  # [N, 20]
 
-        logit = F.softmax(x)
+        logit = F.softmax(x.float(), dim=1)
         logit = logit.clamp(1e-7, 1.-1e-7)
         conf_loss_tmp = -1 * t.float() * torch.log(logit)
         conf_loss_tmp = alpha * conf_loss_tmp * (1-logit)**gamma
@@ -105,42 +105,24 @@ class SSDMultiBoxLoss(nn.Module):
         super(SSDMultiBoxLoss, self).__init__()
         self.num_classes = configer.get('data', 'num_classes')
 
-    def _cross_entropy_loss(self, x, y):
-        """Cross entropy loss w/o averaging across all samples.
-
-        Args:
-          x(tensor): sized [N,D]
-          y(tensor): sized [N,]
-
-        Returns:
-          (tensor): cross entropy loss, sized [N,]
-
-        """
-        xmax = x.data.max()
-        log_sum_exp = torch.log(torch.sum(torch.exp(x - xmax), dim=1)) + xmax
-        return log_sum_exp.view(-1, 1) - x.gather(1, y.view(-1, 1))
-
-    def _hard_negative_mining(self, conf_loss, pos):
-        """Return negative indices that is 3x the number as positive indices.
+    @staticmethod
+    def _hard_negative_mining(mining_loss, pos):
+        """Return the negatives of the 3x highest losses of the positive number per image.
 
         Args:
-          conf_loss: (tensor) cross entropy loss between conf_preds and conf_targets, sized [N*8732,]
+          mining_loss: (tensor) the detached cross entropy loss, the positives set to 0, sized [N, 8732]
           pos: (tensor) positive(matched) box indices, sized [N, 8732]
         Returns:
           (tensor): negative indices, sized [N, 8732]
 
         """
         batch_size, num_boxes = pos.size()
-
-        conf_loss = conf_loss.view(batch_size, -1)  # [N,8732]
-        conf_loss[pos] = 0  # set pos boxes = 0, the rest are neg conf_loss
-
-        _, idx = conf_loss.sort(1, descending=True)  # sort by neg conf_loss
-        _, rank = idx.sort(1)  # [N,8732]
-
-        num_pos = pos.long().sum(1)  # [N,1]
-        num_neg = torch.clamp(3 * num_pos, min=1, max=num_boxes-1)  # [N,1]
-        neg = rank < num_neg.unsqueeze(1).expand_as(rank)  # [N,8732]
+        num_pos = pos.long().sum(1)  # [N,]
+        num_neg = torch.clamp(3 * num_pos, min=1, max=num_boxes - 1)  # [N,]
+        # The per-image count lives on the device, one sort & a scatter of the ranks avoid the host sync of topk.
+        _, idx = mining_loss.sort(1, descending=True)  # sort by neg conf_loss
+        rank = torch.arange(num_boxes, device=pos.device).unsqueeze(0).expand_as(idx)
+        neg = torch.zeros_like(pos).scatter_(1, idx, rank < num_neg.unsqueeze(1))  # [N,8732]
         return neg
 
     @staticmethod
@@ -170,38 +152,31 @@ class SSDMultiBoxLoss(nn.Module):
 
         """
         _, loc_preds, conf_preds = outputs
+        # The log-sum-exp & the sort of hard negative mining need the fp32 range under amp.
+        loc_preds, conf_preds = loc_preds.float(), conf_preds.float()
         loc_targets, conf_targets = targets
         batch_size, num_boxes, _ = loc_preds.size()
 
         pos = conf_targets > 0  # [N,8732], pos means the box matched.
-        num_matched_boxes = pos.data.float().sum()
-        if num_matched_boxes == 0:
-            print("No matched boxes")
+        # No boolean indexing below, the masks keep the shapes static & the device unsynced.
+        num_matched_boxes = pos.float().sum()
 
         # loc_loss.
         pos_mask = pos.unsqueeze(2).expand_as(loc_preds)  # [N, 8732, 4]
-        pos_loc_preds = loc_preds[pos_mask].view(-1, 4)  # [pos,4]
-        pos_loc_targets = loc_targets[pos_mask].view(-1, 4)  # [pos,4]
-        loc_loss = self.smooth_l1_loss(pos_loc_preds, pos_loc_targets)  # F.smooth_l1_loss(pos_loc_preds, pos_loc_targets, reduction='sum')
-
-        # conf_loss.
-        conf_loss = self._cross_entropy_loss(conf_preds.view(-1, self.num_classes), conf_targets.view(-1))  # [N*8732,]
-        neg = self._hard_negative_mining(conf_loss, pos)    # [N,8732]
-        pos_mask = pos.unsqueeze(2).expand_as(conf_preds)  # [N,8732,21]
-        neg_mask = neg.unsqueeze(2).expand_as(conf_preds)  # [N,8732,21]
-        mask = (pos_mask + neg_mask).gt(0)
-        pos_and_neg = (pos + neg).gt(0)
-        preds = conf_preds[mask].view(-1, self.num_classes)  # [pos + neg,21]
-        targets = conf_targets[pos_and_neg]                  # [pos + neg,]
-        conf_loss = F.cross_entropy(preds, targets, reduction='sum', ignore_index=-1)
-
-        if num_matched_boxes > 0:
-            loc_loss = loc_loss / num_matched_boxes
-            conf_loss = conf_loss / num_matched_boxes
-        else:
-            return conf_loss + loc_loss
-
-        Log.debug("loc_loss: %f, cls_loss: %f" % (float(loc_loss.item()), float(conf_loss.item())))
+        loc_loss = self.smooth_l1_loss(torch.where(pos_mask, loc_preds, torch.zeros_like(loc_preds)),
+                                       torch.where(pos_mask, loc_targets.float(), torch.zeros_like(loc_preds)))
+
+        # conf_loss, the ce of every prior once, the ignored priors (-1) are 0.
+        conf_loss = F.cross_entropy(conf_preds.view(-1, self.num_classes), conf_targets.view(-1),
+                                    reduction='none', ignore_index=-1).view(batch_size, num_boxes)  # [N,8732]
+        neg = self._hard_negative_mining(conf_loss.detach().masked_fill(pos, 0), pos)  # [N,8732]
+        conf_loss = (conf_loss * (pos | neg).float()).sum()
+
+        # The sums are not normalized if no box matched.
+        loc_loss = loc_loss / num_matched_boxes.clamp(min=1)
+        conf_loss = conf_loss / num_matched_boxes.clamp(min=1)
+        if Log.is_debug():
+            Log.debug("loc_loss: %f, cls_loss: %f" % (float(loc_loss.item()), float(conf_loss.item())))
 
         return loc_loss + conf_loss
 
@@ -210,36 +185,43 @@ class YOLOv3Loss(nn.Module):
     def __init__(self, configer):
         super(YOLOv3Loss, self).__init__()
         self.configer = configer
-        self.mse_loss = nn.MSELoss(reduction='sum')  # 'sum'
-        self.bce_loss = nn.BCELoss(reduction='sum')
 
     def forward(self, prediction, targets, objmask, noobjmask):
-        # Get outputs
-        x = prediction[..., 0]  # Center x
-        y = prediction[..., 1]  # Center y
-        w = prediction[..., 2]  # Width
-        h = prediction[..., 3]  # Height
-        conf = prediction[..., 4]  # Conf
-        pred_cls = prediction[..., 5:]  # Cls pred.
-
-        # Get targets
-        tx = targets[..., 0]  # Center x
-        ty = targets[..., 1]  # Center y
-        tw = targets[..., 2]  # Width
-        th = targets[..., 3]  # Height
-        tcls = targets[..., 5:]  # Cls pred.
-
-        #  losses.
-        obj_cnt = max(objmask.sum(), 1.0)
-        loss_x = self.bce_loss(x * objmask, tx * objmask)
-        loss_y = self.bce_loss(y * objmask, ty * objmask)
-        loss_w = self.mse_loss(w * objmask, tw * objmask)
-        loss_h = self.mse_loss(h * objmask, th * objmask)
+        """
+        Args:
+          prediction: the logits of YOLODetectionLayer, sized [B, num_priors, 5 + num_classes].
+          targets: the sparse (tx, ty, tw, th, multi-hot cls) of the matched priors, sized [P, 4 + num_classes],
+                   or the dense (tx, ty, tw, th, conf, multi-hot cls), sized [B, num_priors, 5 + num_classes].
+          objmask: the (batch index, prior index) of the matched priors, sized [P, 2],
+                   or the dense mask of the matched priors, sized [B, num_priors].
+          noobjmask: the dense mask of the no-object priors, sized [B, num_priors].
+        """
+        # The losses in fp32 under amp.
+        prediction = prediction.float()
+        if targets.dim() == 3:
+            # The dense targets, gather the matched priors.
+            objmask = (objmask > 0).nonzero()
+            dense_targets = targets[objmask[:, 0], objmask[:, 1]]
+            targets = torch.cat([dense_targets[:, :4], dense_targets[:, 5:]], 1)
+
+        # Only the matched priors for the coord & the cls terms.
+        obj_prediction = prediction[objmask[:, 0], objmask[:, 1]]  # [P, 5 + num_classes]
+        obj_targets = targets.float()
+        obj_cnt = max(obj_targets.size(0), 1)
+        loss_x = F.binary_cross_entropy_with_logits(obj_prediction[:, 0], obj_targets[:, 0], reduction='sum')
+        loss_y = F.binary_cross_entropy_with_logits(obj_prediction[:, 1], obj_targets[:, 1], reduction='sum')
+        loss_w = F.mse_loss(obj_prediction[:, 2], obj_targets[:, 2], reduction='sum')
+        loss_h = F.mse_loss(obj_prediction[:, 3], obj_targets[:, 3], reduction='sum')
         loss_coord = (loss_x + loss_y + 0.5 * loss_w + 0.5 * loss_h) / obj_cnt
-        loss_hasobj = self.bce_loss(conf * objmask, objmask)
-        loss_noobj = self.bce_loss(conf * noobjmask, noobjmask * 0.0)
+
+        # The no-object term on the dense conf channel only.
+        loss_hasobj = F.binary_cross_entropy_with_logits(obj_prediction[:, 4], torch.ones_like(obj_prediction[:, 4]),
+                                                         reduction='sum')
+        loss_noobj = F.binary_cross_entropy_with_logits(prediction[..., 4], torch.zeros_like(prediction[..., 4]),
+                                                        weight=noobjmask.float(), reduction='sum')
         loss_obj = (loss_hasobj + 0.2 * loss_noobj) / obj_cnt
-        loss_cls = self.bce_loss(pred_cls * objmask.unsqueeze(2), tcls * objmask.unsqueeze(2))
+
+        loss_cls = F.binary_cross_entropy_with_logits(obj_prediction[:, 5:], obj_targets[:, 4:], reduction='sum')
         loss_cls = loss_cls / obj_cnt
 
         #  total loss = losses * weight
@@ -17,13 +17,14 @@ class OPMseLoss(nn.Module):
     def __init__(self, configer):
         super(OPMseLoss, self).__init__()
         self.configer = configer
-        reduction = 'elementwise_mean'
+        reduction = 'mean'
         if self.configer.exists('loss', 'params') and 'mse_reduction' in self.configer.get('loss', 'params'):
             reduction = self.configer.get('loss', 'params')['mse_reduction']
 
+        self.reduction = reduction
         self.mse_loss = nn.MSELoss(reduction=reduction)
 
-    def forward(self, inputs, *targets, mask=None, weights=None):
+    def forward(self, inputs, targets, mask=None, weights=None):
         loss = 0.0
         if isinstance(inputs, list):
             if weights is not None:
@@ -45,7 +46,7 @@ class OPMseLoss(nn.Module):
             else:
                 loss = self.mse_loss(inputs, targets)
 
-        if self.configer.get('mse_loss', 'reduction') == 'sum':
+        if self.reduction == 'sum':
             loss = loss / targets.size(0)
 
         return loss
@@ -41,14 +41,14 @@ class FSCELoss(nn.Module):
             for i in range(len(inputs)):
                 if len(targets) > 1:
                     target = self._scale_target(targets[i], (inputs[i].size(2), inputs[i].size(3)))
-                    loss += weights[i] * self.ce_loss(inputs[i], target)
+                    loss += weights[i] * self.ce_loss(inputs[i].float(), target)
                 else:
                     target = self._scale_target(targets[0], (inputs[i].size(2), inputs[i].size(3)))
-                    loss += weights[i] * self.ce_loss(inputs[i], target)
+                    loss += weights[i] * self.ce_loss(inputs[i].float(), target)
 
         else:
             target = self._scale_target(targets[0], (inputs.size(2), inputs.size(3)))
-            loss = self.ce_loss(inputs, target)
+            loss = self.ce_loss(inputs.float(), target)
 
         return loss
 
@@ -89,17 +89,27 @@ class FSOhemCELoss(nn.Module):
                 weight (Tensor, optional): a manual rescaling weight given to each class.
                                            If given, has to be a Tensor of size "nclasses"
         """
-        prob_out = F.softmax(predict, dim=1)
-        tmp_target = target.copy_()
-        tmp_target[tmp_target == self.ignore_label] = 0
-        prob = prob_out.gather(1, tmp_target.unsqueeze(1))
-        mask = target.contiguous().view(-1, ) != self.ignore_label
-        sort_prob, sort_indices = prob.contiguous().view(-1, )[mask].contiguous().sort()
-        min_threshold = sort_prob[self.min_kept]
-        threshold = max(min_threshold, self.thresh)
-        loss_matirx = self.ce_loss(predict, target).contiguous().view(-1, )
-        sort_loss_matirx = loss_matirx[mask][sort_indices]
-        select_loss_matrix = sort_loss_matirx[sort_prob < threshold]
+        # The ce & the prob of the target class in one pass, without the (n, c, h, w) softmax.
+        # Select in fp32, fp16 ties would break the min_kept threshold under amp.
+        predict = predict.float()
+        valid_mask = target != self.ignore_label
+        safe_target = torch.where(valid_mask, target, torch.zeros_like(target)).unsqueeze(1)
+        nll = (torch.logsumexp(predict, 1, keepdim=True) - predict.gather(1, safe_target)).view(-1)
+        # The prob of the target class, the ignored pixels are never selected.
+        prob = torch.exp(-nll.detach())
+        if self.ce_loss.weight is not None:
+            nll = nll * self.ce_loss.weight.to(nll.device)[safe_target.view(-1)]
+
+        valid_mask = valid_mask.view(-1)
+        valid_prob = prob[valid_mask]
+        if valid_prob.numel() > self.min_kept:
+            # The (min_kept + 1)-th smallest prob, in linear time instead of sorting all the pixels.
+            min_threshold = valid_prob.kthvalue(self.min_kept + 1)[0]
+            select_mask = valid_mask & (prob < torch.clamp(min_threshold, min=self.thresh))
+        else:
+            select_mask = valid_mask
+
+        select_loss_matrix = nll[select_mask]
         if self.reduction == 'sum':
             return select_loss_matrix.sum()
         elif self.reduction == 'elementwise_mean':
@@ -185,8 +195,9 @@ class FSFocalLoss(nn.Module):
 
     def forward(self, output, target, **kwargs):
         self.y = self.configer.get('focal_loss', 'y')
-        P = F.softmax(output)
-        f_out = F.log_softmax(output)
+        output = output.float()
+        P = F.softmax(output, dim=1)
+        f_out = F.log_softmax(output, dim=1)
         Pt = P.gather(1, torch.unsqueeze(target, 1))
         focus_p = torch.pow(1 - Pt, self.y)
         alpha = 0.25
@@ -250,71 +261,40 @@ class FSEmbedLoss(nn.Module):
     def __init__(self, configer):
         super(FSEmbedLoss, self).__init__()
         self.num_classes = configer.get('data', 'num_classes')
-        self.cosine_loss = nn.CosineEmbeddingLoss()
+        # The eps of nn.CosineEmbeddingLoss.
+        self.eps = 1e-12
 
     def forward(self, inputs, targets, **kwargs):
-        inputs = inputs.transpose(0, 1)
-        center_array = torch.zeros((self.num_classes, inputs.size()[0]), requires_grad=True).cuda()
-        sim_loss = torch.Tensor([0.0]).cuda()
-        sim_loss.requires_grad = True
-
-        mask_list = list()
-        for i in range(self.num_classes):
-            mask = self.get_mask(targets, i).unsqueeze(0)
-            sum_pixel = max(mask.sum(), 1)
-            # print sum_pixel
-            mask = mask.contiguous().repeat(inputs.size()[0], 1, 1, 1).byte().cuda()
-            sim_input = inputs[mask]
-            if sim_input.numel() == 0:
-                mask_list.append(i)
-                continue
-
-            sim_input = sim_input.contiguous().view(inputs.size()[0], -1)
-            center = torch.sum(sim_input, 1, keepdim=False)
-            center = center / sum_pixel
-            center_array[i, :] = center
-
-            sim_input = sim_input.permute(1, 0)
-
-            sim_label = torch.ones(sim_input.size()[0], ).float().cuda()
-            sim_center = center.contiguous().view(1, -1).repeat(sim_input.size()[0], 1)
-            sim_loss = sim_loss + self.cosine_loss(sim_center, sim_input, sim_label)
-
-        diff_loss = torch.Tensor([0.0]).cuda()
-        diff_loss.requires_grad = True
-        for i in range(self.num_classes):
-            if i in mask_list:
-                continue
-
-            label = torch.zeros(self.num_classes, ).float().cuda()
-            center_dual = torch.zeros((self.num_classes, inputs.size()[0]), requires_grad=True).cuda()
-            for k in range(self.num_classes):
-                center_dual[k] = center_array[i]
-
-            for j in range(self.num_classes):
-                if j == i:
-                    label[j] = 1
-                else:
-                    label[j] = -1
-
-            diff_loss = diff_loss + self.cosine_loss(center_array, center_dual, label)
-
-        embedding_loss = diff_loss + sim_loss
-        # print embedding_loss.requires_grad
-        return embedding_loss
-
-    def get_mask(self, targets, i):
-        targets_cp = torch.cuda.FloatTensor(targets.size())
-        targets_cp.copy_(targets.data)
-        if i == 0:
-            targets_cp[targets_cp != 0] = 2
-            targets_cp[targets_cp == 0] = 1
-            targets_cp[targets_cp == 2] = 0
-        else:
-            targets_cp[targets_cp != i] = 0
-            targets_cp[targets_cp == i] = 1
-
-        return targets_cp
+        """
+            Args:
+                inputs:(n, c, h, w) the embeddings.
+                targets:(n, h, w) the labels, the values out of [0, num_classes) are ignored.
+        """
+        embed = inputs.float().permute(0, 2, 3, 1).contiguous().view(-1, inputs.size(1))
+        targets = targets.to(inputs.device).long().view(-1)
+        valid_mask = (targets >= 0) & (targets < self.num_classes)
+        embed, targets = embed[valid_mask], targets[valid_mask]
+
+        # The centers of all the classes at once, absent classes keep the zero center.
+        counts = torch.bincount(targets, minlength=self.num_classes).float()
+        center_array = torch.zeros((self.num_classes, embed.size(1)), device=embed.device).index_add(0, targets, embed)
+        center_array = center_array / counts.clamp(min=1)[:, None]
+        center_mag = (center_array * center_array).sum(1) + self.eps
+
+        # sim loss: mean (1 - cos) between the pixels & their class center, summed over the classes.
+        pixel_center = center_array[targets]
+        pixel_cos = (embed * pixel_center).sum(1) \
+            / torch.sqrt(((embed * embed).sum(1) + self.eps) * center_mag[targets])
+        sim_loss = ((1 - pixel_cos) / counts[targets]).sum()
+
+        # diff loss: for every present class, mean over the classes of (1 - cos) to itself
+        # & max(cos, 0) to the others.
+        center_cos = torch.mm(center_array, center_array.t()) / torch.sqrt(center_mag[:, None] * center_mag[None, :])
+        eye_mask = torch.eye(self.num_classes, device=embed.device, dtype=torch.bool)
+        diff_matrix = torch.where(eye_mask, 1 - center_cos, center_cos.clamp(min=0))
+        diff_loss = (diff_matrix.mean(1) * (counts > 0).float()).sum()
+
+        return diff_loss + sim_loss
 
 
 if __name__ == "__main__":
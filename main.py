@@ -18,8 +18,11 @@ import torch.backends.cudnn as cudnn
 
 from methods.method_selector import MethodSelector
 from methods.tools.controller import Controller
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.configer import Configer
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 
 
 def str2bool(v):
@@ -35,14 +38,14 @@ def str2bool(v):
         raise argparse.ArgumentTypeError('Unsupported value encountered.')
 
 
-if __name__ == "__main__":
+def get_args_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument('--hypes', default=None, type=str,
                         dest='hypes', help='The file of the hyper parameters.')
     parser.add_argument('--phase', default='train', type=str,
                         dest='phase', help='The phase of module.')
-    parser.add_argument('--gpu', default=[0, 1, 2, 3], nargs='+', type=int,
-                        dest='gpu', help='The gpu list used.')
+    parser.add_argument('--gpu', default=[0, 1, 2, 3], nargs='*', type=int,
+                        dest='gpu', help='The gpu list used, empty for cpu.')
 
     # ***********  Params for data.  **********
     parser.add_argument('--data_dir', default=None, type=str,
@@ -67,6 +70,10 @@ if __name__ == "__main__":
                         dest='checkpoints:save_iters', help='The saving iters of checkpoint model.')
     parser.add_argument('--save_epoch', default=None, type=int,
                         dest='checkpoints:save_epoch', help='The saving epoch of checkpoint model.')
+    parser.add_argument('--keep_last', default=None, type=int,
+                        dest='checkpoints:keep_last', help='The number of iters/epoch checkpoints to keep.')
+    parser.add_argument('--async_save', type=str2bool, nargs='?', default=None,
+                        dest='checkpoints:async_save', help='Whether to write checkpoints in background.')
 
     # ***********  Params for model.  **********
     parser.add_argument('--model_name', default=None, type=str,
@@ -94,7 +101,9 @@ if __name__ == "__main__":
 
     # ***********  Params for solver.  **********
     parser.add_argument('--optim_method', default=None, type=str,
-                        dest='optim:optim_method', help='The optim method that used.')
+                        dest='optim:optim_method', help='The optim method that used, e.g. sgd, sgd_foreach, adam_fused.')
+    parser.add_argument('--clip_grad', default=None, type=float,
+                        dest='optim:clip_grad', help='The max norm of grads, 0 to turn the clipping off.')
     parser.add_argument('--base_lr', default=None, type=float,
                         dest='lr:base_lr', help='The learning rate.')
     parser.add_argument('--nbb_mult', default=1.0, type=float,
@@ -113,6 +122,8 @@ if __name__ == "__main__":
                         dest='solver:display_iter', help='The display iteration of train logs.')
     parser.add_argument('--test_interval', default=None, type=int,
                         dest='solver:test_interval', help='The test interval of validation.')
+    parser.add_argument('--amp', type=str2bool, nargs='?', default=False,
+                        dest='train:amp', help='Whether to train with mixed precision.')
 
     # ***********  Params for logging.  **********
     parser.add_argument('--logfile_level', default=None, type=str,
@@ -126,6 +137,16 @@ if __name__ == "__main__":
     parser.add_argument('--log_to_file', type=str2bool, nargs='?', default=True,
                         dest='logging:log_to_file', help='Whether to write logging into files.')
 
+    # ***********  Params for profiling.  **********
+    parser.add_argument('--profile', type=str2bool, nargs='?', default=False,
+                        dest='profiler:enable', help='Whether to time the stages of every step.')
+    parser.add_argument('--profile_sync', type=str2bool, nargs='?', default=False,
+                        dest='profiler:sync_cuda', help='Whether to synchronize cuda around every stage.')
+    parser.add_argument('--trace_iters', default=None, type=int, nargs=2,
+                        dest='profiler:trace_iters', help='The iters window [start, end) to trace with torch.profiler.')
+    parser.add_argument('--log_metrics', type=str2bool, nargs='?', default=True,
+                        dest='metrics:enable', help='Whether to write the scalars into the json lines file.')
+
     # ***********  Params for test or submission.  **********
     parser.add_argument('--test_img', default=None, type=str,
                         dest='test:test_img', help='The test path of image.')
@@ -133,12 +154,59 @@ if __name__ == "__main__":
                         dest='test:test_dir', help='The test directory of images.')
     parser.add_argument('--out_dir', default='none', type=str,
                         dest='test:out_dir', help='The test out directory of images.')
+    parser.add_argument('--engine', default=None, type=str,
+                        dest='test:engine', help='The inference engine: eager, torchscript, onnx or int8.')
+    parser.add_argument('--engine_path', default=None, type=str,
+                        dest='test:engine_path', help='The path of the exported engine.')
+    parser.add_argument('--test_amp', type=str2bool, nargs='?', default=False,
+                        dest='test:amp', help='Whether to test with mixed precision.')
+    parser.add_argument('--fuse_bn', type=str2bool, nargs='?', default=False,
+                        dest='test:fuse_bn', help='Whether to fold the BN into the conv weights for test.')
+    parser.add_argument('--channels_last', type=str2bool, nargs='?', default=False,
+                        dest='test:channels_last', help='Whether to test in the channels_last memory format.')
+    parser.add_argument('--jit_freeze', type=str2bool, nargs='?', default=False,
+                        dest='test:jit_freeze', help='Whether to trace & freeze the test net with TorchScript.')
+
+    # ***********  Params for quantization.  **********
+    parser.add_argument('--quant_backend', default='fbgemm', type=str,
+                        dest='quant:backend', help='The quantized engine, fbgemm(x86) or qnnpack(arm).')
+    parser.add_argument('--calib_batches', default=10, type=int,
+                        dest='quant:calib_batches', help='The number of val batches for calibration.')
+    parser.add_argument('--eval_batches', default=None, type=int,
+                        dest='quant:eval_batches', help='The number of val batches to compare accuracy.')
+
+    # ***********  Params for serving.  **********
+    parser.add_argument('--host', default='127.0.0.1', type=str,
+                        dest='server:host', help='The host of the inference server.')
+    parser.add_argument('--port', default=8000, type=int,
+                        dest='server:port', help='The port of the inference server.')
+    parser.add_argument('--socket_path', default=None, type=str,
+                        dest='server:socket_path', help='Serve on the unix socket instead of tcp.')
+    parser.add_argument('--max_batch_size', default=8, type=int,
+                        dest='server:max_batch_size', help='The max batch size of dynamic batching.')
+    parser.add_argument('--max_wait_ms', default=10.0, type=float,
+                        dest='server:max_wait_ms', help='The max waiting time of one request in queue.')
+    parser.add_argument('--bucket_stride', default=None, type=int,
+                        dest='server:bucket_stride', help='Pad inputs to the stride to share batches.')
+
+    # ***********  Params for distributed training.  **********
+    parser.add_argument('--dist', type=str2bool, nargs='?', default=False,
+                        dest='dist:enable', help='Whether to train with one process per gpu (or cpu rank).')
+    parser.add_argument('--dist_backend', default=None, type=str,
+                        dest='dist:backend', help='The backend of torch.distributed, nccl(default) or gloo(cpu).')
+    parser.add_argument('--bucket_cap_mb', default=None, type=int,
+                        dest='dist:bucket_cap_mb', help='The bucket size of the grad all-reduce.')
+    parser.add_argument('--local_rank', default=0, type=int,
+                        dest='dist:local_rank', help='The local rank given by torch.distributed.launch.')
 
     # ***********  Params for env.  **********
     parser.add_argument('--seed', default=None, type=int, help='manual seed')
     parser.add_argument('--cudnn', type=str2bool, nargs='?', default=True, help='Use CUDNN.')
+    return parser
 
-    args_parser = parser.parse_args()
+
+if __name__ == "__main__":
+    args_parser = get_args_parser().parse_args()
 
     if args_parser.seed is not None:
         random.seed(args_parser.seed)
@@ -151,9 +219,16 @@ if __name__ == "__main__":
     abs_data_dir = os.path.expanduser(configer.get('data', 'data_dir'))
     configer.update(['data', 'data_dir'], abs_data_dir)
 
+    if configer.get('gpu') is not None and len(configer.get('gpu')) == 0:
+        configer.update(['gpu'], None)
+
     if configer.get('gpu') is not None:
         os.environ["CUDA_VISIBLE_DEVICES"] = ','.join(str(gpu_id) for gpu_id in configer.get('gpu'))
 
+    # Set before the runners freeze the configer.
+    if configer.get('network', 'bn_type') is None:
+        configer.update(['network', 'bn_type'], 'torchbn')
+
     project_dir = os.path.dirname(os.path.realpath(__file__))
     configer.add(['project_dir'], project_dir)
 
@@ -164,12 +239,19 @@ if __name__ == "__main__":
     else:
         configer.update(['logging', 'logfile_level'], None)
 
+    if configer.get('phase') == 'train' and DistHelper.init(configer) and not DistHelper.is_main():
+        # Only rank 0 writes the logs, the others just print the errors.
+        configer.update(['logging', 'logfile_level'], None)
+        configer.update(['logging', 'stdout_level'], 'error')
+
     Log.init(logfile_level=configer.get('logging', 'logfile_level'),
              stdout_level=configer.get('logging', 'stdout_level'),
              log_file=configer.get('logging', 'log_file'),
              log_format=configer.get('logging', 'log_format'),
              rewrite=configer.get('logging', 'rewrite'))
 
+    StepProfiler.init(configer)
+    MetricWriter.init(configer)
     Log.info('Config Dict: {}'.format(json.dumps(configer.to_dict(), indent=2)))
     method_selector = MethodSelector(configer)
     runner = None
@@ -192,6 +274,12 @@ if __name__ == "__main__":
         Controller.debug(runner)
     elif configer.get('phase') == 'test' and configer.get('network', 'resume') is not None:
         Controller.test(runner)
+    elif configer.get('phase') == 'export' and configer.get('network', 'resume') is not None:
+        Controller.export(runner)
+    elif configer.get('phase') == 'quantize' and configer.get('network', 'resume') is not None:
+        Controller.quantize(runner)
+    elif configer.get('phase') == 'serve' and configer.get('network', 'resume') is not None:
+        Controller.serve(runner)
     else:
         Log.error('Phase: {} is not valid.'.format(configer.get('phase')))
         exit(1)
@@ -17,8 +17,11 @@ from loss.loss_manager import LossManager
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.cls_model_manager import ClsModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from metric.cls.cls_running_score import ClsRunningScore
 
 
@@ -73,22 +76,28 @@ class FCClassifier(object):
         self.runner_state['epoch'] += 1
 
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self)
             inputs = data_dict['img']
             labels = data_dict['label']
-            self.data_time.update(time.time() - start_time)
             # Change the data type.
-            inputs, labels = RunnerHelper.to_device(self, inputs, labels)
+            with StepProfiler.timer('h2d'):
+                inputs, labels = RunnerHelper.to_device(self, inputs, labels)
+
             # Forward pass.
-            outputs = self.cls_net(inputs)
-            # Compute the loss of the train batch & backward.
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                outputs = self.cls_net(inputs)
 
-            loss = self.ce_loss(outputs, labels)
+            # Compute the loss of the train batch & backward.
+            with StepProfiler.timer('loss'):
+                loss = self.ce_loss(outputs, labels)
 
             self.train_losses.update(loss.item(), inputs.size(0))
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -97,6 +106,7 @@ class FCClassifier(object):
 
             # Print the log info & reset the states.
             if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -106,6 +116,10 @@ class FCClassifier(object):
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
 
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -143,6 +157,9 @@ class FCClassifier(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
+            self.cls_running_score.all_reduce()
             RunnerHelper.save_net(self, self.cls_net, performance=self.cls_running_score.get_top1_acc())
             self.runner_state['performance'] = self.cls_running_score.get_top1_acc()
             # Print the log info & reset the states.
@@ -150,6 +167,9 @@ class FCClassifier(object):
             Log.info('TestLoss = {loss.avg:.8f}'.format(loss=self.val_losses))
             Log.info('Top1 ACC = {}'.format(self.cls_running_score.get_top1_acc()))
             Log.info('Top5 ACC = {}'.format(self.cls_running_score.get_top5_acc()))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg,
+                             top1_acc=self.cls_running_score.get_top1_acc(),
+                             top5_acc=self.cls_running_score.get_top5_acc())
             self.batch_time.reset()
             self.val_losses.reset()
             self.cls_running_score.reset()
@@ -17,6 +17,7 @@ from PIL import Image
 
 from datasets.cls.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.cls_model_manager import ClsModelManager
 from utils.helpers.image_helper import ImageHelper
@@ -48,6 +49,7 @@ class FCClassifierTest(object):
         self.cls_net = self.cls_model_manager.image_classifier()
         self.cls_net = RunnerHelper.load_net(self, self.cls_net)
         self.cls_net.eval()
+        self.cls_net = ModelOptimizer.optimize(self, self.cls_net)
 
     def __test_img(self, image_path, json_path, raw_path, vis_path):
         Log.info('Image Path: {}'.format(image_path))
@@ -73,9 +75,11 @@ class FCClassifierTest(object):
         inputs = self.blob_helper.make_input(img,
                                              input_size=self.configer.get('test', 'input_size'), scale=1.0)
 
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             outputs = self.cls_net(inputs)
 
+        outputs = outputs.float()
+
         json_dict = self.__get_info_tree(outputs, image_path)
 
         image_canvas = self.cls_parser.draw_label(ori_img_bgr.copy(), json_dict['label'])
@@ -17,12 +17,15 @@ from methods.det.faster_rcnn_test import FastRCNNTest
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.det_model_manager import DetModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.layers.det.fr_priorbox_layer import FRPriorBoxLayer
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
 from metric.det.det_running_score import DetRunningScore
 from vis.visualizer.det_visualizer import DetVisualizer
 from utils.helpers.dc_helper import DCHelper
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 
 
 class FasterRCNN(object):
@@ -85,6 +88,10 @@ class FasterRCNN(object):
         self.runner_state['epoch'] += 1
 
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self)
             batch_gt_bboxes = data_dict['bboxes']
             batch_gt_labels = data_dict['labels']
@@ -92,16 +99,15 @@ class FasterRCNN(object):
             data_dict['bboxes'] = DCHelper.todc(batch_gt_bboxes, gpu_list=self.configer.get('gpu'), cpu_only=True)
             data_dict['labels'] = DCHelper.todc(batch_gt_labels, gpu_list=self.configer.get('gpu'), cpu_only=True)
             data_dict['meta'] = DCHelper.todc(metas, gpu_list=self.configer.get('gpu'), cpu_only=True)
-            self.data_time.update(time.time() - start_time)
-            # Forward pass.
-            loss = self.det_net(data_dict)
-            loss = loss.mean()
+            # Forward pass, the targets are assigned & the loss is computed inside the net.
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                loss = self.det_net(data_dict)
+
+            loss = loss.float().mean()
             self.train_losses.update(loss.item(), data_dict['img'].size(0))
 
             self.optimizer.zero_grad()
-            loss.backward()
-            RunnerHelper.clip_grad(self.det_net, 10.)
-            self.optimizer.step()
+            Trainer.step(self, loss, net=self.det_net, max_grad=10.)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -110,6 +116,7 @@ class FasterRCNN(object):
 
             # Print the log info & reset the states.
             if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -118,6 +125,10 @@ class FasterRCNN(object):
                     self.configer.get('solver', 'display_iter'),
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -165,13 +176,18 @@ class FasterRCNN(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
+            self.det_running_score.all_reduce()
             RunnerHelper.save_net(self, self.det_net, iters=self.runner_state['iters'])
             # Print the log info & reset the states.
             Log.info(
                 'Test Time {batch_time.sum:.3f}s, ({batch_time.avg:.3f})\t'
                 'Loss {loss.avg:.8f}\n'.format(
                     batch_time=self.batch_time, loss=self.val_losses))
-            Log.info('Val mAP: {}\n'.format(self.det_running_score.get_mAP()))
+            mAP = self.det_running_score.get_mAP()
+            Log.info('Val mAP: {}\n'.format(mAP))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg, mAP=mAP)
             self.det_running_score.reset()
             self.batch_time.reset()
             self.val_losses.reset()
@@ -15,6 +15,7 @@ import torch.nn.functional as F
 
 from datasets.det.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.det_model_manager import DetModelManager
 from utils.helpers.det_helper import DetHelper
@@ -25,6 +26,7 @@ from utils.layers.det.fr_roi_generator import FRROIGenerator
 from utils.layers.det.fr_roi_sampler import FRROISampler
 from utils.layers.det.rpn_target_assigner import RPNTargetAssigner
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 from vis.parser.det_parser import DetParser
 from vis.visualizer.det_visualizer import DetVisualizer
 from extensions.parallel.data_container import DataContainer
@@ -52,6 +54,7 @@ class FastRCNNTest(object):
         self.det_net = self.det_model_manager.object_detector()
         self.det_net = RunnerHelper.load_net(self, self.det_net)
         self.det_net.eval()
+        self.det_net = ModelOptimizer.optimize(self, self.det_net)
 
     def __test_img(self, image_path, json_path, raw_path, vis_path):
         Log.info('Image Path: {}'.format(image_path))
@@ -84,18 +87,21 @@ class FastRCNNTest(object):
                                       input_size=[inputs.size(3), inputs.size(2)])]], cpu_only=True)
         )
 
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             # Forward pass.
             test_group = self.det_net(data_dict)
 
             test_indices_and_rois, test_roi_locs, test_roi_scores, test_rois_num = test_group
+            test_roi_locs, test_roi_scores = test_roi_locs.float(), test_roi_scores.float()
+
+        with StepProfiler.timer('decode'):
+            batch_detections = self.decode(test_roi_locs,
+                                           test_roi_scores,
+                                           test_indices_and_rois,
+                                           test_rois_num,
+                                           self.configer,
+                                           DCHelper.tolist(data_dict['meta']))
 
-        batch_detections = self.decode(test_roi_locs,
-                                       test_roi_scores,
-                                       test_indices_and_rois,
-                                       test_rois_num,
-                                       self.configer,
-                                       DCHelper.tolist(data_dict['meta']))
         json_dict = self.__get_info_tree(batch_detections[0], ori_img_bgr, scale=scale)
 
         image_canvas = self.det_parser.draw_bboxes(ori_img_bgr.copy(),
@@ -110,10 +116,11 @@ class FastRCNNTest(object):
 
     @staticmethod
     def decode(roi_locs, roi_scores, indices_and_rois, test_rois_num, configer, metas):
+        config = configer.freeze()
         indices_and_rois = indices_and_rois
-        num_classes = configer.get('data', 'num_classes')
-        mean = torch.Tensor(configer.get('roi', 'loc_normalize_mean')).repeat(num_classes)[None]
-        std = torch.Tensor(configer.get('roi', 'loc_normalize_std')).repeat(num_classes)[None]
+        num_classes = config.data.num_classes
+        mean = torch.Tensor(config.roi.loc_normalize_mean).repeat(num_classes)[None]
+        std = torch.Tensor(config.roi.loc_normalize_std).repeat(num_classes)[None]
         mean = mean.to(roi_locs.device)
         std = std.to(roi_locs.device)
 
@@ -127,7 +134,7 @@ class FastRCNNTest(object):
         cxcy = roi_locs[:, :, :2] * (rois[:, :, 2:] - rois[:, :, :2]) + (rois[:, :, :2] + rois[:, :, 2:]) / 2
         dst_bbox = torch.cat([cxcy - wh / 2, cxcy + wh / 2], 2)  # [b, 8732,4]
 
-        if configer.get('phase') != 'debug':
+        if config.phase != 'debug':
             cls_prob = F.softmax(roi_scores, dim=1)
         else:
             cls_prob = roi_scores
@@ -151,7 +158,7 @@ class FastRCNNTest(object):
             tmp_cls_label = cls_label[start_index:start_index+test_rois_num[i]]
             start_index += test_rois_num[i]
 
-            mask = (tmp_cls_prob > configer.get('res', 'val_conf_thre')) & (tmp_cls_label > 0)
+            mask = (tmp_cls_prob > config.res.val_conf_thre) & (tmp_cls_label > 0)
 
             tmp_dst_bbox = tmp_dst_bbox[mask].contiguous().view(-1, 4)
             if tmp_dst_bbox.numel() == 0:
@@ -164,7 +171,7 @@ class FastRCNNTest(object):
 
             output[i] = DetHelper.cls_nms(valid_preds,
                                           labels=valid_preds[:, 5],
-                                          max_threshold=configer.get('nms', 'max_threshold'))
+                                          max_threshold=config.nms.max_threshold)
 
         return output
 
@@ -198,6 +205,7 @@ class FastRCNNTest(object):
                 feat_list.append(torch.zeros((data_dict['img'].size(0), 1,
                                               input_size[1] // stride, input_size[0] // stride)))
 
+            default_boxes = self.fr_priorbox_layer(feat_list, input_size)
             gt_rpn_locs, gt_rpn_labels = self.rpn_target_generator(feat_list, data_dict['bboxes'], data_dict['meta'])
             eye_matrix = torch.eye(2)
             gt_rpn_labels[gt_rpn_labels == -1] = 0
@@ -235,9 +243,7 @@ class FastRCNNTest(object):
 
                 ori_img_bgr = self.blob_helper.tensor2bgr(data_dict['img'][j])
 
-                self.det_visualizer.vis_default_bboxes(ori_img_bgr,
-                                                       self.fr_priorbox_layer(feat_list, input_size),
-                                                       gt_rpn_labels[j])
+                self.det_visualizer.vis_default_bboxes(ori_img_bgr, default_boxes, gt_rpn_labels[j])
                 json_dict = self.__get_info_tree(batch_detections[j], ori_img_bgr)
                 image_canvas = self.det_parser.draw_bboxes(ori_img_bgr.copy(),
                                                            json_dict,
@@ -17,10 +17,13 @@ from methods.det.single_shot_detector_test import SingleShotDetectorTest
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.det_model_manager import DetModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.layers.det.ssd_priorbox_layer import SSDPriorBoxLayer
 from utils.layers.det.ssd_target_generator import SSDTargetGenerator
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from metric.det.det_running_score import DetRunningScore
 from vis.visualizer.det_visualizer import DetVisualizer
 
@@ -86,41 +89,51 @@ class SingleShotDetector(object):
 
         # data_tuple: (inputs, heatmap, maskmap, vecmap)
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self, backbone_list=(0,))
             inputs = data_dict['img']
             batch_gt_bboxes = data_dict['bboxes']
             batch_gt_labels = data_dict['labels']
             # Change the data type.
-            inputs = RunnerHelper.to_device(self, inputs)
+            with StepProfiler.timer('h2d'):
+                inputs = RunnerHelper.to_device(self, inputs)
 
-            self.data_time.update(time.time() - start_time)
             # Forward pass.
-            outputs = self.det_net(inputs)
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                outputs = self.det_net(inputs)
+
             if self.configer.get('network', 'gathered'):
                 feat_list = outputs[0]
             else:
                 feat_list = outputs[0][0]
 
-            bboxes, labels = self.ssd_target_generator(feat_list, batch_gt_bboxes,
-                                                       batch_gt_labels, [inputs.size(3), inputs.size(2)])
+            with StepProfiler.timer('target'):
+                bboxes, labels = self.ssd_target_generator(feat_list, batch_gt_bboxes,
+                                                           batch_gt_labels, [inputs.size(3), inputs.size(2)])
+
+            with StepProfiler.timer('h2d'):
+                bboxes, labels = RunnerHelper.to_device(self, bboxes, labels)
 
-            bboxes, labels = RunnerHelper.to_device(bboxes, labels)
             # Compute the loss of the train batch & backward.
-            loss = self.det_loss(outputs, bboxes, labels, gathered=self.configer.get('network', 'gathered'))
+            with StepProfiler.timer('loss'):
+                loss = self.det_loss(outputs, bboxes, labels, gathered=self.configer.get('network', 'gathered'))
 
             self.train_losses.update(loss.item(), inputs.size(0))
 
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
             start_time = time.time()
-            self.configer.plus_one('iters')
+            self.runner_state['iters'] += 1
 
             # Print the log info & reset the states.
-            if self.configer.get('iters') % self.configer.get('solver', 'display_iter') == 0:
+            if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -129,6 +142,10 @@ class SingleShotDetector(object):
                     self.configer.get('solver', 'display_iter'),
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -161,13 +178,14 @@ class SingleShotDetector(object):
                 bboxes, labels = self.ssd_target_generator(feat_list, batch_gt_bboxes,
                                                            batch_gt_labels, input_size)
 
-                bboxes, labels = RunnerHelper.to_device(bboxes, labels)
+                bboxes, labels = RunnerHelper.to_device(self, bboxes, labels)
                 # Compute the loss of the val batch.
                 loss = self.det_loss(outputs, bboxes, labels, gathered=self.configer.get('network', 'gathered'))
                 self.val_losses.update(loss.item(), inputs.size(0))
 
                 batch_detections = SingleShotDetectorTest.decode(loc, cls,
-                                                                 self.ssd_priorbox_layer(feat_list, input_size),
+                                                                 self.ssd_priorbox_layer(feat_list, input_size,
+                                                                                         device=loc.device),
                                                                  self.configer, input_size)
                 batch_pred_bboxes = self.__get_object_list(batch_detections)
                 # batch_pred_bboxes = self._get_gt_object_list(batch_gt_bboxes, batch_gt_labels)
@@ -177,13 +195,18 @@ class SingleShotDetector(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
+            self.det_running_score.all_reduce()
             RunnerHelper.save_net(self, self.det_net, iters=self.runner_state['iters'])
             # Print the log info & reset the states.
             Log.info(
                 'Test Time {batch_time.sum:.3f}s, ({batch_time.avg:.3f})\t'
                 'Loss {loss.avg:.8f}\n'.format(
                     batch_time=self.batch_time, loss=self.val_losses))
-            Log.info('Val mAP: {}'.format(self.det_running_score.get_mAP()))
+            mAP = self.det_running_score.get_mAP()
+            Log.info('Val mAP: {}'.format(mAP))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg, mAP=mAP)
             self.det_running_score.reset()
             self.batch_time.reset()
             self.val_losses.reset()
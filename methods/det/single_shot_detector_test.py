@@ -16,6 +16,7 @@ import torch.nn.functional as F
 
 from datasets.det.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.det_model_manager import DetModelManager
 from utils.helpers.det_helper import DetHelper
@@ -24,6 +25,7 @@ from utils.helpers.json_helper import JsonHelper
 from utils.layers.det.ssd_priorbox_layer import SSDPriorBoxLayer
 from utils.layers.det.ssd_target_generator import SSDTargetGenerator
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 from vis.parser.det_parser import DetParser
 from vis.visualizer.det_visualizer import DetVisualizer
 
@@ -47,6 +49,7 @@ class SingleShotDetectorTest(object):
         self.det_net = self.det_model_manager.object_detector()
         self.det_net = RunnerHelper.load_net(self, self.det_net)
         self.det_net.eval()
+        self.det_net = ModelOptimizer.optimize(self, self.det_net)
 
     def __test_img(self, image_path, json_path, raw_path, vis_path):
         Log.info('Image Path: {}'.format(image_path))
@@ -58,12 +61,17 @@ class SingleShotDetectorTest(object):
         inputs = self.blob_helper.make_input(img,
                                              input_size=self.configer.get('test', 'input_size'), scale=1.0)
 
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             feat_list, bbox, cls = self.det_net(inputs)
 
-        batch_detections = self.decode(bbox, cls,
-                                       self.ssd_priorbox_layer(feat_list, self.configer.get('test', 'input_size')),
-                                       self.configer, [inputs.size(3), inputs.size(2)])
+        bbox, cls = bbox.float(), cls.float()
+
+        with StepProfiler.timer('decode'):
+            batch_detections = self.decode(bbox, cls,
+                                           self.ssd_priorbox_layer(feat_list, self.configer.get('test', 'input_size'),
+                                                                   device=bbox.device),
+                                           self.configer, [inputs.size(3), inputs.size(2)])
+
         json_dict = self.__get_info_tree(batch_detections[0], ori_img_bgr, [inputs.size(3), inputs.size(2)])
 
         image_canvas = self.det_parser.draw_bboxes(ori_img_bgr.copy(),
@@ -78,11 +86,12 @@ class SingleShotDetectorTest(object):
 
     @staticmethod
     def decode(bbox, conf, default_boxes, configer, input_size):
+        config = configer.freeze()
         loc = bbox
-        if configer.get('phase') != 'debug':
+        if config.phase != 'debug':
             conf = F.softmax(conf, dim=-1)
 
-        default_boxes = default_boxes.unsqueeze(0).repeat(loc.size(0), 1, 1).to(bbox.device)
+        default_boxes = default_boxes.to(bbox.device).unsqueeze(0)
 
         variances = [0.1, 0.2]
         wh = torch.exp(loc[:, :, 2:] * variances[1]) * default_boxes[:, :, 2:]
@@ -90,14 +99,14 @@ class SingleShotDetectorTest(object):
         boxes = torch.cat([cxcy - wh / 2, cxcy + wh / 2], 2)  # [b, 8732,4]
 
         batch_size, num_priors, _ = boxes.size()
-        boxes = boxes.unsqueeze(2).repeat(1, 1, configer.get('data', 'num_classes'), 1)
+        boxes = boxes.unsqueeze(2).repeat(1, 1, config.data.num_classes, 1)
         boxes = boxes.contiguous().view(boxes.size(0), -1, 4)
 
         # clip bounding box
         boxes[:, :, 0::2] = boxes[:, :, 0::2].clamp(min=0, max=input_size[0] - 1)
         boxes[:, :, 1::2] = boxes[:, :, 1::2].clamp(min=0, max=input_size[1] - 1)
 
-        labels = torch.Tensor([i for i in range(configer.get('data', 'num_classes'))]).to(boxes.device)
+        labels = torch.Tensor([i for i in range(config.data.num_classes)]).to(boxes.device)
         labels = labels.view(1, 1, -1, 1).repeat(batch_size, num_priors, 1, 1).contiguous().view(batch_size, -1, 1)
         max_conf = conf.contiguous().view(batch_size, -1, 1)
 
@@ -111,19 +120,19 @@ class SingleShotDetectorTest(object):
 
             valid_preds = image_pred[ids]
             _, order = valid_preds[:, 4].sort(0, descending=True)
-            order = order[:configer.get('nms', 'pre_nms')]
+            order = order[:config.nms.pre_nms]
             valid_preds = valid_preds[order]
-            valid_preds = valid_preds[valid_preds[:, 4] > configer.get('res', 'val_conf_thre')]
+            valid_preds = valid_preds[valid_preds[:, 4] > config.res.val_conf_thre]
             if valid_preds.numel() == 0:
                 continue
 
             valid_preds = DetHelper.cls_nms(valid_preds[:, :6],
                                             labels=valid_preds[:, 5],
-                                            max_threshold=configer.get('nms', 'max_threshold'),
-                                            cls_keep_num=configer.get('res', 'cls_keep_num'))
+                                            max_threshold=config.nms.max_threshold,
+                                            cls_keep_num=config.res.cls_keep_num)
 
             _, order = valid_preds[:, 4].sort(0, descending=True)
-            order = order[:configer.get('res', 'max_per_image')]
+            order = order[:config.res.max_per_image]
             output[image_i] = valid_preds[order]
 
         return output
@@ -166,8 +175,8 @@ class SingleShotDetectorTest(object):
             eye_matrix = torch.eye(self.configer.get('data', 'num_classes'))
             labels_target = eye_matrix[labels.view(-1)].view(inputs.size(0), -1,
                                                              self.configer.get('data', 'num_classes'))
-            batch_detections = self.decode(bboxes, labels_target,
-                                           self.ssd_priorbox_layer(feat_list, input_size), self.configer, input_size)
+            default_boxes = self.ssd_priorbox_layer(feat_list, input_size)
+            batch_detections = self.decode(bboxes, labels_target, default_boxes, self.configer, input_size)
             for j in range(inputs.size(0)):
                 count = count + 1
                 if count > 20:
@@ -175,8 +184,7 @@ class SingleShotDetectorTest(object):
 
                 ori_img_bgr = self.blob_helper.tensor2bgr(inputs[j])
 
-                self.det_visualizer.vis_default_bboxes(ori_img_bgr,
-                                                       self.ssd_priorbox_layer(feat_list, input_size), labels[j])
+                self.det_visualizer.vis_default_bboxes(ori_img_bgr, default_boxes, labels[j])
                 json_dict = self.__get_info_tree(batch_detections[j], ori_img_bgr, input_size)
                 image_canvas = self.det_parser.draw_bboxes(ori_img_bgr.copy(),
                                                            json_dict,
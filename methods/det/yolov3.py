@@ -12,15 +12,19 @@ import time
 import torch
 
 from datasets.det.data_loader import DataLoader
+from extensions.parallel.data_parallel import DataParallelCriterion
 from loss.loss_manager import LossManager
 from methods.det.yolov3_test import YOLOv3Test
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.det_model_manager import DetModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.layers.det.yolo_detection_layer import YOLODetectionLayer
 from utils.layers.det.yolo_target_generator import YOLOTargetGenerator
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from metric.det.det_running_score import DetRunningScore
 from vis.visualizer.det_visualizer import DetVisualizer
 
@@ -62,6 +66,17 @@ class YOLOv3(object):
         self.val_loader = self.det_data_loader.get_valloader()
 
         self.det_loss = self.det_loss_manager.get_det_loss()
+        # DataParallelCriterion (network.loss_balance) splits the targets along the batch,
+        # which the sparse targets of the matched priors don't have.
+        self.dense_targets = isinstance(self.det_loss, DataParallelCriterion)
+
+    def _get_targets(self, feat_list, batch_gt_bboxes, batch_gt_labels, input_size):
+        targets, objmask, noobjmask = self.yolo_target_generator(feat_list, batch_gt_bboxes,
+                                                                 batch_gt_labels, input_size)
+        if self.dense_targets:
+            targets, objmask = YOLOTargetGenerator.to_dense(targets, objmask, noobjmask)
+
+        return targets, objmask, noobjmask
 
     def _get_parameters(self):
         lr_1 = []
@@ -89,30 +104,38 @@ class YOLOv3(object):
 
         # data_tuple: (inputs, heatmap, maskmap, vecmap)
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self, backbone_list=(0, ))
             inputs = data_dict['img']
             batch_gt_bboxes = data_dict['bboxes']
             batch_gt_labels = data_dict['labels']
             input_size = [inputs.size(3), inputs.size(2)]
-
-            self.data_time.update(time.time() - start_time)
             # Change the data type.
-            inputs = RunnerHelper.to_device(self, inputs)
+            with StepProfiler.timer('h2d'):
+                inputs = RunnerHelper.to_device(self, inputs)
 
             # Forward pass.
-            feat_list, predictions, _ = self.det_net(inputs)
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                feat_list, predictions, _ = self.det_net(inputs)
+
+            with StepProfiler.timer('target'):
+                targets, objmask, noobjmask = self._get_targets(feat_list, batch_gt_bboxes,
+                                                                batch_gt_labels, input_size)
+
+            with StepProfiler.timer('h2d'):
+                targets, objmask, noobjmask = RunnerHelper.to_device(self, targets, objmask, noobjmask)
 
-            targets, objmask, noobjmask = self.yolo_target_generator(feat_list, batch_gt_bboxes,
-                                                                     batch_gt_labels, input_size)
-            targets, objmask, noobjmask = RunnerHelper.to_device(self, targets, objmask, noobjmask)
             # Compute the loss of the train batch & backward.
-            loss = self.det_loss(predictions, targets, objmask, noobjmask)
+            with StepProfiler.timer('loss'):
+                loss = self.det_loss(predictions, targets, objmask, noobjmask)
 
             self.train_losses.update(loss.item(), inputs.size(0))
 
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -120,7 +143,8 @@ class YOLOv3(object):
             self.runner_state['iters'] += 1
 
             # Print the log info & reset the states.
-            if self.configer.get('iters') % self.configer.get('solver', 'display_iter') == 0:
+            if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -129,6 +153,10 @@ class YOLOv3(object):
                     self.configer.get('solver', 'display_iter'),
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -157,8 +185,8 @@ class YOLOv3(object):
                 inputs = RunnerHelper.to_device(self, inputs)
                 feat_list, predictions, detections = self.det_net(inputs)
 
-                targets, objmask, noobjmask = self.yolo_target_generator(feat_list, batch_gt_bboxes,
-                                                                         batch_gt_labels, input_size)
+                targets, objmask, noobjmask = self._get_targets(feat_list, batch_gt_bboxes,
+                                                                batch_gt_labels, input_size)
                 targets, objmask, noobjmask = RunnerHelper.to_device(self, targets, objmask, noobjmask)
 
                 # Compute the loss of the val batch.
@@ -174,13 +202,18 @@ class YOLOv3(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
+            self.det_running_score.all_reduce()
             RunnerHelper.save_net(self, self.det_net, iters=self.runner_state['iters'])
             # Print the log info & reset the states.
             Log.info(
                 'Test Time {batch_time.sum:.3f}s, ({batch_time.avg:.3f})\t'
                 'Loss {loss.avg:.8f}\n'.format(
                     batch_time=self.batch_time, loss=self.val_losses))
-            Log.info('Val mAP: {}'.format(self.det_running_score.get_mAP()))
+            mAP = self.det_running_score.get_mAP()
+            Log.info('Val mAP: {}'.format(mAP))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg, mAP=mAP)
             self.det_running_score.reset()
             self.batch_time.reset()
             self.val_losses.reset()
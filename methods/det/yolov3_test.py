@@ -14,6 +14,7 @@ import torch
 
 from datasets.det.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.det_model_manager import DetModelManager
 from utils.helpers.det_helper import DetHelper
@@ -22,6 +23,7 @@ from utils.helpers.json_helper import JsonHelper
 from utils.layers.det.yolo_detection_layer import YOLODetectionLayer
 from utils.layers.det.yolo_target_generator import YOLOTargetGenerator
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 from vis.parser.det_parser import DetParser
 from vis.visualizer.det_visualizer import DetVisualizer
 
@@ -45,6 +47,7 @@ class YOLOv3Test(object):
         self.det_net = self.det_model_manager.object_detector()
         self.det_net = RunnerHelper.load_net(self, self.det_net)
         self.det_net.eval()
+        self.det_net = ModelOptimizer.optimize(self, self.det_net)
 
     def __test_img(self, image_path, json_path, raw_path, vis_path):
         Log.info('Image Path: {}'.format(image_path))
@@ -56,11 +59,15 @@ class YOLOv3Test(object):
         inputs = self.blob_helper.make_input(img,
                                              input_size=self.configer.get('data', 'input_size'), scale=1.0)
 
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             inputs = inputs.unsqueeze(0).to(self.device)
             _, _, detections = self.det_net(inputs)
 
-        batch_detections = self.decode(detections, self.configer)
+        detections = detections.float()
+
+        with StepProfiler.timer('decode'):
+            batch_detections = self.decode(detections, self.configer)
+
         json_dict = self.__get_info_tree(batch_detections[0], ori_img_bgr)
 
         image_canvas = self.det_parser.draw_bboxes(ori_img_bgr.copy(),
@@ -75,6 +82,7 @@ class YOLOv3Test(object):
 
     @staticmethod
     def decode(batch_pred_bboxes, configer, input_size):
+        config = configer.freeze()
         box_corner = batch_pred_bboxes.new(batch_pred_bboxes.shape)
         box_corner[:, :, 0] = batch_pred_bboxes[:, :, 0] - batch_pred_bboxes[:, :, 2] / 2
         box_corner[:, :, 1] = batch_pred_bboxes[:, :, 1] - batch_pred_bboxes[:, :, 3] / 2
@@ -91,7 +99,7 @@ class YOLOv3Test(object):
         output = [None for _ in range(len(batch_pred_bboxes))]
         for image_i, image_pred in enumerate(batch_pred_bboxes):
             # Filter out confidence scores below threshold
-            conf_mask = (image_pred[:, 4] > configer.get('res', 'val_conf_thre')).squeeze()
+            conf_mask = (image_pred[:, 4] > config.res.val_conf_thre).squeeze()
             image_pred = image_pred[conf_mask]
             # If none are remaining => process next image
             if image_pred.numel() == 0:
@@ -99,12 +107,12 @@ class YOLOv3Test(object):
 
             # Get score and class with highest confidence
             class_conf, class_pred = torch.max(
-                image_pred[:, 5:5 + configer.get('data', 'num_classes')], 1, keepdim=True)
+                image_pred[:, 5:5 + config.data.num_classes], 1, keepdim=True)
             # Detections ordered as (x1, y1, x2, y2, obj_conf, class_conf, class_pred)
             detections = torch.cat((image_pred[:, :5], class_conf.float(), class_pred.float()), 1)
             output[image_i] = DetHelper.cls_nms(detections,
                                                 labels=class_pred.squeeze(1),
-                                                max_threshold=configer.get('nms', 'max_threshold'))
+                                                max_threshold=config.nms.max_threshold)
 
         return output
 
@@ -140,9 +148,9 @@ class YOLOv3Test(object):
             for stride in self.configer.get('network', 'stride_list'):
                 feat_list.append(torch.zeros((inputs.size(0), 1, input_size[1] // stride, input_size[0] // stride)))
 
-            targets, _, _ = self.yolo_target_generator(feat_list, batch_gt_bboxes,
-                                                       batch_gt_labels, input_size)
-            targets = targets.to(self.device)
+            targets, objmask, noobjmask = self.yolo_target_generator(feat_list, batch_gt_bboxes,
+                                                                     batch_gt_labels, input_size)
+            targets = YOLOTargetGenerator.to_dense(targets, objmask, noobjmask)[0].to(self.device)
             anchors_list = self.configer.get('gt', 'anchors_list')
             output_list = list()
             be_c = 0
@@ -16,9 +16,12 @@ from loss.loss_manager import LossManager
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.pose_model_manager import PoseModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.layers.pose.heatmap_generator import HeatmapGenerator
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from vis.visualizer.pose_visualizer import PoseVisualizer
 
 
@@ -73,25 +76,30 @@ class ConvPoseMachine(object):
 
         # data_tuple: (inputs, heatmap, maskmap, tagmap, num_objects)
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self)
             inputs = data_dict['img']
             heatmap = data_dict['heatmap']
-
-            self.data_time.update(time.time() - start_time)
             # Change the data type.
-            inputs, heatmap = RunnerHelper.to_device(self, inputs, heatmap)
+            with StepProfiler.timer('h2d'):
+                inputs, heatmap = RunnerHelper.to_device(self, inputs, heatmap)
+
             # self.pose_visualizer.vis_peaks(heatmap[0], inputs[0], name='cpm')
 
             # Forward pass.
-            outputs = self.pose_net(inputs)
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                outputs = self.pose_net(inputs)
 
             # Compute the loss of the train batch & backward.
-            loss = self.mse_loss(outputs, heatmap)
+            with StepProfiler.timer('loss'):
+                loss = self.mse_loss(outputs, heatmap)
 
             self.train_losses.update(loss.item(), inputs.size(0))
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -100,6 +108,7 @@ class ConvPoseMachine(object):
 
             # Print the log info & reset the states.
             if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -108,6 +117,10 @@ class ConvPoseMachine(object):
                     self.configer.get('solver', 'display_iter'),
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -146,12 +159,15 @@ class ConvPoseMachine(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
             RunnerHelper.save_net(self, self.pose_net, iters=self.runner_state['iters'])
             # Print the log info & reset the states.
             Log.info(
                 'Test Time {batch_time.sum:.3f}s, ({batch_time.avg:.3f})\t'
                 'Loss {loss.avg:.8f}\n'.format(
                     batch_time=self.batch_time, loss=self.val_losses))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg)
             self.batch_time.reset()
             self.val_losses.reset()
             self.pose_net.train()
@@ -16,6 +16,7 @@ from scipy.ndimage.filters import gaussian_filter
 
 from datasets.pose.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.pose_model_manager import PoseModelManager
 from utils.helpers.image_helper import ImageHelper
@@ -41,6 +42,7 @@ class ConvPoseMachineTest(object):
         self.pose_net = self.pose_model_manager.multi_pose_detector()
         self.pose_net = RunnerHelper.load_net(self, self.pose_net)
         self.pose_net.eval()
+        self.pose_net = ModelOptimizer.optimize(self, self.pose_net)
 
     def __test_img(self, image_path, save_path):
         Log.info('Image Path: {}'.format(image_path))
@@ -55,9 +57,9 @@ class ConvPoseMachineTest(object):
             image = self.blob_helper.make_input(ori_image,
                                                 input_size=self.configer.get('test', 'input_size'),
                                                 scale=scale)
-            with torch.no_grad():
+            with torch.no_grad(), RunnerHelper.autocast(self):
                 heatmap_out_list = self.pose_net(image)
-                heatmap_out = heatmap_out_list[-1]
+                heatmap_out = heatmap_out_list[-1].float()
 
                 # extract outputs, resize, and remove padding
                 heatmap = heatmap_out.squeeze(0).cpu().numpy().transpose(1, 2, 0)
@@ -16,10 +16,13 @@ from loss.loss_manager import LossManager
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.pose_model_manager import PoseModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.layers.pose.heatmap_generator import HeatmapGenerator
 from utils.layers.pose.paf_generator import PafGenerator
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from vis.visualizer.pose_visualizer import PoseVisualizer
 
 
@@ -89,26 +92,31 @@ class OpenPose(object):
         start_time = time.time()
         # Adjust the learning rate after every epoch.
         self.runner_state['epoch'] += 1
-        self.scheduler.step(self.train_schedule_loss.avg, epoch=self.configer.get('epoch'))
+        self.scheduler.step(self.train_schedule_loss.avg, epoch=self.runner_state['epoch'])
         self.train_schedule_loss.reset()
         # data_tuple: (inputs, heatmap, maskmap, vecmap)
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             inputs = data_dict['img']
             maskmap = data_dict['maskmap']
             heatmap = data_dict['heatmap']
             vecmap = data_dict['vecmap']
-
-            self.data_time.update(time.time() - start_time)
             # Change the data type.
-            inputs, heatmap, maskmap, vecmap = RunnerHelper.to_device(self, inputs, heatmap, maskmap, vecmap)
+            with StepProfiler.timer('h2d'):
+                inputs, heatmap, maskmap, vecmap = RunnerHelper.to_device(self, inputs, heatmap, maskmap, vecmap)
 
             # Forward pass.
-            paf_out, heatmap_out = self.pose_net(inputs)
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                paf_out, heatmap_out = self.pose_net(inputs)
 
             # Compute the loss of the train batch & backward.
-            loss_heatmap = self.mse_loss(heatmap_out, heatmap, mask=maskmap, weights=self.weights)
-            loss_associate = self.mse_loss(paf_out, vecmap, mask=maskmap, weights=self.weights)
-            loss = 2.0 * loss_heatmap + loss_associate
+            with StepProfiler.timer('loss'):
+                loss_heatmap = self.mse_loss(heatmap_out, heatmap, mask=maskmap, weights=self.weights)
+                loss_associate = self.mse_loss(paf_out, vecmap, mask=maskmap, weights=self.weights)
+                loss = 2.0 * loss_heatmap + loss_associate
 
             self.train_losses.update(loss.item(), inputs.size(0))
             self.train_schedule_loss.update(loss.item(), inputs.size(0))
@@ -116,8 +124,7 @@ class OpenPose(object):
             self.train_loss_associate.update(loss_associate.item(), inputs.size(0))
 
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -126,6 +133,9 @@ class OpenPose(object):
 
             # Print the log info & reset the states.
             if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
+                DistHelper.all_reduce_meter(self.train_loss_heatmap)
+                DistHelper.all_reduce_meter(self.train_loss_associate)
                 Log.info('Loss Heatmap:{}, Loss Asso: {}'.format(self.train_loss_heatmap.avg,
                                                                  self.train_loss_associate.avg))
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
@@ -137,6 +147,11 @@ class OpenPose(object):
                     RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                     data_time=self.data_time, loss=self.train_losses))
 
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg,
+                                 loss_heatmap=self.train_loss_heatmap.avg, loss_associate=self.train_loss_associate.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -182,6 +197,10 @@ class OpenPose(object):
                 self.batch_time.update(time.time() - start_time)
                 start_time = time.time()
 
+            # Sum up the val shards of all ranks.
+            DistHelper.all_reduce_meter(self.val_losses)
+            DistHelper.all_reduce_meter(self.val_loss_heatmap)
+            DistHelper.all_reduce_meter(self.val_loss_associate)
             self.runner_state['val_loss'] = self.val_losses.avg
             RunnerHelper.save_net(self, self.pose_net, val_loss=self.val_losses.avg)
             Log.info('Loss Heatmap:{}, Loss Asso: {}'.format(self.val_loss_heatmap.avg, self.val_loss_associate.avg))
@@ -190,6 +209,8 @@ class OpenPose(object):
                 'Test Time {batch_time.sum:.3f}s, ({batch_time.avg:.3f})\t'
                 'Loss {loss.avg:.8f}\n'.format(
                     batch_time=self.batch_time, loss=self.val_losses))
+            MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg,
+                             loss_heatmap=self.val_loss_heatmap.avg, loss_associate=self.val_loss_associate.avg)
             self.batch_time.reset()
             self.val_losses.reset()
             self.val_loss_heatmap.reset()
@@ -17,6 +17,7 @@ from scipy.ndimage.filters import gaussian_filter
 
 from datasets.pose.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.pose_model_manager import PoseModelManager
 from utils.helpers.image_helper import ImageHelper
@@ -47,6 +48,7 @@ class OpenPoseTest(object):
         self.pose_net = self.pose_model_manager.multi_pose_detector()
         self.pose_net = RunnerHelper.load_net(self, self.pose_net)
         self.pose_net.eval()
+        self.pose_net = ModelOptimizer.optimize(self, self.pose_net)
 
     def _get_blob(self, ori_image, scale=None):
         assert scale is not None
@@ -82,10 +84,10 @@ class OpenPoseTest(object):
         stride = self.configer.get('network', 'stride')
         for i, scale in enumerate(multiplier):
             image, border_hw = self._get_blob(ori_image, scale=scale)
-            with torch.no_grad():
+            with torch.no_grad(), RunnerHelper.autocast(self):
                 paf_out_list, heatmap_out_list = self.pose_net(image)
-                paf_out = paf_out_list[-1]
-                heatmap_out = heatmap_out_list[-1]
+                paf_out = paf_out_list[-1].float()
+                heatmap_out = heatmap_out_list[-1].float()
 
                 # extract outputs, resize, and remove padding
                 heatmap = heatmap_out.squeeze(0).cpu().numpy().transpose(1, 2, 0)
@@ -8,7 +8,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import cv2
 import time
 import torch
 
@@ -17,8 +16,11 @@ from loss.loss_manager import LossManager
 from methods.tools.runner_helper import RunnerHelper
 from methods.tools.trainer import Trainer
 from models.seg_model_manager import SegModelManager
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.average_meter import AverageMeter
 from utils.tools.logger import Logger as Log
+from utils.tools.metric_writer import MetricWriter
+from utils.tools.step_profiler import StepProfiler
 from metric.seg.seg_running_score import SegRunningScore
 from vis.visualizer.seg_visualizer import SegVisualizer
 
@@ -82,23 +84,28 @@ class FCNSegmentor(object):
         # Adjust the learning rate after every epoch.
 
         for i, data_dict in enumerate(self.train_loader):
+            # The time waiting for the data loader.
+            self.data_time.update(time.time() - start_time)
+            StepProfiler.record('data', self.data_time.val)
+            StepProfiler.step(self.runner_state['iters'])
             Trainer.update(self, backbone_list=(0, ))
             inputs = data_dict['img']
             targets = data_dict['labelmap']
-            self.data_time.update(time.time() - start_time)
             # Change the data type.
-
-            inputs, targets = RunnerHelper.to_device(self, inputs, targets)
+            with StepProfiler.timer('h2d'):
+                inputs, targets = RunnerHelper.to_device(self, inputs, targets)
 
             # Forward pass.
-            outputs = self.seg_net(inputs)
+            with StepProfiler.timer('forward'), RunnerHelper.autocast(self):
+                outputs = self.seg_net(inputs)
             # outputs = self.module_utilizer.gather(outputs)
             # Compute the loss of the train batch & backward.
-            loss = self.pixel_loss(outputs, targets, gathered=self.configer.get('network', 'gathered'))
+            with StepProfiler.timer('loss'):
+                loss = self.pixel_loss(outputs, targets, gathered=self.configer.get('network', 'gathered'))
+
             self.train_losses.update(loss.item(), inputs.size(0))
             self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+            Trainer.step(self, loss)
 
             # Update the vars of the train phase.
             self.batch_time.update(time.time() - start_time)
@@ -106,7 +113,8 @@ class FCNSegmentor(object):
             self.runner_state['iters'] += 1
 
             # Print the log info & reset the states.
-            if self.configer.get('iters') % self.configer.get('solver', 'display_iter') == 0:
+            if self.runner_state['iters'] % self.configer.get('solver', 'display_iter') == 0:
+                DistHelper.all_reduce_meter(self.train_losses)
                 Log.info('Train Epoch: {0}\tTrain Iteration: {1}\t'
                          'Time {batch_time.sum:.3f}s / {2}iters, ({batch_time.avg:.3f})\t'
                          'Data load {data_time.sum:.3f}s / {2}iters, ({data_time.avg:3f})\n'
@@ -115,6 +123,10 @@ class FCNSegmentor(object):
                          self.configer.get('solver', 'display_iter'),
                          RunnerHelper.get_lr(self.optimizer), batch_time=self.batch_time,
                          data_time=self.data_time, loss=self.train_losses))
+                MetricWriter.add('train', self.runner_state['iters'], loss=self.train_losses.avg,
+                                 lr=RunnerHelper.get_lr(self.optimizer)[0], batch_time=self.batch_time.avg,
+                                 data_time=self.data_time.avg)
+                StepProfiler.dump(self.runner_state['iters'])
                 self.batch_time.reset()
                 self.data_time.reset()
                 self.train_losses.reset()
@@ -151,12 +163,15 @@ class FCNSegmentor(object):
                 outputs = RunnerHelper.gather(self, outputs)
 
             self.val_losses.update(loss.item(), inputs.size(0))
-            self._update_running_score(outputs[-1], data_dict['meta'])
+            self.seg_running_score.update_logits(outputs[-1], data_dict['meta'])
 
             # Update the vars of the val phase.
             self.batch_time.update(time.time() - start_time)
             start_time = time.time()
 
+        # Sum up the val shards of all ranks.
+        DistHelper.all_reduce_meter(self.val_losses)
+        self.seg_running_score.all_reduce()
         self.runner_state['performance'] = self.seg_running_score.get_mean_iou()
         self.runner_state['val_loss'] = self.val_losses.avg
         RunnerHelper.save_net(self, self.seg_net,
@@ -170,22 +185,13 @@ class FCNSegmentor(object):
                 batch_time=self.batch_time, loss=self.val_losses))
         Log.info('Mean IOU: {}\n'.format(self.seg_running_score.get_mean_iou()))
         Log.info('Pixel ACC: {}\n'.format(self.seg_running_score.get_pixel_acc()))
+        MetricWriter.add('val', self.runner_state['iters'], loss=self.val_losses.avg,
+                         mIoU=self.seg_running_score.get_mean_iou(), pixel_acc=self.seg_running_score.get_pixel_acc())
         self.batch_time.reset()
         self.val_losses.reset()
         self.seg_running_score.reset()
         self.seg_net.train()
 
-    def _update_running_score(self, pred, metas):
-        pred = pred.permute(0, 2, 3, 1)
-        for i in range(pred.size(0)):
-            ori_img_size = metas[i]['ori_img_size']
-            border_size = metas[i]['border_size']
-            ori_target = metas[i]['ori_target']
-            total_logits = cv2.resize(pred[i, :border_size[1], :border_size[0]].cpu().numpy(),
-                                      tuple(ori_img_size), interpolation=cv2.INTER_CUBIC)
-            labelmap = np.argmax(total_logits, axis=-1)
-            self.seg_running_score.update(labelmap[None], ori_target[None])
-
 
 if __name__ == "__main__":
     # Test class for pose estimator.
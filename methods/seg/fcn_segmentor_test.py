@@ -16,6 +16,7 @@ from PIL import Image
 
 from datasets.seg.data_loader import DataLoader
 from methods.tools.blob_helper import BlobHelper
+from methods.tools.model_optimizer import ModelOptimizer
 from methods.tools.runner_helper import RunnerHelper
 from models.seg_model_manager import SegModelManager
 from utils.helpers.image_helper import ImageHelper
@@ -41,6 +42,7 @@ class FCNSegmentorTest(object):
         self.seg_net = self.seg_model_manager.semantic_segmentor()
         self.seg_net = RunnerHelper.load_net(self, self.seg_net)
         self.seg_net.eval()
+        self.seg_net = ModelOptimizer.optimize(self, self.seg_net)
 
     def _get_blob(self, ori_image, scale=None):
         assert scale is not None
@@ -199,9 +201,9 @@ class FCNSegmentorTest(object):
 
         split_crops = np.concatenate(split_crops, axis=0)  # (n, crop_image_size, crop_image_size, 3)
         inputs = torch.from_numpy(split_crops).permute(0, 3, 1, 2).to(self.device)
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             results = self.seg_net.forward(inputs)
-            results = results[-1].permute(0, 2, 3, 1).cpu().numpy()
+            results = results[-1].float().permute(0, 2, 3, 1).cpu().numpy()
 
         reassemble = np.zeros((np_image.shape[0], np_image.shape[1], results.shape[-1]), np.float32)
         index = 0
@@ -225,9 +227,9 @@ class FCNSegmentorTest(object):
         return cropped_starting
 
     def _predict(self, inputs):
-        with torch.no_grad():
+        with torch.no_grad(), RunnerHelper.autocast(self):
             results = self.seg_net.forward(inputs)
-            results = results[-1].squeeze(0).permute(1, 2, 0).cpu().numpy()
+            results = results[-1].float().squeeze(0).permute(1, 2, 0).cpu().numpy()
 
         return results
 
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Asynchronous & atomic checkpoint writer.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import atexit
+import copy
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import torch
+
+from utils.tools.logger import Logger as Log
+
+
+def _to_cpu(obj):
+    if isinstance(obj, torch.Tensor):
+        # Copy even the cpu tensors, the training goes on updating them in place.
+        return obj.detach().to('cpu', copy=True)
+
+    if isinstance(obj, OrderedDict):
+        return OrderedDict([(key, _to_cpu(value)) for key, value in obj.items()])
+
+    if isinstance(obj, dict):
+        return {key: _to_cpu(value) for key, value in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(item) for item in obj)
+
+    return copy.deepcopy(obj)
+
+
+class CheckpointManager(object):
+    """Snapshot the state to cpu once, and write it once in a background thread.
+
+    The file is written as a tmp file and renamed, so a crash never leaves a broken checkpoint.
+    The other names of the same state are hard links (or copies) of the written file, and only
+    the last keep_last periodic (iters/epoch) checkpoints are kept.
+    """
+    def __init__(self, async_save=True, keep_last=None):
+        self.async_save = async_save
+        self.keep_last = keep_last
+        self.periodic_list = list()
+        self.cond = threading.Condition()
+        self.pending = None
+        self.busy = False
+        self.thread = None
+        if self.async_save:
+            self.thread = threading.Thread(target=self._loop, name='checkpoint_writer')
+            self.thread.daemon = True
+            self.thread.start()
+            atexit.register(self.wait)
+
+    @staticmethod
+    def _atomic_save(state, path):
+        tmp_path = '{}.tmp'.format(path)
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _atomic_link(src_path, path):
+        tmp_path = '{}.tmp'.format(path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        try:
+            os.link(src_path, tmp_path)
+        except OSError:
+            shutil.copyfile(src_path, tmp_path)
+
+        os.replace(tmp_path, path)
+
+    def _write(self, state, path, link_list, periodic_list):
+        self._atomic_save(state, path)
+        for link_path in link_list + periodic_list:
+            self._atomic_link(path, link_path)
+
+        self.periodic_list.extend(periodic_list)
+        if self.keep_last is not None and self.keep_last > 0:
+            while len(self.periodic_list) > self.keep_last:
+                old_path = self.periodic_list.pop(0)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+
+    def _loop(self):
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+
+                job = self.pending
+                self.pending = None
+                self.busy = True
+
+            try:
+                self._write(*job)
+            except Exception as e:
+                Log.error('Checkpoint writing failed: {}'.format(e))
+
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def save(self, state, path, link_list=(), periodic_list=()):
+        """Save state into path, then link path to the names of link_list & periodic_list."""
+        job = (_to_cpu(state), path, list(link_list), list(periodic_list))
+        if not self.async_save:
+            self._write(*job)
+            return
+
+        with self.cond:
+            if self.pending is not None:
+                # Only the newest snapshot of the latest file matters, but keep the extra names.
+                _, _, pending_links, pending_periodic = self.pending
+                if len(pending_links) > 0 or len(pending_periodic) > 0:
+                    self.cond.wait_for(lambda: self.pending is None)
+
+            self.pending = job
+            self.cond.notify_all()
+
+    def wait(self):
+        """Block until all the pending checkpoints are on the disk."""
+        if not self.async_save:
+            return
+
+        with self.cond:
+            self.cond.wait_for(lambda: self.pending is None and not self.busy)
@@ -12,6 +12,7 @@ import os
 
 from utils.helpers.file_helper import FileHelper
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 
 
 class Controller(object):
@@ -27,11 +28,9 @@ class Controller(object):
         runner.runner_state['max_performance'] = 0
         runner.runner_state['min_val_loss'] = 0
 
-        if runner.configer.get('network', 'bn_type') is None:
-            runner.configer.update(['network', 'bn_type'], 'torchbn')
-
         if runner.configer.get('phase') == 'train':
-            assert len(runner.configer.get('gpu')) > 1 or runner.configer.get('network', 'bn_type') == 'torchbn'
+            assert (runner.configer.get('gpu') is not None and len(runner.configer.get('gpu')) > 1) \
+                   or runner.configer.get('network', 'bn_type') == 'torchbn'
 
         Log.info('BN Type is {}.'.format(runner.configer.get('network', 'bn_type')))
 
@@ -54,6 +53,9 @@ class Controller(object):
                     runner.val()
                     break
 
+        if getattr(runner, 'checkpoint_manager', None) is not None:
+            runner.checkpoint_manager.wait()
+
         Log.info('Training end...')
 
     @staticmethod
@@ -113,4 +115,26 @@ class Controller(object):
 
                 runner.test_img(image_path, label_path, vis_path, raw_path)
 
+        StepProfiler.dump(0, phase='test')
         Log.info('Testing end...')
+
+    @staticmethod
+    def serve(runner):
+        Log.info('Serving start...')
+        from methods.tools.inference_server import InferenceServer
+        InferenceServer(runner).serve()
+        Log.info('Serving end...')
+
+    @staticmethod
+    def export(runner):
+        Log.info('Exporting start...')
+        from methods.tools.model_exporter import ModelExporter
+        ModelExporter.export(runner)
+        Log.info('Exporting end...')
+
+    @staticmethod
+    def quantize(runner):
+        Log.info('Quantization start...')
+        from methods.tools.model_quantizer import ModelQuantizer
+        ModelQuantizer.quantize(runner)
+        Log.info('Quantization end...')
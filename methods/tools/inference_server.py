@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Inference server with shared memory payloads and dynamic batching.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from utils.tools.logger import Logger as Log
+
+
+NET_ATTR_DICT = {
+    'seg': 'seg_net',
+    'det': 'det_net',
+    'pose': 'pose_net',
+    'cls': 'cls_net',
+}
+
+
+def _flatten(outputs, flat_list):
+    """Append the tensors of the nested outputs to flat_list, return the spec of their structure."""
+    if outputs is None:
+        return None
+
+    if isinstance(outputs, torch.Tensor):
+        flat_list.append(outputs)
+        return len(flat_list) - 1
+
+    return [_flatten(item, flat_list) for item in outputs]
+
+
+def _unflatten(spec, flat_list):
+    if spec is None:
+        return None
+
+    if isinstance(spec, int):
+        return flat_list[spec]
+
+    return [_unflatten(item, flat_list) for item in spec]
+
+
+class SharedMemoryHelper(object):
+
+    @staticmethod
+    def create(array):
+        from multiprocessing import shared_memory
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        return shm, dict(name=shm.name, shape=list(array.shape), dtype=str(array.dtype))
+
+    @staticmethod
+    def attach(name, track=False):
+        from multiprocessing import shared_memory
+        try:
+            return shared_memory.SharedMemory(name=name, track=track)
+        except TypeError:
+            # Before python 3.13 every attach registers the block to the resource tracker,
+            # which would unlink it when this process exits.
+            shm = shared_memory.SharedMemory(name=name)
+            if not track:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+
+            return shm
+
+    @staticmethod
+    def release(shm):
+        """Hand the ownership of a created block to the peer, which unlinks it after reading."""
+        from multiprocessing import resource_tracker
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+        shm.close()
+
+    @staticmethod
+    def read(meta, unlink=False):
+        shm = SharedMemoryHelper.attach(meta['name'], track=unlink)
+        array = np.ndarray(meta['shape'], dtype=np.dtype(meta['dtype']), buffer=shm.buf).copy()
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+        return array
+
+
+class InferenceRequest(object):
+    def __init__(self, inputs, border_hw):
+        self.inputs = inputs
+        self.border_hw = border_hw
+        self.bucket = tuple(inputs.size()[2:])
+        self.arrive_time = time.time()
+        self.outputs = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchScheduler(object):
+    """Group the pending requests with the same bucket into one forward pass.
+
+    A batch is launched as soon as a bucket holds max_batch_size requests, or when the
+    oldest request of a bucket has waited for max_wait_ms. The outputs may be nested lists of
+    batched tensors, e.g. (paf_out_list, heatmap_out_list), every request gets the same structure.
+    """
+    def __init__(self, forward_func, max_batch_size=8, max_wait_ms=10.0):
+        self.forward_func = forward_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = OrderedDict()
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name='batch_scheduler')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+
+    def submit(self, request):
+        with self.cond:
+            if request.bucket not in self.pending:
+                self.pending[request.bucket] = list()
+
+            self.pending[request.bucket].append(request)
+            self.cond.notify()
+
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+
+        return request.outputs
+
+    def _next_batch(self):
+        with self.cond:
+            while self.running:
+                if len(self.pending) == 0:
+                    self.cond.wait()
+                    continue
+
+                # Serve the bucket whose oldest request came first.
+                bucket = min(self.pending, key=lambda key: self.pending[key][0].arrive_time)
+                queue = self.pending[bucket]
+                wait_time = self.max_wait - (time.time() - queue[0].arrive_time)
+                if len(queue) >= self.max_batch_size or wait_time <= 0:
+                    batch = queue[:self.max_batch_size]
+                    if len(queue) > self.max_batch_size:
+                        self.pending[bucket] = queue[self.max_batch_size:]
+                    else:
+                        del self.pending[bucket]
+
+                    return batch
+
+                self.cond.wait(wait_time)
+
+        return None
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            try:
+                flat_list = list()
+                spec = _flatten(self.forward_func(torch.cat([request.inputs for request in batch], 0)), flat_list)
+                for i, request in enumerate(batch):
+                    request.outputs = _unflatten(spec, [output[i] for output in flat_list])
+
+            except Exception as e:
+                Log.error('Batch forward failed: {}'.format(e))
+                for request in batch:
+                    request.error = str(e)
+
+            for request in batch:
+                request.done.set()
+
+
+class InferenceServer(object):
+    """Serve a loaded test runner over a local socket.
+
+    Every request is one json line {"image": shm_meta}, where shm_meta describes a uint8 HxWxC
+    image in the data:input_mode order stored in a shared memory block owned by the client.
+    Every response is one json line {"outputs": [shm_meta, ...], "spec": spec, "border_hw": [h, w]}
+    whose blocks hold the per-image slices of all the flattened network outputs and are unlinked by
+    the client, the spec restores their nested structure.
+    """
+    def __init__(self, runner):
+        self.runner = runner
+        self.configer = runner.configer
+        self.device = torch.device('cpu' if self.configer.get('gpu') is None else 'cuda')
+        self.net = getattr(runner, NET_ATTR_DICT[self.configer.get('task')])
+        self.bucket_stride = self.configer.get('server', 'bucket_stride')
+        self.scheduler = BatchScheduler(self._forward,
+                                        max_batch_size=self.configer.get('server', 'max_batch_size'),
+                                        max_wait_ms=self.configer.get('server', 'max_wait_ms'))
+        self.server_sock = None
+
+    def _get_input_size(self):
+        if self.configer.exists('test', 'input_size'):
+            return self.configer.get('test', 'input_size')
+
+        if self.configer.exists('data', 'input_size'):
+            return self.configer.get('data', 'input_size')
+
+        return None
+
+    def _make_input(self, image):
+        if self.configer.get('data', 'image_tool') == 'pil':
+            image = Image.fromarray(image)
+
+        inputs = self.runner.blob_helper.make_input(image, input_size=self._get_input_size(), scale=1.0)
+        b, c, h, w = inputs.size()
+        border_hw = [h, w]
+        if self.bucket_stride is not None and self.bucket_stride > 1:
+            # Pad to the bucket size, so that similar shapes share one batch.
+            pad_w = 0 if (w % self.bucket_stride == 0) else self.bucket_stride - (w % self.bucket_stride)
+            pad_h = 0 if (h % self.bucket_stride == 0) else self.bucket_stride - (h % self.bucket_stride)
+            inputs = F.pad(inputs, (0, pad_w, 0, pad_h))
+
+        return inputs, border_hw
+
+    def _forward(self, inputs):
+        with torch.no_grad():
+            outputs = self.net(inputs.to(self.device))
+
+        if isinstance(outputs, torch.Tensor):
+            outputs = [outputs]
+
+        return outputs
+
+    def _handle(self, conn):
+        stream = conn.makefile('rwb')
+        try:
+            for line in stream:
+                request_dict = json.loads(line.decode('utf-8'))
+                try:
+                    image = SharedMemoryHelper.read(request_dict['image'])
+                    inputs, border_hw = self._make_input(image)
+                    outputs = self.scheduler.submit(InferenceRequest(inputs, border_hw))
+                    flat_list = list()
+                    spec = _flatten(outputs, flat_list)
+                    out_list = list()
+                    for output in flat_list:
+                        shm, meta = SharedMemoryHelper.create(output.cpu().numpy())
+                        SharedMemoryHelper.release(shm)
+                        out_list.append(meta)
+
+                    response_dict = dict(outputs=out_list, spec=spec, border_hw=border_hw)
+
+                except Exception as e:
+                    response_dict = dict(error=str(e))
+
+                stream.write((json.dumps(response_dict) + '\n').encode('utf-8'))
+                stream.flush()
+
+        finally:
+            stream.close()
+            conn.close()
+
+    def serve(self):
+        if self.configer.get('method') == 'faster_rcnn':
+            Log.error('Faster R-CNN needs image metas, serving is not supported.')
+            exit(1)
+
+        self.scheduler.start()
+        socket_path = self.configer.get('server', 'socket_path')
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+            self.server_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server_sock.bind(socket_path)
+            Log.info('Serving on {}'.format(socket_path))
+        else:
+            self.server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server_sock.bind((self.configer.get('server', 'host'), self.configer.get('server', 'port')))
+            Log.info('Serving on {}:{}'.format(self.configer.get('server', 'host'),
+                                               self.configer.get('server', 'port')))
+
+        self.server_sock.listen(128)
+        try:
+            while True:
+                conn, _ = self.server_sock.accept()
+                handler = threading.Thread(target=self._handle, args=(conn,))
+                handler.daemon = True
+                handler.start()
+
+        except KeyboardInterrupt:
+            Log.info('Server interrupted.')
+
+        finally:
+            self.server_sock.close()
+            self.scheduler.stop()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+class InferenceClient(object):
+    def __init__(self, host='127.0.0.1', port=8000, socket_path=None):
+        if socket_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+
+        self.stream = self.sock.makefile('rwb')
+
+    def infer(self, image):
+        shm, meta = SharedMemoryHelper.create(np.asarray(image, dtype=np.uint8))
+        try:
+            self.stream.write((json.dumps(dict(image=meta)) + '\n').encode('utf-8'))
+            self.stream.flush()
+            response_dict = json.loads(self.stream.readline().decode('utf-8'))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        if 'error' in response_dict:
+            raise RuntimeError(response_dict['error'])
+
+        outputs = [SharedMemoryHelper.read(out_meta, unlink=True) for out_meta in response_dict['outputs']]
+        return _unflatten(response_dict['spec'], outputs), response_dict['border_hw']
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Load generator for the inference server.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from methods.tools.inference_server import InferenceClient
+
+
+class LoadGenerator(object):
+    def __init__(self, args):
+        self.args = args
+        self.latency_list = list()
+        self.error_count = 0
+        self.lock = threading.Lock()
+
+    def _make_image(self, rng):
+        height, width = self.args.image_sizes[rng.randint(len(self.args.image_sizes))]
+        return rng.randint(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    def _worker(self, worker_id):
+        rng = np.random.RandomState(worker_id)
+        client = InferenceClient(host=self.args.host, port=self.args.port, socket_path=self.args.socket_path)
+        latency_list = list()
+        error_count = 0
+        for i in range(self.args.requests):
+            image = self._make_image(rng)
+            start_time = time.time()
+            try:
+                client.infer(image)
+                latency_list.append(time.time() - start_time)
+            except RuntimeError:
+                error_count += 1
+
+            if self.args.interval > 0:
+                time.sleep(self.args.interval)
+
+        client.close()
+        with self.lock:
+            self.latency_list.extend(latency_list)
+            self.error_count += error_count
+
+    def run(self):
+        start_time = time.time()
+        thread_list = [threading.Thread(target=self._worker, args=(i,)) for i in range(self.args.concurrency)]
+        for thread in thread_list:
+            thread.start()
+
+        for thread in thread_list:
+            thread.join()
+
+        total_time = time.time() - start_time
+        latency = np.array(self.latency_list) * 1000.0
+        print('Requests: {}\tErrors: {}\tTime: {:.3f}s\tThroughput: {:.2f} img/s'.format(
+            len(self.latency_list), self.error_count, total_time, len(self.latency_list) / total_time))
+        if len(latency) > 0:
+            print('Latency(ms): mean {:.2f}\tp50 {:.2f}\tp90 {:.2f}\tp99 {:.2f}\tmax {:.2f}'.format(
+                latency.mean(), np.percentile(latency, 50), np.percentile(latency, 90),
+                np.percentile(latency, 99), latency.max()))
+
+
+def parse_size(value):
+    height, width = value.split('x')
+    return int(height), int(width)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1', type=str,
+                        dest='host', help='The host of the inference server.')
+    parser.add_argument('--port', default=8000, type=int,
+                        dest='port', help='The port of the inference server.')
+    parser.add_argument('--socket_path', default=None, type=str,
+                        dest='socket_path', help='The unix socket of the inference server.')
+    parser.add_argument('--concurrency', default=8, type=int,
+                        dest='concurrency', help='The number of concurrent clients.')
+    parser.add_argument('--requests', default=50, type=int,
+                        dest='requests', help='The number of requests per client.')
+    parser.add_argument('--interval', default=0.0, type=float,
+                        dest='interval', help='The sleep seconds between two requests of a client.')
+    parser.add_argument('--image_sizes', default=[(480, 640)], nargs='+', type=parse_size,
+                        dest='image_sizes', help='The image sizes (HxW) sampled by clients.')
+
+    LoadGenerator(parser.parse_args()).run()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Export the test models into TorchScript & ONNX, and run the exported engines.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from methods.tools.inference_server import NET_ATTR_DICT, _flatten, _unflatten
+from utils.helpers.tensor_helper import TensorHelper
+from utils.tools.logger import Logger as Log
+
+
+# Which outputs the test runners consume, the others are auxiliary heads.
+#   all: keep every output.
+#   last: keep the last output, e.g. seg_net(x)[-1].
+#   last_each: keep the last stage of every output list, e.g. paf_out_list[-1], heatmap_out_list[-1].
+#   last_only: keep the position of the outputs, but only export the last one, the others are None,
+#              e.g. None, None, detections. All of them are still computed by the net.
+OUTPUT_SELECT_DICT = {
+    'fcn_segmentor': 'last',
+    'open_pose': 'last_each',
+    'conv_pose_machine': 'last',
+    'single_shot_detector': 'all',
+    'yolov3': 'last_only',
+    'fc_classifier': 'all',
+}
+
+ENGINE_SUFFIX_DICT = {
+    'torchscript': '.pt',
+    'onnx': '.onnx',
+    'int8': '_int8.pt',
+}
+
+
+class ExportWrapper(nn.Module):
+    """Strip the auxiliary outputs and flatten the rest into a tuple of tensors."""
+    def __init__(self, net, select_mode):
+        super(ExportWrapper, self).__init__()
+        self.net = net
+        self.select_mode = select_mode
+        self.spec = None
+
+    def select(self, outputs):
+        if self.select_mode == 'all' or isinstance(outputs, torch.Tensor):
+            return outputs
+
+        elif self.select_mode == 'last':
+            return [outputs[-1]]
+
+        elif self.select_mode == 'last_each':
+            return [[item[-1]] for item in outputs]
+
+        elif self.select_mode == 'last_only':
+            return [None] * (len(outputs) - 1) + [outputs[-1]]
+
+        else:
+            Log.error('Output select mode: {} is not valid.'.format(self.select_mode))
+            exit(1)
+
+    def forward(self, x):
+        flat_list = list()
+        self.spec = _flatten(self.select(self.net(x)), flat_list)
+        return tuple(flat_list)
+
+
+class ExportedNet(object):
+    """Run an exported artifact with the output structure of the eager model."""
+    def __init__(self, engine, engine_path, device):
+        self.engine = engine
+        self.device = device
+        with open('{}.json'.format(engine_path), 'r') as json_stream:
+            engine_dict = json.load(json_stream)
+            self.spec = engine_dict['spec']
+
+        if engine == 'int8':
+            # The quantized kernels only run on cpu.
+            torch.backends.quantized.engine = engine_dict['backend']
+            self.device = torch.device('cpu')
+
+        if engine in ('torchscript', 'int8'):
+            self.net = torch.jit.load(engine_path, map_location=self.device)
+            self.net.eval()
+
+        elif engine == 'onnx':
+            try:
+                import onnxruntime
+            except ImportError:
+                Log.error('onnxruntime is required by the onnx engine.')
+                exit(1)
+
+            providers = ['CPUExecutionProvider']
+            if device.type == 'cuda':
+                providers.insert(0, 'CUDAExecutionProvider')
+
+            self.net = onnxruntime.InferenceSession(engine_path, providers=providers)
+            self.input_name = self.net.get_inputs()[0].name
+
+        else:
+            Log.error('Engine: {} is not valid.'.format(engine))
+            exit(1)
+
+    def eval(self):
+        return self
+
+    def forward(self, x):
+        if self.engine in ('torchscript', 'int8'):
+            with torch.no_grad():
+                flat_list = [item.to(x.device) for item in self.net(x.to(self.device))]
+        else:
+            flat_list = self.net.run(None, {self.input_name: x.detach().cpu().numpy()})
+            flat_list = [torch.from_numpy(item).to(x.device) for item in flat_list]
+
+        return _unflatten(self.spec, flat_list)
+
+    def __call__(self, x):
+        return self.forward(x)
+
+
+class ModelExporter(object):
+
+    @staticmethod
+    def get_engine_path(configer, engine):
+        if configer.exists('test', 'engine_path') and configer.get('test', 'engine_path') is not None:
+            return configer.get('test', 'engine_path')
+
+        resume = configer.get('network', 'resume')
+        return '{}{}'.format(os.path.splitext(resume)[0], ENGINE_SUFFIX_DICT[engine])
+
+    @staticmethod
+    def get_input_size(configer):
+        for key in [('test', 'input_size'), ('data', 'input_size')]:
+            if configer.exists(*key) and configer.get(*key) is not None:
+                input_size = configer.get(*key)
+                if input_size[0] != -1 and input_size[1] != -1:
+                    return input_size
+
+        # The fixed size of the val images, e.g. the classifiers without the test sizes.
+        if configer.exists('val', 'data_transformer'):
+            trans_dict = configer.get('val', 'data_transformer')
+            if trans_dict.get('size_mode') == 'fix_size' and 'input_size' in trans_dict:
+                return trans_dict['input_size']
+
+        return [512, 512]
+
+    @staticmethod
+    def load_engine(configer, device):
+        engine = configer.get('test', 'engine')
+        return ExportedNet(engine, ModelExporter.get_engine_path(configer, engine), device)
+
+    @staticmethod
+    def export(runner):
+        configer = runner.configer
+        if configer.get('method') not in OUTPUT_SELECT_DICT:
+            Log.error('Method: {} is not exportable.'.format(configer.get('method')))
+            exit(1)
+
+        net = getattr(runner, NET_ATTR_DICT[configer.get('task')])
+        net = net.module if hasattr(net, 'module') else net
+        wrapper = ExportWrapper(net.cpu().eval(), OUTPUT_SELECT_DICT[configer.get('method')]).eval()
+        in_width, in_height = ModelExporter.get_input_size(configer)
+        inputs = torch.randn(1, 3, in_height, in_width)
+
+        with torch.no_grad():
+            eager_outputs = wrapper(inputs)
+
+        # Export both engines without --engine.
+        engine = configer.get('test', 'engine') if configer.exists('test', 'engine') else None
+        if engine not in (None, 'eager', 'torchscript', 'onnx'):
+            Log.error('Engine: {} is not exportable, the int8 engine is saved by the quantize phase.'.format(engine))
+            exit(1)
+
+        engine_list = ['torchscript', 'onnx'] if engine in (None, 'eager') else [engine]
+        for engine in engine_list:
+            engine_path = ModelExporter.get_engine_path(configer, engine)
+            if engine == 'torchscript':
+                with torch.no_grad():
+                    traced_net = torch.jit.freeze(torch.jit.trace(wrapper, inputs, check_trace=False))
+
+                traced_net.save(engine_path)
+
+            else:
+                try:
+                    torch.onnx.export(wrapper, inputs, engine_path, input_names=['img'],
+                                      output_names=['out{}'.format(i) for i in range(len(eager_outputs))],
+                                      dynamic_axes={'img': {0: 'batch', 2: 'height', 3: 'width'}},
+                                      opset_version=11)
+                except Exception as e:
+                    Log.warn('ONNX export failed: {}'.format(e))
+                    continue
+
+            with open('{}.json'.format(engine_path), 'w') as json_stream:
+                json.dump(dict(spec=wrapper.spec, input_size=[in_width, in_height]), json_stream)
+
+            Log.info('Export {} engine into {}.'.format(engine, engine_path))
+            ModelExporter.check(wrapper, engine, engine_path, inputs)
+
+    @staticmethod
+    def check(wrapper, engine, engine_path, inputs, iters=10):
+        """Report the max abs diff and the cpu latency of the exported engine against the eager model.
+
+            Returns:
+                the max abs diff, None if the engine can't run here.
+        """
+        if engine == 'onnx':
+            try:
+                import onnxruntime
+            except ImportError:
+                Log.warn('onnxruntime is not installed, skip checking the onnx engine.')
+                return None
+
+        exported_net = ExportedNet(engine, engine_path, torch.device('cpu'))
+
+        inputs = torch.rand_like(inputs)
+        flat_list = list()
+        with torch.no_grad():
+            _flatten(wrapper.select(wrapper.net(inputs)), flat_list)
+            exported_list = list()
+            _flatten(exported_net(inputs), exported_list)
+
+        max_diff = 0.0
+        for a, b in zip(flat_list, exported_list):
+            diff, _ = TensorHelper.max_abs_diff(b, a)
+            # Keep a NaN diff, max() would drop it.
+            max_diff = diff if np.isnan(diff) or diff > max_diff else max_diff
+
+        latency = dict()
+        for name, func in [('eager', wrapper.net), (engine, exported_net)]:
+            with torch.no_grad():
+                func(inputs)
+                start_time = time.time()
+                for _ in range(iters):
+                    func(inputs)
+
+            latency[name] = (time.time() - start_time) / iters * 1000.0
+
+        Log.info('{} engine: max abs diff {:.6f}\tEager {:.2f}ms\t{} {:.2f}ms\tSpeedup {:.2f}x'.format(
+            engine, max_diff, latency['eager'], engine, latency[engine],
+            latency['eager'] / max(latency[engine], np.finfo(np.float32).eps)))
+
+        return max_diff
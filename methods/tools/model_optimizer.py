@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Inference optimization of the test models: BN folding, channels_last & TorchScript freezing.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from extensions.parallel.data_container import DataContainer
+from methods.tools.inference_server import _unflatten
+from methods.tools.model_exporter import ExportWrapper, ModelExporter
+from methods.tools.model_quantizer import ModelQuantizer, _copy_net
+from utils.helpers.tensor_helper import TensorHelper
+from utils.tools.logger import Logger as Log
+
+
+def _map_tensors(obj, func):
+    if isinstance(obj, torch.Tensor):
+        return func(obj)
+
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_map_tensors(item, func) for item in obj)
+
+    if isinstance(obj, dict):
+        return {key: _map_tensors(value, func) for key, value in obj.items()}
+
+    return obj
+
+
+def _flatten_tensors(obj, flat_list):
+    _map_tensors(obj, flat_list.append)
+    return flat_list
+
+
+def _to_channels_last(x):
+    return x.contiguous(memory_format=torch.channels_last) if x.dim() == 4 else x
+
+
+def _to_contiguous(x):
+    return x.contiguous() if x.dim() == 4 else x
+
+
+def _set_module(net, target, module):
+    parent_name, _, name = target.rpartition('.')
+    setattr(net.get_submodule(parent_name) if parent_name else net, name, module)
+
+
+def _can_fold(conv, bn):
+    return type(conv) is nn.Conv2d and type(bn) is nn.BatchNorm2d and bn.track_running_stats \
+        and bn.running_mean is not None
+
+
+class OptimizedNet(nn.Module):
+    """Run the optimized net with the inputs & outputs of the eager model.
+
+    The 4D inputs are turned into channels_last & the 4D outputs back into contiguous tensors,
+    the flat outputs of the frozen TorchScript are restored into the output structure by the spec.
+    """
+    def __init__(self, net, channels_last=False, spec=None):
+        super(OptimizedNet, self).__init__()
+        self.net = net
+        self.channels_last = channels_last
+        self.spec = spec
+
+    def forward(self, *inputs):
+        if self.channels_last:
+            inputs = _map_tensors(inputs, _to_channels_last)
+
+        outputs = self.net(*inputs)
+        if self.spec is not None:
+            outputs = _unflatten(self.spec, list(outputs))
+
+        return _map_tensors(outputs, _to_contiguous) if self.channels_last else outputs
+
+
+class ModelOptimizer(object):
+
+    @staticmethod
+    def enabled(configer, key):
+        return configer.exists('test', key) and bool(configer.get('test', key))
+
+    @staticmethod
+    def fold_bn(net):
+        """Fold the BN into the weights of the conv before it in place, the BN is replaced by nn.Identity.
+
+        The conv-BN pairs are found on the torch.fx graph, the conv output is only used by the BN & neither of
+        them is called twice. The children of the modules that fx could not trace are folded one by one.
+
+        Returns:
+          The number of the folded BN.
+        """
+        try:
+            graph = torch.fx.symbolic_trace(net).graph
+        except Exception:
+            return sum([ModelOptimizer.fold_bn(child) for child in net.children() if len(child._modules) > 0])
+
+        num_calls = dict()
+        for node in graph.nodes:
+            if node.op == 'call_module':
+                num_calls[node.target] = num_calls.get(node.target, 0) + 1
+
+        num_folded = 0
+        for node in graph.nodes:
+            if node.op != 'call_module' or len(node.args) == 0 or not isinstance(node.args[0], torch.fx.Node):
+                continue
+
+            conv_node = node.args[0]
+            if conv_node.op != 'call_module' or len(conv_node.users) > 1 \
+                    or num_calls[conv_node.target] > 1 or num_calls[node.target] > 1:
+                continue
+
+            conv, bn = net.get_submodule(conv_node.target), net.get_submodule(node.target)
+            if _can_fold(conv, bn):
+                _set_module(net, conv_node.target, fuse_conv_bn_eval(conv, bn))
+                _set_module(net, node.target, nn.Identity())
+                num_folded += 1
+
+        return num_folded
+
+    @staticmethod
+    def freeze(net, inputs):
+        """Trace & freeze the net into TorchScript, the outputs are flattened by ExportWrapper."""
+        wrapper = ExportWrapper(net, 'all').eval()
+        with torch.no_grad():
+            frozen_net = torch.jit.freeze(torch.jit.trace(wrapper, inputs, check_trace=False))
+
+        return frozen_net, wrapper.spec
+
+    @staticmethod
+    def get_example_inputs(configer, device):
+        in_width, in_height = ModelExporter.get_input_size(configer)
+        inputs = torch.randn(1, 3, in_height, in_width, device=device)
+        if configer.get('method') != 'faster_rcnn':
+            return (inputs, )
+
+        meta = DataContainer([[dict(ori_img_size=[in_width, in_height], aug_img_size=[in_width, in_height],
+                                    img_scale=1.0, input_size=[in_width, in_height])]], cpu_only=True)
+        return (dict(img=inputs, meta=meta), )
+
+    @staticmethod
+    def build(net, keys, inputs, freezable=True):
+        """The optimized copy of the eval net & the number of its folded BN.
+
+        Args:
+          keys: The optimizations, of fuse_bn, channels_last & jit_freeze.
+          inputs: The example inputs of the TorchScript tracing.
+          freezable: Whether the net could be traced, e.g. not wrapped by the data parallel.
+        """
+        opt_net = _copy_net(net).eval()
+        num_folded = 0
+        if 'fuse_bn' in keys:
+            # The syncbn & inplace_abn into torch BN (+ activation) first.
+            opt_net = ModelQuantizer.to_torchbn(opt_net).eval()
+            num_folded = ModelOptimizer.fold_bn(opt_net)
+
+        if 'channels_last' in keys:
+            opt_net = opt_net.to(memory_format=torch.channels_last)
+
+        spec = None
+        if 'jit_freeze' in keys:
+            if not freezable or not isinstance(inputs[0], torch.Tensor):
+                Log.warn('The TorchScript freezing only supports the single device nets with the tensor inputs.')
+            else:
+                try:
+                    opt_net, spec = ModelOptimizer.freeze(
+                        opt_net, _to_channels_last(inputs[0]) if 'channels_last' in keys else inputs[0])
+                except Exception as e:
+                    Log.warn('The TorchScript freezing failed: {}'.format(e))
+
+        return OptimizedNet(opt_net, channels_last='channels_last' in keys, spec=spec).eval(), num_folded
+
+    @staticmethod
+    def optimize(runner, net):
+        """Apply the inference optimizations of the test configs onto the eval net.
+
+        test.fuse_bn: fold the BN (syncbn & inplace_abn included) into the conv weights.
+        test.channels_last: run the conv in the channels_last memory format.
+        test.jit_freeze: trace & freeze the net with TorchScript, the traced sizes are fixed by the example input.
+
+        The optimized net is checked against the eager net, which is kept if they differ.
+        """
+        configer = runner.configer
+        keys = [key for key in ('fuse_bn', 'channels_last', 'jit_freeze') if ModelOptimizer.enabled(configer, key)]
+        if len(keys) == 0 or not isinstance(net, nn.Module):
+            # The exported engines are optimized by their runtimes.
+            return net
+
+        eager_net = net.module if hasattr(net, 'module') else net
+        device = torch.device('cpu' if configer.get('gpu') is None else 'cuda')
+        inputs = ModelOptimizer.get_example_inputs(configer, device)
+        try:
+            opt_net, num_folded = ModelOptimizer.build(eager_net, keys, inputs, freezable=not hasattr(net, 'module'))
+            passed = ModelOptimizer.check(configer, eager_net, opt_net, inputs, num_folded)
+        except Exception as e:
+            # e.g. the view of the channels_last tensors.
+            Log.warn('The optimized net failed: {}'.format(e))
+            passed = False
+
+        if not passed:
+            Log.warn('The optimized net differs from the eager net, use the eager net.')
+            return net
+
+        if hasattr(net, 'module'):
+            net.module = opt_net
+            return net
+
+        return opt_net
+
+    @staticmethod
+    def check(configer, eager_net, opt_net, inputs, num_folded, iters=10, rtol=1e-3):
+        """Log the max abs diff & the latency of the optimized net against the eager net,
+        return whether the diff is within rtol of the finite eager outputs. NaN or an unmatched inf fails."""
+        with torch.no_grad():
+            eager_list = _flatten_tensors(eager_net(*inputs), list())
+            opt_list = _flatten_tensors(opt_net(*inputs), list())
+
+        if len(eager_list) != len(opt_list) or any(a.size() != b.size() for a, b in zip(eager_list, opt_list)):
+            Log.warn('The outputs of the optimized net differ in shape.')
+            return False
+
+        max_diff, max_value = 0.0, 0.0
+        for a, b in zip(eager_list, opt_list):
+            diff, value = TensorHelper.max_abs_diff(b, a)
+            # A NaN diff fails the check, max() would drop it.
+            max_diff = diff if np.isnan(diff) or diff > max_diff else max_diff
+            max_value = max(max_value, value)
+
+        latency = dict()
+        sync_cuda = configer.get('gpu') is not None
+        for name, net in [('eager', eager_net), ('optimized', opt_net)]:
+            with torch.no_grad():
+                net(*inputs)
+                if sync_cuda:
+                    torch.cuda.synchronize()
+
+                start_time = time.time()
+                for _ in range(iters):
+                    net(*inputs)
+
+                if sync_cuda:
+                    torch.cuda.synchronize()
+
+            latency[name] = (time.time() - start_time) / iters * 1000.0
+
+        Log.info('Optimized {}: folded BN {}\tmax abs diff {:.6f}\tEager {:.2f}ms\tOptimized {:.2f}ms\t'
+                 'Speedup {:.2f}x'.format(configer.get('method'), num_folded, max_diff, latency['eager'],
+                                          latency['optimized'],
+                                          latency['eager'] / max(latency['optimized'], np.finfo(np.float32).eps)))
+        return bool(max_diff <= rtol * max(max_value, 1.0))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Post-training int8 quantization of the test models.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import copy
+import json
+import time
+
+import torch
+import torch.nn as nn
+
+from methods.tools.inference_server import NET_ATTR_DICT
+from methods.tools.model_exporter import ExportWrapper, ModelExporter, OUTPUT_SELECT_DICT
+from metric.cls.cls_running_score import ClsRunningScore
+from metric.det.det_running_score import DetRunningScore
+from metric.seg.seg_running_score import SegRunningScore
+from utils.tools.logger import Logger as Log
+
+
+ABN_ACTIVATION_DICT = {
+    'leaky_relu': lambda slope: nn.LeakyReLU(slope),
+    'elu': lambda slope: nn.ELU(),
+    'none': lambda slope: nn.Identity(),
+}
+
+
+def _copy_net(net):
+    """Deep copy the params & buffers of the net, the plain attributes of its modules (e.g. the configer & the
+    SyncMaster of syncbn, which holds the thread locks) are shared."""
+    memo = dict()
+    for module in net.modules():
+        for value in vars(module).values():
+            if not isinstance(value, (torch.Tensor, nn.Module, dict, list, tuple, set, str, int, float, type(None))):
+                memo[id(value)] = value
+
+    return copy.deepcopy(net, memo)
+
+
+class ModelQuantizer(object):
+
+    @staticmethod
+    def to_torchbn(net):
+        """Turn syncbn & inplace_abn layers into torch BN (+ activation), so that the
+        Conv+BN+ReLU patterns of ModuleHelper.BNReLU could be fused by the quantizer."""
+        for name, module in net.named_children():
+            module_cls = type(module).__name__
+            if module_cls in ('ABN', 'InPlaceABN', 'InPlaceABNSync'):
+                bn = nn.BatchNorm2d(module.num_features, eps=module.eps, momentum=module.momentum)
+                bn.running_mean.copy_(module.running_mean)
+                bn.running_var.copy_(module.running_var)
+                if module.affine:
+                    bn.weight.data.copy_(module.weight.data)
+                    bn.bias.data.copy_(module.bias.data)
+
+                setattr(net, name, nn.Sequential(bn, ABN_ACTIVATION_DICT[module.activation](module.slope)))
+
+            elif module_cls == 'BatchNorm2d' and type(module) is not nn.BatchNorm2d:
+                bn = nn.BatchNorm2d(module.num_features, eps=module.eps, momentum=module.momentum,
+                                    affine=module.affine)
+                bn.load_state_dict(module.state_dict(), strict=False)
+                setattr(net, name, bn)
+
+            else:
+                ModelQuantizer.to_torchbn(module)
+
+        return net
+
+    @staticmethod
+    def _get_qconfig(backend):
+        try:
+            from torch.ao.quantization import get_default_qconfig_mapping
+            return get_default_qconfig_mapping(backend)
+        except ImportError:
+            from torch.quantization import get_default_qconfig
+            return {'': get_default_qconfig(backend)}
+
+    @staticmethod
+    def quantize(runner):
+        configer = runner.configer
+        try:
+            from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+        except ImportError:
+            try:
+                from torch.quantization.quantize_fx import prepare_fx, convert_fx
+            except ImportError:
+                Log.error('Post-training quantization requires torch.fx (torch >= 1.8).')
+                exit(1)
+
+        if configer.get('method') not in OUTPUT_SELECT_DICT:
+            Log.error('Method: {} is not quantizable.'.format(configer.get('method')))
+            exit(1)
+
+        backend = configer.get('quant', 'backend')
+        torch.backends.quantized.engine = backend
+        net = getattr(runner, NET_ATTR_DICT[configer.get('task')])
+        net = net.module if hasattr(net, 'module') else net
+        float_net = ModelQuantizer.to_torchbn(_copy_net(net).cpu()).eval()
+        data_loader = getattr(runner, '{}_data_loader'.format(configer.get('task'))).get_valloader()
+
+        # Calibrate the observers with the val batches.
+        example_inputs = None
+        prepared_net = None
+        with torch.no_grad():
+            for i, data_dict in enumerate(data_loader):
+                if i >= configer.get('quant', 'calib_batches'):
+                    break
+
+                if prepared_net is None:
+                    example_inputs = data_dict['img']
+                    prepared_net = prepare_fx(_copy_net(float_net), ModelQuantizer._get_qconfig(backend),
+                                              example_inputs=(example_inputs,))
+
+                prepared_net(data_dict['img'])
+
+        if prepared_net is None:
+            Log.error('No val batches for the calibration.')
+            exit(1)
+
+        quant_net = convert_fx(prepared_net).eval()
+
+        engine_path = ModelExporter.get_engine_path(configer, 'int8')
+        wrapper = ExportWrapper(quant_net, OUTPUT_SELECT_DICT[configer.get('method')]).eval()
+        with torch.no_grad():
+            traced_net = torch.jit.trace(wrapper, example_inputs, check_trace=False)
+
+        traced_net.save(engine_path)
+        with open('{}.json'.format(engine_path), 'w') as json_stream:
+            json.dump(dict(spec=wrapper.spec, backend=backend), json_stream)
+
+        Log.info('Save int8 engine into {}.'.format(engine_path))
+        ModelQuantizer.report(runner, float_net, quant_net, data_loader, example_inputs)
+
+    @staticmethod
+    def report(runner, float_net, quant_net, data_loader, example_inputs, iters=10):
+        """Log the val scores of the fp32 & int8 models and the cpu speedup of int8."""
+        score_list = list()
+        for net in (float_net, quant_net):
+            score_list.append(ModelQuantizer._evaluate(runner, net, data_loader))
+
+        for key in score_list[0]:
+            Log.info('{}: fp32 {:.5f}\tint8 {:.5f}\tdelta {:.5f}'.format(
+                key, score_list[0][key], score_list[1][key], score_list[1][key] - score_list[0][key]))
+
+        latency_list = list()
+        with torch.no_grad():
+            for net in (float_net, quant_net):
+                net(example_inputs)
+                start_time = time.time()
+                for _ in range(iters):
+                    net(example_inputs)
+
+                latency_list.append((time.time() - start_time) / iters * 1000.0)
+
+        Log.info('Latency: fp32 {:.2f}ms\tint8 {:.2f}ms\tSpeedup {:.2f}x'.format(
+            latency_list[0], latency_list[1], latency_list[0] / latency_list[1]))
+
+    @staticmethod
+    def _evaluate(runner, net, data_loader):
+        configer = runner.configer
+        eval_batches = configer.get('quant', 'eval_batches')
+        running_score = None
+        if configer.get('task') == 'seg':
+            running_score = SegRunningScore(configer)
+        elif configer.get('task') == 'cls':
+            running_score = ClsRunningScore(configer)
+        elif configer.get('task') == 'det':
+            running_score = DetRunningScore(configer)
+
+        with torch.no_grad():
+            for i, data_dict in enumerate(data_loader):
+                if eval_batches is not None and i >= eval_batches:
+                    break
+
+                inputs = data_dict['img']
+                outputs = net(inputs)
+                if configer.get('task') == 'seg':
+                    running_score.update_logits(outputs[-1], data_dict['meta'])
+
+                elif configer.get('task') == 'cls':
+                    running_score.update(outputs, data_dict['label'])
+
+                elif configer.get('task') == 'det':
+                    batch_pred_bboxes = ModelQuantizer._get_det_object_list(runner, outputs, inputs)
+                    running_score.update(batch_pred_bboxes, data_dict['bboxes'], data_dict['labels'])
+
+        if configer.get('task') == 'seg':
+            return dict(mean_iou=running_score.get_mean_iou(), pixel_acc=running_score.get_pixel_acc())
+        elif configer.get('task') == 'cls':
+            return dict(top1_acc=running_score.get_top1_acc(), top5_acc=running_score.get_top5_acc())
+        elif configer.get('task') == 'det':
+            return dict(mAP=running_score.get_mAP())
+        else:
+            Log.warn('No running score for task: {}.'.format(configer.get('task')))
+            return dict()
+
+    @staticmethod
+    def _get_det_object_list(runner, outputs, inputs):
+        input_size = [inputs.size(3), inputs.size(2)]
+        if runner.configer.get('method') == 'single_shot_detector':
+            feat_list, loc, conf = outputs
+            batch_detections = runner.decode(loc, conf, runner.ssd_priorbox_layer(feat_list, input_size, device=loc.device),
+                                             runner.configer, input_size)
+            cls_offset = 1
+        else:
+            batch_detections = runner.decode(outputs[-1], runner.configer, input_size)
+            cls_offset = 0
+
+        batch_pred_bboxes = list()
+        for detections in batch_detections:
+            object_list = list()
+            if detections is not None:
+                for detection in detections:
+                    xmin, ymin, xmax, ymax, conf = [item.cpu().item() for item in detection[:5]]
+                    cls_pred = detection[-1].cpu().item() - cls_offset
+                    object_list.append([xmin, ymin, xmax, ymax, int(cls_pred), float('%.2f' % conf)])
+
+            batch_pred_bboxes.append(object_list)
+
+        return batch_pred_bboxes
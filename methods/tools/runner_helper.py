@@ -8,14 +8,19 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import math
+import contextlib
 import os
 from collections import OrderedDict
 import torch
 import torch.nn as nn
+from torch.nn.utils import clip_grad_norm_
 from torch.nn.parallel.scatter_gather import gather as torch_gather
 
 from extensions.parallel.data_parallel import DataParallelModel
+from methods.tools.checkpoint_manager import CheckpointManager
+from methods.tools.model_exporter import ModelExporter
+from models.tools.module_helper import ModuleHelper
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.logger import Logger as Log
 
 
@@ -30,6 +35,44 @@ class RunnerHelper(object):
 
         return return_list[0] if len(params) == 1 else return_list
 
+    @staticmethod
+    def amp_enabled(runner):
+        key = ('train', 'amp') if runner.configer.get('phase') == 'train' else ('test', 'amp')
+        return runner.configer.exists(*key) and bool(runner.configer.get(*key))
+
+    @staticmethod
+    def autocast(runner):
+        """Run the forward pass in fp16 (bf16 on cpu) when amp is enabled, otherwise do nothing."""
+        if not RunnerHelper.amp_enabled(runner):
+            return contextlib.nullcontext()
+
+        if runner.configer.get('gpu') is None:
+            return torch.autocast(device_type='cpu', dtype=torch.bfloat16)
+
+        if hasattr(torch, 'autocast'):
+            return torch.autocast(device_type='cuda', dtype=torch.float16)
+
+        return torch.cuda.amp.autocast()
+
+    @staticmethod
+    def _make_dist(runner, net):
+        # Every rank holds the local outputs, & the grads are all-reduced in buckets during backward.
+        runner.configer.update(['network', 'gathered'], True)
+        bucket_cap_mb = 25
+        if runner.configer.exists('dist', 'bucket_cap_mb') and runner.configer.get('dist', 'bucket_cap_mb') is not None:
+            bucket_cap_mb = runner.configer.get('dist', 'bucket_cap_mb')
+
+        find_unused = runner.configer.exists('dist', 'find_unused_parameters') \
+            and runner.configer.get('dist', 'find_unused_parameters')
+        if runner.configer.get('gpu') is None:
+            return nn.parallel.DistributedDataParallel(net, bucket_cap_mb=bucket_cap_mb,
+                                                       find_unused_parameters=find_unused)
+
+        device_id = torch.cuda.current_device()
+        return nn.parallel.DistributedDataParallel(net.cuda(device_id), device_ids=[device_id],
+                                                   output_device=device_id, bucket_cap_mb=bucket_cap_mb,
+                                                   find_unused_parameters=find_unused)
+
     @staticmethod
     def _make_parallel(runner, net):
         if len(runner.configer.get('gpu')) == 1 or len(range(torch.cuda.device_count())) == 1:
@@ -39,12 +82,22 @@ class RunnerHelper(object):
 
     @staticmethod
     def load_net(runner, net):
-        if runner.configer.get('gpu') is not None:
+        if runner.configer.get('phase') in ('test', 'serve') and runner.configer.exists('test', 'engine') \
+                and runner.configer.get('test', 'engine') not in (None, 'eager'):
+            # The exported engine has been stripped of the parallel wrapper & auxiliary heads.
+            return ModelExporter.load_engine(runner.configer, torch.device(
+                'cpu' if runner.configer.get('gpu') is None else 'cuda'))
+
+        if DistHelper.is_dist():
+            net = RunnerHelper._make_dist(runner, net)
+
+        elif runner.configer.get('gpu') is not None:
             net = RunnerHelper._make_parallel(runner, net)
 
-        net = net.to(torch.device('cpu' if runner.configer.get('gpu') is None else 'cuda'))
+        device = torch.device('cpu' if runner.configer.get('gpu') is None else 'cuda')
+        net = net.to(device)
         if runner.configer.get('network', 'resume') is not None:
-            resume_dict = torch.load(runner.configer.get('network', 'resume'))
+            resume_dict = ModuleHelper.load_file(runner.configer.get('network', 'resume'), map_location=device)
             if 'state_dict' in resume_dict:
                 checkpoint_dict = resume_dict['state_dict']
 
@@ -58,9 +111,6 @@ class RunnerHelper(object):
                 raise RuntimeError(
                     'No state_dict found in checkpoint file {}'.format(runner.configer.get('network', 'resume')))
 
-            if list(checkpoint_dict.keys())[0].startswith('module.'):
-                checkpoint_dict = {k[7:]: v for k, v in checkpoint_dict.items()}
-
             # load state_dict
             if hasattr(net, 'module'):
                 RunnerHelper.load_state_dict(net.module, checkpoint_dict,
@@ -79,6 +129,8 @@ class RunnerHelper(object):
         This method is modified from :meth:`torch.nn.Module.load_state_dict`.
         Default value for ``strict`` is set to ``False`` and the message for
         param mismatch will be shown even if strict is False.
+        The keys are mapped once (stripping the ``module.`` prefix), and the
+        tensors are copied straight into the params of the module.
         Args:
             module (Module): Module that receives the state_dict.
             state_dict (OrderedDict): Weights.
@@ -86,25 +138,8 @@ class RunnerHelper(object):
                 in :attr:`state_dict` match the keys returned by this module's
                 :meth:`~torch.nn.Module.state_dict` function. Default: ``False``.
         """
-        unexpected_keys = []
-        own_state = module.state_dict()
-        for name, param in state_dict.items():
-            if name not in own_state:
-                unexpected_keys.append(name)
-                continue
-            if isinstance(param, torch.nn.Parameter):
-                # backwards compatibility for serialized parameters
-                param = param.data
-
-            try:
-                own_state[name].copy_(param)
-            except Exception:
-                raise RuntimeError('While copying the parameter named {}, '
-                                   'whose dimensions in the model are {} and '
-                                   'whose dimensions in the checkpoint are {}.'
-                                   .format(name, own_state[name].size(),
-                                           param.size()))
-        missing_keys = set(own_state.keys()) - set(state_dict.keys())
+        key_map = ModuleHelper.compile_key_map(state_dict.keys(), module.state_dict().keys())
+        unexpected_keys, missing_keys = ModuleHelper.copy_state_dict(module, state_dict, key_map)
 
         err_msg = []
         if unexpected_keys:
@@ -120,6 +155,9 @@ class RunnerHelper(object):
 
     @staticmethod
     def save_net(runner, net, performance=None, val_loss=None, iters=None, epoch=None):
+        if not DistHelper.is_main():
+            return
+
         state = {
             'config_dict': runner.configer.to_dict(),
             'state_dict': net.state_dict(),
@@ -135,32 +173,49 @@ class RunnerHelper(object):
         if not os.path.exists(checkpoints_dir):
             os.makedirs(checkpoints_dir)
 
+        # The state is written once into the latest file, the others are links of it.
+        link_list = list()
+        periodic_list = list()
         latest_name = '{}_latest.pth'.format(runner.configer.get('checkpoints', 'checkpoints_name'))
-        torch.save(state, os.path.join(checkpoints_dir, latest_name))
+        latest_path = os.path.join(checkpoints_dir, latest_name)
         if performance is not None:
             if performance > runner.runner_state['max_performance']:
                 latest_name = '{}_max_performance.pth'.format(runner.configer.get('checkpoints', 'checkpoints_name'))
-                torch.save(state, os.path.join(checkpoints_dir, latest_name))
+                link_list.append(os.path.join(checkpoints_dir, latest_name))
                 runner.runner_state['max_performance'] = performance
 
         if val_loss is not None:
             if val_loss < runner.runner_state['min_val_loss']:
                 latest_name = '{}_min_loss.pth'.format(runner.configer.get('checkpoints', 'checkpoints_name'))
-                torch.save(state, os.path.join(checkpoints_dir, latest_name))
+                link_list.append(os.path.join(checkpoints_dir, latest_name))
                 runner.runner_state['min_val_loss'] = val_loss
 
         if iters is not None:
             if iters - runner.runner_state['last_iters'] >= runner.configer.get('checkpoints', 'save_iters'):
                 latest_name = '{}_iters{}.pth'.format(runner.configer.get('checkpoints', 'checkpoints_name'), iters)
-                torch.save(state, os.path.join(checkpoints_dir, latest_name))
+                periodic_list.append(os.path.join(checkpoints_dir, latest_name))
                 runner.runner_state['last_iters'] = iters
 
         if epoch is not None:
             if epoch - runner.runner_state['last_epoch'] >= runner.configer.get('checkpoints', 'save_epoch'):
                 latest_name = '{}_epoch{}.pth'.format(runner.configer.get('checkpoints', 'checkpoints_name'), epoch)
-                torch.save(state, os.path.join(checkpoints_dir, latest_name))
+                periodic_list.append(os.path.join(checkpoints_dir, latest_name))
                 runner.runner_state['last_epoch'] = epoch
 
+        RunnerHelper.get_checkpoint_manager(runner).save(state, latest_path,
+                                                          link_list=link_list, periodic_list=periodic_list)
+
+    @staticmethod
+    def get_checkpoint_manager(runner):
+        if getattr(runner, 'checkpoint_manager', None) is None:
+            configer = runner.configer
+            async_save = not configer.exists('checkpoints', 'async_save') \
+                or configer.get('checkpoints', 'async_save') is None or configer.get('checkpoints', 'async_save')
+            keep_last = configer.get('checkpoints', 'keep_last') if configer.exists('checkpoints', 'keep_last') else None
+            runner.checkpoint_manager = CheckpointManager(async_save=async_save, keep_last=keep_last)
+
+        return runner.checkpoint_manager
+
     @staticmethod
     def freeze_bn(net, syncbn=False):
         for m in net.modules():
@@ -174,19 +229,14 @@ class RunnerHelper(object):
 
     @staticmethod
     def clip_grad(net, max_grad=10.):
-        """Computes a gradient clipping coefficient based on gradient norm."""
-        total_norm = 0
-        for p in net.parameters():
-            if p.requires_grad:
-                modulenorm = p.grad.data.norm()
-                total_norm += modulenorm ** 2
-
-        total_norm = math.sqrt(total_norm)
-
-        norm = max_grad / max(total_norm, max_grad)
-        for p in net.parameters():
-            if p.requires_grad:
-                p.grad.mul_(norm)
+        """Clip the grads of a net (or a list of params) by their total norm.
+        The foreach kernels keep the norm & the coefficient on device, so there is no sync per param."""
+        params = net.parameters() if isinstance(net, nn.Module) else net
+        params = [p for p in params if p.grad is not None]
+        if len(params) == 0:
+            return None
+
+        return clip_grad_norm_(params, max_grad, foreach=True)
 
     @staticmethod
     def gather(runner, outputs, target_device=None, dim=0):
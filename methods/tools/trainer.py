@@ -8,29 +8,63 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import inspect
+
+import torch
 from torch.optim import SGD, Adam, lr_scheduler
 
+from methods.tools.runner_helper import RunnerHelper
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 
 
 class Trainer(object):
 
+    @staticmethod
+    def _get_impl_kwargs(runner, optim_cls, impl):
+        """The kwargs of the multi-tensor (foreach) or the fused implementation of the optimizer."""
+        if impl is None:
+            return dict()
+
+        optim_args = inspect.signature(optim_cls.__init__).parameters
+        if impl == 'fused':
+            if 'fused' in optim_args and (runner.configer.get('gpu') is not None or optim_cls is Adam):
+                return dict(fused=True)
+
+            Log.warn('Fused {} is not supported, use the foreach one.'.format(optim_cls.__name__))
+            impl = 'foreach'
+
+        if impl == 'foreach':
+            if 'foreach' in optim_args:
+                return dict(foreach=True)
+
+            Log.warn('Foreach {} is not supported, use the default one.'.format(optim_cls.__name__))
+            return dict()
+
+        Log.error('Optimizer implementation {} is not valid.'.format(impl))
+        exit(1)
+
     @staticmethod
     def init(runner, net_params):
         optimizer = None
-        if runner.configer.get('optim', 'optim_method') == 'sgd':
+        # sgd, sgd_foreach, sgd_fused, adam, adam_foreach or adam_fused.
+        optim_method, _, impl = runner.configer.get('optim', 'optim_method').partition('_')
+        impl = impl if impl != '' else None
+        if optim_method == 'sgd':
             optimizer = SGD(net_params,
                             lr=runner.configer.get('lr', 'base_lr'),
                             momentum=runner.configer.get('optim', 'sgd')['momentum'],
                             weight_decay=runner.configer.get('optim', 'sgd')['weight_decay'],
-                            nesterov=runner.configer.get('optim', 'sgd')['nesterov'])
+                            nesterov=runner.configer.get('optim', 'sgd')['nesterov'],
+                            **Trainer._get_impl_kwargs(runner, SGD, impl))
 
-        elif runner.configer.get('optim', 'optim_method') == 'adam':
+        elif optim_method == 'adam':
             optimizer = Adam(net_params,
                              lr=runner.configer.get('lr', 'base_lr'),
                              betas=runner.configer.get('optim', 'adam')['betas'],
                              eps=runner.configer.get('optim', 'adam')['eps'],
-                             weight_decay=runner.configer.get('optim', 'adam')['weight_decay'])
+                             weight_decay=runner.configer.get('optim', 'adam')['weight_decay'],
+                             **Trainer._get_impl_kwargs(runner, Adam, impl))
 
         else:
             Log.error('Optimizer {} is not valid.'.format(runner.configer.get('optim', 'optim_method')))
@@ -82,8 +116,73 @@ class Trainer(object):
             Log.error('Policy:{} is not valid.'.format(policy))
             exit(1)
 
+        runner.grad_scaler = Trainer._init_grad_scaler(runner)
         return optimizer, scheduler
 
+    @staticmethod
+    def _init_grad_scaler(runner):
+        # Loss scaling is only needed by fp16 on gpu, bf16 autocast on cpu keeps the fp32 range.
+        if not RunnerHelper.amp_enabled(runner) or runner.configer.get('gpu') is None:
+            return None
+
+        if hasattr(torch, 'amp') and hasattr(torch.amp, 'GradScaler'):
+            return torch.amp.GradScaler('cuda')
+
+        return torch.cuda.amp.GradScaler()
+
+    @staticmethod
+    def _get_max_grad(runner, max_grad):
+        # optim.clip_grad overrides the max_grad of the runner, 0 turns the clipping off.
+        if runner.configer.exists('optim', 'clip_grad') and runner.configer.get('optim', 'clip_grad') is not None:
+            max_grad = runner.configer.get('optim', 'clip_grad')
+
+        return max_grad if max_grad is not None and max_grad > 0 else None
+
+    @staticmethod
+    def _clip_grad(runner, net, max_grad):
+        if net is None:
+            net = [p for group in runner.optimizer.param_groups for p in group['params']]
+
+        RunnerHelper.clip_grad(net, max_grad)
+
+    @staticmethod
+    def step(runner, loss, net=None, max_grad=None):
+        """Backward the loss & update the params, with loss scaling under amp.
+        The grads are unscaled before being clipped by max_grad (or optim.clip_grad)."""
+        grad_scaler = getattr(runner, 'grad_scaler', None)
+        max_grad = Trainer._get_max_grad(runner, max_grad)
+        if grad_scaler is None:
+            with StepProfiler.timer('backward'):
+                loss.backward()
+
+            with StepProfiler.timer('optimizer'):
+                if max_grad is not None:
+                    Trainer._clip_grad(runner, net, max_grad)
+
+                runner.optimizer.step()
+
+            return
+
+        with StepProfiler.timer('backward'):
+            grad_scaler.scale(loss).backward()
+
+        with StepProfiler.timer('optimizer'):
+            if max_grad is not None:
+                grad_scaler.unscale_(runner.optimizer)
+                Trainer._clip_grad(runner, net, max_grad)
+
+            grad_scaler.step(runner.optimizer)
+            grad_scaler.update()
+
+    @staticmethod
+    def _get_warm_iters(runner):
+        # The hypes give the warm-up in warm_iters or in warm_epoch.
+        warm_dict = runner.configer.get('lr', 'warm')
+        if 'warm_iters' in warm_dict:
+            return warm_dict['warm_iters']
+
+        return int(warm_dict['warm_epoch'] * len(runner.train_loader))
+
     @staticmethod
     def update(runner, backbone_list=()):
         if not runner.configer.exists('lr', 'is_warm') or not runner.configer.get('lr', 'is_warm'):
@@ -95,19 +194,20 @@ class Trainer(object):
 
             return
 
-        if runner.runner_state['iters'] < runner.configer.get('lr', 'warm')['warm_iters']:
-            if runner.configer.get('lr', 'warm')['freeze_backbone']:
+        warm_iters = Trainer._get_warm_iters(runner)
+        if runner.runner_state['iters'] < warm_iters:
+            if runner.configer.get('lr', 'warm').get('freeze_backbone', False):
                 for backbone_index in backbone_list:
                     runner.optimizer.param_groups[backbone_index]['lr'] = 0.0
 
             else:
-                lr_ratio = (runner.runner_state['iters'] + 1) / runner.configer.get('lr', 'warm')['warm_iters']
+                lr_ratio = (runner.runner_state['iters'] + 1) / warm_iters
 
                 base_lr_list = runner.scheduler.get_lr()
                 for param_group, base_lr in zip(runner.optimizer.param_groups, base_lr_list):
                     param_group['lr'] = base_lr * (lr_ratio ** 4)
 
-        elif runner.runner_state['iters'] == runner.configer.get('lr', 'warm')['warm_iters']:
+        elif runner.runner_state['iters'] == warm_iters:
             try:
                 base_lr_list = runner.scheduler.get_lr()
                 for param_group, base_lr in zip(runner.optimizer.param_groups, base_lr_list):
@@ -119,7 +219,7 @@ class Trainer(object):
                     if i in backbone_list:
                         continue
 
-                    param_group[i]['lr'] = nbb_lr
+                    param_group['lr'] = nbb_lr
 
         else:
             if runner.configer.get('lr', 'metric') == 'epoch':
@@ -127,10 +227,3 @@ class Trainer(object):
             else:
                 assert runner.configer.get('lr', 'metric') == 'iters'
                 runner.scheduler.step(runner.runner_state['iters'])
-
-
-
-
-
-
-
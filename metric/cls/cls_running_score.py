@@ -8,6 +8,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+from utils.helpers.dist_helper import DistHelper
 from utils.tools.average_meter import AverageMeter
 
 
@@ -38,13 +39,29 @@ class ClsRunningScore(object):
         correct = pred.eq(target.view(1, -1).expand_as(pred))
         res = []
         for k in topk:
-            correct_k = correct[:k].view(-1).float().sum(0, keepdim=False)
+            correct_k = correct[:k].contiguous().view(-1).float().sum(0, keepdim=False)
             res.append(correct_k / batch_size)
 
         self.top1_acc.update(res[0].item(), batch_size)
         self.top3_acc.update(res[1].item(), batch_size)
         self.top5_acc.update(res[2].item(), batch_size)
 
+    def merge(self, other):
+        for meter, other_meter in zip((self.top1_acc, self.top3_acc, self.top5_acc),
+                                      (other.top1_acc, other.top3_acc, other.top5_acc)):
+            meter.sum += other_meter.sum
+            meter.count += other_meter.count
+            meter.avg = meter.sum / max(meter.count, 1)
+
+        return self
+
+    def all_reduce(self):
+        """Sum the top-k counters of the val shards on every rank."""
+        for meter in (self.top1_acc, self.top3_acc, self.top5_acc):
+            DistHelper.all_reduce_meter(meter)
+
+        return self
+
     def reset(self):
         self.top1_acc.reset()
         self.top3_acc.reset()
@@ -12,6 +12,8 @@ from __future__ import print_function
 import time
 import numpy as np
 
+from utils.helpers.dist_helper import DistHelper
+
 
 class DetRunningScore(object):
     def __init__(self, configer):
@@ -153,6 +155,46 @@ class DetRunningScore(object):
         else:
             return sum(ap_list) / self.configer.get('data', 'num_classes')
 
+    def merge(self, other, prefix=None):
+        """Add the gts & preds of another score, the prefix keeps the image names of the shards apart."""
+        for cls in range(self.configer.get('data', 'num_classes')):
+            for image_name, gt_dict in other.gt_list[cls].items():
+                key = image_name if prefix is None else '{}_{}'.format(prefix, image_name)
+                self.gt_list[cls][key] = gt_dict
+
+            for image_name, conf, bbox in other.pred_list[cls]:
+                key = image_name if prefix is None else '{}_{}'.format(prefix, image_name)
+                self.pred_list[cls].append([key, conf, bbox])
+
+            self.num_positive[cls] += other.num_positive[cls]
+
+        return self
+
+    def all_reduce(self):
+        """Gather the gts & preds of the val shards on every rank."""
+        if not DistHelper.is_dist():
+            return self
+
+        # Pack the preds into arrays, which pickle much smaller than lists of floats.
+        packed_preds = list()
+        for cls in range(self.configer.get('data', 'num_classes')):
+            packed_preds.append(([pred[0] for pred in self.pred_list[cls]],
+                                 np.array([pred[1] for pred in self.pred_list[cls]], dtype=np.float64),
+                                 np.array([pred[2] for pred in self.pred_list[cls]], dtype=np.float64)))
+
+        shard_list = DistHelper.all_gather_object(
+            dict(gt_list=self.gt_list, packed_preds=packed_preds, num_positive=self.num_positive))
+        self.reset()
+        for rank, shard in enumerate(shard_list):
+            other = DetRunningScore.__new__(DetRunningScore)
+            other.gt_list = shard['gt_list']
+            other.num_positive = shard['num_positive']
+            other.pred_list = [[[name, conf, bbox] for name, conf, bbox in zip(*packed)]
+                               for packed in shard['packed_preds']]
+            self.merge(other, prefix=rank)
+
+        return self
+
     def reset(self):
         self.gt_list = list()
         self.pred_list = list()
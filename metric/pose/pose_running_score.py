@@ -10,6 +10,8 @@ from __future__ import print_function
 
 import numpy as np
 
+from utils.helpers.dist_helper import DistHelper
+
 
 class PoseRunningScore(object):
     def __init__(self, configer):
@@ -67,6 +69,21 @@ class PoseRunningScore(object):
 
         return np.mean(average_precision)
 
+    def merge(self, other):
+        self.oks_all = np.concatenate((self.oks_all, other.oks_all), axis=0)
+        self.oks_num += other.oks_num
+        return self
+
+    def all_reduce(self):
+        """Gather the oks buffers of the val shards on every rank."""
+        if not DistHelper.is_dist():
+            return self
+
+        shard_list = DistHelper.all_gather_object((self.oks_all, self.oks_num))
+        self.oks_all = np.concatenate([oks_all for oks_all, _ in shard_list], axis=0)
+        self.oks_num = sum([oks_num for _, oks_num in shard_list])
+        return self
+
     def reset(self):
         self.oks_all = np.zeros(0)
         self.oks_num = 0
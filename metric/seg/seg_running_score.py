@@ -9,6 +9,9 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
+import torch.nn.functional as F
+
+from utils.helpers.dist_helper import DistHelper
 
 
 class SegRunningScore(object):
@@ -30,6 +33,18 @@ class SegRunningScore(object):
         for lt, lp in zip(label_trues, label_preds):
             self.confusion_matrix += self._fast_hist(lt.flatten(), lp.flatten(), self.n_classes)
 
+    def update_logits(self, pred, metas):
+        """Update by the logits [B, C, H, W] of the batch, resized back to the original images."""
+        for i in range(pred.size(0)):
+            ori_img_size = metas[i]['ori_img_size']
+            border_size = metas[i]['border_size']
+            ori_target = metas[i]['ori_target']
+            # The bicubic resize of torch, cv2 doesn't resize the maps of more than 4 channels.
+            total_logits = F.interpolate(pred[i:i + 1, :, :border_size[1], :border_size[0]],
+                                         size=(ori_img_size[1], ori_img_size[0]), mode='bicubic', align_corners=False)
+            labelmap = total_logits[0].argmax(0).cpu().numpy()
+            self.update(labelmap[None], ori_target[None])
+
     def _get_scores(self):
         """Returns accuracy score evaluation result.
             - overall accuracy
@@ -55,6 +70,15 @@ class SegRunningScore(object):
     def get_pixel_acc(self):
         return self._get_scores()[0]
 
+    def merge(self, other):
+        self.confusion_matrix += other.confusion_matrix
+        return self
+
+    def all_reduce(self):
+        """Sum the confusion matrices of the val shards on every rank."""
+        self.confusion_matrix = DistHelper.all_reduce_array(self.confusion_matrix)
+        return self
+
     def reset(self):
         self.confusion_matrix = np.zeros((self.n_classes, self.n_classes))
 
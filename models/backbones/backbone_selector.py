@@ -7,12 +7,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from models.backbones.vgg.vgg_backbone import VGGBackbone
-from models.backbones.darknet.darknet_backbone import DarkNetBackbone
-from models.backbones.resnet.resnet_backbone import ResNetBackbone
-from models.backbones.mobilenet.mobilenet_backbone import MobileNetBackbone
-from models.backbones.densenet.densenet_backbone import DenseNetBackbone
-from models.backbones.squeezenet.squeezenet_backbone import SqueezeNetBackbone
 from utils.tools.logger import Logger as Log
 
 
@@ -26,21 +20,27 @@ class BackboneSelector(object):
 
         model = None
         if 'vgg' in backbone:
+            from models.backbones.vgg.vgg_backbone import VGGBackbone
             model = VGGBackbone(self.configer)(**params)
 
         elif 'darknet' in backbone:
+            from models.backbones.darknet.darknet_backbone import DarkNetBackbone
             model = DarkNetBackbone(self.configer)(**params)
 
         elif 'resnet' in backbone:
+            from models.backbones.resnet.resnet_backbone import ResNetBackbone
             model = ResNetBackbone(self.configer)(**params)
 
         elif 'mobilenet' in backbone:
+            from models.backbones.mobilenet.mobilenet_backbone import MobileNetBackbone
             model = MobileNetBackbone(self.configer)(*params)
 
         elif 'densenet' in backbone:
+            from models.backbones.densenet.densenet_backbone import DenseNetBackbone
             model = DenseNetBackbone(self.configer)(**params)
 
         elif 'squeezenet' in backbone:
+            from models.backbones.squeezenet.squeezenet_backbone import SqueezeNetBackbone
             model = SqueezeNetBackbone(self.configer)(**params)
 
         else:
@@ -10,6 +10,7 @@ from __future__ import print_function
 import torch.nn as nn
 
 from models.backbones.densenet.densenet_models import DenseNetModels
+from models.tools.module_helper import ModuleHelper
 
 
 class NormalDensenetBackbone(nn.Module):
@@ -38,6 +39,7 @@ class NormalDensenetBackbone(nn.Module):
         self.denseblock4 = orig_densenet.features.denseblock4
 
         self.norm5 = orig_densenet.features.norm5
+        self.checkpoint = False
 
     def get_num_features(self):
         return self.num_features
@@ -49,22 +51,22 @@ class NormalDensenetBackbone(nn.Module):
         x = self.relu0(x)
         x = self.pool0(x)
 
-        x = self.denseblock1(x)
+        x = ModuleHelper.checkpoint(self.denseblock1, x, enable=self.checkpoint)
         x = self.transition1(x)
         tuple_features.append(x)
         x = self.transition1_pool(x)
 
-        x = self.denseblock2(x)
+        x = ModuleHelper.checkpoint(self.denseblock2, x, enable=self.checkpoint)
         x = self.transition2(x)
         tuple_features.append(x)
         x = self.transition2_pool(x)
 
-        x = self.denseblock3(x)
+        x = ModuleHelper.checkpoint(self.denseblock3, x, enable=self.checkpoint)
         x = self.transition3(x)
         tuple_features.append(x)
         x = self.transition3_pool(x)
 
-        x = self.denseblock4(x)
+        x = ModuleHelper.checkpoint(self.denseblock4, x, enable=self.checkpoint)
 
         x = self.norm5(x)
         tuple_features.append(x)
@@ -108,6 +110,7 @@ class DilatedDensenetBackbone(nn.Module):
         self.denseblock4 = orig_densenet.features.denseblock4
 
         self.norm5 = orig_densenet.features.norm5
+        self.checkpoint = False
 
     def _conv_dilate(self, m, dilate):
         classname = m.__class__.__name__
@@ -127,24 +130,24 @@ class DilatedDensenetBackbone(nn.Module):
         x = self.relu0(x)
         x = self.pool0(x)
 
-        x = self.denseblock1(x)
+        x = ModuleHelper.checkpoint(self.denseblock1, x, enable=self.checkpoint)
         x = self.transition1(x)
         tuple_features.append(x)
         x = self.transition1_pool(x)
 
-        x = self.denseblock2(x)
+        x = ModuleHelper.checkpoint(self.denseblock2, x, enable=self.checkpoint)
         x = self.transition2(x)
         tuple_features.append(x)
         if self.dilate_scale > 8:
             x = self.transition2_pool(x)
 
-        x = self.denseblock3(x)
+        x = ModuleHelper.checkpoint(self.denseblock3, x, enable=self.checkpoint)
         x = self.transition3(x)
         tuple_features.append(x)
         if self.dilate_scale > 16:
             x = self.transition3_pool(x)
 
-        x = self.denseblock4(x)
+        x = ModuleHelper.checkpoint(self.denseblock4, x, enable=self.checkpoint)
 
         x = self.norm5(x)
         tuple_features.append(x)
@@ -210,4 +213,6 @@ class DenseNetBackbone(object):
         else:
             raise Exception('Architecture undefined!')
 
+        arch_net.checkpoint = self.configer.exists('network', 'checkpoint') \
+            and bool(self.configer.get('network', 'checkpoint'))
         return arch_net
\ No newline at end of file
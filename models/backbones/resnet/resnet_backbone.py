@@ -10,6 +10,7 @@ from __future__ import print_function
 import torch.nn as nn
 
 from models.backbones.resnet.resnet_models import ResNetModels
+from models.tools.module_helper import ModuleHelper
 
 
 class NormalResnetBackbone(nn.Module):
@@ -24,6 +25,7 @@ class NormalResnetBackbone(nn.Module):
         self.layer2 = orig_resnet.layer2
         self.layer3 = orig_resnet.layer3
         self.layer4 = orig_resnet.layer4
+        self.checkpoint = False
 
     def get_num_features(self):
         return self.num_features
@@ -33,13 +35,13 @@ class NormalResnetBackbone(nn.Module):
         x = self.prefix(x)
         x = self.maxpool(x)
 
-        x = self.layer1(x)
+        x = ModuleHelper.checkpoint(self.layer1, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer2(x)
+        x = ModuleHelper.checkpoint(self.layer2, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer3(x)
+        x = ModuleHelper.checkpoint(self.layer3, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer4(x)
+        x = ModuleHelper.checkpoint(self.layer4, x, enable=self.checkpoint)
         tuple_features.append(x)
 
         return tuple_features
@@ -74,6 +76,7 @@ class DilatedResnetBackbone(nn.Module):
         self.layer2 = orig_resnet.layer2
         self.layer3 = orig_resnet.layer3
         self.layer4 = orig_resnet.layer4
+        self.checkpoint = False
 
     def _nostride_dilate(self, m, dilate):
         classname = m.__class__.__name__
@@ -98,13 +101,13 @@ class DilatedResnetBackbone(nn.Module):
         x = self.prefix(x)
         x = self.maxpool(x)
 
-        x = self.layer1(x)
+        x = ModuleHelper.checkpoint(self.layer1, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer2(x)
+        x = ModuleHelper.checkpoint(self.layer2, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer3(x)
+        x = ModuleHelper.checkpoint(self.layer3, x, enable=self.checkpoint)
         tuple_features.append(x)
-        x = self.layer4(x)
+        x = ModuleHelper.checkpoint(self.layer4, x, enable=self.checkpoint)
         tuple_features.append(x)
 
         return tuple_features
@@ -187,4 +190,6 @@ class ResNetBackbone(object):
         else:
             raise Exception('Architecture undefined!')
 
+        arch_net.checkpoint = self.configer.exists('network', 'checkpoint') \
+            and bool(self.configer.get('network', 'checkpoint'))
         return arch_net
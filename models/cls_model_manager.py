@@ -8,20 +8,18 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from models.cls.nets.mobilenet import MobileNet
-from models.cls.nets.vgg import VGG
-from models.cls.nets.shufflenetv2 import ShuffleNetV2, ShuffleResNetV2
+from utils.helpers.import_helper import ImportHelper
 from utils.tools.logger import Logger as Log
 
 CLS_MODEL_DICT = {
-    'vgg11': VGG,
-    'vgg13': VGG,
-    'vgg16': VGG,
-    'vgg19': VGG,
-    'mobilenet': MobileNet,
-    'shufflenetv2': ShuffleNetV2,
-    'shufflenetv2-50': ShuffleResNetV2,
-    'shufflenetv2-164': ShuffleResNetV2
+    'vgg11': 'models.cls.nets.vgg.VGG',
+    'vgg13': 'models.cls.nets.vgg.VGG',
+    'vgg16': 'models.cls.nets.vgg.VGG',
+    'vgg19': 'models.cls.nets.vgg.VGG',
+    'mobilenet': 'models.cls.nets.mobilenet.MobileNet',
+    'shufflenetv2': 'models.cls.nets.shufflenetv2.ShuffleNetV2',
+    'shufflenetv2-50': 'models.cls.nets.shufflenetv2.ShuffleResNetV2',
+    'shufflenetv2-164': 'models.cls.nets.shufflenetv2.ShuffleResNetV2'
 }
 
 
@@ -37,6 +35,6 @@ class ClsModelManager(object):
             Log.error('Model: {} not valid!'.format(model_name))
             exit(1)
 
-        model = CLS_MODEL_DICT[model_name](self.configer)
+        model = ImportHelper.load(CLS_MODEL_DICT[model_name])(self.configer)
 
         return model
@@ -14,11 +14,13 @@ from torch.nn import functional as F
 from torchvision.models import vgg16
 
 from loss.modules.det_modules import FRLoss
+from models.tools.module_helper import ModuleHelper
 from utils.layers.det.fr_roi_generator import FRROIGenerator
 from utils.layers.det.fr_roi_sampler import FRROISampler
 from utils.layers.det.rpn_detection_layer import RPNDetectionLayer
 from utils.layers.det.rpn_target_assigner import RPNTargetAssigner
 from utils.tools.logger import Logger as Log
+from utils.tools.step_profiler import StepProfiler
 
 
 DETECTOR_CONFIG = {
@@ -35,7 +37,7 @@ class VGGModel(object):
         model = vgg16(pretrained=False)
         if self.configer.get('network', 'pretrained') is not None :
             Log.info('Loading pretrained model: {}'.format(self.configer.get('network', 'pretrained')))
-            model.load_state_dict(torch.load(self.configer.get('network', 'pretrained')))
+            model.load_state_dict(ModuleHelper.load_file(self.configer.get('network', 'pretrained')))
 
         features = list(model.features)[:30]
         classifier = model.classifier
@@ -146,7 +148,10 @@ class FasterRCNN(nn.Module):
         elif self.configer.get('phase') == 'train' and self.training:
             x = self.backbone(data_dict['img'])
             feat_list, rpn_locs, rpn_scores = self.rpn(x)
-            gt_rpn_locs, gt_rpn_labels = self.rpn_target_assigner(feat_list, data_dict['bboxes'], data_dict['meta'])
+            with StepProfiler.timer('target'):
+                gt_rpn_locs, gt_rpn_labels = self.rpn_target_assigner(feat_list, data_dict['bboxes'],
+                                                                      data_dict['meta'])
+
             gt_rpn_locs = gt_rpn_locs.to(rpn_scores.device)
             gt_rpn_labels = gt_rpn_labels.to(rpn_scores.device)
 
@@ -155,10 +160,11 @@ class FasterRCNN(nn.Module):
                                                            self.configer.get('rpn', 'n_train_post_nms'),
                                                            data_dict['meta'])
 
-            sample_rois, gt_roi_bboxes, gt_roi_labels = self.roi_sampler(train_indices_and_rois,
-                                                                         data_dict['bboxes'],
-                                                                         data_dict['labels'],
-                                                                         data_dict['meta'])
+            with StepProfiler.timer('target'):
+                sample_rois, gt_roi_bboxes, gt_roi_labels = self.roi_sampler(train_indices_and_rois,
+                                                                             data_dict['bboxes'],
+                                                                             data_dict['labels'],
+                                                                             data_dict['meta'])
 
             sample_roi_locs, sample_roi_scores = self.bbox_head(x, sample_rois, data_dict['meta'])
             sample_roi_locs = sample_roi_locs.contiguous().view(-1, self.configer.get('data', 'num_classes'), 4)
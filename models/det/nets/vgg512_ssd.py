@@ -8,6 +8,7 @@ import torch
 from torch import nn
 import torch.nn.init as init
 
+from models.tools.module_helper import ModuleHelper
 from utils.layers.det.ssd_detection_layer import SSDDetectionLayer
 from utils.tools.logger import Logger as Log
 
@@ -58,7 +59,7 @@ def vgg_backbone(configer):
     model = VGGModel(DETECTOR_CONFIG['vgg_cfg'])
     if configer.get('network', 'pretrained') is not None:
         Log.info('Loading pretrained model:{}'.format(configer.get('network', 'pretrained')))
-        pretrained_dict = torch.load(configer.get('network', 'pretrained'))
+        pretrained_dict = ModuleHelper.load_file(configer.get('network', 'pretrained'))
 
         Log.info('Pretrained Keys: {}'.format(pretrained_dict.keys()))
         model_dict = model.state_dict()
@@ -82,11 +83,11 @@ def vgg_backbone(configer):
 class Vgg512SSD(nn.Module):
     def __init__(self, configer):
         super(Vgg512SSD, self).__init__()
-        self.backbone = vgg_backbone(configer).named_modules()
+        backbone = vgg_backbone(configer).named_modules()
         cnt = 0
         self.sub_backbone_1 = nn.ModuleList()
         self.sub_backbone_2 = nn.ModuleList()
-        for key, module in self.backbone:
+        for key, module in backbone:
             if len(key.split('.')) < 2:
                 continue
 
@@ -12,6 +12,7 @@ import torch.nn as nn
 import torch.nn.init as init
 
 from models.backbones.backbone_selector import BackboneSelector
+from models.tools.module_helper import ModuleHelper
 
 
 class OpenPose(nn.Module):
@@ -48,6 +49,9 @@ class PoseModel(nn.Module):
         self.model4_2 = model_dict['block4_2']
         self.model5_2 = model_dict['block5_2']
         self.model6_2 = model_dict['block6_2']
+        # Recompute the activations of the refinement stages in the backward.
+        self.checkpoint = self.configer.exists('network', 'checkpoint') \
+            and bool(self.configer.get('network', 'checkpoint'))
 
         for m in self.modules():
             if isinstance(m, nn.Conv2d):
@@ -137,24 +141,24 @@ class PoseModel(nn.Module):
         out1_2 = self.model1_2(out1)
         out2 = torch.cat([out1_1, out1_2, out1], 1)
 
-        out2_1 = self.model2_1(out2)
-        out2_2 = self.model2_2(out2)
+        out2_1 = ModuleHelper.checkpoint(self.model2_1, out2, enable=self.checkpoint)
+        out2_2 = ModuleHelper.checkpoint(self.model2_2, out2, enable=self.checkpoint)
         out3 = torch.cat([out2_1, out2_2, out1], 1)
 
-        out3_1 = self.model3_1(out3)
-        out3_2 = self.model3_2(out3)
+        out3_1 = ModuleHelper.checkpoint(self.model3_1, out3, enable=self.checkpoint)
+        out3_2 = ModuleHelper.checkpoint(self.model3_2, out3, enable=self.checkpoint)
         out4 = torch.cat([out3_1, out3_2, out1], 1)
 
-        out4_1 = self.model4_1(out4)
-        out4_2 = self.model4_2(out4)
+        out4_1 = ModuleHelper.checkpoint(self.model4_1, out4, enable=self.checkpoint)
+        out4_2 = ModuleHelper.checkpoint(self.model4_2, out4, enable=self.checkpoint)
         out5 = torch.cat([out4_1, out4_2, out1], 1)
 
-        out5_1 = self.model5_1(out5)
-        out5_2 = self.model5_2(out5)
+        out5_1 = ModuleHelper.checkpoint(self.model5_1, out5, enable=self.checkpoint)
+        out5_2 = ModuleHelper.checkpoint(self.model5_2, out5, enable=self.checkpoint)
         out6 = torch.cat([out5_1, out5_2, out1], 1)
 
-        out6_1 = self.model6_1(out6)
-        out6_2 = self.model6_2(out6)
+        out6_1 = ModuleHelper.checkpoint(self.model6_1, out6, enable=self.checkpoint)
+        out6_2 = ModuleHelper.checkpoint(self.model6_2, out6, enable=self.checkpoint)
 
         paf_out = [out1_1, out2_1, out3_1, out4_1, out5_1, out6_1]
         heatmap_out = [out1_2, out2_2, out3_2, out4_2, out5_2, out6_2]
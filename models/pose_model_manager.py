@@ -8,18 +8,16 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from models.pose.nets.open_pose_org import get_open_pose_org
-from models.pose.nets.cpm_net import CPMNet
-from models.pose.nets.open_pose import OpenPose
+from utils.helpers.import_helper import ImportHelper
 from utils.tools.logger import Logger as Log
 
 MULTI_POSE_MODEL_DICT = {
-    'open_pose': OpenPose,
-    'open_pose_org': get_open_pose_org,
+    'open_pose': 'models.pose.nets.open_pose.OpenPose',
+    'open_pose_org': 'models.pose.nets.open_pose_org.get_open_pose_org',
 }
 
 SINGLE_POSE_MODEL_DICT = {
-    'cpm_net': CPMNet
+    'cpm_net': 'models.pose.nets.cpm_net.CPMNet'
 }
 
 
@@ -34,7 +32,7 @@ class PoseModelManager(object):
             Log.error('Model: {} not valid!'.format(model_name))
             exit(1)
 
-        model = MULTI_POSE_MODEL_DICT[model_name](self.configer)
+        model = ImportHelper.load(MULTI_POSE_MODEL_DICT[model_name])(self.configer)
 
         return model
 
@@ -45,6 +43,6 @@ class PoseModelManager(object):
             Log.error('Model: {} not valid!'.format(model_name))
             exit(1)
 
-        model = SINGLE_POSE_MODEL_DICT[model_name](self.configer)
+        model = ImportHelper.load(SINGLE_POSE_MODEL_DICT[model_name])(self.configer)
 
         return model
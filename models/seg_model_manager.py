@@ -8,17 +8,14 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from models.seg.nets.denseassp import DenseASPP
-from models.seg.nets.deeplabv3 import DeepLabV3
-from models.seg.nets.embednet import EmbedNet
-from models.seg.nets.pspnet import PSPNet
+from utils.helpers.import_helper import ImportHelper
 from utils.tools.logger import Logger as Log
 
 SEG_MODEL_DICT = {
-    'deeplabv3': DeepLabV3,
-    'pspnet': PSPNet,
-    'embednet': EmbedNet,
-    'denseaspp': DenseASPP
+    'deeplabv3': 'models.seg.nets.deeplabv3.DeepLabV3',
+    'pspnet': 'models.seg.nets.pspnet.PSPNet',
+    'embednet': 'models.seg.nets.embednet.EmbedNet',
+    'denseaspp': 'models.seg.nets.denseassp.DenseASPP'
 }
 
 
@@ -34,6 +31,6 @@ class SegModelManager(object):
             Log.error('Model: {} not valid!'.format(model_name))
             exit(1)
 
-        model = SEG_MODEL_DICT[model_name](self.configer)
+        model = ImportHelper.load(SEG_MODEL_DICT[model_name])(self.configer)
 
         return model
@@ -8,7 +8,9 @@ from __future__ import division
 from __future__ import print_function
 
 import functools
+import inspect
 import os
+from collections import OrderedDict
 
 import torch
 import torch.nn as nn
@@ -37,7 +39,12 @@ class ModuleHelper(object):
                 nn.ReLU()
             )
         elif bn_type == 'inplace_abn':
-            from extensions.inplace_abn.bn import InPlaceABNSync
+            torch_ver = torch.__version__[:3]
+            if torch_ver == '0.4':
+                from extensions.inplace_abn.bn import InPlaceABNSync
+            else:
+                from extensions.inplace_abn_1.bn import InPlaceABNSync
+
             return InPlaceABNSync(num_features, **kwargs)
         else:
             Log.error('Not support BN type: {}.'.format(bn_type))
@@ -56,47 +63,146 @@ class ModuleHelper(object):
             torch_ver = torch.__version__[:3]
             if torch_ver == '0.4':
                 from extensions.inplace_abn.bn import InPlaceABNSync
-                if ret_cls:
-                    return InPlaceABNSync
+            else:
+                from extensions.inplace_abn_1.bn import InPlaceABNSync
 
-                return functools.partial(InPlaceABNSync, activation='none')
+            if ret_cls:
+                return InPlaceABNSync
+
+            return functools.partial(InPlaceABNSync, activation='none')
 
         else:
             Log.error('Not support BN type: {}.'.format(bn_type))
             exit(1)
 
+    @staticmethod
+    def checkpoint(module, x, enable=True):
+        """Activation checkpointing of the module, its activations are recomputed in the backward instead of
+        being kept. Only under the train mode with grad, the module is called directly otherwise.
+
+        The BN running stats are only updated by the first forward, the recomputation restores them.
+        """
+        if not enable or not module.training or not torch.is_grad_enabled():
+            return module(x)
+
+        from torch.utils.checkpoint import checkpoint
+        kwargs = dict()
+        if 'use_reentrant' in inspect.signature(checkpoint).parameters:
+            kwargs['use_reentrant'] = False
+        elif not x.requires_grad:
+            # The reentrant checkpoint gives no grad to the params if its input requires no grad.
+            return module(x)
+
+        state = dict(recompute=False)
+
+        def run_module(inputs):
+            if not state['recompute']:
+                state['recompute'] = True
+                return module(inputs)
+
+            return ModuleHelper._run_keep_bn_stats(module, inputs)
+
+        return checkpoint(run_module, x, **kwargs)
+
+    @staticmethod
+    def _run_keep_bn_stats(module, x):
+        bn_stats = list()
+        for m in module.modules():
+            if getattr(m, 'running_mean', None) is None:
+                continue
+
+            for name in ('running_mean', 'running_var', 'num_batches_tracked'):
+                if getattr(m, name, None) is not None:
+                    bn_stats.append((m, name, getattr(m, name).clone()))
+
+        try:
+            return module(x)
+        finally:
+            # The recomputation may stop early by an exception. Copy back by name, the syncbn reassigns them.
+            with torch.no_grad():
+                for m, name, value in bn_stats:
+                    getattr(m, name).copy_(value)
+
+    @staticmethod
+    def load_file(path, map_location='cpu'):
+        """Map the checkpoint file into memory instead of reading it, the tensors are paged in
+        when they are copied into the params. Fall back to torch.load for the legacy format.
+        Both load the tensors onto map_location."""
+        if 'mmap' in inspect.signature(torch.load).parameters:
+            try:
+                return torch.load(path, map_location=map_location, mmap=True, weights_only=False)
+            except RuntimeError:
+                # The legacy (non zipfile) format could not be mapped.
+                pass
+
+        return torch.load(path, map_location=map_location)
+
+    @staticmethod
+    def compile_key_map(src_keys, dst_keys, prefix_list=('', ), strip_list=('module.', )):
+        """Map the checkpoint keys to the module keys once, the first matched prefix wins."""
+        dst_keys = set(dst_keys)
+        key_map = OrderedDict()
+        for src_key in src_keys:
+            key = src_key
+            for strip in strip_list:
+                if key.startswith(strip):
+                    key = key[len(strip):]
+                    break
+
+            for prefix in prefix_list:
+                if '{}{}'.format(prefix, key) in dst_keys:
+                    key_map[src_key] = '{}{}'.format(prefix, key)
+                    break
+
+        return key_map
+
+    @staticmethod
+    def copy_state_dict(module, state_dict, key_map):
+        """Copy the mapped tensors straight into the params & buffers of the module."""
+        own_state = module.state_dict()
+        with torch.no_grad():
+            for src_key, dst_key in key_map.items():
+                param = state_dict[src_key]
+                if isinstance(param, nn.Parameter):
+                    param = param.data
+
+                if own_state[dst_key].size() != param.size():
+                    raise RuntimeError('While copying the parameter named {}, '
+                                       'whose dimensions in the model are {} and '
+                                       'whose dimensions in the checkpoint are {}.'
+                                       .format(dst_key, own_state[dst_key].size(), param.size()))
+
+                own_state[dst_key].copy_(param)
+
+        unexpected_keys = [key for key in state_dict.keys() if key not in key_map]
+        missing_keys = sorted(set(own_state.keys()) - set(key_map.values()))
+        return unexpected_keys, missing_keys
+
     @staticmethod
     def load_model(model, pretrained=None, all_match=True):
         if pretrained is None:
             return model
 
+        Log.info('Loading pretrained model:{}'.format(pretrained))
+        pretrained_dict = ModuleHelper.load_file(pretrained)
+        model_keys = model.state_dict().keys()
         if all_match:
-            Log.info('Loading pretrained model:{}'.format(pretrained))
-            pretrained_dict = torch.load(pretrained)
-            model_dict = model.state_dict()
-            load_dict = dict()
-            for k, v in pretrained_dict.items():
-                if 'prefix.{}'.format(k) in model_dict:
-                    load_dict['prefix.{}'.format(k)] = v
-                else:
-                    load_dict[k] = v
-
-            # load_dict = {k: v for k, v in pretrained_dict.items() if 'resinit.{}'.format(k) not in model_dict}
-            model.load_state_dict(load_dict)
+            key_map = ModuleHelper.compile_key_map(pretrained_dict.keys(), model_keys,
+                                                   prefix_list=('prefix.', ''), strip_list=())
+            unexpected_keys, missing_keys = ModuleHelper.copy_state_dict(model, pretrained_dict, key_map)
+            if len(unexpected_keys) > 0 or len(missing_keys) > 0:
+                raise RuntimeError('Error(s) in loading state_dict, unexpected keys: {}, missing keys: {}.'
+                                   .format(unexpected_keys, missing_keys))
 
         else:
-            Log.info('Loading pretrained model:{}'.format(pretrained))
-            pretrained_dict = torch.load(pretrained)
-            model_dict = model.state_dict()
-            load_dict = {k: v for k, v in pretrained_dict.items() if k in model_dict}
-            Log.info('Matched Keys: {}'.format(load_dict.keys()))
-            model_dict.update(load_dict)
-            model.load_state_dict(model_dict)
+            key_map = ModuleHelper.compile_key_map(pretrained_dict.keys(), model_keys, strip_list=())
+            Log.info('Matched Keys: {}'.format(list(key_map.values())))
+            ModuleHelper.copy_state_dict(model, pretrained_dict, key_map)
 
         return model
 
     @staticmethod
-    def load_url(url, map_location=None):
+    def load_url(url, map_location='cpu'):
         model_dir = os.path.join('~', '.PyTorchCV', 'models')
         if not os.path.exists(model_dir):
             os.makedirs(model_dir)
@@ -108,7 +214,7 @@ class ModuleHelper(object):
             urlretrieve(url, cached_file)
 
         Log.info('Loading pretrained model:{}'.format(cached_file))
-        return torch.load(cached_file, map_location=map_location)
+        return ModuleHelper.load_file(cached_file, map_location=map_location)
 
     @staticmethod
     def constant_init(module, val, bias=0):
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of building the aug transforms from the hypes files.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import glob
+import os
+import unittest
+
+from datasets.tools.cv2_aug_transforms import CV2AugCompose, RandomDetCrop, RandomHFlip, RandomRotate
+from utils.tools.configer import Configer
+
+
+HYPES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'hypes')
+
+
+class TestAugCompose(unittest.TestCase):
+
+    def test_hypes(self):
+        hypes_list = sorted(glob.glob(os.path.join(HYPES_DIR, '*', '*', '*.json')))
+        self.assertGreater(len(hypes_list), 0)
+        for hypes_file in hypes_list:
+            configer = Configer(hypes_file=hypes_file)
+            if configer.get('data', 'image_tool') == 'pil':
+                try:
+                    from datasets.tools.pil_aug_transforms import PILAugCompose as AugCompose
+                except ImportError:
+                    # e.g. matplotlib of RandomHSV.
+                    continue
+            else:
+                AugCompose = CV2AugCompose
+
+            for split in ('train', 'val'):
+                aug_compose = AugCompose(configer, split=split)
+                self.assertEqual(set(aug_compose.trans_seq) - set(aug_compose.transforms), set(),
+                                 msg='{} {}'.format(hypes_file, split))
+
+    def test_build_trans(self):
+        hflip = CV2AugCompose.build_trans('random_hflip', dict(ratio=0.3, swap_pair=[[1, 2]]))
+        self.assertIsInstance(hflip, RandomHFlip)
+        self.assertEqual(hflip.ratio, 0.3)
+        self.assertEqual(hflip.swap_pair, [[1, 2]])
+        rotate = CV2AugCompose.build_trans('random_rotate', dict(ratio=1.0, rotate_degree=10))
+        self.assertIsInstance(rotate, RandomRotate)
+        self.assertEqual(rotate.max_degree, 10)
+        det_crop = CV2AugCompose.build_trans('random_crop', dict(ratio=1.0, method='det', grid=[3, 2]))
+        self.assertIsInstance(det_crop, RandomDetCrop)
+
+    def test_invalid_param(self):
+        # e.g. a typo or an outdated param name.
+        with self.assertRaises(SystemExit):
+            CV2AugCompose.build_trans('random_hflip', dict(ratio=0.3, swap_pairs=[[1, 2]]))
+
+        with self.assertRaises(SystemExit):
+            CV2AugCompose.build_trans('random_crop', dict(ratio=1.0, method='det', crop_sizes=[10, 10]))
+
+
+if __name__ == '__main__':
+    unittest.main()
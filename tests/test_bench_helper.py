@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the correctness check of the benchmark cases.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math
+import unittest
+
+import torch
+
+from benchmarks.bench_helper import BenchHelper
+
+
+class TestCheckCase(unittest.TestCase):
+
+    def _check(self, out, ref_out):
+        record = dict(status='ok')
+        BenchHelper.check_case(record, torch.tensor(out, dtype=torch.float64),
+                               torch.tensor(ref_out, dtype=torch.float64))
+        return record
+
+    def test_finite(self):
+        self.assertEqual(self._check([1.0, 2.0], [1.0, 2.0])['status'], 'ok')
+        record = self._check([1.0, 2.1], [1.0, 2.0])
+        self.assertEqual(record['status'], 'failed')
+        self.assertAlmostEqual(record['max_abs_diff'], 0.1)
+
+    def test_nan(self):
+        for out, ref_out in (([1.0, float('nan')], [1.0, 2.0]), ([1.0, 2.0], [1.0, float('nan')]),
+                             ([float('nan')], [float('nan')])):
+            record = self._check(out, ref_out)
+            self.assertEqual(record['status'], 'failed')
+            self.assertTrue(math.isnan(record['max_abs_diff']))
+
+    def test_inf(self):
+        inf = float('inf')
+        record = self._check([1.0, inf, -inf], [1.0, inf, -inf])
+        self.assertEqual(record['status'], 'ok')
+        self.assertEqual(record['max_abs_diff'], 0.0)
+        for out, ref_out in (([1.0, -inf], [1.0, inf]), ([1.0, 2.0], [1.0, inf]), ([1.0, inf], [1.0, 2.0])):
+            self.assertEqual(self._check(out, ref_out)['status'], 'failed')
+
+        # The tolerance is relative to the finite reference only.
+        self.assertEqual(self._check([1.0, inf], [1.1, inf])['status'], 'failed')
+
+    def test_skipped(self):
+        record = dict(status='skipped')
+        BenchHelper.check_case(record, torch.tensor([float('nan')]), torch.tensor([1.0]))
+        self.assertEqual(record['status'], 'skipped')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the ConfigView of the Configer.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import copy
+import pickle
+import unittest
+
+from utils.tools.configer import Configer
+
+
+class TestConfigView(unittest.TestCase):
+
+    def setUp(self):
+        self.configer = Configer(config_dict=dict(data=dict(input_mode='BGR', num_classes=21),
+                                                  train=dict(batch_size=16)))
+        self.config = self.configer.freeze()
+
+    def test_get(self):
+        self.assertEqual(self.config.data.input_mode, 'BGR')
+        self.assertEqual(self.config.train.batch_size, 16)
+        self.assertTrue('num_classes' in self.config.data)
+        self.assertEqual(self.config.data.get('label_list', [1]), [1])
+
+    def test_missing_key(self):
+        self.assertFalse(hasattr(self.config.data, 'label_list'))
+        self.assertIsNone(getattr(self.config.data, 'label_list', None))
+        self.assertFalse(hasattr(self.config, 'test'))
+        with self.assertRaises(AttributeError):
+            self.config.data.label_list
+
+    def test_copy(self):
+        for config in (pickle.loads(pickle.dumps(self.config)), copy.deepcopy(self.config)):
+            self.assertEqual(config.data.num_classes, 21)
+            self.assertFalse(hasattr(config.data, 'label_list'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the pure torch fallbacks of the compiled ops against the ports of their C loops.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from benchmarks.bench_ops import _forward_grad, loop_ca_map, loop_ca_weight, loop_roi_align, loop_roi_pool
+
+
+def _loop_nms(dets, thresh):
+    """The port of the loops of nms/src/cpu_nms.pyx."""
+    x1, y1, x2, y2, scores = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3], dets[:, 4]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+    suppressed = np.zeros((dets.shape[0],), dtype=np.int64)
+    keep = []
+    for _i in range(dets.shape[0]):
+        i = order[_i]
+        if suppressed[i] == 1:
+            continue
+
+        keep.append(i)
+        for _j in range(_i + 1, dets.shape[0]):
+            j = order[_j]
+            if suppressed[j] == 1:
+                continue
+
+            w = max(0.0, min(x2[i], x2[j]) - max(x1[i], x1[j]) + 1)
+            h = max(0.0, min(y2[i], y2[j]) - max(y1[i], y1[j]) + 1)
+            inter = w * h
+            if inter / (areas[i] + areas[j] - inter) >= thresh:
+                suppressed[j] = 1
+
+    return keep
+
+
+def _rand_rois(rng, num_rois, width, height):
+    xy = rng.uniform(-0.2, 0.8, size=(num_rois, 2)) * [width, height]
+    wh = rng.uniform(0.0, 0.6, size=(num_rois, 2)) * [width, height]
+    batch_index = rng.randint(0, 2, size=(num_rois, 1))
+    return torch.from_numpy(np.concatenate([batch_index, xy, xy + wh], 1))
+
+
+def _bn_grad(module, ref_func, features):
+    """The output & the grads of the input, weight & bias of the module against the reference func."""
+    module.weight.data.uniform_(0.5, 1.5)
+    module.bias.data.uniform_(-0.5, 0.5)
+    inputs, ref_inputs = features.clone().requires_grad_(), features.clone().requires_grad_()
+    weight = module.weight.detach().clone().requires_grad_()
+    bias = module.bias.detach().clone().requires_grad_()
+    # The in-place bn can't modify a leaf, its backward restores the input from the output.
+    out = module(inputs * 1.0)
+    out_copy = out.detach().clone()
+    out.backward(torch.ones_like(out))
+    ref_out = ref_func(ref_inputs, weight, bias)
+    ref_out.backward(torch.ones_like(ref_out))
+    return [out_copy, inputs.grad, module.weight.grad, module.bias.grad], \
+        [ref_out.detach(), ref_inputs.grad, weight.grad, bias.grad]
+
+
+class TestNMS(unittest.TestCase):
+
+    def test_cpu_nms(self):
+        from extensions.nms.py_nms import cpu_nms
+        rng = np.random.RandomState(0)
+        xy = rng.uniform(0, 100, size=(200, 2))
+        dets = np.concatenate([xy, xy + rng.uniform(5, 40, size=(200, 2)), rng.uniform(size=(200, 1))], 1)
+        for thresh in (0.3, 0.5, 0.7):
+            self.assertEqual([int(i) for i in cpu_nms(dets.astype(np.float32), thresh)],
+                             [int(i) for i in _loop_nms(dets.astype(np.float32), thresh)])
+
+
+class TestRoIOps(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.features = torch.from_numpy(rng.randn(2, 3, 9, 11))
+        self.rois = _rand_rois(rng, 24, 11 * 4, 9 * 4)
+
+    def test_roi_align(self):
+        from extensions.roialign.py_roi_align import roi_align
+        for sampling_ratio in (0, 2):
+            out = _forward_grad(lambda x, rois: roi_align(x, rois, 3, 4, 0.25, sampling_ratio),
+                                self.features, self.rois)
+            ref_out = _forward_grad(lambda x, rois: loop_roi_align(x, rois, 3, 4, 0.25, sampling_ratio),
+                                    self.features, self.rois)
+            self.assertTrue(torch.allclose(out, ref_out, atol=1e-10))
+
+    def test_roi_pool(self):
+        from extensions.roipool.py_roi_pool import roi_pool
+        out = _forward_grad(lambda x, rois: roi_pool(x, rois, 3, 4, 0.25), self.features, self.rois)
+        ref_out = _forward_grad(lambda x, rois: loop_roi_pool(x, rois, 3, 4, 0.25), self.features, self.rois)
+        self.assertTrue(torch.allclose(out, ref_out, atol=1e-10))
+
+
+class TestBN(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.features = torch.randn(2, 4, 5, 6, dtype=torch.float64) * 3.0 + 1.0
+
+    def test_syncbn(self):
+        from extensions.syncbn.module import BatchNorm2d
+        module = BatchNorm2d(4).double().train()
+        out_list, ref_list = _bn_grad(
+            module, lambda x, weight, bias: F.batch_norm(x, None, None, weight, bias, training=True),
+            self.features)
+        for out, ref_out in zip(out_list, ref_list):
+            self.assertTrue(torch.allclose(out, ref_out, atol=1e-10))
+
+        # The running stats of the unbiased var.
+        self.assertTrue(torch.allclose(module.running_mean, 0.1 * self.features.mean((0, 2, 3))))
+        self.assertTrue(torch.allclose(module.running_var,
+                                       0.9 + 0.1 * self.features.transpose(0, 1).reshape(4, -1).var(1)))
+
+    def test_inplace_abn(self):
+        from extensions.inplace_abn_1.bn import InPlaceABN
+        module = InPlaceABN(4).double().train()
+        out_list, ref_list = _bn_grad(
+            module, lambda x, weight, bias: F.leaky_relu(
+                F.batch_norm(x, None, None, weight, bias, training=True), 0.01),
+            self.features)
+        # The backward inverts the affine with |w| + eps.
+        for out, ref_out in zip(out_list, ref_list):
+            self.assertTrue(torch.allclose(out, ref_out, atol=1e-4))
+
+
+class TestCCAttention(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.query, self.key, self.value = [torch.from_numpy(rng.randn(2, channels, 6, 5)) for channels in (4, 4, 3)]
+        self.weight = F.softmax(torch.from_numpy(rng.randn(2, 10, 6, 5)), 1)
+
+    def test_ca_weight(self):
+        from extensions.cc_attention.functions import ca_weight
+        self.assertTrue(torch.allclose(_forward_grad(ca_weight, self.query, self.key),
+                                       _forward_grad(loop_ca_weight, self.query, self.key), atol=1e-10))
+
+    def test_ca_map(self):
+        from extensions.cc_attention.functions import ca_map
+        self.assertTrue(torch.allclose(_forward_grad(ca_map, self.weight, self.value),
+                                       _forward_grad(loop_ca_map, self.weight, self.value), atol=1e-10))
+
+    def test_ca_attention(self):
+        from extensions.cc_attention.functions import ca_attention
+        ref_func = lambda t, f, g: loop_ca_map(F.softmax(loop_ca_weight(t, f), 1), g)
+        ref_out = _forward_grad(ref_func, self.query, self.key, self.value)
+        for chunk_numel in (1, 64, 1 << 22):
+            out = _forward_grad(lambda t, f, g: ca_attention(t, f, g, chunk_numel=chunk_numel),
+                                self.query, self.key, self.value)
+            self.assertTrue(torch.allclose(out, ref_out, atol=1e-10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the batch scheduler of the inference server.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+import unittest
+
+import torch
+
+from methods.tools.inference_server import BatchScheduler, InferenceRequest, _flatten, _unflatten
+
+
+def _pose_forward(inputs):
+    # The (paf_out_list, heatmap_out_list) of the open_pose stages.
+    paf_list = [inputs * 1.0, inputs * 2.0]
+    heatmap_list = [inputs + 1.0, inputs + 2.0]
+    return paf_list, heatmap_list
+
+
+class TestBatchScheduler(unittest.TestCase):
+
+    def test_flatten(self):
+        outputs = _pose_forward(torch.randn(2, 3, 4, 4))
+        flat_list = list()
+        spec = _flatten(outputs, flat_list)
+        self.assertEqual(spec, [[0, 1], [2, 3]])
+        restored = _unflatten(spec, flat_list)
+        for out_list, restored_list in zip(outputs, restored):
+            for output, restored_output in zip(out_list, restored_list):
+                self.assertIs(output, restored_output)
+
+    def test_nested_outputs(self):
+        batch_size = 4
+        scheduler = BatchScheduler(_pose_forward, max_batch_size=batch_size, max_wait_ms=1000.0)
+        scheduler.start()
+        input_list = [torch.randn(1, 3, 8, 8) for _ in range(batch_size)]
+        output_list = [None] * batch_size
+
+        def submit(i):
+            output_list[i] = scheduler.submit(InferenceRequest(input_list[i], [8, 8]))
+
+        thread_list = [threading.Thread(target=submit, args=(i,)) for i in range(batch_size)]
+        for thread in thread_list:
+            thread.start()
+
+        for thread in thread_list:
+            thread.join()
+
+        scheduler.stop()
+        for inputs, outputs in zip(input_list, output_list):
+            paf_list, heatmap_list = _pose_forward(inputs[0])
+            self.assertEqual(len(outputs), 2)
+            for expected, output in zip(paf_list + heatmap_list, outputs[0] + outputs[1]):
+                self.assertTrue(torch.equal(expected, output))
+
+
+if __name__ == '__main__':
+    unittest.main()
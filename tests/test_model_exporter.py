@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the exported engines against the eager model.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+import torch.nn as nn
+
+from methods.tools.inference_server import NET_ATTR_DICT
+from methods.tools.model_exporter import ExportedNet, ExportWrapper, ModelExporter, OUTPUT_SELECT_DICT
+from models.cls_model_manager import ClsModelManager
+from models.det_model_manager import DetModelManager
+from models.pose_model_manager import PoseModelManager
+from models.seg_model_manager import SegModelManager
+from utils.tools.configer import Configer
+
+
+class _PoseNet(nn.Module):
+    """The (paf_out_list, heatmap_out_list) of two stages."""
+    def __init__(self):
+        super(_PoseNet, self).__init__()
+        self.conv = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU())
+        self.paf_list = nn.ModuleList([nn.Conv2d(8, 4, 1) for _ in range(2)])
+        self.heatmap_list = nn.ModuleList([nn.Conv2d(8, 2, 1) for _ in range(2)])
+
+    def forward(self, x):
+        x = self.conv(x)
+        return [paf(x) for paf in self.paf_list], [heatmap(x) for heatmap in self.heatmap_list]
+
+
+class _Runner(object):
+    def __init__(self, configer, net):
+        self.configer = configer
+        setattr(self, NET_ATTR_DICT[configer.get('task')], net)
+
+
+class TestModelExporter(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.work_dir = tempfile.mkdtemp()
+        self.net = _PoseNet()
+        # Non-trivial running stats, so that the frozen BN is checked as well.
+        self.net.conv[1].running_mean.uniform_(-1.0, 1.0)
+        self.net.conv[1].running_var.uniform_(0.5, 2.0)
+        self.net.eval()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def _export(self, engine):
+        configer = Configer(config_dict=dict(
+            task='pose', method='open_pose', data=dict(input_size=[32, 24]),
+            network=dict(resume=os.path.join(self.work_dir, 'open_pose.pth')), test=dict(engine=engine)))
+        ModelExporter.export(_Runner(configer, self.net))
+        return configer
+
+    def _check_parity(self, engine, configer):
+        engine_path = ModelExporter.get_engine_path(configer, engine)
+        self.assertTrue(os.path.exists(engine_path))
+        exported_net = ExportedNet(engine, engine_path, torch.device('cpu'))
+        # Another input size than the traced one.
+        inputs = torch.randn(2, 3, 40, 48)
+        with torch.no_grad():
+            paf_list, heatmap_list = self.net(inputs)
+            exported_outputs = exported_net(inputs)
+
+        self.assertEqual(len(exported_outputs), 2)
+        for expected, output in zip([paf_list[-1], heatmap_list[-1]], exported_outputs[0] + exported_outputs[1]):
+            self.assertEqual(expected.size(), output.size())
+            self.assertTrue(torch.allclose(expected, output, atol=1e-5, rtol=1e-4))
+
+    def test_default_engine(self):
+        # Without --engine both engines are exported.
+        configer = self._export(None)
+        self._check_parity('torchscript', configer)
+        try:
+            import onnxruntime
+        except ImportError:
+            self.skipTest('onnxruntime is not installed.')
+
+        self._check_parity('onnx', configer)
+
+    def test_torchscript(self):
+        configer = self._export('torchscript')
+        self._check_parity('torchscript', configer)
+        self.assertFalse(os.path.exists(ModelExporter.get_engine_path(configer, 'onnx')))
+
+    def test_last_only(self):
+        wrapper = ExportWrapper(self.net, 'last_only').eval()
+        with torch.no_grad():
+            flat_outputs = wrapper(torch.randn(1, 3, 16, 16))
+
+        self.assertEqual(len(flat_outputs), 2)
+        self.assertEqual(wrapper.spec, [None, [0, 1]])
+
+
+class TestManagerExport(unittest.TestCase):
+    """The parity of the torchscript engines of the small nets of every model manager."""
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def _check(self, task, method, config_dict, get_model):
+        config_dict = dict(config_dict, task=task, method=method, phase='test', test=dict(engine='torchscript'))
+        config_dict['network'].update(pretrained=None, resume=os.path.join(self.work_dir, '{}.pth'.format(task)))
+        configer = Configer(config_dict=config_dict)
+        net = get_model(configer).eval()
+        ModelExporter.export(_Runner(configer, net))
+
+        engine_path = ModelExporter.get_engine_path(configer, 'torchscript')
+        self.assertTrue(os.path.exists(engine_path))
+        in_width, in_height = ModelExporter.get_input_size(configer)
+        max_diff = ModelExporter.check(ExportWrapper(net, OUTPUT_SELECT_DICT[method]).eval(), 'torchscript',
+                                       engine_path, torch.randn(1, 3, in_height, in_width), iters=1)
+        self.assertLessEqual(max_diff, 1e-4)
+
+    def test_seg(self):
+        self._check('seg', 'fcn_segmentor', dict(
+            data=dict(num_classes=3, input_size=[64, 48]),
+            network=dict(model_name='pspnet', backbone='resnet34_dilated8', bn_type='torchbn')),
+            lambda configer: SegModelManager(configer).semantic_segmentor())
+
+    def test_det(self):
+        anchors_list = [[[116, 90], [156, 198], [373, 326]], [[30, 61], [62, 45], [59, 119]],
+                        [[10, 13], [16, 30], [33, 23]]]
+        self._check('det', 'yolov3', dict(
+            data=dict(num_classes=3, input_size=[64, 64]), gt=dict(anchors_list=anchors_list),
+            network=dict(model_name='darknet_yolov3', backbone='darknet21', stride_list=[32, 16, 8],
+                         bn_type='torchbn')),
+            lambda configer: DetModelManager(configer).object_detector())
+
+    def test_pose(self):
+        self._check('pose', 'open_pose', dict(
+            data=dict(input_size=[64, 48]),
+            network=dict(model_name='open_pose', backbone='vgg19', paf_out=4, heatmap_out=3)),
+            lambda configer: PoseModelManager(configer).multi_pose_detector())
+
+    def test_cls(self):
+        self._check('cls', 'fc_classifier', dict(
+            data=dict(num_classes=10, input_size=[64, 64]),
+            network=dict(model_name='shufflenetv2', model_scale=0.5, shuffle_group=2, pooled_size=2,
+                         bn_type='torchbn')),
+            lambda configer: ClsModelManager(configer).image_classifier())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the optimized test models & their check against the eager model.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+from unittest import mock
+
+import torch
+import torch.nn as nn
+
+from methods.tools.model_optimizer import ModelOptimizer, OptimizedNet
+from utils.tools.configer import Configer
+
+
+class _ConvNet(nn.Module):
+    def __init__(self):
+        super(_ConvNet, self).__init__()
+        self.conv = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU(),
+                                  nn.Conv2d(8, 4, 1), nn.BatchNorm2d(4))
+
+    def forward(self, x):
+        x = self.conv(x)
+        return x, [x.mean((2, 3))]
+
+
+class _ConstNet(nn.Module):
+    def __init__(self, values):
+        super(_ConstNet, self).__init__()
+        self.values = torch.tensor(values)
+
+    def forward(self, x):
+        return self.values
+
+
+class _Runner(object):
+    def __init__(self, configer):
+        self.configer = configer
+
+
+class TestModelOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.configer = Configer(config_dict=dict(
+            task='cls', method='image_classifier', gpu=None, data=dict(input_size=[32, 24]),
+            test=dict(fuse_bn=True, channels_last=True, jit_freeze=True)))
+        self.net = _ConvNet()
+        # Non-trivial running stats, so that the folded BN is checked.
+        for bn in (self.net.conv[1], self.net.conv[4]):
+            bn.running_mean.uniform_(-1.0, 1.0)
+            bn.running_var.uniform_(0.5, 2.0)
+
+        self.net.eval()
+        self.inputs = (torch.randn(1, 3, 24, 32), )
+
+    def _check(self, eager_values, opt_values):
+        return ModelOptimizer.check(self.configer, _ConstNet(eager_values), _ConstNet(opt_values),
+                                    self.inputs, 0, iters=1)
+
+    def test_optimize(self):
+        opt_net = ModelOptimizer.optimize(_Runner(self.configer), self.net)
+        self.assertIsInstance(opt_net, OptimizedNet)
+        self.assertIsNotNone(opt_net.spec)
+        inputs = torch.randn(1, 3, 24, 32)
+        with torch.no_grad():
+            expected, output = self.net(inputs), opt_net(inputs)
+
+        self.assertTrue(torch.allclose(expected[0], output[0], atol=1e-5))
+        self.assertTrue(torch.allclose(expected[1][0], output[1][0], atol=1e-5))
+
+    def test_fold_bn(self):
+        opt_net, num_folded = ModelOptimizer.build(self.net, ['fuse_bn'], self.inputs)
+        self.assertEqual(num_folded, 2)
+        self.assertTrue(ModelOptimizer.check(self.configer, self.net, opt_net, self.inputs, num_folded, iters=1))
+
+    def test_check(self):
+        inf, nan = float('inf'), float('nan')
+        self.assertTrue(self._check([1.0, 2.0], [1.0, 2.0]))
+        self.assertFalse(self._check([1.0, 2.0], [1.0, 2.1]))
+        self.assertTrue(self._check([1.0, inf, -inf], [1.0, inf, -inf]))
+        # The eager inf doesn't scale the tolerance of the finite values.
+        self.assertFalse(self._check([1.0, inf], [1.1, inf]))
+        for eager_values, opt_values in (([1.0, 2.0], [1.0, nan]), ([1.0, nan], [1.0, nan]),
+                                         ([1.0, inf], [1.0, -inf]), ([1.0, inf], [1.0, 2.0]),
+                                         ([1.0, 2.0], [1.0, inf])):
+            self.assertFalse(self._check(eager_values, opt_values))
+
+    def test_failed_optimization(self):
+        # Any error of the optimized net keeps the eager net.
+        with mock.patch.object(ModelOptimizer, 'build', side_effect=ValueError('failed')):
+            self.assertIs(ModelOptimizer.optimize(_Runner(self.configer), self.net), self.net)
+
+        with mock.patch.object(ModelOptimizer, 'check', return_value=False):
+            self.assertIs(ModelOptimizer.optimize(_Runner(self.configer), self.net), self.net)
+
+
+if __name__ == '__main__':
+    unittest.main()
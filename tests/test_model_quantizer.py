@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the post-training int8 quantization of the test models.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+
+from methods.tools.model_exporter import ModelExporter
+from methods.tools.model_quantizer import ModelQuantizer
+from models.cls.nets.shufflenetv2 import ShuffleNetV2
+from utils.tools.configer import Configer
+
+
+class _DataLoader(object):
+    def __init__(self, batch_list):
+        self.batch_list = batch_list
+
+    def get_valloader(self):
+        return self.batch_list
+
+
+class _Runner(object):
+    def __init__(self, configer, net, data_loader):
+        self.configer = configer
+        self.cls_net = net
+        self.cls_data_loader = data_loader
+
+
+class TestModelQuantizer(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.work_dir = tempfile.mkdtemp()
+        # The syncbn layers are turned into torch BN before the fusion.
+        self.configer = Configer(config_dict=dict(
+            task='cls', method='fc_classifier', data=dict(num_classes=10),
+            network=dict(model_scale=0.5, shuffle_group=2, pooled_size=2, bn_type='syncbn',
+                         resume=os.path.join(self.work_dir, 'shufflenetv2.pth')),
+            quant=dict(backend='fbgemm', calib_batches=2, eval_batches=1)))
+        self.net = ShuffleNetV2(self.configer).eval()
+        self.batch_list = [dict(img=torch.randn(2, 3, 64, 64), label=torch.randint(0, 10, (2, )))
+                           for _ in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_to_torchbn(self):
+        inputs = torch.randn(2, 3, 64, 64)
+        with torch.no_grad():
+            expected = self.net(inputs)
+            float_net = ModelQuantizer.to_torchbn(self.net).eval()
+            self.assertTrue(all(type(module).__module__.startswith('torch.')
+                                for module in float_net.modules() if 'BatchNorm' in type(module).__name__))
+            self.assertTrue(torch.allclose(float_net(inputs), expected, atol=1e-5))
+
+    def test_quantize(self):
+        ModelQuantizer.quantize(_Runner(self.configer, self.net, _DataLoader(self.batch_list)))
+        engine_path = ModelExporter.get_engine_path(self.configer, 'int8')
+        self.assertTrue(os.path.exists(engine_path))
+        with open('{}.json'.format(engine_path)) as json_stream:
+            self.assertEqual(json.load(json_stream)['backend'], 'fbgemm')
+
+        int8_net = torch.jit.load(engine_path)
+        inputs = self.batch_list[0]['img']
+        with torch.no_grad():
+            expected = self.net(inputs)
+            output = int8_net(inputs)[0]
+
+        self.assertEqual(output.size(), expected.size())
+        # The int8 logits follow the fp32 logits.
+        self.assertGreater(torch.corrcoef(torch.stack([output.view(-1), expected.view(-1)]))[0, 1].item(), 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
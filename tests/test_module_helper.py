@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the checkpoint loading of the ModuleHelper.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+
+from models.tools.module_helper import ModuleHelper
+
+
+class TestLoadFile(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.state_dict = dict(weight=torch.randn(4, 3), bias=torch.randn(4))
+        self.path_dict = dict()
+        # The zipfile format is mapped into memory, the legacy one falls back to torch.load.
+        for name, zipfile in [('zipfile', True), ('legacy', False)]:
+            self.path_dict[name] = os.path.join(self.work_dir, '{}.pth'.format(name))
+            torch.save(self.state_dict, self.path_dict[name], _use_new_zipfile_serialization=zipfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_default(self):
+        for path in self.path_dict.values():
+            load_dict = ModuleHelper.load_file(path)
+            for key, value in self.state_dict.items():
+                self.assertEqual(load_dict[key].device, torch.device('cpu'))
+                self.assertTrue(torch.equal(load_dict[key], value))
+
+    def test_map_location(self):
+        for path in self.path_dict.values():
+            load_dict = ModuleHelper.load_file(path, map_location=torch.device('meta'))
+            for key, value in self.state_dict.items():
+                self.assertEqual(load_dict[key].device, torch.device('meta'))
+                self.assertEqual(load_dict[key].size(), value.size())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the grad clipping of the runners.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+import torch
+import torch.nn as nn
+
+from methods.tools.runner_helper import RunnerHelper
+
+
+class TestClipGrad(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.net = nn.Sequential(nn.Conv2d(3, 4, 3), nn.ReLU(), nn.Conv2d(4, 2, 1), nn.Linear(6, 2))
+        self.net(torch.randn(2, 3, 8, 8)).pow(2).sum().mul(10.0).backward()
+        # A param without grad is skipped.
+        self.net[3].weight.grad = None
+
+    def test_clip_grad(self):
+        grad_list = [p.grad.clone() for p in self.net.parameters() if p.grad is not None]
+        total_norm = torch.stack([grad.norm() for grad in grad_list]).norm()
+        self.assertGreater(total_norm.item(), 1.0)
+        self.assertTrue(torch.allclose(RunnerHelper.clip_grad(self.net, max_grad=1.0), total_norm))
+        for grad, p in zip(grad_list, [p for p in self.net.parameters() if p.grad is not None]):
+            self.assertTrue(torch.allclose(p.grad, grad / total_norm, atol=1e-6))
+
+    def test_no_clip(self):
+        grad_list = [p.grad.clone() for p in self.net.parameters() if p.grad is not None]
+        RunnerHelper.clip_grad(list(self.net.parameters()), max_grad=1e6)
+        for grad, p in zip(grad_list, [p for p in self.net.parameters() if p.grad is not None]):
+            self.assertTrue(torch.equal(p.grad, grad))
+
+        self.assertIsNone(RunnerHelper.clip_grad(nn.Linear(2, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
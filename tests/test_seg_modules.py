@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the seg losses against their sorting & loop implementations.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from loss.modules.seg_modules import FSEmbedLoss, FSOhemCELoss
+from utils.tools.configer import Configer
+
+
+def _sort_ohem_ce_loss(predict, target, thresh, min_kept, ignore_index, reduction, weight=None):
+    """The FSOhemCELoss of the full softmax & sort, the target is cloned instead of copy_()."""
+    prob_out = F.softmax(predict, dim=1)
+    tmp_target = target.clone()
+    tmp_target[tmp_target == ignore_index] = 0
+    prob = prob_out.gather(1, tmp_target.unsqueeze(1))
+    mask = target.contiguous().view(-1, ) != ignore_index
+    sort_prob, sort_indices = prob.contiguous().view(-1, )[mask].contiguous().sort()
+    min_threshold = sort_prob[min_kept]
+    threshold = max(min_threshold, thresh)
+    ce_loss = nn.CrossEntropyLoss(weight=weight, ignore_index=ignore_index, reduction='none')
+    loss_matrix = ce_loss(predict, target).contiguous().view(-1, )
+    sort_loss_matrix = loss_matrix[mask][sort_indices]
+    select_loss_matrix = sort_loss_matrix[sort_prob < threshold]
+    return select_loss_matrix.sum() if reduction == 'sum' else select_loss_matrix.mean()
+
+
+def _loop_embed_loss(inputs, targets, num_classes):
+    """The port of the class loops of FSEmbedLoss on the cpu."""
+    cosine_loss = nn.CosineEmbeddingLoss()
+    inputs = inputs.transpose(0, 1)
+    center_array = torch.zeros((num_classes, inputs.size(0)))
+    sim_loss = torch.zeros(1)
+    mask_list = list()
+    for i in range(num_classes):
+        mask = targets == i
+        if mask.sum() == 0:
+            mask_list.append(i)
+            continue
+
+        sim_input = inputs[:, mask]
+        center = sim_input.sum(1) / mask.sum()
+        center_array[i, :] = center
+        sim_input = sim_input.permute(1, 0)
+        sim_center = center.view(1, -1).repeat(sim_input.size(0), 1)
+        sim_loss = sim_loss + cosine_loss(sim_center, sim_input, torch.ones(sim_input.size(0)))
+
+    diff_loss = torch.zeros(1)
+    for i in range(num_classes):
+        if i in mask_list:
+            continue
+
+        label = -torch.ones(num_classes)
+        label[i] = 1
+        center_dual = center_array[i].view(1, -1).repeat(num_classes, 1)
+        diff_loss = diff_loss + cosine_loss(center_array, center_dual, label)
+
+    return (diff_loss + sim_loss).squeeze(0)
+
+
+class TestFSOhemCELoss(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.num_classes = 5
+        self.predict = torch.randn(2, self.num_classes, 12, 10) * 3.0
+        self.target = torch.randint(0, self.num_classes, (2, 12, 10))
+        # About a quarter of the pixels are ignored.
+        self.target[torch.rand(2, 12, 10) < 0.25] = 255
+        self.num_valid = int((self.target != 255).sum())
+
+    def _get_loss(self, thresh, min_kept, reduction='elementwise_mean'):
+        configer = Configer(config_dict=dict(loss=dict(params=dict(
+            ohem_thresh=thresh, ohem_minkeep=min_kept, ce_ignore_index=255, ce_reduction=reduction))))
+        return FSOhemCELoss(configer)
+
+    def _check(self, thresh, min_kept, reduction='elementwise_mean', weight=None):
+        ohem_loss = self._get_loss(thresh, min_kept, reduction)
+        if weight is not None:
+            ohem_loss.ce_loss.weight = weight
+
+        predict = self.predict.clone().requires_grad_()
+        loss = ohem_loss(predict, self.target.clone())
+        loss.backward()
+        sort_predict = self.predict.clone().requires_grad_()
+        sort_loss = _sort_ohem_ce_loss(sort_predict, self.target.clone(), thresh, max(1, min_kept), 255,
+                                       reduction, weight=weight)
+        sort_loss.backward()
+        self.assertTrue(torch.allclose(loss, sort_loss, rtol=1e-5, atol=1e-6),
+                        msg='thresh {} min_kept {}: {} vs {}'.format(thresh, min_kept, loss, sort_loss))
+        self.assertTrue(torch.allclose(predict.grad, sort_predict.grad, rtol=1e-4, atol=1e-7))
+        return loss
+
+    def test_thresh(self):
+        # The thresh decides, min_kept is below the pixels under it.
+        self._check(0.7, 10)
+        self._check(0.7, 0)
+
+    def test_min_kept(self):
+        # min_kept decides, the thresh keeps fewer pixels.
+        self._check(0.01, 100)
+        self._check(0.01, self.num_valid - 1)
+
+    def test_reduction(self):
+        self._check(0.7, 50, reduction='sum')
+
+    def test_weight(self):
+        self._check(0.7, 50, weight=torch.rand(self.num_classes) + 0.5)
+
+    def test_min_kept_all(self):
+        # min_kept covers all the valid pixels: the ce of all of them, where the sort would index out of range.
+        loss = self._get_loss(0.7, self.num_valid)(self.predict, self.target.clone())
+        ce_loss = F.cross_entropy(self.predict, self.target, ignore_index=255)
+        self.assertTrue(torch.allclose(loss, ce_loss, rtol=1e-5))
+
+    def test_ignore_index(self):
+        # The ignored pixels never change the loss.
+        loss = self._get_loss(0.7, 20)(self.predict, self.target.clone())
+        predict = self.predict.clone()
+        predict[:, 0][self.target == 255] = 100.0
+        self.assertTrue(torch.allclose(loss, self._get_loss(0.7, 20)(predict, self.target.clone())))
+
+
+class TestFSEmbedLoss(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.num_classes = 6
+        self.embed_loss = FSEmbedLoss(Configer(config_dict=dict(data=dict(num_classes=self.num_classes))))
+        self.inputs = torch.randn(2, 4, 7, 9) + 0.5
+        # Class 5 is absent & some pixels are ignored.
+        self.target = torch.randint(0, self.num_classes - 1, (2, 7, 9))
+        self.target[torch.rand(2, 7, 9) < 0.2] = 255
+
+    def _check(self, target):
+        inputs = self.inputs.clone().requires_grad_()
+        loss = self.embed_loss(inputs, target)
+        loss.backward()
+        loop_inputs = self.inputs.clone().requires_grad_()
+        loop_loss = _loop_embed_loss(loop_inputs, target, self.num_classes)
+        loop_loss.backward()
+        self.assertTrue(torch.allclose(loss, loop_loss, rtol=1e-5), msg='{} vs {}'.format(loss, loop_loss))
+        self.assertTrue(torch.allclose(inputs.grad, loop_inputs.grad, rtol=1e-4, atol=1e-7))
+
+    def test_loss(self):
+        self._check(self.target)
+
+    def test_single_class(self):
+        target = self.target.clone()
+        target[target != 255] = 2
+        self._check(target)
+
+
+if __name__ == '__main__':
+    unittest.main()
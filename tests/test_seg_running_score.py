@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the seg running score of the val logits.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import unittest
+
+import numpy as np
+import torch
+
+from metric.seg.seg_running_score import SegRunningScore
+from utils.tools.configer import Configer
+
+
+class TestSegRunningScore(unittest.TestCase):
+
+    def test_update_logits(self):
+        # More channels than cv2.resize takes, the padded border is cropped before the resize.
+        running_score = SegRunningScore(Configer(config_dict=dict(data=dict(num_classes=150))))
+        labelmap = torch.randint(0, 150, (6, 8))
+        pred = torch.full((1, 150, 10, 12), -10.0)
+        pred[0].scatter_(0, labelmap[None], 10.0)
+        ori_target = labelmap.repeat_interleave(2, 0).repeat_interleave(2, 1).numpy().astype(np.int64)
+        ori_target[0, 0] = -1
+        running_score.update_logits(pred, [dict(ori_img_size=[16, 12], border_size=[8, 6], ori_target=ori_target)])
+        self.assertEqual(running_score.confusion_matrix.sum(), 16 * 12 - 1)
+        self.assertGreater(running_score.get_pixel_acc(), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
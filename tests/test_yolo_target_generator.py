@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Tests of the sparse YOLOv3 targets & loss against the dense per-gt loop.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math
+import unittest
+
+import torch
+import torch.nn as nn
+
+from loss.modules.det_modules import YOLOv3Loss
+from utils.helpers.det_helper import DetHelper
+from utils.layers.det.yolo_target_generator import YOLOTargetGenerator
+from utils.tools.configer import Configer
+
+
+ANCHORS_LIST = [[[116, 90], [156, 198], [373, 326]], [[30, 61], [62, 45], [59, 119]], [[10, 13], [16, 30], [33, 23]]]
+
+
+def _loop_targets(configer, feat_list, batch_gt_bboxes, batch_gt_labels, input_size):
+    """The dense (targets, objmask, noobjmask) of the per-gt loop."""
+    num_classes = configer.get('data', 'num_classes')
+    iou_threshold = configer.get('gt', 'iou_threshold')
+    target_list, objmask_list, noobjmask_list = list(), list(), list()
+    for i, ori_anchors in enumerate(configer.get('gt', 'anchors_list')):
+        in_h, in_w = feat_list[i].size()[2:]
+        w_fm_stride, h_fm_stride = input_size[0] / in_w, input_size[1] / in_h
+        anchors = [(a_w / w_fm_stride, a_h / h_fm_stride) for a_w, a_h in ori_anchors]
+        batch_size, num_anchors = len(batch_gt_bboxes), len(anchors)
+        obj_mask = torch.zeros(batch_size, num_anchors, in_h, in_w)
+        noobj_mask = torch.ones(batch_size, num_anchors, in_h, in_w)
+        target = torch.zeros(batch_size, num_anchors, in_h, in_w, 5 + num_classes)
+        for b in range(batch_size):
+            for t in range(batch_gt_bboxes[b].size(0)):
+                gx = float(batch_gt_bboxes[b][t, 0] + batch_gt_bboxes[b][t, 2]) / (2.0 * input_size[0]) * in_w
+                gy = float(batch_gt_bboxes[b][t, 1] + batch_gt_bboxes[b][t, 3]) / (2.0 * input_size[1]) * in_h
+                gw = float(batch_gt_bboxes[b][t, 2] - batch_gt_bboxes[b][t, 0]) / input_size[0] * in_w
+                gh = float(batch_gt_bboxes[b][t, 3] - batch_gt_bboxes[b][t, 1]) / input_size[1] * in_h
+                if gw * gh == 0 or gx >= in_w or gy >= in_h:
+                    continue
+
+                gi, gj = int(gx), int(gy)
+                gt_box = torch.FloatTensor([[0, 0, gw, gh]])
+                anchor_shapes = torch.cat([torch.zeros(num_anchors, 2), torch.FloatTensor(anchors)], 1)
+                anch_ious = DetHelper.bbox_iou(gt_box, anchor_shapes)
+                noobj_mask[b, anch_ious[0] > iou_threshold] = 0
+                best_n = int(torch.argmax(anch_ious, dim=1))
+                if anch_ious[0, best_n] < iou_threshold:
+                    continue
+
+                obj_mask[b, best_n, gj, gi] = 1
+                target[b, best_n, gj, gi, 0] = gx - gi
+                target[b, best_n, gj, gi, 1] = gy - gj
+                target[b, best_n, gj, gi, 2] = math.log(gw / anchors[best_n][0] + 1e-16)
+                target[b, best_n, gj, gi, 3] = math.log(gh / anchors[best_n][1] + 1e-16)
+                target[b, best_n, gj, gi, 4] = 1
+                target[b, best_n, gj, gi, 5 + int(batch_gt_labels[b][t])] = 1
+
+        target_list.append(target.view(batch_size, -1, 5 + num_classes))
+        objmask_list.append(obj_mask.view(batch_size, -1))
+        noobjmask_list.append(noobj_mask.view(batch_size, -1))
+
+    return torch.cat(target_list, 1), torch.cat(objmask_list, 1), torch.cat(noobjmask_list, 1)
+
+
+def _masked_bce_loss(configer, prediction, targets, objmask, noobjmask):
+    """The loss of the masked BCELoss on the sigmoid outputs."""
+    bce_loss, mse_loss = nn.BCELoss(reduction='sum'), nn.MSELoss(reduction='sum')
+    x, y = torch.sigmoid(prediction[..., 0]), torch.sigmoid(prediction[..., 1])
+    w, h = prediction[..., 2], prediction[..., 3]
+    conf, pred_cls = torch.sigmoid(prediction[..., 4]), torch.sigmoid(prediction[..., 5:])
+    obj_cnt = max(objmask.sum(), 1.0)
+    loss_coord = (bce_loss(x * objmask, targets[..., 0] * objmask) + bce_loss(y * objmask, targets[..., 1] * objmask)
+                  + 0.5 * mse_loss(w * objmask, targets[..., 2] * objmask)
+                  + 0.5 * mse_loss(h * objmask, targets[..., 3] * objmask)) / obj_cnt
+    loss_obj = (bce_loss(conf * objmask, objmask) + 0.2 * bce_loss(conf * noobjmask, noobjmask * 0.0)) / obj_cnt
+    loss_cls = bce_loss(pred_cls * objmask.unsqueeze(2), targets[..., 5:] * objmask.unsqueeze(2)) / obj_cnt
+    loss_weights = configer.get('network', 'loss_weights')
+    return loss_coord * loss_weights['coord_loss'] + loss_obj * loss_weights['obj_loss'] + \
+        loss_cls * loss_weights['cls_loss']
+
+
+class TestYOLOTargetGenerator(unittest.TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.num_classes = 6
+        self.configer = Configer(config_dict=dict(
+            data=dict(num_classes=self.num_classes), gt=dict(anchors_list=ANCHORS_LIST, iou_threshold=0.5),
+            network=dict(loss_weights=dict(coord_loss=1.0, obj_loss=5.0, cls_loss=1.0))))
+        self.input_size = [160, 128]
+        self.feat_list = [torch.zeros(2, 1, self.input_size[1] // stride, self.input_size[0] // stride)
+                          for stride in (32, 16, 8)]
+        self.num_priors = sum([feat.size(2) * feat.size(3) * 3 for feat in self.feat_list])
+        self.batch_gt_bboxes, self.batch_gt_labels = list(), list()
+        for b in range(2):
+            xy = torch.rand(10, 2) * torch.FloatTensor(self.input_size) * 0.7
+            wh = torch.rand(10, 2) * torch.FloatTensor(self.input_size) * 0.3 + 4.0
+            bboxes = torch.cat([xy, xy + wh], 1)
+            labels = torch.randint(0, self.num_classes, (10,))
+            # The same boxes with the other labels & a box of the same cell & anchor, on the same priors.
+            bboxes = torch.cat([bboxes, bboxes[:3], bboxes[3:4] + torch.FloatTensor([1, 1, 1, 1])], 0)
+            labels = torch.cat([labels, (labels[:3] + 1) % self.num_classes, (labels[3:4] + 2) % self.num_classes])
+            self.batch_gt_bboxes.append(bboxes)
+            self.batch_gt_labels.append(labels)
+
+    def _get_targets(self, batch_index):
+        generator = YOLOTargetGenerator(self.configer)
+        feat_list = [feat[batch_index] for feat in self.feat_list]
+        return generator(feat_list, [self.batch_gt_bboxes[b] for b in batch_index],
+                         [self.batch_gt_labels[b] for b in batch_index], self.input_size)
+
+    def test_dense_targets(self):
+        targets, objmask, noobjmask = self._get_targets([0, 1])
+        loop_targets, loop_objmask, loop_noobjmask = _loop_targets(
+            self.configer, self.feat_list, self.batch_gt_bboxes, self.batch_gt_labels, self.input_size)
+        dense_targets, dense_objmask = YOLOTargetGenerator.to_dense(targets, objmask, noobjmask)
+        # The priors of more than one label are there.
+        self.assertTrue((loop_targets[..., 5:].sum(-1) > 1).any())
+        self.assertTrue(torch.equal(dense_objmask, loop_objmask))
+        self.assertTrue(torch.equal(noobjmask, loop_noobjmask))
+        self.assertTrue(torch.allclose(dense_targets, loop_targets, atol=1e-6))
+        self.assertEqual(targets.size(0), int(loop_objmask.sum()))
+
+    def test_loss(self):
+        targets, objmask, noobjmask = self._get_targets([0, 1])
+        loop_targets, loop_objmask, loop_noobjmask = _loop_targets(
+            self.configer, self.feat_list, self.batch_gt_bboxes, self.batch_gt_labels, self.input_size)
+        prediction = torch.randn(2, self.num_priors, 5 + self.num_classes)
+        yolo_loss = YOLOv3Loss(self.configer)
+        loss_list, grad_list = list(), list()
+        for loss_func, loss_targets in [(yolo_loss, (targets, objmask, noobjmask)),
+                                        (yolo_loss, YOLOTargetGenerator.to_dense(targets, objmask, noobjmask)
+                                         + (noobjmask,)),
+                                        (lambda *args: _masked_bce_loss(self.configer, *args),
+                                         (loop_targets, loop_objmask, loop_noobjmask))]:
+            inputs = prediction.clone().requires_grad_()
+            loss = loss_func(inputs, *loss_targets)
+            loss.backward()
+            loss_list.append(loss.detach())
+            grad_list.append(inputs.grad)
+
+        for loss, grad in zip(loss_list[1:], grad_list[1:]):
+            self.assertTrue(torch.allclose(loss_list[0], loss, rtol=1e-5))
+            self.assertTrue(torch.allclose(grad_list[0], grad, rtol=1e-4, atol=1e-6))
+
+    def test_batch_split(self):
+        # DataParallelCriterion chunks the dense targets along the batch, each chunk is the targets of its images.
+        targets, objmask, noobjmask = self._get_targets([0, 1])
+        dense_targets, dense_objmask = YOLOTargetGenerator.to_dense(targets, objmask, noobjmask)
+        prediction = torch.randn(2, self.num_priors, 5 + self.num_classes)
+        yolo_loss = YOLOv3Loss(self.configer)
+        for b in range(2):
+            chunk_loss = yolo_loss(prediction[b:b + 1], dense_targets[b:b + 1], dense_objmask[b:b + 1],
+                                   noobjmask[b:b + 1])
+            self.assertTrue(torch.allclose(chunk_loss, yolo_loss(prediction[b:b + 1], *self._get_targets([b])),
+                                           rtol=1e-5))
+
+
+if __name__ == '__main__':
+    unittest.main()
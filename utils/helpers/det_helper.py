@@ -12,31 +12,33 @@ import torch
 
 from extensions.nms.nms_wrapper import nms
 from extensions.nms.nms_wrapper import soft_nms
+from utils.tools.step_profiler import StepProfiler
 
 
 class DetHelper(object):
 
     @staticmethod
     def cls_nms(dets, labels, max_threshold=0.0, cls_keep_num=None, device_id=None):
-        if isinstance(labels, torch.Tensor):
-            labels = labels.detach().cpu().numpy()
+        with StepProfiler.timer('nms'):
+            if isinstance(labels, torch.Tensor):
+                labels = labels.detach().cpu().numpy()
 
-        assert isinstance(labels, np.ndarray)
+            assert isinstance(labels, np.ndarray)
 
-        unique_labels = np.unique(labels)
+            unique_labels = np.unique(labels)
 
-        cls_keep_list = list()
-        for c in unique_labels:
-            cls_index = np.where(labels == c)[0]
-            cls_keep = nms(dets[cls_index], thresh=max_threshold, device_id=device_id)
+            cls_keep_list = list()
+            for c in unique_labels:
+                cls_index = np.where(labels == c)[0]
+                cls_keep = nms(dets[cls_index], thresh=max_threshold, device_id=device_id)
 
-            if cls_keep_num is not None:
-                cls_keep = cls_keep[:cls_keep_num]
+                if cls_keep_num is not None:
+                    cls_keep = cls_keep[:cls_keep_num]
 
-            cls_keep_list.append(cls_index[cls_keep])
+                cls_keep_list.append(cls_index[cls_keep])
 
-        keep_index = np.concatenate(cls_keep_list, 0)
-        return dets[keep_index]
+            keep_index = np.concatenate(cls_keep_list, 0)
+            return dets[keep_index]
 
     @staticmethod
     def cls_softnms(dets, labels, max_threshold=0.0, min_score=0.001, sigma=0.5, method='linear', cls_keep_num=None):
@@ -107,6 +109,60 @@ class DetHelper(object):
         iou = inter / (area1 + area2 - inter)
         return iou
 
+    @staticmethod
+    def batch_bbox_iou(box1, box2):
+        """The bbox_iou of every image in the batch.
+
+        Args:
+          box1(tensor): bounding boxes, sized [B,N,4].
+          box2(tensor): bounding boxes, sized [B,M,4].
+        Return:
+          iou(tensor): sized [B,N,M].
+        """
+        lt = torch.max(box1[:, :, None, :2], box2[:, None, :, :2])  # [B,N,M,2]
+        rb = torch.min(box1[:, :, None, 2:4], box2[:, None, :, 2:4])  # [B,N,M,2]
+        wh = (rb - lt).clamp(min=0)
+        inter = wh[:, :, :, 0] * wh[:, :, :, 1]  # [B,N,M]
+        area1 = (box1[:, :, 2] - box1[:, :, 0]) * (box1[:, :, 3] - box1[:, :, 1])  # [B,N]
+        area2 = (box2[:, :, 2] - box2[:, :, 0]) * (box2[:, :, 3] - box2[:, :, 1])  # [B,M]
+        return inter / (area1[:, :, None] + area2[:, None, :] - inter)
+
+    @staticmethod
+    def pad_bboxes(bboxes_list, device, value=0):
+        """Stack the bboxes of every image into [B,G,C] with the valid mask [B,G], G is the max count."""
+        max_len = max([1] + [len(bboxes) for bboxes in bboxes_list])
+        shape = (len(bboxes_list), max_len) + tuple(bboxes_list[0].size()[1:])
+        pad_bboxes = torch.full(shape, value, dtype=bboxes_list[0].dtype, device=device)
+        valid_mask = torch.zeros((len(bboxes_list), max_len), dtype=torch.bool, device=device)
+        for i, bboxes in enumerate(bboxes_list):
+            if len(bboxes) > 0:
+                pad_bboxes[i, :len(bboxes)] = bboxes.to(device)
+                valid_mask[i, :len(bboxes)] = True
+
+        return pad_bboxes, valid_mask
+
+    @staticmethod
+    def random_subsample(mask, num_keep):
+        """Keep num_keep (per row) of the True entries of mask [B,N] uniformly at random, on the mask device.
+
+        Args:
+          mask(tensor): the candidates, bool sized [B,N].
+          num_keep(tensor): the max number to keep of every row, sized [B].
+        Return:
+          keep(tensor): bool sized [B,N], a subset of mask.
+        """
+        keep = torch.zeros_like(mask)
+        max_keep = min(int(num_keep.max().item()), mask.size(1)) if mask.numel() > 0 else 0
+        if max_keep <= 0:
+            return keep
+
+        # The top max_keep random keys of every row, the first num_keep of them are kept.
+        rand_keys = torch.rand(mask.size(), device=mask.device).masked_fill_(~mask, -1.0)
+        top_keys, top_index = rand_keys.topk(max_keep, dim=1)
+        rank = torch.arange(max_keep, device=mask.device)[None]
+        keep.scatter_(1, top_index, (top_keys >= 0) & (rank < num_keep[:, None]))
+        return keep
+
     @staticmethod
     def bbox_kmeans(bboxes, cluster_number, dist=np.mean):
         box_number = bboxes.shape[0]
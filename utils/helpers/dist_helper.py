@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Helpers of the multi-process distributed training.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import pickle
+
+import torch
+import torch.distributed as dist
+from torch.utils import data
+
+from utils.tools.logger import Logger as Log
+
+
+class DistributedSampler(data.distributed.DistributedSampler):
+    """Reshuffle the shards every epoch, without the runners calling set_epoch."""
+    def __iter__(self):
+        indices = super(DistributedSampler, self).__iter__()
+        self.set_epoch(self.epoch + 1)
+        return indices
+
+
+class ShardSampler(data.Sampler):
+    """Split the val set over the ranks without padding, so that every sample is scored once."""
+    def __init__(self, dataset, num_replicas, rank):
+        self.dataset = dataset
+        self.num_replicas = num_replicas
+        self.rank = rank
+
+    def __iter__(self):
+        return iter(range(self.rank, len(self.dataset), self.num_replicas))
+
+    def __len__(self):
+        return len(range(self.rank, len(self.dataset), self.num_replicas))
+
+
+class DistHelper(object):
+
+    @staticmethod
+    def init(configer):
+        """Join the process group launched by torchrun (or torch.distributed.launch).
+        Use gloo on cpu, so the distributed mode is testable without gpus."""
+        if not configer.exists('dist', 'enable') or not configer.get('dist', 'enable'):
+            return False
+
+        if 'WORLD_SIZE' not in os.environ:
+            Log.error('Distributed mode needs the env of torchrun or torch.distributed.launch.')
+            exit(1)
+
+        local_rank = int(os.environ.get('LOCAL_RANK', -1))
+        if local_rank < 0:
+            local_rank = configer.get('dist', 'local_rank') if configer.exists('dist', 'local_rank') else 0
+
+        backend = configer.get('dist', 'backend') if configer.exists('dist', 'backend') else None
+        if backend is None:
+            backend = 'gloo' if configer.get('gpu') is None else 'nccl'
+
+        if configer.get('gpu') is not None:
+            torch.cuda.set_device(local_rank)
+
+        dist.init_process_group(backend=backend, init_method='env://')
+        configer.update(['dist', 'local_rank'], local_rank)
+        return True
+
+    @staticmethod
+    def is_dist():
+        return dist.is_available() and dist.is_initialized()
+
+    @staticmethod
+    def get_rank():
+        return dist.get_rank() if DistHelper.is_dist() else 0
+
+    @staticmethod
+    def get_world_size():
+        return dist.get_world_size() if DistHelper.is_dist() else 1
+
+    @staticmethod
+    def is_main():
+        return DistHelper.get_rank() == 0
+
+    @staticmethod
+    def barrier():
+        if DistHelper.is_dist():
+            dist.barrier()
+
+    @staticmethod
+    def get_batch_size(batch_size):
+        """train.batch_size is the total batch size, split it over the ranks."""
+        world_size = DistHelper.get_world_size()
+        if batch_size % world_size != 0:
+            Log.warn('Batch size {} is not divisible by world size {}.'.format(batch_size, world_size))
+
+        return max(1, batch_size // world_size)
+
+    @staticmethod
+    def get_sampler(dataset, shuffle=True):
+        if not DistHelper.is_dist():
+            return None
+
+        return DistributedSampler(dataset, num_replicas=DistHelper.get_world_size(),
+                                  rank=DistHelper.get_rank(), shuffle=shuffle)
+
+    @staticmethod
+    def get_val_sampler(dataset):
+        if not DistHelper.is_dist():
+            return None
+
+        return ShardSampler(dataset, num_replicas=DistHelper.get_world_size(), rank=DistHelper.get_rank())
+
+    @staticmethod
+    def _get_device():
+        return torch.device('cuda') if dist.get_backend() == 'nccl' else torch.device('cpu')
+
+    @staticmethod
+    def all_reduce_array(array):
+        """Sum a numpy array over the ranks."""
+        if not DistHelper.is_dist():
+            return array
+
+        tensor = torch.from_numpy(array.astype('float64')).to(DistHelper._get_device())
+        DistHelper.all_reduce_tensor(tensor)
+        return tensor.cpu().numpy().astype(array.dtype)
+
+    @staticmethod
+    def all_gather_object(obj):
+        """Gather a picklable object from every rank, ordered by rank."""
+        if not DistHelper.is_dist():
+            return [obj]
+
+        world_size = DistHelper.get_world_size()
+        if hasattr(dist, 'all_gather_object'):
+            obj_list = [None] * world_size
+            dist.all_gather_object(obj_list, obj)
+            return obj_list
+
+        device = DistHelper._get_device()
+        buffer = torch.ByteTensor(list(pickle.dumps(obj))).to(device)
+        size_list = [torch.zeros(1, dtype=torch.long, device=device) for _ in range(world_size)]
+        dist.all_gather(size_list, torch.tensor([buffer.numel()], dtype=torch.long, device=device))
+        max_size = max([size.item() for size in size_list])
+        buffer_list = [torch.zeros(max_size, dtype=torch.uint8, device=device) for _ in range(world_size)]
+        dist.all_gather(buffer_list, torch.cat([buffer, buffer.new_zeros(max_size - buffer.numel())]))
+        return [pickle.loads(bytes(item[:size.item()].cpu().tolist())) for item, size in zip(buffer_list, size_list)]
+
+    @staticmethod
+    def all_reduce_tensor(tensor, average=False):
+        if not DistHelper.is_dist():
+            return tensor
+
+        dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+        if average:
+            tensor /= DistHelper.get_world_size()
+
+        return tensor
+
+    @staticmethod
+    def all_reduce_meter(meter):
+        """Sum the AverageMeter of every rank, in one all_reduce."""
+        if not DistHelper.is_dist():
+            return meter
+
+        stat = torch.tensor([meter.sum, meter.count], dtype=torch.float64, device=DistHelper._get_device())
+
+        DistHelper.all_reduce_tensor(stat)
+        meter.sum, meter.count = stat[0].item(), int(stat[1].item())
+        meter.avg = meter.sum / max(meter.count, 1)
+        return meter
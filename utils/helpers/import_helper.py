@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Resolve the import paths of the registries lazily.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import importlib
+
+
+class ImportHelper(object):
+    obj_dict = dict()
+
+    @staticmethod
+    def load(import_path):
+        """'package.module.Name' -> the object, the module is imported by the first call only."""
+        if import_path not in ImportHelper.obj_dict:
+            module_name, obj_name = import_path.rsplit('.', 1)
+            ImportHelper.obj_dict[import_path] = getattr(importlib.import_module(module_name), obj_name)
+
+        return ImportHelper.obj_dict[import_path]
@@ -10,6 +10,7 @@ from __future__ import print_function
 
 import numpy as np
 import pycocotools.mask as mask_util
+import torch
 
 
 class MaskHelper(object):
@@ -59,6 +60,56 @@ class MaskHelper(object):
         mask = np.array(mask > 0, dtype=np.float32)
         return mask
 
+    @staticmethod
+    def batch_polys2mask_wrt_box(polygons_list, boxes, target_size):
+        """The batched polys2mask_wrt_box on the device of the boxes, polygons_list[i] is enclosed in boxes[i].
+
+        The pixels whose centers are inside odd crossings of any polygon of the roi are on.
+
+        Returns:
+          The masks of shape [N, target_size[1], target_size[0]], of data type torch.float32.
+        """
+        device = boxes.device
+        width, height = target_size
+        if len(polygons_list) == 0:
+            return torch.zeros((0, height, width), device=device)
+
+        # The edges (x1, y1, x2, y2) of all the polygons, with their roi & polygon indices.
+        edge_list, roi_index_list, poly_index_list = list(), list(), list()
+        num_polys = 0
+        for roi_index, polygons in enumerate(polygons_list):
+            for poly in polygons:
+                points = np.array(poly, dtype=np.float32).reshape(-1, 2)
+                edge_list.append(np.concatenate((points, np.roll(points, -1, axis=0)), 1))
+                roi_index_list.append(np.full((len(points),), roi_index, dtype=np.int64))
+                poly_index_list.append(np.full((len(points),), num_polys, dtype=np.int64))
+                num_polys += 1
+
+        masks = torch.zeros((len(polygons_list), height, width), device=device)
+        if num_polys == 0:
+            return masks
+
+        edges = torch.from_numpy(np.concatenate(edge_list, 0)).to(device)
+        roi_index = torch.from_numpy(np.concatenate(roi_index_list, 0)).to(device)
+        poly_index = torch.from_numpy(np.concatenate(poly_index_list, 0)).to(device)
+        edge_boxes = boxes[roi_index].float()
+        box_wh = (edge_boxes[:, 2:] - edge_boxes[:, :2]).clamp(min=1)
+        scale = torch.tensor([width, height], dtype=torch.float32, device=device)
+        edges = ((edges.view(-1, 2, 2) - edge_boxes[:, None, :2]) * scale / box_wh[:, None]).view(-1, 4)
+
+        x1, y1, x2, y2 = [edges[:, i, None, None] for i in range(4)]
+        py = torch.arange(height, dtype=torch.float32, device=device)[None, :, None] + 0.5
+        px = torch.arange(width, dtype=torch.float32, device=device)[None, None, :] + 0.5
+        straddle = (y1 > py) != (y2 > py)
+        cross_x = x1 + (x2 - x1) * (py - y1) / torch.where(y2 == y1, torch.ones_like(y1), y2 - y1)
+        crossings = (straddle & (px < cross_x)).float()  # [E, H, W]
+
+        poly_counts = torch.zeros((num_polys, height, width), device=device).index_add_(0, poly_index, crossings)
+        poly_roi_index = torch.zeros((num_polys,), dtype=torch.long, device=device)
+        poly_roi_index[poly_index] = roi_index
+        masks.index_add_(0, poly_roi_index, (poly_counts.remainder(2) > 0).float())
+        return (masks > 0).float()
+
     @staticmethod
     def rle_mask_voting(top_masks, all_masks, all_dets, iou_thresh, binarize_thresh, method='AVG'):
         """Returns new masks (in correspondence with `top_masks`) by combining
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Helpers of comparing the output tensors.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import torch
+
+
+class TensorHelper(object):
+
+    @staticmethod
+    def max_abs_diff(out, ref_out):
+        """The max abs diff of the finite values & the max abs of the finite reference.
+
+        The diff is nan if either has NaN, inf if the inf of out don't match the reference in place & sign.
+        """
+        out, ref_out = out.detach().double(), ref_out.detach().double()
+        if torch.isnan(out).any() or torch.isnan(ref_out).any():
+            return float('nan'), 0.0
+
+        finite = torch.isfinite(ref_out)
+        if not torch.equal(torch.isfinite(out), finite) or not torch.equal(out[~finite], ref_out[~finite]):
+            return float('inf'), 0.0
+
+        if not finite.any():
+            return 0.0, 0.0
+
+        return (out[finite] - ref_out[finite]).abs().max().item(), ref_out[finite].abs().max().item()
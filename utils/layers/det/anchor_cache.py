@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# LRU cache of the anchors shared by all the anchor layers of Detection.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import json
+
+import torch
+
+
+class AnchorCache(object):
+    """
+    The anchors only depend on the feature map sizes, the input size, the anchor config & the device,
+    so the train, val & test layers share one cache keyed by them, the least recently used key is evicted.
+
+    Usage:
+      anchor_boxes = AnchorCache.get('ssd', feat_list, input_size, anchor_config, device,
+                                     lambda: self._make_anchors(feat_list, input_size, device))
+
+    The cached tensors are shared, the callers must not modify them in-place.
+    """
+    max_size = 32
+    _cache_dict = collections.OrderedDict()
+
+    @staticmethod
+    def get(name, feat_list, input_size, anchor_config, device, make_func):
+        key = (name, tuple([tuple(feat.size()[2:]) for feat in feat_list]), tuple(input_size),
+               json.dumps(anchor_config, sort_keys=True), str(torch.device(device)))
+        if key in AnchorCache._cache_dict:
+            anchors = AnchorCache._cache_dict.pop(key)
+            AnchorCache._cache_dict[key] = anchors
+            return anchors
+
+        anchors = make_func()
+        AnchorCache._cache_dict[key] = anchors
+        while len(AnchorCache._cache_dict) > AnchorCache.max_size:
+            AnchorCache._cache_dict.popitem(last=False)
+
+        return anchors
+
+    @staticmethod
+    def clear():
+        AnchorCache._cache_dict.clear()
+
+    @staticmethod
+    def grid_centers(fm_w, fm_h, stride_w, stride_h, device):
+        """The centers of the cells of the feature map in the input image, sized [fm_h * fm_w, 2] (row-major)."""
+        shift_x = (torch.arange(fm_w, dtype=torch.float32, device=device) + 0.5) * stride_w
+        shift_y = (torch.arange(fm_h, dtype=torch.float32, device=device) + 0.5) * stride_h
+        # The meshgrid by broadcast, torch.meshgrid changes its default indexing across the versions.
+        shift_x = shift_x[None, :].expand(fm_h, fm_w)
+        shift_y = shift_y[:, None].expand(fm_h, fm_w)
+        return torch.stack((shift_x.reshape(-1), shift_y.reshape(-1)), 1)
+
+    @staticmethod
+    def place_anchors(centers, anchor_wh):
+        """The anchors [num_cells * num_anchors, 4] in center-offset form, the anchors of one cell are adjacent."""
+        num_cells, num_anchors = centers.size(0), anchor_wh.size(0)
+        return torch.cat((centers[:, None, :].expand(num_cells, num_anchors, 2),
+                          anchor_wh[None, :, :].expand(num_cells, num_anchors, 2)), 2).reshape(-1, 4)
@@ -86,8 +86,8 @@ class FRROIGenerator(object):
         # to set self.traing = False
         device = loc.device
 
-        anchors = self.fr_priorbox_layer(feat_list, meta[0]['input_size'])
-        default_boxes = anchors.unsqueeze(0).repeat(loc.size(0), 1, 1).to(device)
+        anchors = self.fr_priorbox_layer(feat_list, meta[0]['input_size'], device=device)
+        default_boxes = anchors.unsqueeze(0).expand(loc.size(0), -1, -1)
 
         # loc = loc[:, :, [1, 0, 3, 2]]
         # Convert anchors into proposal via bbox transformations.
@@ -29,98 +29,101 @@ class FRROISampler(object):
         pos_ratio = self.configer.get('roi', 'loss')['pos_ratio']
         loc_normalize_mean = self.configer.get('roi', 'loc_normalize_mean')
         loc_normalize_std = self.configer.get('roi', 'loc_normalize_std')
-
-        sample_roi_list = list()
-        gt_roi_loc_list = list()
-        gt_roi_label_list= list()
-        gt_roi_mask_list = list()
-
-        for i in range(len(gt_bboxes)):
-            temp_gt_bboxes = gt_bboxes[i].to(indices_and_rois.device)
-            temp_gt_labels = gt_labels[i].to(indices_and_rois.device)
-
-            if temp_gt_bboxes.numel() == 0:
-                min_size = self.configer.get('rpn', 'min_size')
-                roi_size = random.randint(min_size, min(meta[i]['border_size']))
-                sample_roi = torch.zeros((1, 4), requires_grad=True).float().to(indices_and_rois.device)
-                sample_roi[0, 2:] = roi_size
-                gt_roi_loc = torch.zeros((1, 4), requires_grad=True).float().to(sample_roi.device)
-                gt_roi_label = torch.ones((1,), requires_grad=True).long().to(sample_roi.device).mul_(-1)
-
-            else:
-                pos_roi_per_image = np.round(n_sample * pos_ratio)
-                if self.configer.get('phase') == 'debug':
-                    rois = indices_and_rois[indices_and_rois[:, 0] == i][:, 1:]
-                else:
-                    if indices_and_rois.numel() == 0:
-                        rois = temp_gt_bboxes
-                    else:
-                        rois = torch.cat((indices_and_rois[indices_and_rois[:, 0] == i][:, 1:], temp_gt_bboxes), 0)
-
-                iou = DetHelper.bbox_iou(rois, temp_gt_bboxes)
-                max_iou, gt_assignment = iou.max(1, keepdim=False)
-                # Offset range of classes from [0, n_fg_class - 1] to [1, n_fg_class].
-                # The label with value 0 is the background.
-                gt_roi_label = temp_gt_labels[gt_assignment] + 1
-
-                max_iou = max_iou.cpu().detach().numpy()
-                # Select foreground RoIs as those with >= pos_iou_thresh IoU.
-                pos_index = np.where(max_iou >= pos_iou_thresh)[0]
-                pos_roi_per_this_image = int(min(pos_roi_per_image, pos_index.size))
-                if pos_index.size > 0:
-                    pos_index = np.random.choice(pos_index, size=pos_roi_per_this_image, replace=False)
-
-                # Select background RoIs as those within
-                # [neg_iou_thresh_lo, neg_iou_thresh_hi).
-                neg_index = np.where((max_iou < neg_iou_thresh_hi) & (max_iou >= neg_iou_thresh_lo))[0]
-                neg_roi_per_this_image = n_sample - pos_roi_per_this_image
-                neg_roi_per_this_image = int(min(neg_roi_per_this_image, neg_index.size))
-                if neg_index.size > 0:
-                    neg_index = np.random.choice(neg_index, size=neg_roi_per_this_image, replace=False)
-
-                # The indices that we're selecting (both positive and negative).
-                keep_index = np.append(pos_index, neg_index)
-                gt_roi_label = gt_roi_label[keep_index].detach()
-                gt_roi_label[pos_roi_per_this_image:] = 0  # negative labels --> 0
-                sample_roi = rois[keep_index].detach()
-
-                if gt_polygons is not None:
-                    temp_gt_polygons = gt_polygons[i]
-                    target_size = [self.configer.get('roi', 'pooled_width'), self.configer.get('roi', 'pooled_height')]
-                    for roi_index in range(pos_roi_per_this_image):
-                        gt_index = gt_assignment[keep_index[roi_index]]
-                        roi_polygons = temp_gt_polygons[gt_index]
-                        roi = sample_roi[roi_index].cpu().numpy()
-                        mask = MaskHelper.polys2mask_wrt_box(roi_polygons, roi, target_size)
-                        mask = torch.from_numpy(mask).to(indices_and_rois.device)
-                        gt_roi_mask_list.append(mask)
-
-                # Compute offsets and scales to match sampled RoIs to the GTs.
-                boxes = temp_gt_bboxes[gt_assignment][keep_index]
-                cxcy = (boxes[:, :2] + boxes[:, 2:]) / 2 - (sample_roi[:, :2] + sample_roi[:, 2:]) / 2  # [8732,2]
-                cxcy /= (sample_roi[:, 2:] - sample_roi[:, :2])
-                wh = (boxes[:, 2:] - boxes[:, :2]) / (sample_roi[:, 2:] - sample_roi[:, :2])  # [8732,2]
-                wh = torch.log(wh)
-                loc = torch.cat([cxcy, wh], 1).detach()  # [8732,4]
-                # loc = loc[:, [1, 0, 3, 2]]
-
-                normalize_mean = torch.Tensor(loc_normalize_mean).to(loc.device)
-                normalize_std = torch.Tensor(loc_normalize_std).to(loc.device)
-                gt_roi_loc = (loc - normalize_mean) / normalize_std
-
-            batch_index = i * torch.ones((len(sample_roi),)).to(sample_roi.device)
-            sample_roi = torch.cat([batch_index[:, None], sample_roi], dim=1).contiguous()
-            sample_roi_list.append(sample_roi)
-            gt_roi_loc_list.append(gt_roi_loc)
-            gt_roi_label_list.append(gt_roi_label)
-            # sample_roi.register_hook(lambda g: print(g))
-
-        sample_roi = torch.cat(sample_roi_list, 0)
-        gt_roi_loc = torch.cat(gt_roi_loc_list, 0)
-        gt_roi_label = torch.cat(gt_roi_label_list, 0)
-
-        if gt_polygons is not None:
-            gt_pos_roi_mask = torch.cat(gt_roi_mask_list, 0)
-            return sample_roi, gt_roi_loc, gt_roi_label, gt_pos_roi_mask
-        else:
+        device = indices_and_rois.device
+        batch_size = len(gt_bboxes)
+
+        # The gts & the rois of all the images, padded to [B, G, 4] & [B, R, 4].
+        pad_gt_bboxes, gt_mask = DetHelper.pad_bboxes([bboxes.float() for bboxes in gt_bboxes], device)
+        pad_gt_labels, _ = DetHelper.pad_bboxes([labels.long() for labels in gt_labels], device)
+        pad_rois, roi_mask = self._pad_rois(indices_and_rois, batch_size, device)
+        if self.configer.get('phase') != 'debug':
+            # The gts are rois too.
+            pad_rois = torch.cat((pad_rois, pad_gt_bboxes), 1)
+            roi_mask = torch.cat((roi_mask, gt_mask), 1)
+
+        iou = DetHelper.batch_bbox_iou(pad_rois, pad_gt_bboxes)  # [B, R, G]
+        iou.masked_fill_(~(roi_mask[:, :, None] & gt_mask[:, None, :]), -1)
+        max_iou, gt_assignment = iou.max(2)  # [B, R]
+
+        # Select foreground RoIs as those with >= pos_iou_thresh IoU.
+        pos_mask = max_iou >= pos_iou_thresh
+        pos_roi_per_image = torch.full((batch_size,), int(np.round(n_sample * pos_ratio)),
+                                       dtype=torch.long, device=device)
+        pos_mask = DetHelper.random_subsample(pos_mask, pos_roi_per_image)
+        # Select background RoIs as those within
+        # [neg_iou_thresh_lo, neg_iou_thresh_hi).
+        neg_mask = (max_iou < neg_iou_thresh_hi) & (max_iou >= neg_iou_thresh_lo)
+        neg_mask = DetHelper.random_subsample(neg_mask, n_sample - pos_mask.sum(1))
+
+        # The kept rois, image by image & the positives first in every image.
+        num_rois = pad_rois.size(1)
+        sort_key = torch.arange(batch_size, device=device)[:, None] * (2 * num_rois) \
+            + (~pos_mask).long() * num_rois + torch.arange(num_rois, device=device)[None]
+        keep_key = sort_key[pos_mask | neg_mask].sort()[0]
+        batch_index, keep_index = keep_key // (2 * num_rois), keep_key % num_rois
+
+        sample_roi = pad_rois[batch_index, keep_index].detach()
+        gt_index = gt_assignment[batch_index, keep_index]
+        # Offset range of classes from [0, n_fg_class - 1] to [1, n_fg_class].
+        # The label with value 0 is the background.
+        gt_roi_label = pad_gt_labels[batch_index, gt_index] + 1
+        is_pos = pos_mask[batch_index, keep_index]
+        gt_roi_label[~is_pos] = 0  # negative labels --> 0
+
+        # Compute offsets and scales to match sampled RoIs to the GTs.
+        boxes = pad_gt_bboxes[batch_index, gt_index]
+        cxcy = (boxes[:, :2] + boxes[:, 2:]) / 2 - (sample_roi[:, :2] + sample_roi[:, 2:]) / 2  # [8732,2]
+        cxcy /= (sample_roi[:, 2:] - sample_roi[:, :2])
+        wh = (boxes[:, 2:] - boxes[:, :2]) / (sample_roi[:, 2:] - sample_roi[:, :2])  # [8732,2]
+        wh = torch.log(wh)
+        loc = torch.cat([cxcy, wh], 1).detach()  # [8732,4]
+        # loc = loc[:, [1, 0, 3, 2]]
+
+        normalize_mean = torch.Tensor(loc_normalize_mean).to(device)
+        normalize_std = torch.Tensor(loc_normalize_std).to(device)
+        gt_roi_loc = (loc - normalize_mean) / normalize_std
+        sample_roi = torch.cat([batch_index[:, None].float(), sample_roi], dim=1).contiguous()
+
+        # One random roi of ignored label for every image without gt.
+        empty_list = [i for i in range(batch_size) if gt_bboxes[i].numel() == 0]
+        if len(empty_list) > 0:
+            min_size = self.configer.get('rpn', 'min_size')
+            empty_roi = torch.zeros((len(empty_list), 5), device=device)
+            empty_roi[:, 0] = torch.tensor(empty_list, dtype=torch.float, device=device)
+            empty_roi[:, 3:] = torch.tensor([random.randint(min_size, min(meta[i]['border_size']))
+                                             for i in empty_list], dtype=torch.float, device=device)[:, None]
+            sample_roi = torch.cat((sample_roi, empty_roi), 0)
+            gt_roi_loc = torch.cat((gt_roi_loc, torch.zeros((len(empty_list), 4), device=device)), 0)
+            gt_roi_label = torch.cat((gt_roi_label, gt_roi_label.new_full((len(empty_list),), -1)), 0)
+
+        if gt_polygons is None:
             return sample_roi, gt_roi_loc, gt_roi_label
+
+        # The mask targets of the positives, rasterized at once.
+        target_size = [self.configer.get('roi', 'pooled_width'), self.configer.get('roi', 'pooled_height')]
+        pos_batch_index = batch_index[is_pos].tolist()
+        pos_gt_index = gt_index[is_pos].tolist()
+        polygons_list = [gt_polygons[b][g] for b, g in zip(pos_batch_index, pos_gt_index)]
+        gt_pos_roi_mask = MaskHelper.batch_polys2mask_wrt_box(polygons_list, sample_roi[:len(is_pos)][is_pos, 1:],
+                                                              target_size)
+        return sample_roi, gt_roi_loc, gt_roi_label, gt_pos_roi_mask
+
+    @staticmethod
+    def _pad_rois(indices_and_rois, batch_size, device):
+        """The rois of every image padded to [B, R, 4], with the valid mask [B, R]."""
+        if indices_and_rois.numel() == 0:
+            return torch.zeros((batch_size, 0, 4), device=device), \
+                   torch.zeros((batch_size, 0), dtype=torch.bool, device=device)
+
+        batch_index = indices_and_rois[:, 0].long()
+        counts = torch.bincount(batch_index, minlength=batch_size)
+        order = torch.argsort(batch_index * indices_and_rois.size(0)
+                              + torch.arange(indices_and_rois.size(0), device=device))
+        starts = torch.cumsum(counts, 0) - counts
+        sorted_index = batch_index[order]
+        pos_index = torch.arange(indices_and_rois.size(0), device=device) - starts[sorted_index]
+        pad_rois = torch.zeros((batch_size, int(counts.max().item()), 4), device=device)
+        pad_rois[sorted_index, pos_index] = indices_and_rois[order, 1:].detach().float()
+        roi_mask = torch.zeros(pad_rois.size()[:2], dtype=torch.bool, device=device)
+        roi_mask[sorted_index, pos_index] = True
+        return pad_rois, roi_mask
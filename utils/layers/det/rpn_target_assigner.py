@@ -8,8 +8,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import math
-import numpy as np
 import torch
 
 from utils.helpers.det_helper import DetHelper
@@ -25,78 +23,65 @@ class RPNTargetAssigner(object):
         self.fr_proirbox_layer = FRPriorBoxLayer(configer)
 
     def __call__(self, feat_list, gt_bboxes, meta):
-        anchor_boxes = self.fr_proirbox_layer(feat_list, meta[0]['input_size'])
+        device = feat_list[0].device
+        anchor_boxes = self.fr_proirbox_layer(feat_list, meta[0]['input_size'], device=device)
         n_sample = self.configer.get('rpn', 'loss')['n_sample']
         pos_iou_thresh = self.configer.get('rpn', 'loss')['pos_iou_thresh']
         neg_iou_thresh = self.configer.get('rpn', 'loss')['neg_iou_thresh']
         pos_ratio = self.configer.get('rpn', 'loss')['pos_ratio']
+        batch_size, num_anchors = len(gt_bboxes), anchor_boxes.size(0)
+
+        # The gt of all the images, padded to [B, G, 4], so that every step runs on the batch at once.
+        pad_gt_bboxes, gt_mask = DetHelper.pad_bboxes([bboxes.float() for bboxes in gt_bboxes], device)
+        has_gt = gt_mask.any(1)  # [B]
+
         # Calc indicies of anchors which are located completely inside of the image
         # whose size is speficied.
-        target_bboxes = list()
-        target_labels = list()
-        for i in range(len(gt_bboxes)):
-            index_inside = (((anchor_boxes[:, 0] - anchor_boxes[:, 2] / 2) >= 0)
-                            & ((anchor_boxes[:, 1] - anchor_boxes[:, 3] / 2) >= 0)
-                            & ((anchor_boxes[:, 0] + anchor_boxes[:, 2] / 2) < meta[i]['border_size'][0])
-                            & ((anchor_boxes[:, 1] + anchor_boxes[:, 3] / 2) < meta[i]['border_size'][1]))
-            index_inside = index_inside.nonzero().contiguous().view(-1, )
-            default_boxes = anchor_boxes[index_inside]
-            loc = torch.zeros_like(default_boxes)
-            label = torch.ones((default_boxes.size(0),)).mul_(-1).long()
-
-            if gt_bboxes[i].numel() > 0:
-                # label: 1 is positive, 0 is negative, -1 is dont care
-                ious = DetHelper.bbox_iou(gt_bboxes[i],
-                                          torch.cat([default_boxes[:, :2] - default_boxes[:, 2:] / 2,
-                                                     default_boxes[:, :2] + default_boxes[:, 2:] / 2], 1))
-
-                max_ious, argmax_ious = ious.max(0, keepdim=False)
-                _, gt_argmax_ious = ious.max(1, keepdim=False)
-
-                # assign negative labels first so that positive labels can clobber them
-                label[max_ious < neg_iou_thresh] = 0
-
-                # positive label: for each gt, anchor with highest iou
-                label[gt_argmax_ious] = 1
-
-                # positive label: above threshold IOU
-                label[max_ious >= pos_iou_thresh] = 1
-
-                # subsample positive labels if we have too many
-                n_pos = int(pos_ratio * n_sample)
-                pos_index = (label == 1).nonzero().contiguous().view(-1, ).numpy()
-                if len(pos_index) > n_pos:
-                    disable_index = np.random.choice(pos_index, size=(len(pos_index) - n_pos), replace=False)
-                    label[disable_index] = -1
-
-                # subsample negative labels if we have too many
-                n_neg = n_sample - torch.sum(label == 1).item()
-                neg_index = (label == 0).nonzero().contiguous().view(-1, ).numpy()
-
-                if len(neg_index) > n_neg:
-                    disable_index = np.random.choice(neg_index, size=(len(neg_index) - n_neg), replace=False)
-                    label[disable_index] = -1
-
-                boxes = gt_bboxes[i][argmax_ious]  # [8732,4]
-                cxcy = (boxes[:, :2] + boxes[:, 2:]) / 2 - default_boxes[:, :2]  # [8732,2]
-                cxcy /= default_boxes[:, 2:]
-                wh = (boxes[:, 2:] - boxes[:, :2]) / default_boxes[:, 2:]  # [8732,2]
-                wh = torch.log(wh)
-                loc = torch.cat([cxcy, wh], 1)  # [8732,4]
-                # loc = loc[:, [1, 0, 3, 2]]
-            else:
-                # subsample negative labels if we have too many
-                n_neg = n_sample // 2
-                neg_index = (label == -1).nonzero().contiguous().view(-1, ).numpy()
-                if len(neg_index) > n_neg:
-                    disable_index = np.random.choice(neg_index, size=n_neg, replace=False)
-                    label[disable_index] = 0
-
-            ret_label = torch.ones((anchor_boxes.size(0),), dtype=torch.long).mul_(-1)
-            ret_label[index_inside] = torch.LongTensor(label)
-            ret_loc = torch.zeros((anchor_boxes.size(0), 4))
-            ret_loc[index_inside] = loc
-            target_bboxes.append(ret_loc)
-            target_labels.append(ret_label)
-
-        return torch.stack(target_bboxes, 0), torch.stack(target_labels, 0)
\ No newline at end of file
+        border_size = torch.tensor([m['border_size'] for m in meta], dtype=torch.float, device=device)  # [B, 2]
+        anchor_corners = torch.cat([anchor_boxes[:, :2] - anchor_boxes[:, 2:] / 2,
+                                    anchor_boxes[:, :2] + anchor_boxes[:, 2:] / 2], 1)
+        inside_mask = (anchor_corners[None, :, 0] >= 0) & (anchor_corners[None, :, 1] >= 0) \
+            & (anchor_corners[None, :, 2] < border_size[:, 0:1]) & (anchor_corners[None, :, 3] < border_size[:, 1:2])
+
+        # ious: [B, G, A], the padded gts & the outside anchors never match.
+        ious = DetHelper.batch_bbox_iou(pad_gt_bboxes, anchor_corners[None].expand(batch_size, -1, -1))
+        ious.masked_fill_(~(gt_mask[:, :, None] & inside_mask[:, None, :]), -1)
+        max_ious, argmax_ious = ious.max(1)  # [B, A]
+        _, gt_argmax_ious = ious.max(2)  # [B, G]
+
+        # label: 1 is positive, 0 is negative, -1 is dont care
+        # assign negative labels first so that positive labels can clobber them
+        label = torch.full((batch_size, num_anchors), -1, dtype=torch.long, device=device)
+        label[inside_mask & (max_ious < neg_iou_thresh)] = 0
+        # positive label: for each gt, anchor with highest iou
+        # The padded gts write into the extra column, which is dropped.
+        label = torch.cat([label, label.new_full((batch_size, 1), -1)], 1)
+        label.scatter_(1, torch.where(gt_mask, gt_argmax_ious, torch.full_like(gt_argmax_ious, num_anchors)), 1)
+        label = label[:, :num_anchors].contiguous()
+        # positive label: above threshold IOU
+        label[max_ious >= pos_iou_thresh] = 1
+
+        # The images without gt keep n_sample // 2 random anchors inside as the negatives.
+        label[~has_gt[:, None] & inside_mask] = 0
+
+        # subsample positive labels if we have too many
+        pos_mask = label == 1
+        keep_pos = DetHelper.random_subsample(pos_mask, torch.full((batch_size,), int(pos_ratio * n_sample),
+                                                                   dtype=torch.long, device=device))
+        label[pos_mask & ~keep_pos] = -1
+
+        # subsample negative labels if we have too many
+        n_neg = torch.where(has_gt, n_sample - keep_pos.sum(1),
+                            torch.full((batch_size,), n_sample // 2, dtype=torch.long, device=device))
+        neg_mask = label == 0
+        label[neg_mask & ~DetHelper.random_subsample(neg_mask, n_neg)] = -1
+
+        boxes = torch.gather(pad_gt_bboxes, 1, argmax_ious[:, :, None].expand(-1, -1, 4))  # [B, A, 4]
+        cxcy = (boxes[:, :, :2] + boxes[:, :, 2:]) / 2 - anchor_boxes[None, :, :2]  # [B, A, 2]
+        cxcy /= anchor_boxes[None, :, 2:]
+        wh = (boxes[:, :, 2:] - boxes[:, :, :2]) / anchor_boxes[None, :, 2:]  # [B, A, 2]
+        wh = torch.log(wh)
+        loc = torch.cat([cxcy, wh], 2)  # [B, A, 4]
+        # loc = loc[:, :, [1, 0, 3, 2]]
+        loc = torch.where((inside_mask & has_gt[:, None])[:, :, None], loc, torch.zeros_like(loc))
+        return loc, label
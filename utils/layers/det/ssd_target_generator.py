@@ -46,7 +46,7 @@ class SSDTargetGenerator(object):
                 cxcy = (boxes[:, :2] + boxes[:, 2:]) / 2 - anchor_boxes[:, :2]  # [8732,2]
                 cxcy /= variances[0] * anchor_boxes[:, 2:]
                 wh = (boxes[:, 2:] - boxes[:, :2]) / anchor_boxes[:, 2:]  # [8732,2]
-                wh = torch.log(wh) / variances[1]
+                wh = torch.log(wh.clamp(min=1e-6)) / variances[1]
                 loc = torch.cat([cxcy, wh], 1)  # [8732,4]
 
                 conf = 1 + gt_labels[i][max_idx]  # [8732,], background class = 0
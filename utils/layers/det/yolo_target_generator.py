@@ -8,8 +8,6 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import math
-import numpy as np
 import torch
 
 from utils.helpers.det_helper import DetHelper
@@ -17,85 +15,89 @@ from utils.tools.logger import Logger as Log
 
 
 class YOLOTargetGenerator(object):
-    """Compute prior boxes coordinates in center-offset form for each source feature map."""
+    """Compute prior boxes coordinates in center-offset form for each source feature map.
+
+    Returns the sparse targets of the matched priors:
+      targets: (tx, ty, tw, th, multi-hot cls) of every matched prior, sized [P, 4 + num_classes].
+      objmask: (batch index, prior index) of every matched prior, sized [P, 2].
+      noobjmask: 1 for the priors of the no-object loss, sized [B, num_priors].
+    The priors are ordered as the predictions of YOLODetectionLayer: layer, anchor, row, col.
+    The coords of a prior matched by several gts are the ones of the last gt, its cls has the label of every gt.
+    """
 
     def __init__(self, configer):
         self.configer = configer
 
     def __call__(self, feat_list, batch_gt_bboxes, batch_gt_labels, input_size):
-        batch_target_list = list()
-        batch_objmask_list = list()
-        batch_noobjmask_list = list()
+        iou_threshold = self.configer.get('gt', 'iou_threshold')
+        num_classes = self.configer.get('data', 'num_classes')
+        batch_size = len(batch_gt_bboxes)
+        gt_bboxes = torch.cat([bboxes.float().view(-1, 4) for bboxes in batch_gt_bboxes], 0)
+        gt_labels = torch.cat([labels.long().view(-1) for labels in batch_gt_labels], 0)
+        gt_batch_index = torch.cat([torch.full((bboxes.view(-1, 4).size(0),), b, dtype=torch.long)
+                                    for b, bboxes in enumerate(batch_gt_bboxes)], 0)
+
+        target_list, index_list, noobjmask_list = list(), list(), list()
+        prior_offset = 0
         for i, ori_anchors in enumerate(self.configer.get('gt', 'anchors_list')):
             in_h, in_w = feat_list[i].size()[2:]
             w_fm_stride, h_fm_stride = input_size[0] / in_w, input_size[1] / in_h
-            anchors = [(a_w / w_fm_stride, a_h / h_fm_stride) for a_w, a_h in ori_anchors]
-            batch_size = len(batch_gt_bboxes)
-            num_anchors = len(anchors)
-            obj_mask = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            noobj_mask = torch.ones(batch_size, num_anchors, in_h, in_w)
-            tx = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            ty = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            tw = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            th = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            tconf = torch.zeros(batch_size, num_anchors, in_h, in_w)
-            tcls = torch.zeros(batch_size, num_anchors, in_h, in_w, self.configer.get('data', 'num_classes'))
-
-            for b in range(batch_size):
-                for t in range(batch_gt_bboxes[b].size(0)):
-                    # Convert to position relative to box
-                    gx = (batch_gt_bboxes[b][t, 0] + batch_gt_bboxes[b][t, 2]) / (2.0 * input_size[0]) * in_w
-                    gy = (batch_gt_bboxes[b][t, 1] + batch_gt_bboxes[b][t, 3]) / (2.0 * input_size[1]) * in_h
-                    gw = (batch_gt_bboxes[b][t, 2] - batch_gt_bboxes[b][t, 0]) / input_size[0] * in_w
-                    gh = (batch_gt_bboxes[b][t, 3] - batch_gt_bboxes[b][t, 1]) /input_size[1] * in_h
-                    if gw * gh == 0 or gx >= in_w or gy >= in_h:
-                        continue
+            anchors = torch.FloatTensor([(a_w / w_fm_stride, a_h / h_fm_stride) for a_w, a_h in ori_anchors])
+            num_anchors = anchors.size(0)
+            noobj_mask = torch.ones(batch_size, num_anchors, in_h * in_w)
 
-                    # Get grid box indices
-                    gi = int(gx)
-                    gj = int(gy)
-                    # Get shape of gt box
-                    gt_box = torch.FloatTensor(np.array([0, 0, gw, gh])).unsqueeze(0)
-                    # Get shape of anchor box
-                    anchor_shapes = torch.FloatTensor(np.concatenate((np.zeros((num_anchors, 2)),
-                                                                      np.array(anchors)), 1))
-                    # Calculate iou between gt and anchor shapes
-                    anch_ious = DetHelper.bbox_iou(gt_box, anchor_shapes)
-                    # Where the overlap is larger than threshold set mask to zero (ignore)
-                    noobj_mask[b, anch_ious[0] > self.configer.get('gt', 'iou_threshold')] = 0
-                    # Find the best matching anchor box
-                    best_n = torch.argmax(anch_ious, dim=1)
-                    if anch_ious[0, best_n] < self.configer.get('gt', 'iou_threshold'):
-                        continue
+            # Convert to position relative to box
+            gx = (gt_bboxes[:, 0] + gt_bboxes[:, 2]) / (2.0 * input_size[0]) * in_w
+            gy = (gt_bboxes[:, 1] + gt_bboxes[:, 3]) / (2.0 * input_size[1]) * in_h
+            gw = (gt_bboxes[:, 2] - gt_bboxes[:, 0]) / input_size[0] * in_w
+            gh = (gt_bboxes[:, 3] - gt_bboxes[:, 1]) / input_size[1] * in_h
+            valid = (gw * gh != 0) & (gx < in_w) & (gy < in_h)
+            if valid.any():
+                # Calculate iou between the shapes of the gt boxes & the anchor boxes.
+                gt_box = torch.stack([torch.zeros_like(gw), torch.zeros_like(gh), gw, gh], 1)[valid]
+                anchor_shapes = torch.cat([torch.zeros(num_anchors, 2), anchors], 1)
+                anch_ious = DetHelper.bbox_iou(gt_box, anchor_shapes)  # [T, A]
+                b_index = gt_batch_index[valid]
+                # Where the overlap is larger than threshold set mask to zero (ignore)
+                ignore_b, ignore_n = (anch_ious > iou_threshold).nonzero().t()
+                noobj_mask[b_index[ignore_b], ignore_n] = 0
+                # Find the best matching anchor box
+                best_iou, best_n = anch_ious.max(1)
+                keep = best_iou >= iou_threshold
+                gx, gy, gw, gh = gx[valid][keep], gy[valid][keep], gw[valid][keep], gh[valid][keep]
+                b_index, best_n, labels = b_index[keep], best_n[keep], gt_labels[valid][keep]
+                # Get grid box indices
+                gi, gj = gx.long(), gy.long()
+                prior_index = (best_n * in_h + gj) * in_w + gi
+                coords = torch.stack([gx - gi.float(), gy - gj.float(),
+                                      torch.log(gw / anchors[best_n, 0] + 1e-16),
+                                      torch.log(gh / anchors[best_n, 1] + 1e-16)], 1)
 
-                    # Masks
-                    obj_mask[b, best_n, gj, gi] = 1
-                    # Coordinates
-                    tx[b, best_n, gj, gi] = gx - gi
-                    ty[b, best_n, gj, gi] = gy - gj
-                    # Width and height
-                    tw[b, best_n, gj, gi] = math.log(gw / anchors[best_n][0] + 1e-16)
-                    th[b, best_n, gj, gi] = math.log(gh / anchors[best_n][1] + 1e-16)
-                    # object
-                    tconf[b, best_n, gj, gi] = 1
-                    # One-hot encoding of label
-                    tcls[b, best_n, gj, gi, int(batch_gt_labels[b][t])] = 1
+                # One row per matched prior: the later gt overwrites the coords, the labels are or-ed.
+                key, inverse = torch.unique(b_index * num_anchors * in_h * in_w + prior_index, return_inverse=True)
+                last_index = torch.full_like(key, -1).scatter_reduce(
+                    0, inverse, torch.arange(inverse.size(0)), reduce='amax')
+                tcls = torch.zeros(key.size(0), num_classes)
+                tcls[inverse, labels] = 1
+                target_list.append(torch.cat([coords[last_index], tcls], 1))
+                index_list.append(torch.stack([b_index[last_index], prior_offset + prior_index[last_index]], 1))
 
-            obj_mask = obj_mask.view(batch_size, -1)
-            noobj_mask = noobj_mask.view(batch_size, -1)
-            tx = tx.view(batch_size, -1).unsqueeze(2)
-            ty = ty.view(batch_size, -1).unsqueeze(2)
-            tw = tw.view(batch_size, -1).unsqueeze(2)
-            th = th.view(batch_size, -1).unsqueeze(2)
-            tconf = tconf.view(batch_size, -1).unsqueeze(2)
-            tcls = tcls.view(batch_size, -1, self.configer.get('data', 'num_classes'))
-            target = torch.cat((tx, ty, tw, th, tconf, tcls), -1)
-            batch_target_list.append(target)
-            batch_objmask_list.append(obj_mask)
-            batch_noobjmask_list.append(noobj_mask)
-
-        batch_target = torch.cat(batch_target_list, 1)
-        batch_objmask = torch.cat(batch_objmask_list, 1)
-        batch_noobjmask = torch.cat(batch_noobjmask_list, 1)
+            noobjmask_list.append(noobj_mask.view(batch_size, -1))
+            prior_offset += num_anchors * in_h * in_w
 
+        batch_target = torch.cat(target_list, 0) if len(target_list) > 0 else torch.zeros((0, 4 + num_classes))
+        batch_objmask = torch.cat(index_list, 0) if len(index_list) > 0 else torch.zeros((0, 2), dtype=torch.long)
+        batch_noobjmask = torch.cat(noobjmask_list, 1)
         return batch_target, batch_objmask, batch_noobjmask
+
+    @staticmethod
+    def to_dense(targets, objmask, noobjmask):
+        """The dense targets (tx, ty, tw, th, conf, multi-hot cls), sized [B, num_priors, 5 + num_classes],
+        & the dense objmask, sized [B, num_priors]."""
+        batch_size, num_priors = noobjmask.size()
+        dense_targets = torch.zeros((batch_size, num_priors, targets.size(1) + 1), device=targets.device)
+        batch_index, prior_index = objmask[:, 0], objmask[:, 1]
+        dense_targets[batch_index, prior_index, :4] = targets[:, :4]
+        dense_targets[batch_index, prior_index, 4] = 1
+        dense_targets[batch_index, prior_index, 5:] = targets[:, 4:]
+        return dense_targets, dense_targets[:, :, 4].clone()
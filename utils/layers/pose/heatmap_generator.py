@@ -34,8 +34,8 @@ class HeatmapGenerator(object):
                 if gt_kpts[i][j][2] < 0:
                     continue
 
-                x = gt_kpts[i][j][0]
-                y = gt_kpts[i][j][1]
+                x = float(gt_kpts[i][j][0])
+                y = float(gt_kpts[i][j][1])
                 y_range = [i for i in range(int(height // stride))]
                 x_range = [i for i in range(int(width // stride))]
                 xx, yy = np.meshgrid(x_range, y_range)
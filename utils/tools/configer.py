@@ -16,9 +16,35 @@ import argparse
 from utils.tools.logger import Logger as Log
 
 
+class ConfigView(object):
+    """Read-only attribute access of the params, e.g. config.data.input_mode.
+
+    It holds plain values only, so it is cheap to read in the loops & to pickle to the loader workers.
+    """
+    def __init__(self, params_dict):
+        for key, value in params_dict.items():
+            self.__dict__[key] = ConfigView(value) if isinstance(value, dict) else value
+
+    def __getattr__(self, key):
+        # Only called for the missing keys, so that hasattr & getattr with a default work.
+        raise AttributeError('ConfigView has no Key: {}.'.format(key))
+
+    def __setattr__(self, key, value):
+        Log.error('ConfigView is read-only, update the Configer of Key: {} instead.'.format(key))
+        exit(1)
+
+    def __contains__(self, key):
+        return key in self.__dict__
+
+    def get(self, key, default=None):
+        return self.__dict__.get(key, default)
+
+
 class Configer(object):
 
     def __init__(self, args_parser=None, hypes_file=None, config_dict=None):
+        self.view = None
+        self.stale_keys = set()
         if config_dict is not None:
             self.params_root = config_dict
 
@@ -55,6 +81,26 @@ class Configer(object):
         prefix = '{}, {}'.format(filename, lineno)
         return prefix
 
+    def freeze(self):
+        """The ConfigView of the params, compiled once for the hot loops after the cli overrides."""
+        if self.view is None:
+            self.view = ConfigView(self.params_root)
+
+        return self.view
+
+    def _check_frozen(self, key_tuple):
+        if self.view is None:
+            return
+
+        # The views handed out keep the old values, the later freeze() returns the new ones.
+        if tuple(key_tuple) not in self.stale_keys:
+            self.stale_keys.add(tuple(key_tuple))
+            frame = sys._getframe(2)
+            Log.warn('{}, {} Key: {} changed after freeze!!!'.format(os.path.basename(frame.f_code.co_filename),
+                                                                    frame.f_lineno, key_tuple))
+
+        self.view = ConfigView(self.params_root)
+
     def get(self, *key):
         if len(key) == 0:
             return self.params_root
@@ -104,6 +150,8 @@ class Configer(object):
             Log.error('{} KeyError: {}.'.format(self._get_caller(), key_tuple))
             exit(1)
 
+        self._check_frozen(key_tuple)
+
     def update(self, key_tuple, value):
         if not self.exists(*key_tuple):
             Log.error('{} Key: {} not existed!!!'.format(self._get_caller(), key_tuple))
@@ -119,6 +167,8 @@ class Configer(object):
             Log.error('{} Key: {} not existed!!!'.format(self._get_caller(), key_tuple))
             exit(1)
 
+        self._check_frozen(key_tuple)
+
     def plus_one(self, *key):
         if not self.exists(*key):
             Log.error('{} Key: {} not existed!!!'.format(self._get_caller(), key))
@@ -134,8 +184,12 @@ class Configer(object):
             Log.error('{} KeyError: {} !!!'.format(self._get_caller(), key))
             exit(1)
 
+        self._check_frozen(key)
+
     def resume(self, config_dict):
         self.params_root = config_dict
+        if self.view is not None:
+            self.view = ConfigView(self.params_root)
 
     def to_dict(self):
         return self.params_root
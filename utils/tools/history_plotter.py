@@ -22,6 +22,29 @@ class HistoryPlotter(object):
         for lb in self.labels:
             self.history[lb] = []
 
+    @staticmethod
+    def from_metric_file(metric_file, labels, phase='val'):
+        r"""Load the history from the json lines file of MetricWriter
+        Parameters
+        ---------
+        metric_file: str
+            Path of the *.metrics.jsonl file.
+        labels: list of str
+            List of scalar names to load, one history point per line with all of them.
+        """
+        from utils.tools.metric_writer import MetricWriter
+
+        plotter = HistoryPlotter(labels)
+        scalar_dict = MetricWriter.load(metric_file, phase=phase)
+        for lb in labels:
+            plotter.history[lb] = scalar_dict[lb][1].tolist() if lb in scalar_dict else []
+
+        plotter.epochs = min([len(plotter.history[lb]) for lb in labels])
+        for lb in labels:
+            plotter.history[lb] = plotter.history[lb][:plotter.epochs]
+
+        return plotter
+
     def update(self, values):
         r"""Update the training history
         Parameters
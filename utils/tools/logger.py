@@ -124,6 +124,12 @@ class Logger(object):
 
         Logger.init(stdout_level=log_level)
 
+    @staticmethod
+    def is_debug():
+        """Whether the debug messages are logged, to skip building them (e.g. syncing the device) otherwise."""
+        Logger.check_logger()
+        return Logger.logger.isEnabledFor(logging.DEBUG)
+
     @staticmethod
     def debug(message):
         Logger.check_logger()
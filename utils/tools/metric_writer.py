@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Buffered json lines of the scalars (losses, lr, timings & scores) of the train & val.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import atexit
+import json
+import os
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import numpy as np
+
+from utils.helpers.dist_helper import DistHelper
+from utils.tools.logger import Logger as Log
+
+
+class MetricWriter(object):
+    """
+    Args:
+      enable: Whether to write the scalars, add() is a no-op otherwise.
+      metric_file: The json lines file, one line {phase, iters, time, scalars} per add().
+      flush_secs: The background thread writes the buffered lines to the file every flush_secs.
+
+    Usage:
+      MetricWriter.add('train', iters, loss=train_losses.avg, lr=lr_list[0])
+      scalar_dict = MetricWriter.load(metric_file)['train']  # {name: (iters array, values array)}
+    """
+    enable = False
+    metric_file = None
+    flush_secs = 5.0
+    _queue = None
+    _thread = None
+
+    @staticmethod
+    def init(configer):
+        # Only rank 0 writes the file under the distributed mode.
+        MetricWriter.close()
+        MetricWriter.enable = configer.exists('metrics', 'enable') and bool(configer.get('metrics', 'enable')) \
+            and DistHelper.is_main()
+        if not MetricWriter.enable:
+            return
+
+        log_file = configer.get('logging', 'log_file') if configer.exists('logging', 'log_file') else None
+        log_file = './default.log' if log_file is None else log_file
+        MetricWriter.metric_file = '{}.metrics.jsonl'.format(os.path.splitext(log_file)[0])
+        if configer.exists('metrics', 'flush_secs') and configer.get('metrics', 'flush_secs') is not None:
+            MetricWriter.flush_secs = configer.get('metrics', 'flush_secs')
+
+        dir_name = os.path.dirname(os.path.abspath(MetricWriter.metric_file))
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+
+        MetricWriter._queue = queue.Queue()
+        MetricWriter._thread = threading.Thread(target=MetricWriter._write_loop,
+                                                args=(MetricWriter._queue, MetricWriter.metric_file,
+                                                      MetricWriter.flush_secs))
+        MetricWriter._thread.daemon = True
+        MetricWriter._thread.start()
+        Log.info('Write the metrics into {}.'.format(MetricWriter.metric_file))
+
+    @staticmethod
+    def add(phase, iters, **scalars):
+        """Buffer the scalars of one step, the python floats & ints are json-encoded by the writer thread."""
+        if not MetricWriter.enable:
+            return
+
+        MetricWriter._queue.put((phase, iters, time.time(), scalars))
+
+    @staticmethod
+    def _write_loop(line_queue, metric_file, flush_secs):
+        # The file is opened by the first line, so the runs without any scalar leave no file.
+        metric_stream = None
+        last_flush = time.time()
+        while True:
+            try:
+                item = line_queue.get(timeout=flush_secs)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                break
+
+            if item:
+                phase, iters, add_time, scalars = item
+                scalars = {key: MetricWriter._to_float(value) for key, value in scalars.items()}
+                if metric_stream is None:
+                    metric_stream = open(metric_file, 'a')
+
+                metric_stream.write(json.dumps(dict(phase=phase, iters=iters,
+                                                    time=add_time, scalars=scalars)) + '\n')
+
+            if metric_stream is not None and time.time() - last_flush >= flush_secs:
+                metric_stream.flush()
+                last_flush = time.time()
+
+        if metric_stream is not None:
+            metric_stream.close()
+
+    @staticmethod
+    def _to_float(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+
+        if isinstance(value, (list, tuple)):
+            return [MetricWriter._to_float(item) for item in value]
+
+        if isinstance(value, dict):
+            return {key: MetricWriter._to_float(item) for key, item in value.items()}
+
+        return float(value)
+
+    @staticmethod
+    def close():
+        """Write the buffered lines & stop the writer thread."""
+        if MetricWriter._thread is None:
+            return
+
+        MetricWriter._queue.put(None)
+        MetricWriter._thread.join()
+        MetricWriter._queue = None
+        MetricWriter._thread = None
+
+    @staticmethod
+    def load(metric_file, phase=None):
+        """Read the scalars of the file.
+
+        Returns:
+          dict of phase -> {name: (iters array, values array)}, or the dict of the phase if given.
+        """
+        phase_dict = dict()
+        with open(metric_file, 'r') as metric_stream:
+            for line in metric_stream:
+                item = json.loads(line)
+                scalar_dict = phase_dict.setdefault(item['phase'], dict())
+                for name, value in item['scalars'].items():
+                    if isinstance(value, (list, dict)):
+                        continue
+
+                    iters_list, value_list = scalar_dict.setdefault(name, (list(), list()))
+                    iters_list.append(item['iters'])
+                    value_list.append(value)
+
+        for scalar_dict in phase_dict.values():
+            for name, (iters_list, value_list) in scalar_dict.items():
+                scalar_dict[name] = (np.array(iters_list), np.array(value_list))
+
+        if phase is not None:
+            return phase_dict.get(phase, dict())
+
+        return phase_dict
+
+
+atexit.register(MetricWriter.close)
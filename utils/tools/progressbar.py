@@ -1,4 +1,4 @@
-import collections
+import collections.abc
 import sys
 from multiprocessing import Pool
 from shutil import get_terminal_size
@@ -75,11 +75,11 @@ def track_progress(func, tasks, bar_width=50, **kwargs):
     """
     if isinstance(tasks, tuple):
         assert len(tasks) == 2
-        assert isinstance(tasks[0], collections.Iterable)
+        assert isinstance(tasks[0], collections.abc.Iterable)
         assert isinstance(tasks[1], int)
         task_num = tasks[1]
         tasks = tasks[0]
-    elif isinstance(tasks, collections.Iterable):
+    elif isinstance(tasks, collections.abc.Iterable):
         task_num = len(tasks)
     else:
         raise TypeError(
@@ -140,11 +140,11 @@ def track_parallel_progress(func,
     """
     if isinstance(tasks, tuple):
         assert len(tasks) == 2
-        assert isinstance(tasks[0], collections.Iterable)
+        assert isinstance(tasks[0], collections.abc.Iterable)
         assert isinstance(tasks[1], int)
         task_num = tasks[1]
         tasks = tasks[0]
-    elif isinstance(tasks, collections.Iterable):
+    elif isinstance(tasks, collections.abc.Iterable):
         task_num = len(tasks)
     else:
         raise TypeError(
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+# Author: Donny You(youansheng@gmail.com)
+# Named stage timers of the train & test steps.
+
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+import torch
+
+from utils.helpers.dist_helper import DistHelper
+from utils.tools.logger import Logger as Log
+
+
+class _NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _StageTimer(object):
+    __slots__ = ('name', 'start_time')
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        if StepProfiler.sync_cuda:
+            torch.cuda.synchronize()
+
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        if StepProfiler.sync_cuda:
+            torch.cuda.synchronize()
+
+        StepProfiler.record(self.name, time.perf_counter() - self.start_time)
+        return False
+
+
+class StepProfiler(object):
+    """
+    Args:
+      enable: Whether to time the stages, the timers are no-ops otherwise.
+      sync_cuda: Synchronize cuda around every stage, so the kernels are charged to their own stage.
+      prof_file: The json lines file of the stage times, one line per display_iter.
+      trace_iters: [start, end], trace the iters of the window with torch.profiler.
+
+    Usage:
+      with StepProfiler.timer('forward'):
+          outputs = net(inputs)
+    """
+    enable = False
+    sync_cuda = False
+    prof_file = None
+    trace_iters = None
+    trace_dir = None
+    stage_dict = OrderedDict()
+    _null_timer = _NullTimer()
+    _torch_profiler = None
+
+    @staticmethod
+    def init(configer):
+        # Only rank 0 times the stages & writes the file under the distributed mode.
+        StepProfiler.enable = configer.exists('profiler', 'enable') and bool(configer.get('profiler', 'enable')) \
+            and DistHelper.is_main()
+        StepProfiler.sync_cuda = StepProfiler.enable and configer.get('gpu') is not None \
+            and configer.exists('profiler', 'sync_cuda') and bool(configer.get('profiler', 'sync_cuda'))
+        StepProfiler.reset()
+        if not StepProfiler.enable:
+            return
+
+        log_file = configer.get('logging', 'log_file') if configer.exists('logging', 'log_file') else None
+        log_file = './default.log' if log_file is None else log_file
+        StepProfiler.prof_file = '{}.prof.jsonl'.format(os.path.splitext(log_file)[0])
+        StepProfiler.trace_dir = os.path.dirname(os.path.abspath(log_file))
+        if configer.exists('profiler', 'trace_iters') and configer.get('profiler', 'trace_iters') is not None:
+            StepProfiler.trace_iters = configer.get('profiler', 'trace_iters')
+
+    @staticmethod
+    def timer(name):
+        if not StepProfiler.enable:
+            return StepProfiler._null_timer
+
+        return _StageTimer(name)
+
+    @staticmethod
+    def record(name, seconds):
+        if not StepProfiler.enable:
+            return
+
+        if name not in StepProfiler.stage_dict:
+            StepProfiler.stage_dict[name] = [0.0, 0]
+
+        stage = StepProfiler.stage_dict[name]
+        stage[0] += seconds
+        stage[1] += 1
+
+    @staticmethod
+    def step(iters):
+        """Open & close the torch.profiler trace window, called at the start of every iter."""
+        if not StepProfiler.enable or StepProfiler.trace_iters is None:
+            return
+
+        start_iter, end_iter = StepProfiler.trace_iters
+        if iters == start_iter and StepProfiler._torch_profiler is None:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+            StepProfiler._torch_profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+            StepProfiler._torch_profiler.__enter__()
+            Log.info('Start tracing iters [{}, {}).'.format(start_iter, end_iter))
+
+        elif iters == end_iter and StepProfiler._torch_profiler is not None:
+            StepProfiler._torch_profiler.__exit__(None, None, None)
+            trace_file = os.path.join(StepProfiler.trace_dir, 'trace_iters{}-{}.json'.format(start_iter, end_iter))
+            StepProfiler._torch_profiler.export_chrome_trace(trace_file)
+            StepProfiler._torch_profiler = None
+            Log.info('Save the trace into {}.'.format(trace_file))
+
+    @staticmethod
+    def reset():
+        StepProfiler.stage_dict = OrderedDict()
+
+    @staticmethod
+    def summary():
+        """The total & avg seconds and the calls of every stage since the last reset."""
+        stage_dict = OrderedDict()
+        for name, (total_time, calls) in StepProfiler.stage_dict.items():
+            stage_dict[name] = dict(total=total_time, calls=calls, avg=total_time / calls)
+
+        return stage_dict
+
+    @staticmethod
+    def dump(iters, phase='train'):
+        """Log & append the stage times since the last dump as one json line, then reset them."""
+        if not StepProfiler.enable or len(StepProfiler.stage_dict) == 0:
+            return
+
+        stage_dict = StepProfiler.summary()
+        Log.info('Stage Time(ms): {}'.format(
+            '\t'.join(['{} {:.2f}'.format(name, value['avg'] * 1000.0) for name, value in stage_dict.items()])))
+        with open(StepProfiler.prof_file, 'a') as prof_stream:
+            prof_stream.write(json.dumps(dict(phase=phase, iters=iters, stages=stage_dict)) + '\n')
+
+        StepProfiler.reset()
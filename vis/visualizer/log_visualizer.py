@@ -12,11 +12,27 @@ import re
 import numpy as np
 import matplotlib.pyplot as plt
 
+from utils.tools.metric_writer import MetricWriter
+
 
 class LogVisualizer(object):
 
 
+    def vis_scalar(self, metric_file, name, phase_list=('train', 'val')):
+        """Plot one scalar of the *.metrics.jsonl file written by the runners."""
+        phase_dict = MetricWriter.load(metric_file)
+        for phase in phase_list:
+            if name in phase_dict.get(phase, dict()):
+                iters_array, value_array = phase_dict[phase][name]
+                plt.plot(iters_array, value_array, label='{} {}'.format(phase.capitalize(), name))
+
+        plt.legend()
+        plt.show()
+
     def vis_loss(self, log_file):
+        if log_file.endswith('.jsonl'):
+            self.vis_scalar(log_file, 'loss')
+            return
 
         with open(log_file, 'r') as file_stream:
             train_ax = list()
@@ -56,6 +72,10 @@ class LogVisualizer(object):
         plt.show()
 
     def vis_acc(self, log_file):
+        if log_file.endswith('.jsonl'):
+            self.vis_scalar(log_file, 'top1_acc', phase_list=('val',))
+            return
+
         with open(log_file, 'r') as file_stream:
             acc_ax = list()
             acc_ay = list()